@@ -0,0 +1,144 @@
+# ============================================
+# KingTG UserBot Service - Eşzamanlı Aktivasyon Stres Testi
+# ============================================
+# CLIENTS sahte client için 7 plugin'i AYNI ANDA aktive eder ve her
+# handler'ın doğru client'a bağlandığını doğrular:
+#   - client'taki ve yönlendiricideki her callback'in modülü ya bu
+#     kullanıcının modülü (plugin_<ad>_<uid>) ya da paylaşımlı modüldür
+#   - "probe" eski stil plugin'i exec sırasında get_client() okur ve bir
+#     görev açar; görev bir sonraki döngü turunda @register çağırır
+#     (global `_client` ile bu handler son aktive edilen client'a düşerdi)
+# Telegram'a BAĞLANMAZ.
+#
+#   python benchmarks/bench_activation.py [client]
+# ============================================
+
+import os
+import sys
+import time
+import shutil
+import asyncio
+import inspect
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+_tmp = tempfile.mkdtemp(prefix="kingtg-bench-")
+config.USERS_FILE = os.path.join(_tmp, "users.json")
+config.SETTINGS_FILE = os.path.join(_tmp, "settings.json")
+config.PLUGINS_FILE = os.path.join(_tmp, "plugins.json")
+config.BANS_FILE = os.path.join(_tmp, "bans.json")
+config.SUDOS_FILE = os.path.join(_tmp, "sudos.json")
+config.PLUGIN_CACHE_DIR = os.path.join(_tmp, "plugin_cache")
+
+_plugins_src = config.PLUGINS_DIR
+config.PLUGINS_DIR = os.path.join(_tmp, "plugins")
+os.makedirs(config.PLUGINS_DIR)
+
+from telethon import TelegramClient
+from telethon.sessions import StringSession
+
+from database import database as db
+from userbot.plugins import plugin_manager
+from userbot.router import get_router
+
+CLIENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+REAL = ["example", "efekt", "burc", "afk", "tag", "raw"]
+
+_PROBE = '''
+import asyncio
+from userbot.events import register, get_client
+
+BOUND = get_client()
+
+@register(outgoing=True, pattern=r"^\\.probe$")
+async def probe(event):
+    pass
+
+async def _late():
+    await asyncio.sleep(0)
+
+    @register(incoming=True, pattern=r"^probe-late$")
+    async def probe_late(event):
+        pass
+
+asyncio.get_running_loop().create_task(_late())
+'''
+
+
+def _owner(callback):
+    """Callback'in tanımlandığı plugin modülünün adı"""
+    func = inspect.unwrap(callback)
+    return getattr(func, "__globals__", {}).get("__name__") or getattr(func, "__module__", "")
+
+
+def _check(clients) -> int:
+    """Yanlış client'a bağlanan handler sayısı"""
+    shared = {s.module.__name__ for s in plugin_manager._shared_modules.values()}
+    wrong = 0
+    for uid, client in clients.items():
+        router = get_router(client, create=False)
+        handlers = list(client.list_event_handlers())
+        for name in router._by_plugin if router else ():
+            handlers += router.plugin_handlers(name)
+        for callback, _builder in handlers:
+            if getattr(callback, "__self__", None) is router:
+                continue
+            owner = _owner(callback)
+            if owner not in shared and not owner.endswith(f"_{uid}"):
+                wrong += 1
+        module = plugin_manager.user_active_plugins[uid]["probe"]
+        if module.BOUND is not client:
+            wrong += 1
+        late = [cb for cb, _b in plugin_manager.user_handlers[uid]["probe"]
+                if getattr(cb, "__name__", "") == "probe_late"]
+        if len(late) != 1 or not any(cb is late[0] for cb, _b in client.list_event_handlers()):
+            wrong += 1
+    return wrong
+
+
+async def _round(base: int):
+    clients = {}
+    for uid in range(base, base + CLIENTS):
+        await db.add_user(uid)
+        clients[uid] = TelegramClient(StringSession(), 1, "x")
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        plugin_manager.activate_plugin(uid, name, client)
+        for uid, client in clients.items()
+        for name in REAL + ["probe"]))
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(0.05)  # probe'un geç kayıt görevleri
+
+    failed = [msg for ok, msg in results if not ok]
+    assert not failed, failed[:3]
+    wrong = _check(clients)
+    for uid in clients:
+        await plugin_manager.unload_user_plugins(uid)
+    return elapsed, wrong
+
+
+async def main():
+    for name in REAL:
+        shutil.copy(os.path.join(_plugins_src, f"{name}.py"), config.PLUGINS_DIR)
+        await db.add_plugin(name, f"{name}.py")
+    with open(os.path.join(config.PLUGINS_DIR, "probe.py"), "w", encoding="utf-8") as f:
+        f.write(_PROBE)
+    await db.add_plugin("probe", "probe.py")
+
+    # Derleme önbelleğini ısıt
+    await _round(10_000_000)
+
+    elapsed, wrong = await _round(20_000_000)
+    total = CLIENTS * (len(REAL) + 1)
+    print(f"{CLIENTS} client × {len(REAL) + 1} plugin ({total} aktivasyon, eşzamanlı)")
+    print(f"  süre           : {elapsed * 1000:8.1f} ms  ({elapsed / total * 1e6:.0f} µs / aktivasyon)")
+    print(f"  yanlış bağlanan: {wrong}")
+    assert wrong == 0, "handler yanlış client'a bağlandı"
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
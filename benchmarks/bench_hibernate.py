@@ -0,0 +1,102 @@
+# ============================================
+# KingTG UserBot Service - Hibernasyon Bellek Ölçümü
+# ============================================
+# Komut plugin'li boştaki kullanıcı başına yerleşik belleği ölçer:
+#   tam   → TelegramClient + yüklü plugin modülleri/handler'lar
+#   uyku  → yalnızca uyandırma client'ı (entity_cache_limit=100, tek handler)
+# Telegram'a BAĞLANMAZ; ağ kaynaklı tamponlar (bağlantı, varlık önbelleği)
+# ölçüme girmez, yani gerçek kazanç bu sayıdan büyüktür.
+#
+#   python benchmarks/bench_hibernate.py [kullanıcı] [plugin,plugin,...]
+# ============================================
+
+import os
+import sys
+import gc
+import asyncio
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+_tmp = tempfile.mkdtemp(prefix="kingtg-bench-")
+config.USERS_FILE = os.path.join(_tmp, "users.json")
+config.SETTINGS_FILE = os.path.join(_tmp, "settings.json")
+config.PLUGINS_FILE = os.path.join(_tmp, "plugins.json")
+config.BANS_FILE = os.path.join(_tmp, "bans.json")
+config.SUDOS_FILE = os.path.join(_tmp, "sudos.json")
+
+from telethon import TelegramClient, events
+from telethon.sessions import StringSession
+
+from database import database as db
+from userbot.plugins import plugin_manager
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+PLUGINS = sys.argv[2].split(",") if len(sys.argv) > 2 else ["burc", "tag", "example", "raw"]
+
+
+async def _measure(build):
+    """build() sonrası tracemalloc farkı (bayt); nesneler ölçüm bitene dek tutulur"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    keep = await build()
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(s.size_diff for s in after.compare_to(before, "filename"))
+    return keep, size
+
+
+async def main():
+    for name in PLUGINS:
+        await db.add_plugin(name, f"{name}.py")
+    for uid in range(USERS):
+        await db.add_user(uid)
+
+    # Derleme önbelleğini ısıt (ölçüme tek seferlik derleme girmesin)
+    warm = TelegramClient(StringSession(), 1, "x")
+    for name in PLUGINS:
+        await plugin_manager.activate_plugin(-1, name, warm)
+    await plugin_manager.unload_user_plugins(-1)
+
+    async def build_full():
+        clients = []
+        for uid in range(USERS):
+            client = TelegramClient(StringSession(), 1, "x")
+            for name in PLUGINS:
+                await plugin_manager.activate_plugin(uid, name, client)
+            clients.append(client)
+        return clients
+
+    async def build_wake():
+        clients = []
+        for _ in range(USERS):
+            client = TelegramClient(StringSession(), 1, "x", entity_cache_limit=100)
+
+            async def on_command(event):
+                pass
+
+            client.add_event_handler(on_command, events.NewMessage(outgoing=True, pattern=r"^\."))
+            clients.append(client)
+        return clients
+
+    full, full_size = await _measure(build_full)
+    for uid in range(USERS):
+        await plugin_manager.unload_user_plugins(uid)
+    del full
+
+    _, wake_size = await _measure(build_wake)
+
+    print(f"{USERS} kullanıcı × {len(PLUGINS)} plugin ({', '.join(PLUGINS)})")
+    print(f"  tam   : {full_size / USERS / 1024:8.1f} KiB / kullanıcı")
+    print(f"  uyku  : {wake_size / USERS / 1024:8.1f} KiB / kullanıcı")
+    if full_size:
+        print(f"  kazanç: %{(1 - wake_size / full_size) * 100:.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
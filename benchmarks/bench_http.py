@@ -0,0 +1,140 @@
+# ============================================
+# KingTG UserBot Service - Paylaşılan HTTP İstemcisi
+# ============================================
+# Yerel HTTPS sunucusuna (openssl ile üretilen geçici sertifika) istekler:
+#   yeni oturum  → her istekte aiohttp.ClientSession (eski plugin kodu)
+#   paylaşılan   → utils.http_client (keep-alive, DNS önbelleği)
+# önce sıralı, sonra CONCURRENT eşzamanlı. Ardından doğrulanır:
+#   - 2 kez 503 dönen uç, yeniden denemeyle 3. istekte başarılı
+#   - POST varsayılan olarak yeniden denenmez
+#   - sınırı aşan yanıt ResponseTooLarge
+#   - host başına metrikler ve Prometheus metni
+# Telegram'a BAĞLANMAZ. openssl yoksa düz HTTP kullanılır.
+#
+#   python benchmarks/bench_http.py [istek] [eşzamanlı]
+# ============================================
+
+import os
+import sys
+import ssl
+import time
+import shutil
+import asyncio
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+from aiohttp import web
+
+from utils.http_client import HttpClient, ResponseTooLarge
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+CONCURRENT = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+_flaky = {"count": 0}
+
+
+def _tls_context():
+    """Geçici öz imzalı sertifika (openssl yoksa None → düz HTTP)"""
+    if not shutil.which("openssl"):
+        return None
+    tmp = tempfile.mkdtemp(prefix="kingtg-bench-")
+    cert, key = os.path.join(tmp, "cert.pem"), os.path.join(tmp, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-subj", "/CN=127.0.0.1", "-keyout", key, "-out", cert],
+                   check=True, capture_output=True)
+    ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    ctx.load_cert_chain(cert, key)
+    return ctx
+
+
+async def _ok(request):
+    return web.json_response({"ok": True, "burc": "koç"})
+
+
+async def _flaky_handler(request):
+    _flaky["count"] += 1
+    if _flaky["count"] % 3:
+        return web.Response(status=503)
+    return web.json_response({"ok": True})
+
+
+async def _big(request):
+    return web.Response(body=b"x" * 2_000_000)
+
+
+async def _timed(make, count):
+    started = time.perf_counter()
+    await make(count)
+    return (time.perf_counter() - started) * 1000
+
+
+async def main():
+    tls = _tls_context()
+    app = web.Application()
+    app.router.add_get("/ok", _ok)
+    app.router.add_route("*", "/flaky", _flaky_handler)
+    app.router.add_get("/big", _big)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=tls)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base = f"{'https' if tls else 'http'}://127.0.0.1:{port}"
+    verify = False if tls else None
+
+    client = HttpClient(limit_per_host=CONCURRENT, retries=2, backoff=0.01)
+
+    async def fresh(n):
+        for _ in range(n):
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{base}/ok", ssl=verify) as resp:
+                    await resp.json()
+
+    async def shared(n):
+        for _ in range(n):
+            (await client.get(f"{base}/ok", ssl=verify)).json()
+
+    async def fresh_parallel(n):
+        async def one():
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{base}/ok", ssl=verify) as resp:
+                    await resp.json()
+        await asyncio.gather(*(one() for _ in range(n)))
+
+    async def shared_parallel(n):
+        await asyncio.gather(*(client.get(f"{base}/ok", ssl=verify) for _ in range(n)))
+
+    await shared(1)  # havuzu ısıt (ilk el sıkışma)
+    print(f"yerel {'HTTPS' if tls else 'HTTP'} sunucu, {REQUESTS} sıralı / {CONCURRENT} eşzamanlı istek")
+    for label, make, n in (("sıralı, yeni oturum", fresh, REQUESTS),
+                           ("sıralı, paylaşılan", shared, REQUESTS),
+                           ("eşzamanlı, yeni oturum", fresh_parallel, CONCURRENT),
+                           ("eşzamanlı, paylaşılan", shared_parallel, CONCURRENT)):
+        ms = await _timed(make, n)
+        print(f"  {label:24s}: {ms:7.1f} ms  ({ms / n:.2f} ms/istek)")
+
+    resp = await client.get(f"{base}/flaky", ssl=verify)
+    assert resp.status == 200 and _flaky["count"] == 3, (resp.status, _flaky)
+    _flaky["count"] = 0
+    resp = await client.post(f"{base}/flaky", ssl=verify)
+    assert resp.status == 503 and _flaky["count"] == 1, "POST varsayılan olarak tekrarlanmamalı"
+    try:
+        await client.get(f"{base}/big", ssl=verify, max_bytes=1_000_000)
+        raise AssertionError("boyut sınırı çalışmadı")
+    except ResponseTooLarge:
+        pass
+    row = client.stats()[0]
+    assert row["host"] == "127.0.0.1" and row["retries"] == 2, row
+    assert 'kingtg_http_requests_total{host="127.0.0.1"}' in client.prometheus()
+    print(f"  doğrulama: tamam (503→200 2 yeniden denemeyle, POST tekrarlanmadı, boyut sınırı; "
+          f"{row['requests']} istek, p50 {row['p50_ms']:.2f} ms, p99 {row['p99_ms']:.2f} ms)")
+
+    await client.close()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,183 @@
+# ============================================
+# KingTG UserBot Service - Çeviri Önbelleği Yazma Fırtınası
+# ============================================
+# Soğuk kullanıcı dalgası: LANGS dilde STRINGS yeni metin eşzamanlı
+# translate() ile çevrilir (backend sahte, anında döner). Gerçek dil
+# dosyaları (data/lang) geçici dizine kopyalanır.
+#   eski → her ıskada dilin TÜM json dosyası global kilit altında yeniden yazılır
+#   yeni → ıska logun sonuna tek satır eklenir, log eşiği aşınca sıkıştırılır
+#   yalnız bellek → diske hiç yazmadan (gather/executor taban maliyeti)
+# Toplam süre, diske yazılan bayt ve olay döngüsünün en uzun tıkanması
+# raporlanır. Sonra sıcak okuma yolu (kilitli / kilitsiz) ölçülür ve yeniden
+# yükleme (yarım kalmış son log satırı dahil) doğrulanır.
+# Telegram'a BAĞLANMAZ.
+#
+#   python benchmarks/bench_i18n.py [metin] [dil]
+# ============================================
+
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+_src_lang = os.path.join(config.DATA_DIR, "lang")
+config.DATA_DIR = tempfile.mkdtemp(prefix="kingtg-bench-")
+
+from utils import i18n
+
+STRINGS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+LANGS = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+READS = 500_000
+
+_written = {"bytes": 0}
+
+
+def _fake_translate(text, lang):
+    return f"<{lang}> {text}"
+
+
+def _word(n):
+    # Rakamlar maskelenir: her metin harflerle benzersiz olsun
+    out = ""
+    while True:
+        n, r = divmod(n, 26)
+        out += chr(97 + r)
+        if not n:
+            return out
+
+
+def _legacy_put(lang, masked, translated):
+    # Eski davranış: _cache_put + save_lang → tam dosya, RLock altında
+    with i18n._lock:
+        i18n._ensure_lang(lang)[masked] = translated
+        i18n._dirty.add(lang)
+        path = i18n._lang_path(lang)
+        i18n._save_json(path, i18n._cache[lang])
+        i18n._dirty.discard(lang)
+        _written["bytes"] += os.path.getsize(path)
+
+
+def _memory_put(lang, masked, translated):
+    i18n._ensure_lang(lang)[masked] = translated
+
+
+def _counting(put, save_json):
+    """Yeni yolun diske yazdığı baytlar: log satırları + sıkıştırma dosyaları"""
+    def counted_put(lang, masked, translated):
+        _written["bytes"] += len(json.dumps([masked, translated], ensure_ascii=False).encode()) + 1
+        put(lang, masked, translated)
+
+    def counted_save(path, data):
+        save_json(path, data)
+        _written["bytes"] += os.path.getsize(path)
+    return counted_put, counted_save
+
+
+def _reset(langs):
+    """Önbelleği boşalt, dil dosyalarını orijinal haline getir"""
+    for f in i18n._logs.values():
+        f.close()
+    i18n._logs.clear()
+    i18n._cache.clear()
+    i18n._dirty.clear()
+    i18n._log_entries.clear()
+    shutil.rmtree(i18n.LANG_DIR, ignore_errors=True)
+    os.makedirs(i18n.LANG_DIR)
+    for lang in langs:
+        src = os.path.join(_src_lang, f"{lang}.json")
+        if os.path.exists(src):
+            shutil.copy(src, i18n.LANG_DIR)
+
+
+async def _wave(langs):
+    worst, done = 0.0, False
+
+    async def ticker():
+        nonlocal worst
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            worst = max(worst, now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(i18n.translate(f"Yeni metin {_word(n)} için açıklama", lang)
+                           for n in range(STRINGS) for lang in langs))
+    elapsed = time.perf_counter() - started
+    done = True
+    await tick
+    return elapsed, worst
+
+
+async def main():
+    langs = [code for code in i18n.DEFAULT_LANGS if code != i18n.SOURCE_LANG][:LANGS]
+    i18n._translate_one_sync = _fake_translate
+    i18n._translate_batch_sync = lambda texts, lang: [_fake_translate(t, lang) for t in texts]
+    seed = sum(os.path.getsize(os.path.join(_src_lang, f"{l}.json"))
+               for l in langs if os.path.exists(os.path.join(_src_lang, f"{l}.json")))
+    print(f"{len(langs)} dil × {STRINGS} yeni metin (mevcut dil dosyaları {seed // 1024} KB)")
+
+    new_put, save_json = i18n._cache_put, i18n._save_json
+    counted_put, counted_save = _counting(new_put, save_json)
+    for label, put in (("eski", _legacy_put), ("yeni", counted_put), ("yalnız bellek", _memory_put)):
+        _reset(langs)
+        for lang in langs:
+            i18n._ensure_lang(lang)
+        _written["bytes"] = 0
+        i18n._cache_put = put
+        i18n._save_json = counted_save
+        elapsed, worst = await _wave(langs)
+        await asyncio.sleep(0.2)  # arka plan sıkıştırmaları bitsin
+        print(f"  {label:13s}: {elapsed * 1000:7.0f} ms, diske {_written['bytes'] / 1048576:6.2f} MB, "
+              f"döngü en uzun tıkanma {worst * 1000:6.1f} ms")
+    i18n._cache_put, i18n._save_json = new_put, save_json
+    _reset(langs)
+    await _wave(langs)
+
+    # Sıcak okuma: eskiden her _cache_get RLock alıyordu
+    lang = langs[0]
+    key = next(iter(i18n._cache[lang]))
+
+    def locked_get(l, m):
+        with i18n._lock:
+            return i18n._ensure_lang(l).get(m)
+
+    for label, get in (("kilitli", locked_get), ("kilitsiz", i18n._cache_get)):
+        started = time.perf_counter()
+        for _ in range(READS):
+            get(lang, key)
+        print(f"  okuma ({label:8s}): {(time.perf_counter() - started) / READS * 1e9:5.0f} ns")
+
+    # Yeniden yükleme: bellek boş, log + anlık görüntü diskte; son satır yarım
+    expected = {l: dict(i18n._cache[l]) for l in langs}
+    i18n._cache_put(lang, "son metin", "<x> last")
+    expected[lang]["son metin"] = "<x> last"
+    with open(i18n._log_path(lang), "a", encoding="utf-8") as f:
+        f.write('["yarım kalan sat')
+    for f in i18n._logs.values():
+        f.close()
+    i18n._logs.clear()
+    i18n._cache.clear()
+    i18n._dirty.clear()
+    for l in langs:
+        assert i18n._ensure_lang(l) == expected[l], f"{l}: yeniden yükleme farklı"
+    logs = sum(1 for n in os.listdir(i18n.LANG_DIR) if n.endswith(".log"))
+    i18n.flush_cache()
+    left = sum(os.path.getsize(p) for p in (i18n._log_path(l) for l in langs) if os.path.exists(p))
+    with open(i18n._lang_path(lang), encoding="utf-8") as f:
+        assert json.load(f)["son metin"] == "<x> last"
+    print(f"  doğrulama: tamam ({logs} log + anlık görüntü → aynı içerik, yarım satır atlandı, "
+          f"flush sonrası log {left} B)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
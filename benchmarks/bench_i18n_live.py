@@ -0,0 +1,178 @@
+# ============================================
+# KingTG UserBot Service - Canlı Çeviri Zamanlayıcısı
+# ============================================
+# Aynı dili seçmiş USERS kullanıcı aynı anda PANEL metinlik (önbellekte
+# olmayan) paneli açar. Sahte backend her metin için LATENCY ms bekler
+# (Google web isteği gibi, iş parçacığında).
+#   eski → her çağıran her metin için ayrı run_in_executor(None, ...)
+#   yeni → i18n.translate: uçuştaki istek paylaşılır, ıskalar pencerede
+#          birleşir, ayrı sınırlı havuzda çalışır
+# Toplam süre, backend çağrısı/metin sayısı ve dalga sırasında varsayılan
+# executor'a verilen küçük bir işin en uzun bekleme süresi raporlanır.
+# Ardından doğrulanır:
+#   - iptal edilen çağıran paylaşılan isteği diğerleri için bozmaz
+#   - backend düşünce devre açılır, soğumadan sonra tek deneme geçer ve kapanır
+# Telegram'a BAĞLANMAZ.
+#
+#   python benchmarks/bench_i18n_live.py [kullanıcı] [metin] [gecikme ms]
+# ============================================
+
+import os
+import sys
+import time
+import shutil
+import asyncio
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+config.DATA_DIR = tempfile.mkdtemp(prefix="kingtg-bench-")
+
+from utils import i18n
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+PANEL = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+LATENCY = (float(sys.argv[3]) if len(sys.argv) > 3 else 20) / 1000
+LANG = "en"
+
+_calls = {"calls": 0, "texts": 0}
+_count_lock = threading.Lock()
+_backend = {"up": True}
+
+
+def _fake_text(text, lang):
+    time.sleep(LATENCY)
+    if not _backend["up"]:
+        raise ConnectionError("backend yok")
+    return f"<{lang}> {text}"
+
+
+def _fake_one(text, lang):
+    with _count_lock:
+        _calls["calls"] += 1
+        _calls["texts"] += 1
+    try:
+        out = _fake_text(text, lang)
+    except Exception:
+        i18n._mark_backend_down()
+        return None
+    i18n._mark_backend_up()
+    return out
+
+
+def _fake_batch(texts, lang):
+    # deep-translator'ın translate_batch'i gibi: metinleri sırayla çevirir
+    with _count_lock:
+        _calls["calls"] += 1
+        _calls["texts"] += len(texts)
+    try:
+        out = [_fake_text(t, lang) for t in texts]
+    except Exception:
+        i18n._mark_backend_down()
+        return None
+    i18n._mark_backend_up()
+    return out
+
+
+async def _legacy_translate(text, lang):
+    # Eski translate: çağıran başına varsayılan executor'da tek çağrı
+    masked, tokens = i18n._mask(text)
+    hit = i18n._cache_get(lang, masked)
+    if hit is not None:
+        return i18n._unmask(hit, tokens)
+    loop = asyncio.get_running_loop()
+    translated = await loop.run_in_executor(None, i18n._translate_one_sync, masked, lang)
+    if not translated or translated == masked:
+        return text
+    i18n._cache_put(lang, masked, translated)
+    return i18n._unmask(translated, tokens)
+
+
+def _panel(n):
+    return [f"Panel satırı {chr(97 + n % 26)}{chr(97 + n // 26 % 26)} ayarları"
+            for n in range(n)]
+
+
+def _reset():
+    for f in i18n._logs.values():
+        f.close()
+    i18n._logs.clear()
+    i18n._cache.clear()
+    i18n._dirty.clear()
+    i18n._log_entries.clear()
+    shutil.rmtree(i18n.LANG_DIR, ignore_errors=True)
+    os.makedirs(i18n.LANG_DIR)
+    _calls.update(calls=0, texts=0)
+
+
+async def _wave(translate):
+    texts = _panel(PANEL)
+    worst, done = 0.0, False
+
+    async def probe():
+        # Varsayılan executor'a (diğer modüllerin kullandığı) küçük iş
+        nonlocal worst
+        loop = asyncio.get_running_loop()
+        while not done:
+            started = time.perf_counter()
+            await loop.run_in_executor(None, int)
+            worst = max(worst, time.perf_counter() - started)
+            await asyncio.sleep(0.002)
+
+    async def user():
+        return [await translate(t, LANG) for t in texts]
+
+    tick = asyncio.create_task(probe())
+    started = time.perf_counter()
+    results = await asyncio.gather(*(user() for _ in range(USERS)))
+    elapsed = time.perf_counter() - started
+    done = True
+    await tick
+    assert all(r == results[0] for r in results) and results[0][0].startswith(f"<{LANG}>")
+    return elapsed, worst
+
+
+async def main():
+    i18n._translate_one_sync = _fake_one
+    i18n._translate_batch_sync = _fake_batch
+    print(f"{USERS} kullanıcı × {PANEL} yeni metin, backend {LATENCY * 1000:.0f} ms/metin, "
+          f"havuz {i18n._WORKERS}, pencere {i18n._BATCH_WINDOW * 1000:.0f} ms")
+    for label, translate in (("eski", _legacy_translate), ("yeni", i18n.translate)):
+        _reset()
+        elapsed, worst = await _wave(translate)
+        print(f"  {label}: {elapsed * 1000:7.0f} ms, backend {_calls['calls']:5d} çağrı / "
+              f"{_calls['texts']:5d} metin, varsayılan executor en uzun bekleme {worst * 1000:6.1f} ms")
+
+    # İptal: ilk çağıran vazgeçse de ikincisi sonucu alır
+    _reset()
+    first = asyncio.create_task(i18n.translate("İptal edilen metin", LANG))
+    second = asyncio.create_task(i18n.translate("İptal edilen metin", LANG))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert (await second).startswith(f"<{LANG}>") and _calls["calls"] == 1, _calls
+
+    # Devre kesici: 5 hata → açık, çağrı yapılmaz; soğuma → tek deneme → kapalı
+    _reset()
+    i18n._BREAKER_COOLDOWN = 0.2
+    _backend["up"] = False
+    for n in range(i18n._BREAKER_FAILURES * 4):
+        assert await i18n.translate(f"Düşük backend {chr(97 + n)}", LANG) == f"Düşük backend {chr(97 + n)}"
+    opened = _calls["calls"]
+    assert opened == i18n._BREAKER_FAILURES and i18n._breaker_open(), _calls
+    await asyncio.sleep(0.25)
+    await asyncio.gather(*(i18n.translate(f"Deneme {chr(97 + n)}", LANG) for n in range(5)))
+    assert _calls["calls"] == opened + 1 and i18n._breaker_open(), "yarı açıkta tek deneme geçmeli"
+    await asyncio.sleep(0.25)
+    _backend["up"] = True
+    assert (await i18n.translate("Geri gelen backend", LANG)).startswith(f"<{LANG}>")
+    assert not i18n._breaker_open() and i18n._failures == 0
+    print(f"  doğrulama: tamam (iptal paylaşılan isteği bozmadı; {i18n._BREAKER_FAILURES * 4} ıskada "
+          f"{opened} çağrı sonra devre açık, yarı açıkta 1 deneme, backend dönünce kapandı)")
+    i18n.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
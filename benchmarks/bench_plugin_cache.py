@@ -0,0 +1,88 @@
+# ============================================
+# KingTG UserBot Service - Plugin Önbelleği Açılış Ölçümü
+# ============================================
+# Açılışta plugin başına yapılan iş (bağımlılık taraması, bilgi çıkarımı,
+# yamalama + derleme) üç durumda ölçülür:
+#   önbelleksiz → eski akış (oku, yamala, her aşamada ast.parse, compile)
+#   soğuk       → disk önbelleği boş (kayıtlar üretilip yazılır)
+#   sıcak       → yeni süreç gibi (bellek boş), kayıtlar diskten okunur
+#
+#   python benchmarks/bench_plugin_cache.py [tekrar]
+# ============================================
+
+import os
+import sys
+import ast
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+_tmp = tempfile.mkdtemp(prefix="kingtg-bench-")
+config.USERS_FILE = os.path.join(_tmp, "users.json")
+config.SETTINGS_FILE = os.path.join(_tmp, "settings.json")
+config.PLUGINS_FILE = os.path.join(_tmp, "plugins.json")
+config.BANS_FILE = os.path.join(_tmp, "bans.json")
+config.SUDOS_FILE = os.path.join(_tmp, "sudos.json")
+config.PLUGIN_CACHE_DIR = os.path.join(_tmp, "plugin_cache")
+
+from userbot.plugins import PluginManager, _collect_imports, _plugin_info_from_source
+
+ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+FILES = sorted(os.path.join(config.PLUGINS_DIR, f) for f in os.listdir(config.PLUGINS_DIR)
+               if f.endswith(".py"))
+
+
+def _startup_uncached(pm):
+    """Önbellek öncesi açılış işi (preinstall + extract_plugin_info + derleme)"""
+    for path in FILES:
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
+        _collect_imports(ast.parse(content))              # preinstall_all_dependencies
+        _plugin_info_from_source(content)                  # extract_plugin_info
+        patched = pm._patch_plugin_content(content)        # _get_compiled_plugin
+        compile(patched, path, "exec")
+        _collect_imports(ast.parse(patched))               # check_and_install_imports
+
+
+def _startup_cached(pm):
+    for path in FILES:
+        entry = pm._load_entry(path)
+        pm.extract_plugin_info(path)
+        pm._get_compiled_plugin(path)
+        pm._cached_imports(path)
+        assert entry is not None
+
+
+def _time(fn, fresh_disk):
+    best = None
+    for _ in range(ROUNDS):
+        if fresh_disk:
+            shutil.rmtree(config.PLUGIN_CACHE_DIR, ignore_errors=True)
+        pm = PluginManager()
+        started = time.perf_counter()
+        fn(pm)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    uncached = _time(_startup_uncached, fresh_disk=True)
+    cold = _time(_startup_cached, fresh_disk=True)
+    warm = _time(_startup_cached, fresh_disk=False)
+    size = sum(os.path.getsize(os.path.join(config.PLUGIN_CACHE_DIR, f))
+               for f in os.listdir(config.PLUGIN_CACHE_DIR))
+    print(f"{len(FILES)} plugin, en iyi {ROUNDS} tur")
+    print(f"  önbelleksiz : {uncached * 1000:7.1f} ms")
+    print(f"  soğuk       : {cold * 1000:7.1f} ms")
+    print(f"  sıcak       : {warm * 1000:7.1f} ms  ({uncached / warm:.0f}x)")
+    print(f"  disk        : {size / 1024:7.1f} KiB")
+    shutil.rmtree(_tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
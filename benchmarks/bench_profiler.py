@@ -0,0 +1,163 @@
+# ============================================
+# KingTG UserBot Service - Plugin Profilleyici Ek Yükü
+# ============================================
+# Boş bir handler CALLS kez çağrılarak profilleyicinin çağrı başına ek yükü
+# ölçülür:
+#   çıplak    → profilleyiciden önceki @register sarmalayıcısı
+#   kapalı    → @register sarmalayıcısı, PLUGIN_PROFILE=false
+#   1/N       → sayaçlar her çağrıda, süre ölçümü N çağrıda bir
+#   hepsi     → her çağrı adım adım ölçülür
+# Ek yük tek mesaj düzenleyen bir komut handler'ının (markdown + istek
+# serileştirme, ağ hariç) süresine oranla raporlanır (hedef: örneklemeyle < %1).
+# Ardından p50/p95/p99, hata ve yavaş callback sayımı doğrulanır.
+# Telegram'a BAĞLANMAZ.
+#
+#   python benchmarks/bench_profiler.py [çağrı] [örnekleme]
+# ============================================
+
+import os
+import sys
+import gc
+import time
+import types
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telethon.extensions import markdown
+from telethon.tl import functions, types as tl_types
+
+from userbot_compat import events as compat_events
+from utils.profiler import PluginProfiler
+
+CALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+SAMPLE = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+ROUNDS = 7
+
+
+class _Client:
+    _kingtg_user_id = 1
+
+
+class _Event:
+    _client = _Client()
+
+
+async def noop(event):
+    # Ek yükü ölçmek için boş handler: tek askıya alma, iş yok
+    await _yield_once()
+
+
+async def handler(event):
+    # Tek mesaj düzenleyen komut: markdown ayrıştırma + isteğin serileştirilmesi
+    # (şifreleme ve ağ hariç, yani gerçek handler'ın alt sınırı) + bir await
+    text, entities = markdown.parse("**Burç:** `Koç` — bugün __şanslısın__")
+    bytes(functions.messages.EditMessageRequest(
+        peer=tl_types.InputPeerSelf(), id=123, message=text, entities=entities))
+    await _yield_once()
+
+
+@types.coroutine
+def _yield_once():
+    # asyncio.sleep(0) gibi tek askıya alma; döngü zamanlaması ölçüme karışmasın
+    yield
+
+
+def _drive(coro):
+    """Coroutine'i döngüsüz sür: ölçüme zamanlayıcı gürültüsü karışmasın"""
+    try:
+        while True:
+            coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+
+
+def _run(profilers: dict, func=noop) -> dict:
+    """Varyantlar her turda sırayla çalışır (ısınma/frekans farkı dağılsın).
+    Ölçülen: @register sarmalayıcısı; None → profilleyicisiz eski sarmalayıcı"""
+    event = _Event()
+    bare = _bare_wrapper(func)
+    wrapped = compat_events.register(pattern=r"^\.bench$")(func)
+    best = {label: float("inf") for label in profilers}
+    for prof in profilers.values():
+        if prof is not None:
+            prof.set_resolver({__name__: "bench"}.get)
+    gc.disable()
+    for _ in range(ROUNDS):
+        for label, prof in profilers.items():
+            call = bare if prof is None else wrapped
+            compat_events.profiler = prof
+            started = time.perf_counter()
+            for _ in range(CALLS):
+                _drive(call(event))
+            best[label] = min(best[label], time.perf_counter() - started)
+    gc.enable()
+    compat_events._pending_handlers.clear()
+    return {label: elapsed / CALLS for label, elapsed in best.items()}
+
+
+def _bare_wrapper(func):
+    # Profilleyiciden önceki @register sarmalayıcısı
+    async def wrapper(event):
+        try:
+            return await func(event)
+        except Exception:
+            return None
+    return wrapper
+
+
+async def _verify():
+    prof = PluginProfiler(True, 1, slow_ms=20)
+    event = _Event()
+
+    async def fast(event):
+        await asyncio.sleep(0)
+
+    async def slow(event):
+        time.sleep(0.03)  # döngüyü bloklar
+        await asyncio.sleep(0.01)  # bloklamaz, yalnızca süreye eklenir
+
+    async def broken(event):
+        raise ValueError("x")
+
+    for _ in range(200):
+        await prof.call(fast, event, "hizli")
+    for _ in range(3):
+        await prof.call(slow, event, "yavas")
+    for _ in range(5):
+        try:
+            await prof.call(broken, event, "bozuk")
+        except ValueError:
+            pass
+    rows = {r["plugin"]: r for r in prof.top(10)}
+    assert rows["yavas"]["slow"] == 3 and rows["hizli"]["slow"] == 0
+    assert rows["yavas"]["busy_max_ms"] >= 30 and rows["hizli"]["busy_max_ms"] < 20, rows["yavas"]
+    assert rows["yavas"]["p50_ms"] >= 40, "await süresi gecikmeye dahil olmalı"
+    assert rows["bozuk"]["errors"] == 5 and rows["hizli"]["calls"] == 200
+    assert prof.top(1)[0]["plugin"] == "yavas"
+    text = prof.prometheus()
+    assert 'kingtg_plugin_calls_total{plugin="hizli",user="1"} 200' in text
+    assert 'quantile="0.99"' in text
+    print(f"  doğrulama: tamam (yavaş p50 {rows['yavas']['p50_ms']:.1f} ms, "
+          f"en uzun adım {rows['yavas']['busy_max_ms']:.1f} ms, hata {rows['bozuk']['errors']})")
+
+
+async def main():
+    results = _run({
+        "çıplak": None,
+        "kapalı": PluginProfiler(False),
+        f"1/{SAMPLE}": PluginProfiler(True, SAMPLE),
+        "hepsi": PluginProfiler(True, 1),
+    })
+    typical = _run({"handler": None}, handler)["handler"]
+    bare = results.pop("çıplak")
+    print(f"{CALLS} çağrı × {ROUNDS} tur (en iyi tur), boş handler {bare * 1e9:.0f} ns, "
+          f"tipik handler {typical * 1e6:.1f} µs")
+    for label, per in results.items():
+        extra = per - bare
+        print(f"  {label:8s}: +{extra * 1e9:5.0f} ns / çağrı  (tipik handler'a göre %{extra / typical * 100:.2f})")
+    await _verify()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,180 @@
+# ============================================
+# KingTG UserBot Service - Quote Önbelleği
+# ============================================
+# q.py'nin .q yolu sahte client ve yerel sahte Quotly sunucusuyla sürülür:
+#   soğuk    → avatar indirme + Quotly isteği
+#   sıcak    → aynı mesaj/renk: avatar ve render önbellekten
+#   eşzamanlı→ aynı quote'u CONCURRENT kullanıcı aynı anda ister: tek indirme,
+#              tek Quotly isteği
+#   disk     → yeni süreç gibi boş bellekle: render diskten
+# Ayrıca istek başına yeni ClientSession ile paylaşılan oturum karşılaştırılır.
+# Telegram'a BAĞLANMAZ.
+#
+#   python benchmarks/bench_quote_cache.py [gecikme_ms] [eşzamanlı]
+# ============================================
+
+import os
+import sys
+import time
+import types
+import base64
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+_tmp = tempfile.mkdtemp(prefix="kingtg-bench-")
+config.USERS_FILE = os.path.join(_tmp, "users.json")
+config.SETTINGS_FILE = os.path.join(_tmp, "settings.json")
+config.PLUGINS_FILE = os.path.join(_tmp, "plugins.json")
+config.BANS_FILE = os.path.join(_tmp, "bans.json")
+config.SUDOS_FILE = os.path.join(_tmp, "sudos.json")
+config.PLUGIN_CACHE_DIR = os.path.join(_tmp, "plugin_cache")
+config.MEDIA_CACHE_DIR = os.path.join(_tmp, "media_cache")
+
+import aiohttp
+from aiohttp import web
+from telethon.tl.types import User, UserProfilePhoto
+
+from userbot.plugins import plugin_manager
+from utils.http_client import http_client
+from utils.media_cache import MediaCache, media_cache
+
+LATENCY = (float(sys.argv[1]) if len(sys.argv) > 1 else 150) / 1000
+CONCURRENT = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+REQUESTS = 100
+
+_PNG = base64.b64encode(b"\x89PNG\r\n\x1a\n" + b"\0" * 150_000).decode()
+counts = {"avatar": 0, "quotly": 0}
+
+
+def _load_q():
+    plugin_manager._setup_compatibility()
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "plugins", "q.py")
+    with open(path, encoding="utf-8") as f:
+        code = plugin_manager._patch_plugin_content(f.read())
+    module = types.ModuleType("plugin_q_bench")
+    module.__file__ = path
+    exec(compile(code, path, "exec"), module.__dict__)
+    return module
+
+
+class _Full:
+    full_user = types.SimpleNamespace(premium=False)
+    users = []
+
+
+class _Client:
+    async def __call__(self, request):
+        await asyncio.sleep(LATENCY / 5)
+        return _Full()
+
+    async def download_profile_photo(self, user, file):
+        counts["avatar"] += 1
+        await asyncio.sleep(LATENCY)
+        return b"\xff\xd8\xff" + bytes(40_000)
+
+
+class _Msg:
+    def __init__(self, sender, text):
+        self._sender = sender
+        self.text = text
+        self.entities = []
+        self.media = None
+        self.reply_to_msg_id = None
+
+    async def get_sender(self):
+        return self._sender
+
+
+async def _quotly(request):
+    counts["quotly"] += 1
+    await request.json()
+    await asyncio.sleep(LATENCY * 2)
+    return web.json_response({"ok": True, "result": {"image": _PNG}})
+
+
+async def _ping(request):
+    return web.Response(text="ok")
+
+
+async def _quote(q, client, msg, color="#1b1429"):
+    data = await q.build_message_data(client, msg, include_reply_info=False)
+    image, err = await q.generate_quote([data], color, "webp")
+    assert image, err
+    return image
+
+
+async def main():
+    app = web.Application()
+    app.router.add_post("/quote/generate", _quotly)
+    app.router.add_get("/ping", _ping)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    q = _load_q()
+    q.QUOTLY_APIS = [f"http://127.0.0.1:{port}/quote/generate"]
+    client = _Client()
+    user = User(id=42, first_name="Kral", photo=UserProfilePhoto(photo_id=777, dc_id=2))
+    msg = _Msg(user, "Merhaba dünya")
+
+    print(f"sahte gecikme: indirme {LATENCY * 1000:.0f} ms, Quotly {LATENCY * 2000:.0f} ms")
+    for label, text, color in (("soğuk", "Merhaba dünya", "#1b1429"),
+                               ("sıcak (aynı)", "Merhaba dünya", "#1b1429"),
+                               ("yeni renk", "Merhaba dünya", "#5c1e1e")):
+        msg.text = text
+        before = dict(counts)
+        started = time.perf_counter()
+        await _quote(q, client, msg, color)
+        ms = (time.perf_counter() - started) * 1000
+        print(f"  {label:13s}: {ms:7.1f} ms  (avatar indirme {counts['avatar'] - before['avatar']}, "
+              f"Quotly {counts['quotly'] - before['quotly']})")
+
+    # Aynı quote'u çok kullanıcı aynı anda ister (yeni mesaj: önbellekte yok)
+    msg.text = "Eşzamanlı quote"
+    fresh = User(id=43, first_name="Yeni", photo=UserProfilePhoto(photo_id=778, dc_id=2))
+    msg._sender = fresh
+    before = dict(counts)
+    started = time.perf_counter()
+    await asyncio.gather(*(_quote(q, client, msg) for _ in range(CONCURRENT)))
+    ms = (time.perf_counter() - started) * 1000
+    print(f"  {CONCURRENT} eşzamanlı : {ms:7.1f} ms  (avatar indirme {counts['avatar'] - before['avatar']}, "
+          f"Quotly {counts['quotly'] - before['quotly']})")
+    assert counts["avatar"] - before["avatar"] == 1 and counts["quotly"] - before["quotly"] == 1
+
+    # Yeniden açılış: bellek boş, disk dolu
+    q.media_cache = MediaCache(config.MEDIA_CACHE_DIR, media_cache.mem_bytes, media_cache.disk_bytes)
+    before = dict(counts)
+    started = time.perf_counter()
+    await _quote(q, client, msg)
+    ms = (time.perf_counter() - started) * 1000
+    print(f"  disk (yeniden): {ms:5.1f} ms  (avatar indirme {counts['avatar'] - before['avatar']}, "
+          f"Quotly {counts['quotly'] - before['quotly']})  {q.media_cache.stats()}")
+    assert counts["quotly"] == before["quotly"]
+
+    url = f"http://127.0.0.1:{port}/ping"
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url) as resp:
+                await resp.read()
+    fresh_ms = (time.perf_counter() - started) * 1000 / REQUESTS
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        async with http_client.session.get(url) as resp:
+            await resp.read()
+    pooled_ms = (time.perf_counter() - started) * 1000 / REQUESTS
+    print(f"{REQUESTS} GET (yerel, TLS yok): yeni oturum {fresh_ms:.2f} ms/istek, "
+          f"paylaşılan {pooled_ms:.2f} ms/istek")
+
+    await http_client.close()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
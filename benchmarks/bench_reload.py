@@ -0,0 +1,133 @@
+# ============================================
+# KingTG UserBot Service - Plugin Hot-Reload Ölçümü
+# ============================================
+# USERS sahte client'ta yüklü plugin'in dosyası değiştirilir ve
+# plugin_manager.reload_plugin ile herkes yeni koda geçirilir:
+#   sayac  → kullanıcıya özel (her kullanıcıda exec), migrate_state ile
+#            sayaç değeri yeni modüle taşınır
+#   burc   → paylaşımlı (# shared: true), yeni kod bir kez exec edilir
+#   bozuk  → register sırasında hata veren sürüm: kanaryada geri alınır,
+#            herkes ve sonraki aktivasyonlar eski kodda kalır
+# Telegram'a BAĞLANMAZ.
+#
+#   python benchmarks/bench_reload.py [kullanıcı]
+# ============================================
+
+import os
+import sys
+import shutil
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+_tmp = tempfile.mkdtemp(prefix="kingtg-bench-")
+config.USERS_FILE = os.path.join(_tmp, "users.json")
+config.SETTINGS_FILE = os.path.join(_tmp, "settings.json")
+config.PLUGINS_FILE = os.path.join(_tmp, "plugins.json")
+config.BANS_FILE = os.path.join(_tmp, "bans.json")
+config.SUDOS_FILE = os.path.join(_tmp, "sudos.json")
+config.PLUGIN_CACHE_DIR = os.path.join(_tmp, "plugin_cache")
+
+_plugins_src = config.PLUGINS_DIR
+config.PLUGINS_DIR = os.path.join(_tmp, "plugins")
+os.makedirs(config.PLUGINS_DIR)
+
+from telethon import TelegramClient
+from telethon.sessions import StringSession
+
+from database import database as db
+from userbot.plugins import plugin_manager
+from userbot.router import get_router
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+_SAYAC = '''
+from userbot.events import register
+
+VERSION = {version}
+COUNT = 0
+
+@register(outgoing=True, pattern=r"^\\.say$")
+async def say(event):
+    global COUNT
+    COUNT += 1
+
+def migrate_state(old_module, new_module):
+    new_module.COUNT = old_module.COUNT
+{extra}
+'''
+
+
+def _write(name: str, text: str):
+    path = os.path.join(config.PLUGINS_DIR, f"{name}.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    # mtime çözünürlüğüne takılmamak için ileri al
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+
+
+def _say_version(client) -> int:
+    callback = get_router(client).candidates(".say")[0][0]
+    return callback.__wrapped__.__globals__["VERSION"]
+
+
+async def _reload(name: str) -> dict:
+    report = await plugin_manager.reload_plugin(name)
+    line = (f"  {name:6s}: {report['swapped']:4d}/{report['users']} kullanıcı  "
+            f"{report['total_ms']:8.1f} ms  (derleme {report['compile_ms']:.1f} ms")
+    if report["swapped"]:
+        line += f", {report['total_ms'] / report['swapped'] * 1000:.0f} µs / kullanıcı"
+    print(line + ")" + ("  → GERİ ALINDI" if report["rolled_back"] else ""))
+    return report
+
+
+async def main():
+    _write("sayac", _SAYAC.format(version=1, extra=""))
+    shutil.copy(os.path.join(_plugins_src, "burc.py"), config.PLUGINS_DIR)
+    await db.add_plugin("sayac", "sayac.py")
+    await db.add_plugin("burc", "burc.py")
+
+    clients = {}
+    for uid in range(USERS):
+        await db.add_user(uid)
+        clients[uid] = client = TelegramClient(StringSession(), 1, "x")
+        for name in ("sayac", "burc"):
+            ok, msg = await plugin_manager.activate_plugin(uid, name, client)
+            assert ok, msg
+        plugin_manager.user_active_plugins[uid]["sayac"].COUNT = uid
+    handlers = {uid: len(c.list_event_handlers()) for uid, c in clients.items()}
+    old_burc = get_router(clients[0]).candidates(".burc")[0][0]
+
+    print(f"{USERS} kullanıcı")
+    _write("sayac", _SAYAC.format(version=2, extra=""))
+    report = await _reload("sayac")
+    assert report["swapped"] == USERS and not report["failed"]
+    for uid, client in clients.items():
+        assert _say_version(client) == 2
+        assert plugin_manager.user_active_plugins[uid]["sayac"].COUNT == uid, "durum taşınmadı"
+        assert len(client.list_event_handlers()) == handlers[uid], "handler sayısı değişti"
+
+    with open(os.path.join(config.PLUGINS_DIR, "burc.py"), "a", encoding="utf-8") as f:
+        f.write("\n# değişiklik\n")
+    report = await _reload("burc")
+    assert report["swapped"] == USERS
+    new_burc = get_router(clients[0]).candidates(".burc")[0][0]
+    assert new_burc is not old_burc and new_burc is get_router(clients[1]).candidates(".burc")[0][0]
+
+    _write("sayac", _SAYAC.format(version=3, extra="def register(client):\n    raise RuntimeError('bozuk')\n"))
+    report = await _reload("sayac")
+    assert report["rolled_back"] and report["swapped"] == 0
+    assert all(_say_version(c) == 2 for c in clients.values())
+    late = TelegramClient(StringSession(), 1, "x")
+    await db.add_user(USERS)
+    ok, msg = await plugin_manager.activate_plugin(USERS, "sayac", late)
+    assert ok and _say_version(late) == 2, "geri alınan kod yeni aktivasyona sızdı"
+    print("  doğrulama: tamam (durum taşındı, handler sayısı sabit, geri alma çalıştı)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+# ============================================
+# KingTG UserBot Service - Komut Yönlendirici Ölçümü
+# ============================================
+# Mesaj başına dağıtım maliyeti (20 plugin yüklü, tek client):
+#   eski  → her NewMessage handler'ının filtresi/regex'i sırayla çalışır
+#   yeni  → tek yönlendirici handler'ı + trie, kalanlar regex yolunda
+# Telethon'un _dispatch_update döngüsü aynen taklit edilir (builder.filter
+# + callback); ağ ve güncelleme çözümleme maliyeti iki tarafta da aynı
+# olduğundan ölçüme girmez.
+#
+#   python benchmarks/bench_router.py [plugin] [mesaj]
+# ============================================
+
+import os
+import sys
+import time
+import random
+import asyncio
+import inspect
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+_tmp = tempfile.mkdtemp(prefix="kingtg-bench-")
+config.USERS_FILE = os.path.join(_tmp, "users.json")
+config.SETTINGS_FILE = os.path.join(_tmp, "settings.json")
+config.PLUGINS_FILE = os.path.join(_tmp, "plugins.json")
+config.BANS_FILE = os.path.join(_tmp, "bans.json")
+config.SUDOS_FILE = os.path.join(_tmp, "sudos.json")
+
+from telethon import TelegramClient, events
+from telethon.sessions import StringSession
+from telethon.tl.types import Message, PeerUser
+
+from userbot.plugins import plugin_manager
+
+PLUGINS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+MESSAGES = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+# Depodaki plugin'lerin tipik pattern biçimleri (plugin başına 3 komut + 1 gelen dinleyici)
+_TEMPLATES = (
+    r"^\.{name}$",
+    r"^\.{name}(?:\s+(.+))?$",
+    r"^\.{name}[kc]fg (.+)",
+)
+
+
+def _build(client, per_plugin_hits):
+    """PLUGINS adet sahte plugin'in handler'larını client'a ekle"""
+    plugins = {}
+    for p in range(PLUGINS):
+        name = f"p{p:02d}"
+        before = len(client.list_event_handlers())
+        for t, template in enumerate(_TEMPLATES):
+            async def handler(event, _key=(name, t)):
+                per_plugin_hits[_key] = per_plugin_hits.get(_key, 0) + 1
+            client.add_event_handler(
+                handler, events.NewMessage(outgoing=True, pattern=template.format(name=f"cmd{p:02d}")))
+        if p % 4 == 0:
+            # afk/tag benzeri gelen mesaj dinleyicisi (yönlendirilemez)
+            async def watcher(event):
+                pass
+            client.add_event_handler(watcher, events.NewMessage(incoming=True, func=lambda e: e.is_private))
+        plugins[name] = client.list_event_handlers()[before:]
+    return plugins
+
+
+def _messages():
+    rnd = random.Random(42)
+    words = ["merhaba", "nasılsın", "tamam", "yarın görüşürüz", "ok", "😂", "https://t.me/x"]
+    result = []
+    for _ in range(MESSAGES):
+        if rnd.random() < 0.3:
+            p = rnd.randrange(PLUGINS)
+            result.append(rnd.choice([f".cmd{p:02d}", f".cmd{p:02d} arg", f".cmd{p:02d}kfg x", ".bilinmeyen"]))
+        else:
+            result.append(" ".join(rnd.choice(words) for _ in range(rnd.randint(1, 8))))
+    return [events.NewMessage.Event(Message(id=i, peer_id=PeerUser(1), date=None, message=text, out=True))
+            for i, text in enumerate(result)]
+
+
+async def _dispatch(client, event):
+    """TelegramClient._dispatch_update'in handler döngüsü"""
+    for builder, callback in client._event_builders:
+        if not builder.resolved:
+            await builder.resolve(client)
+        matched = builder.filter(event)
+        if inspect.isawaitable(matched):
+            matched = await matched
+        if not matched:
+            continue
+        try:
+            await callback(event)
+        except events.StopPropagation:
+            break
+
+
+async def _run(route: bool):
+    client = TelegramClient(StringSession(), 1, "x")
+    hits = {}
+    plugins = _build(client, hits)
+    if route:
+        for name, handlers in plugins.items():
+            plugin_manager._route_handlers(client, name, handlers)
+    evs = _messages()
+    for ev in evs[:200]:
+        await _dispatch(client, ev)
+    hits.clear()
+    started = time.perf_counter()
+    for ev in evs:
+        await _dispatch(client, ev)
+    elapsed = time.perf_counter() - started
+    return elapsed, len(client.list_event_handlers()), hits
+
+
+async def main():
+    old, old_count, old_hits = await _run(route=False)
+    new, new_count, new_hits = await _run(route=True)
+    assert old_hits == new_hits, "yönlendirici farklı handler'ları tetikledi"
+    print(f"{PLUGINS} plugin, {MESSAGES} mesaj (%30 komut)")
+    print(f"  eski : {old_count:3d} handler  {old / MESSAGES * 1e6:7.2f} µs / mesaj")
+    print(f"  yeni : {new_count:3d} handler  {new / MESSAGES * 1e6:7.2f} µs / mesaj")
+    print(f"  hızlanma: {old / new:.1f}x  (tetiklenen komut: {sum(new_hits.values())})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
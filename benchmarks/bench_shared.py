@@ -0,0 +1,111 @@
+# ============================================
+# KingTG UserBot Service - Paylaşımlı Plugin Bellek Ölçümü
+# ============================================
+# Paketle gelen her plugin için kullanıcı başına yerleşik bellek:
+#   exec    → her kullanıcıya ayrı modül (plugin_<ad>_<uid>)
+#   shared  → modül bir kez exec, kullanıcıya yalnızca handler bağlanır
+# `# shared: true` başlığı olmayan pluginler de ölçüm için zorla paylaşımlı
+# yüklenir (dönüştürülürlerse kazanılacak bellek); mesaj işlenmez.
+# Derleme/bağımlılık maliyeti ısıtma turunda ödenir, ölçüme girmez.
+#
+#   python benchmarks/bench_shared.py [kullanıcı] [plugin,plugin,...]
+# ============================================
+
+import os
+import sys
+import gc
+import asyncio
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+_tmp = tempfile.mkdtemp(prefix="kingtg-bench-")
+config.USERS_FILE = os.path.join(_tmp, "users.json")
+config.SETTINGS_FILE = os.path.join(_tmp, "settings.json")
+config.PLUGINS_FILE = os.path.join(_tmp, "plugins.json")
+config.BANS_FILE = os.path.join(_tmp, "bans.json")
+config.SUDOS_FILE = os.path.join(_tmp, "sudos.json")
+
+from telethon import TelegramClient
+from telethon.sessions import StringSession
+
+import userbot.plugins as plugins_module
+from database import database as db
+from userbot.plugins import plugin_manager
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+if len(sys.argv) > 2:
+    PLUGINS = sys.argv[2].split(",")
+else:
+    PLUGINS = sorted(f[:-3] for f in os.listdir(config.PLUGINS_DIR)
+                     if f.endswith(".py") and not f.startswith("_"))
+
+_declared = plugins_module._is_shared_plugin
+
+
+async def _per_user(name, clients, shared):
+    """USERS kullanıcıya plugin yükle; kullanıcı başına bayt (None = yüklenemedi)"""
+    plugins_module._is_shared_plugin = lambda content: shared
+    try:
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for uid, client in enumerate(clients):
+            ok, _msg = await plugin_manager.activate_plugin(uid, name, client)
+            if not ok:
+                return None
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        return sum(s.size_diff for s in after.compare_to(before, "filename")) / USERS
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        for uid in range(USERS):
+            await plugin_manager.deactivate_plugin(uid, name, persist=False)
+        plugin_manager._shared_modules.pop(name, None)
+        sys.modules.pop(f"plugin_{name}", None)
+        plugins_module._is_shared_plugin = _declared
+
+
+async def main():
+    for name in PLUGINS:
+        await db.add_plugin(name, f"{name}.py")
+    for uid in range(USERS):
+        await db.add_user(uid)
+    clients = [TelegramClient(StringSession(), 1, "x") for _ in range(USERS)]
+
+    rows = []
+    for name in PLUGINS:
+        # Isıtma: derleme + bağımlılık kontrolü bir kez
+        ok, _msg = await plugin_manager.activate_plugin(-1, name, clients[0])
+        await plugin_manager.deactivate_plugin(-1, name, persist=False)
+        if not ok:
+            rows.append((name, None, None, False))
+            continue
+        with open(os.path.join(config.PLUGINS_DIR, f"{name}.py"), encoding="utf-8") as f:
+            declared = _declared(f.read())
+        rows.append((name, await _per_user(name, clients, False),
+                     await _per_user(name, clients, True), declared))
+
+    print(f"{USERS} kullanıcı, kullanıcı başına KiB (tracemalloc)")
+    print(f"  {'plugin':10s} {'exec':>8s} {'shared':>8s}  başlık")
+    total_exec = total_shared = 0.0
+    for name, per_exec, per_shared, declared in rows:
+        if per_exec is None or per_shared is None:
+            print(f"  {name:10s} {'—':>8s} {'—':>8s}  yüklenemedi")
+            continue
+        total_exec += per_exec
+        total_shared += per_shared
+        mark = "shared" if declared else ""
+        print(f"  {name:10s} {per_exec / 1024:8.1f} {per_shared / 1024:8.1f}  {mark}")
+    if total_exec:
+        print(f"  {'toplam':10s} {total_exec / 1024:8.1f} {total_shared / 1024:8.1f}"
+              f"  (kazanç %{(1 - total_shared / total_exec) * 100:.0f})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,161 @@
+# ============================================
+# KingTG UserBot Service - Quote Sticker Dönüştürme
+# ============================================
+# q.py'nin resize_sticker'ı (arka plan silme + 512 px + PNG) için:
+#   eski  → piksel piksel Python döngüsü (olay döngüsünde)
+#   yeni  → Pillow LUT / ImageChops ile renk anahtarı (utils.imaging)
+# Temsilî quote görselleri (Quotly çıktısı gibi 1024 px genişlik, scale=2:
+# koyu arka plan, avatar, balon, kenarı yumuşatılmış yazı) üretilir; iki yolun
+# çıktısının piksel piksel aynı olduğu doğrulanır.
+# Ardından JOBS eşzamanlı dönüştürme sırasında olay döngüsünün en uzun
+# tıkanması ölçülür (süreç havuzu vs döngü içinde).
+# Telegram'a BAĞLANMAZ.
+#
+#   python benchmarks/bench_sticker.py [tur] [eşzamanlı iş]
+# ============================================
+
+import os
+import sys
+import time
+import asyncio
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw, ImageFont
+
+from utils import imaging
+
+ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+JOBS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+# (ad, yükseklik): tek satır, orta, 1.5 M piksellik uzun quote
+SHAPES = [("kısa", 320), ("orta", 768), ("uzun", 1536)]
+
+
+def _legacy(image_data, make_transparent=True):
+    # Eski resize_sticker (hata yakalama hariç birebir)
+    img = Image.open(BytesIO(image_data))
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    if make_transparent:
+        pixels = img.load()
+        bg_color = pixels[0, 0][:3] if len(pixels[0, 0]) >= 3 else None
+        if bg_color:
+            new_img = Image.new('RGBA', img.size)
+            new_pixels = new_img.load()
+            tolerance = 35
+            for y in range(img.height):
+                for x in range(img.width):
+                    pixel = pixels[x, y]
+                    if len(pixel) >= 3:
+                        diff = sum(abs(pixel[i] - bg_color[i]) for i in range(3))
+                        if diff < tolerance:
+                            new_pixels[x, y] = (0, 0, 0, 0)
+                        else:
+                            new_pixels[x, y] = pixel
+                    else:
+                        new_pixels[x, y] = pixel
+            img = new_img
+    width, height = img.size
+    if width > height:
+        new_width = 512
+        new_height = int((height / width) * 512)
+    else:
+        new_height = 512
+        new_width = int((width / height) * 512)
+    img = img.resize((new_width, new_height), Image.LANCZOS)
+    output = BytesIO()
+    img.save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+
+def _quote_image(height: int) -> bytes:
+    """Quotly benzeri görsel: #1b1429 zemin, avatar, yuvarlak balon, yazı"""
+    img = Image.new("RGBA", (1024, height), (27, 20, 41, 255))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((16, height - 112, 112, height - 16), fill=(214, 120, 64, 255))
+    draw.rounded_rectangle((128, 16, 1000, height - 16), radius=48, fill=(44, 37, 60, 255))
+    font = ImageFont.load_default(size=40)
+    draw.text((168, 40), "Kral Kullanıcı", font=font, fill=(120, 180, 255, 255))
+    line = "Bugün hava çok güzel, quote sticker deneniyor. "
+    for i, y in enumerate(range(100, height - 60, 56)):
+        draw.text((168, y), line[i % 7:] + line[:i % 7], font=font, fill=(235, 235, 240, 255))
+    out = BytesIO()
+    img.save(out, format="PNG")
+    return out.getvalue()
+
+
+def _best(func, *args) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+async def _max_stall(make_jobs) -> tuple:
+    """İşler sürerken 1 ms'lik tikçi; en uzun tik aralığı = döngü tıkanması"""
+    worst = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal worst
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            worst = max(worst, now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    started = time.perf_counter()
+    await make_jobs()
+    elapsed = time.perf_counter() - started
+    done = True
+    await tick
+    return elapsed, worst
+
+
+async def main():
+    images = {name: _quote_image(h) for name, h in SHAPES}
+    print(f"en iyi {ROUNDS} tur, arka plan silme + 512 px + PNG")
+    for name, data in images.items():
+        legacy = _legacy(data)
+        fresh = imaging.render_sticker(memoryview(data))
+        a, b = Image.open(BytesIO(legacy)), Image.open(BytesIO(fresh))
+        assert a.size == b.size and a.tobytes() == b.tobytes(), f"{name}: çıktı farklı"
+        old = _best(_legacy, data)
+        new = _best(imaging.render_sticker, data)
+        print(f"  {name} (1024×{Image.open(BytesIO(data)).height:<4}): eski {old * 1000:7.0f} ms  "
+              f"yeni {new * 1000:6.1f} ms  (×{old / new:.0f}, çıktı aynı)")
+    for fmt in ("png", "webp"):
+        t = _best(imaging.render_sticker, images["uzun"], True, 35, fmt)
+        print(f"  uzun → {fmt:4s}: {t * 1000:6.1f} ms, "
+              f"{len(imaging.render_sticker(images['uzun'], True, 35, fmt)) // 1024} KB")
+
+    data = images["uzun"]
+    await imaging.image_pool.run(imaging.render_sticker, data)  # alt süreçleri ısıt
+
+    async def pooled():
+        await asyncio.gather(*(imaging.sticker(data) for _ in range(JOBS)))
+
+    async def inline():
+        for _ in range(JOBS):
+            imaging.render_sticker(data)
+            await asyncio.sleep(0)
+
+    async def inline_legacy():
+        _legacy(data)
+
+    print(f"{JOBS} eşzamanlı uzun quote, olay döngüsünün en uzun tıkanması:")
+    for label, jobs in (("havuz", pooled), ("döngüde (yeni)", inline), ("döngüde (eski, 1 iş)", inline_legacy)):
+        elapsed, stall = await _max_stall(jobs)
+        print(f"  {label:20s}: toplam {elapsed * 1000:7.0f} ms, en uzun tıkanma {stall * 1000:7.1f} ms")
+    imaging.image_pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+# ============================================
+# KingTG UserBot Service - Depo Karşılaştırması
+# ============================================
+# LocalStorage (JSON + günlük) ile SQLiteDB'yi 100 / 1k / 10k kullanıcıda
+# karşılaştırır. Gerçek data/ klasörüne DOKUNMAZ (geçici dizin kullanır).
+#
+#   python benchmarks/bench_storage.py
+# ============================================
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+SIZES = (100, 1000, 10000)
+OPS = 2000
+
+
+def _use_dir(path):
+    """config dosya yollarını geçici dizine yönlendir"""
+    config.DATA_DIR = path
+    config.USERS_FILE = os.path.join(path, "users.json")
+    config.SETTINGS_FILE = os.path.join(path, "settings.json")
+    config.PLUGINS_FILE = os.path.join(path, "plugins.json")
+    config.BANS_FILE = os.path.join(path, "bans.json")
+    config.SUDOS_FILE = os.path.join(path, "sudos.json")
+    config.SQLITE_PATH = os.path.join(path, "bench.db")
+
+
+# database paketi import edilirken global depolar oluşur → önce yönlendir
+_use_dir(tempfile.mkdtemp(prefix="kingtg-bench-"))
+
+
+def _timed(fn, *args):
+    t = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - t) * 1000
+
+
+async def _atimed(coro):
+    t = time.perf_counter()
+    await coro
+    return (time.perf_counter() - t) * 1000
+
+
+def bench_local(n):
+    from database.local import LocalStorage
+    _use_dir(tempfile.mkdtemp(prefix="kingtg-bench-"))
+    store = LocalStorage()
+    r = {}
+    r["seed"] = _timed(lambda: [store.update_user(i, {"is_logged_in": i % 3 == 0,
+                                                        "active_plugins": ["afk", "q"]})
+                                for i in range(n)])
+    r["get_user"] = _timed(lambda: [store.get_user(i % n) for i in range(OPS)])
+    r["update_user"] = _timed(lambda: [store.update_user(i % n, {"x": i}) for i in range(OPS)])
+    r["logged_in"] = _timed(store.get_logged_in_users)
+    r["count"] = _timed(store.get_user_count)
+    store.flush()
+    return r
+
+
+async def bench_sqlite(n):
+    from database.sqlite import SQLiteDB
+    _use_dir(tempfile.mkdtemp(prefix="kingtg-bench-"))
+    store = SQLiteDB(config.SQLITE_PATH)
+    await store.connect()
+    r = {}
+
+    async def seed():
+        for i in range(n):
+            await store.update_user(i, {"is_logged_in": i % 3 == 0, "active_plugins": ["afk", "q"]})
+
+    async def gets():
+        for i in range(OPS):
+            await store.get_user(i % n)
+
+    async def updates():
+        for i in range(OPS):
+            await store.update_user(i % n, {"x": i})
+
+    r["seed"] = await _atimed(seed())
+    r["get_user"] = await _atimed(gets())
+    r["update_user"] = await _atimed(updates())
+    r["logged_in"] = await _atimed(store.get_logged_in_users())
+    r["count"] = await _atimed(store.get_user_count())
+    store.close()
+    return r
+
+
+def main():
+    cols = ("seed", "get_user", "update_user", "logged_in", "count")
+    print(f"{'backend':<8} {'users':>6} " + " ".join(f"{c + ' ms':>14}" for c in cols))
+    for n in SIZES:
+        for name, result in (("json", bench_local(n)),
+                             ("sqlite", asyncio.run(bench_sqlite(n)))):
+            print(f"{name:<8} {n:>6} " + " ".join(f"{result[c]:>14.1f}" for c in cols))
+    print(f"(get_user / update_user: {OPS} işlem)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# ============================================
+# KingTG UserBot Service - Plugin Klasör Senkronu Ölçümü
+# ============================================
+# sync_folder_plugins'in açılış maliyeti (depodaki tüm pluginler):
+#   ilk     → dizin yok: her dosya okunur, ayrıştırılır, DB'ye eklenir
+#   eski    → dizin yok, DB dolu: her dosya yine okunur, hash'lenir ve bilgisi
+#             derleme önbelleğinden (sıcak) alınıp DB ile karşılaştırılır
+#   yeni    → parmak izi dizini var: yalnızca stat, ayrıştırma/DB yazma yok
+#   touch   → tek dosyanın mtime'ı değişti, içerik aynı: hash, ayrıştırma yok
+#   değişti → tek dosyanın içeriği değişti: yalnızca o dosya ayrıştırılır
+# DB yazma sayısı da raporlanır. Telegram'a BAĞLANMAZ.
+#
+#   python benchmarks/bench_sync.py [tekrar]
+# ============================================
+
+import os
+import sys
+import time
+import shutil
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+_tmp = tempfile.mkdtemp(prefix="kingtg-bench-")
+config.USERS_FILE = os.path.join(_tmp, "users.json")
+config.SETTINGS_FILE = os.path.join(_tmp, "settings.json")
+config.PLUGINS_FILE = os.path.join(_tmp, "plugins.json")
+config.BANS_FILE = os.path.join(_tmp, "bans.json")
+config.SUDOS_FILE = os.path.join(_tmp, "sudos.json")
+config.PLUGIN_CACHE_DIR = os.path.join(_tmp, "plugin_cache")
+config.PLUGIN_INDEX_FILE = os.path.join(_tmp, "plugin_index.json")
+
+_plugins_src = config.PLUGINS_DIR
+config.PLUGINS_DIR = os.path.join(_tmp, "plugins")
+os.makedirs(config.PLUGINS_DIR)
+for _fn in os.listdir(_plugins_src):
+    if _fn.endswith(".py"):
+        shutil.copy(os.path.join(_plugins_src, _fn), config.PLUGINS_DIR)
+
+from database import database as db
+from userbot.plugin_cache import PluginCodeCache
+from userbot.plugin_index import PluginIndex
+from userbot.plugins import plugin_manager, PLUGIN_PATCHER_VERSION
+
+ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+_writes = 0
+_update = db.update_plugin
+_add = db.add_plugin
+
+
+async def _count_update(*args, **kwargs):
+    global _writes
+    _writes += 1
+    return await _update(*args, **kwargs)
+
+
+async def _count_add(*args, **kwargs):
+    global _writes
+    _writes += 1
+    return await _add(*args, **kwargs)
+
+
+db.update_plugin = _count_update
+db.add_plugin = _count_add
+
+
+def _restart(keep_index: bool, keep_cache: bool):
+    """Yeniden başlatma: bellek önbellekleri boş, disk önbelleği/dizin isteğe bağlı"""
+    if not keep_index and os.path.exists(config.PLUGIN_INDEX_FILE):
+        os.remove(config.PLUGIN_INDEX_FILE)
+    plugin_manager._folder_index = PluginIndex(config.PLUGIN_INDEX_FILE)
+    plugin_manager._disk_cache = PluginCodeCache(config.PLUGIN_CACHE_DIR, PLUGIN_PATCHER_VERSION)
+    if not keep_cache:
+        plugin_manager._disk_cache.clear()
+
+
+async def _measure(label: str, keep_index: bool, keep_cache: bool = True, before=None,
+                   rounds: int = ROUNDS):
+    global _writes
+    elapsed = 0.0
+    writes = 0
+    for _ in range(rounds):
+        if before:
+            before()
+        _restart(keep_index, keep_cache)
+        _writes = 0
+        started = time.perf_counter()
+        await plugin_manager.sync_folder_plugins()
+        elapsed += time.perf_counter() - started
+        writes += _writes
+    index = plugin_manager._folder_index.stats()
+    print(f"  {label:8s}: {elapsed / rounds * 1000:7.2f} ms  "
+          f"bilgi çıkarılan {index['parsed']:2d}  DB yazma {writes / rounds:.0f}")
+
+
+def _touch(name: str, append: str = ""):
+    path = os.path.join(config.PLUGINS_DIR, name)
+    if append:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(append)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+async def main():
+    files = len([f for f in os.listdir(config.PLUGINS_DIR) if not f.startswith("_")])
+    print(f"{files} plugin dosyası, {ROUNDS} tekrar")
+    await _measure("ilk", keep_index=False, keep_cache=False, rounds=1)
+    await _measure("eski", keep_index=False)
+    await _measure("yeni", keep_index=True)
+    await _measure("touch", keep_index=True, before=lambda: _touch("burc.py"))
+    await _measure("değişti", keep_index=True, before=lambda: _touch("burc.py", "\n# v\n"), rounds=1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+# ============================================
+# KingTG UserBot Service - Handler Sökme Ölçümü
+# ============================================
+# Tek client'ta yüklü PLUGINS adet sahte plugin'in hepsini söker:
+#   eski  → client listesini dize eşlemeyle tara + modülün her public
+#           callable'ı için listeyi YENİDEN tara (O(öznitelik × handler))
+#   yeni  → aktivasyon kaydı (user_handlers) + client başına tek geçiş
+# Eski tarama bu dosyada aynen taklit edilir; DB ve plugin yan etkileri
+# (unregister, cleanup_user_data) iki tarafta da yoktur.
+#
+#   python benchmarks/bench_teardown.py [plugin] [öznitelik] [tekrar]
+# ============================================
+
+import os
+import sys
+import time
+import types
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+_tmp = tempfile.mkdtemp(prefix="kingtg-bench-")
+config.USERS_FILE = os.path.join(_tmp, "users.json")
+config.SETTINGS_FILE = os.path.join(_tmp, "settings.json")
+config.PLUGINS_FILE = os.path.join(_tmp, "plugins.json")
+config.BANS_FILE = os.path.join(_tmp, "bans.json")
+config.SUDOS_FILE = os.path.join(_tmp, "sudos.json")
+
+from telethon import TelegramClient, events
+from telethon.sessions import StringSession
+
+from userbot.plugins import plugin_manager
+
+PLUGINS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+ATTRS = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+ROUNDS = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+USER = 1
+
+
+def _build():
+    """Plugin başına 4 handler + ATTRS public yardımcı fonksiyonlu modüller"""
+    client = TelegramClient(StringSession(), 1, "x")
+    modules = {}
+    for p in range(PLUGINS):
+        name = f"p{p:02d}"
+        module = types.ModuleType(f"plugin_{name}_{USER}")
+        module.client = client
+        ns = {"__name__": module.__name__}
+        exec("\n".join(
+            [f"async def cmd{i}(event): pass" for i in range(4)]
+            + [f"def helper{i}(): pass" for i in range(ATTRS)]), ns)
+        vars(module).update(ns)
+        before = len(client.list_event_handlers())
+        for i in range(4):
+            client.add_event_handler(getattr(module, f"cmd{i}"),
+                                     events.NewMessage(incoming=True, pattern=f"(?i)^{name}{i}"))
+        plugin_manager.user_active_plugins.setdefault(USER, {})[name] = module
+        plugin_manager.user_handlers.setdefault(USER, {})[name] = client.list_event_handlers()[before:]
+        modules[name] = module
+    return client, modules
+
+
+def _old_teardown(client, name, module):
+    """Eski deactivate_plugin taraması"""
+    module_name = f"plugin_{name}_{USER}"
+    for callback, event in list(client.list_event_handlers()):
+        cb_module = getattr(callback, '__module__', '') or ''
+        cb_name = getattr(callback, '__name__', '') or ''
+        cb_qualname = getattr(callback, '__qualname__', '') or ''
+        should_remove = module_name in cb_module or module_name in cb_qualname \
+            or (name in cb_module and str(USER) in cb_module)
+        if hasattr(module, cb_name) and getattr(module, cb_name, None) is callback:
+            should_remove = True
+        if should_remove:
+            client.remove_event_handler(callback, event)
+    for attr_name in dir(module):
+        if attr_name.startswith('_'):
+            continue
+        attr = getattr(module, attr_name)
+        if not callable(attr):
+            continue
+        for callback, event in list(client.list_event_handlers()):
+            if callback is attr:
+                client.remove_event_handler(callback, event)
+
+
+def _run(old: bool) -> float:
+    elapsed = 0.0
+    for _ in range(ROUNDS):
+        client, modules = _build()
+        started = time.perf_counter()
+        for name, module in modules.items():
+            if old:
+                _old_teardown(client, name, module)
+            else:
+                _client, handlers, _ = plugin_manager._teardown_plugin(USER, name, "disable", False)
+                plugin_manager._remove_handlers(_client, handlers)
+        elapsed += time.perf_counter() - started
+        assert not client.list_event_handlers(), "handler kaldı"
+        plugin_manager.user_active_plugins.pop(USER, None)
+        plugin_manager.user_handlers.pop(USER, None)
+    return elapsed / ROUNDS
+
+
+async def main():
+    old = _run(old=True)
+    new = _run(old=False)
+    print(f"{PLUGINS} plugin × 4 handler, modül başına {ATTRS} public fonksiyon")
+    print(f"  eski : {old * 1000:8.2f} ms / client")
+    print(f"  yeni : {new * 1000:8.2f} ms / client")
+    print(f"  hızlanma: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
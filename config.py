@@ -75,6 +75,160 @@ PLUGINS_FILE = os.path.join(DATA_DIR, "plugins.json")
 BANS_FILE = os.path.join(DATA_DIR, "bans.json")
 SUDOS_FILE = os.path.join(DATA_DIR, "sudos.json")
 
+# ============================================
+# BİRİNCİL DEPO
+# ============================================
+# json: data/*.json (LocalStorage) | sqlite: gömülü SQLite (data/kingtg.db)
+DB_BACKEND = os.getenv("DB_BACKEND", "json").strip().lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "") or os.path.join(DATA_DIR, "kingtg.db")
+
+# ============================================
+# YEREL VERİTABANI (write-behind günlük)
+# ============================================
+# fsync: her yazmada fsync | group: N ms'lik grup commit | none: fsync yok
+LOCAL_DB_DURABILITY = os.getenv("LOCAL_DB_DURABILITY", "group").strip().lower()
+LOCAL_DB_GROUP_COMMIT_MS = int(os.getenv("LOCAL_DB_GROUP_COMMIT_MS", 50))
+# Günlüğün users.json'a sıkıştırılma aralığı (sn) ve boyut eşiği (bayt)
+LOCAL_DB_COMPACT_INTERVAL = float(os.getenv("LOCAL_DB_COMPACT_INTERVAL", 60))
+LOCAL_DB_COMPACT_BYTES = int(os.getenv("LOCAL_DB_COMPACT_BYTES", 4 * 1024 * 1024))
+
+# ============================================
+# OKUMA ÖNBELLEĞİ (get_user / get_plugin)
+# ============================================
+# Yazmalar anahtarı hemen geçersizleştirir; TTL yalnızca dış değişikliklere karşı
+DB_CACHE_TTL = float(os.getenv("DB_CACHE_TTL", 300))
+DB_CACHE_SIZE = int(os.getenv("DB_CACHE_SIZE", 5000))
+
+# ============================================
+# MONGODB YAZMA KUYRUĞU
+# ============================================
+# Yazmalar bu aralıkla (ms) birleştirilip toplu gönderilir
+MONGO_WRITE_FLUSH_MS = int(os.getenv("MONGO_WRITE_FLUSH_MS", 50))
+MONGO_WRITE_BATCH = int(os.getenv("MONGO_WRITE_BATCH", 500))
+# Sonucu beklenen (wait=True) yazmanın en fazla bekleme süresi (sn)
+MONGO_WRITE_WAIT_TIMEOUT = float(os.getenv("MONGO_WRITE_WAIT_TIMEOUT", 10))
+
+# MongoDB'deki logların saklama süresi (gün, TTL indeksi)
+LOG_RETENTION_DAYS = float(os.getenv("LOG_RETENTION_DAYS", 30))
+
+# ============================================
+# PLUGIN DERLEME ÖNBELLEĞİ
+# ============================================
+# Yamalanmış + derlenmiş plugin kodu, import listesi ve bilgileri diskte
+# (içerik hash'i ile) tutulur; sıcak açılışta ayrıştırma/derleme yapılmaz
+PLUGIN_CACHE_DIR = os.getenv("PLUGIN_CACHE_DIR", "") or os.path.join(DATA_DIR, "plugin_cache")
+
+# ============================================
+# PLUGIN BAĞIMLILIKLARI (pip)
+# ============================================
+# modül → paket → sürüm önbelleği; aynı anda en fazla kaç pip çalışır, zaman aşımı (sn)
+DEPS_CACHE_FILE = os.path.join(DATA_DIR, "deps_cache.json")
+PIP_CONCURRENCY = int(os.getenv("PIP_CONCURRENCY", 1))
+PIP_TIMEOUT = float(os.getenv("PIP_TIMEOUT", 300))
+
+# ============================================
+# PLUGIN HOT-RELOAD
+# ============================================
+# plugins/ klasörü izlenir; değişen plugin bir kez derlenip yükleyen TÜM
+# kullanıcılarda yerinde değiştirilir. Tarama aralığı (sn) ve tur başına kullanıcı
+PLUGIN_HOT_RELOAD = os.getenv("PLUGIN_HOT_RELOAD", "true").strip().lower() in ("1", "true", "yes", "on")
+PLUGIN_WATCH_INTERVAL = float(os.getenv("PLUGIN_WATCH_INTERVAL", 2))
+PLUGIN_RELOAD_BATCH = int(os.getenv("PLUGIN_RELOAD_BATCH", 50))
+# Klasör senkronu: dosya parmak izi dizini; art arda değişiklikler bu kadar
+# sn sessizlik olunca tek senkronda işlenir (yeni dosya panele düşer)
+PLUGIN_INDEX_FILE = os.path.join(DATA_DIR, "plugin_index.json")
+PLUGIN_SYNC_DEBOUNCE = float(os.getenv("PLUGIN_SYNC_DEBOUNCE", 1.5))
+
+# ============================================
+# PLUGIN PROFİLLEYİCİ
+# ============================================
+# (plugin, kullanıcı) başına çağrı/hata sayaçları her çağrıda; süre ve döngü
+# bloklama ölçümü N çağrıda bir (1 = hepsi). Tek senkron adımı bu kadar ms'yi
+# aşan handler "yavaş" sayılır. Port > 0 ise /metrics Prometheus metni sunar.
+PLUGIN_PROFILE = os.getenv("PLUGIN_PROFILE", "true").strip().lower() in ("1", "true", "yes", "on")
+PLUGIN_PROFILE_SAMPLE = int(os.getenv("PLUGIN_PROFILE_SAMPLE", 20))
+PLUGIN_SLOW_CALLBACK_MS = float(os.getenv("PLUGIN_SLOW_CALLBACK_MS", 100))
+PLUGIN_PROFILE_PORT = int(os.getenv("PLUGIN_PROFILE_PORT", 0))
+PLUGIN_PROFILE_HOST = os.getenv("PLUGIN_PROFILE_HOST", "127.0.0.1")
+
+# ============================================
+# GÖRSEL İŞLEME HAVUZU
+# ============================================
+# Sticker/görsel dönüştürme (Pillow) bu kadar alt süreçte çalışır;
+# 0 = süreç açma, iş parçacığında çalıştır
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", min(2, os.cpu_count() or 1)))
+
+# ============================================
+# MEDYA ÖNBELLEĞİ
+# ============================================
+# Avatar, custom emoji ve quote render'ları: bellekte LRU (MB), diskte
+# MEDIA_CACHE_DIR altında (MB, 0 = disk kapalı)
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR", "") or os.path.join(DATA_DIR, "media_cache")
+MEDIA_CACHE_MEM_MB = float(os.getenv("MEDIA_CACHE_MEM_MB", 32))
+MEDIA_CACHE_DISK_MB = float(os.getenv("MEDIA_CACHE_DISK_MB", 256))
+
+# ============================================
+# HTTP İSTEMCİSİ
+# ============================================
+# Tüm plugin'ler ve BotAPI tek bağlantı havuzunu paylaşır: toplam / host başına
+# bağlantı, DNS önbelleği ve boşta bağlantı ömrü (sn), geçici hatada yeniden
+# deneme sayısı, yanıt gövdesi sınırı (MB)
+HTTP_LIMIT = int(os.getenv("HTTP_LIMIT", 100))
+HTTP_LIMIT_PER_HOST = int(os.getenv("HTTP_LIMIT_PER_HOST", 10))
+HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", 300))
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", 30))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 2))
+HTTP_MAX_MB = float(os.getenv("HTTP_MAX_MB", 20))
+
+# ============================================
+# ÇEVİRİ ÖNBELLEĞİ
+# ============================================
+# Yeni çeviriler data/lang/<dil>.log'a eklenir; log bu kadar satıra ulaşınca
+# data/lang/<dil>.json anlık görüntüsüne arka planda katlanır
+I18N_COMPACT_ENTRIES = int(os.getenv("I18N_COMPACT_ENTRIES", 256))
+# Canlı çeviri zamanlayıcısı: çağrılar bu kadar iş parçacığında çalışır;
+# I18N_BATCH_MS içinde gelen ıskalar dil başına tek toplu çağrıda birleşir
+I18N_WORKERS = int(os.getenv("I18N_WORKERS", 4))
+I18N_BATCH_MS = float(os.getenv("I18N_BATCH_MS", 5))
+I18N_BATCH_MAX = int(os.getenv("I18N_BATCH_MAX", 25))
+# Backend art arda bu kadar hata verirse I18N_BREAKER_COOLDOWN saniye
+# çağrılmaz (metinler çevrilmeden gider), sonra tek deneme isteği geçer
+I18N_BREAKER_FAILURES = int(os.getenv("I18N_BREAKER_FAILURES", 5))
+I18N_BREAKER_COOLDOWN = float(os.getenv("I18N_BREAKER_COOLDOWN", 60))
+
+# ============================================
+# AÇILIŞ GERİ YÜKLEME
+# ============================================
+# Aynı anda bağlanan en fazla kullanıcı ve her bağlantı sonrası bekleme (ms)
+RESTORE_CONCURRENCY = int(os.getenv("RESTORE_CONCURRENCY", 5))
+RESTORE_STAGGER_MS = int(os.getenv("RESTORE_STAGGER_MS", 200))
+
+# ============================================
+# HİBERNASYON (komut plugin'li boştaki kullanıcılar)
+# ============================================
+# Bu kadar saniye boşta kalan komut-plugin'li client kapatılır (0 = kapalı)
+HIBERNATE_AFTER = int(os.getenv("HIBERNATE_AFTER", 15 * 60))
+# Uyandırma kanalı: ilk '.' komutunu yakalayan hafif client açık kalsın mı
+# (kapalıysa kullanıcı yalnızca bot üzerinden işlem yapınca uyanır)
+HIBERNATE_WAKE_LISTENER = os.getenv("HIBERNATE_WAKE_LISTENER", "true").strip().lower() in ("1", "true", "yes", "on")
+
+# ============================================
+# OTURUM SAĞLIK KONTROLÜ
+# ============================================
+# Temel / en kısa (geçici hatadan sonra) / en uzun (sorunsuz oturum) aralık (sn)
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", 120))
+HEALTH_CHECK_MIN_INTERVAL = float(os.getenv("HEALTH_CHECK_MIN_INTERVAL", 30))
+HEALTH_CHECK_MAX_INTERVAL = float(os.getenv("HEALTH_CHECK_MAX_INTERVAL", 600))
+# Aynı anda yapılan en fazla get_me() kontrolü
+HEALTH_CHECK_CONCURRENCY = int(os.getenv("HEALTH_CHECK_CONCURRENCY", 10))
+
+# ============================================
+# İSTATİSTİK GEÇMİŞİ
+# ============================================
+# Örnekleme aralığı (sn) ve tutulacak örnek sayısı (300 sn × 288 = 24 saat)
+STATS_SAMPLE_INTERVAL = int(os.getenv("STATS_SAMPLE_INTERVAL", 300))
+STATS_HISTORY_SIZE = int(os.getenv("STATS_HISTORY_SIZE", 288))
+
 # ============================================
 # VARSAYILAN AYARLAR
 # ============================================
@@ -4,6 +4,10 @@
 
 from .mongo import db, MongoDB
 from .local import local_db, LocalStorage
+from .sqlite import SQLiteDB
+from .cache import TTLCache, MISS
+from .commands import CommandIndex
+from .stats import StatsHistory
 from typing import Optional, Dict, List, Any
 import config
 import logging
@@ -11,46 +15,118 @@ import logging
 log = logging.getLogger(f"kingtg.{__name__}")
 
 
+class _LocalAdapter:
+    """LocalStorage'ın senkron metodlarını await edilebilir hâle getirir.
+    Çağrılar bellekten döndüğü için executor'a gerek yoktur."""
+    
+    def __init__(self, local: LocalStorage):
+        self._local = local
+    
+    def __getattr__(self, name):
+        fn = getattr(self._local, name)
+        
+        async def call(*args, **kwargs):
+            return fn(*args, **kwargs)
+        
+        return call
+
+
+# Plugin önbelleğinde tüm listenin anahtarı (plugin adlarıyla çakışmaz)
+_ALL_PLUGINS = ("__all__",)
+
+
 class Database:
     """
     Birleşik veritabanı arayüzü.
-    MongoDB bağlıysa onu kullanır, değilse yerel dosyalara düşer.
-    Veriler her iki yerde de senkronize tutulur.
+    Birincil depo DB_BACKEND ile seçilir: `json` (LocalStorage) veya `sqlite`.
+    MongoDB bağlıysa yazmalar oraya da yansıtılır.
     """
     
     def __init__(self):
         self.mongo = db
         self.local = local_db
+        # SQLite örneği (ve iş parçacığı) yalnızca seçildiyse oluşturulur
+        self.sqlite = SQLiteDB() if config.DB_BACKEND == "sqlite" else None
+        # Birincil depo (async arayüz): SQLite veya LocalStorage uyarlayıcısı
+        self.store = self.sqlite or _LocalAdapter(local_db)
+        # Okuma önbellekleri: her yazma ilgili anahtarı geçersizleştirir
+        self.user_cache = TTLCache(config.DB_CACHE_SIZE, config.DB_CACHE_TTL)
+        self.plugin_cache = TTLCache(config.DB_CACHE_SIZE, config.DB_CACHE_TTL)
+        # Trend grafikleri için periyodik istatistik örnekleri
+        self.stats_history = StatsHistory(config.STATS_HISTORY_SIZE)
+        # Komut → plugin dizini (açılmış varyantlar dahil); plugin yazmalarıyla güncellenir
+        self.commands = CommandIndex()
     
     async def connect(self) -> bool:
         """Veritabanlarına bağlan"""
+        if self.sqlite is not None and not await self.sqlite.connect():
+            log.warning("SQLite açılamadı — yerel JSON depoya dönülüyor")
+            self.sqlite = None
+            self.store = _LocalAdapter(self.local)
         return await self.mongo.connect()
     
     @property
     def is_mongo_connected(self) -> bool:
         return self.mongo.connected
     
+    def cache_stats(self) -> Dict:
+        """Önbellek isabet/ıska sayaçları"""
+        return {
+            "users": self.user_cache.stats(),
+            "plugins": self.plugin_cache.stats(),
+        }
+    
+    def _invalidate_user(self, user_id: int):
+        self.user_cache.invalidate(user_id)
+    
+    def _invalidate_plugin(self, name: str):
+        self.plugin_cache.invalidate(name)
+        self.plugin_cache.invalidate(_ALL_PLUGINS)
+    
+    async def flush_remote(self, timeout: float = None) -> bool:
+        """Kuyruktaki MongoDB yazmalarının gönderilmesini bekle (read-your-writes).
+        Tek bir yazma için mongo.<metot>(..., wait=True) da kullanılabilir."""
+        return await self.mongo.writes.flush(timeout)
+    
+    def write_queue_stats(self) -> Dict:
+        """MongoDB yazma kuyruğu derinliği / gönderim süreleri"""
+        return self.mongo.writes.stats()
+    
+    async def disconnect(self):
+        """Kapanış: MongoDB yazma kuyruğunu boşalt ve bağlantıyı kapat"""
+        await self.mongo.disconnect()
+    
+    def flush(self):
+        """Yerel depodaki bekleyen yazmaları diske indir (kapanışta)"""
+        self.local.flush()
+        if self.sqlite is not None:
+            self.sqlite.close()
+    
     # ==========================================
     # KULLANICI İŞLEMLERİ
     # ==========================================
     
     async def get_user(self, user_id: int) -> Optional[Dict]:
-        """Kullanıcı bilgilerini getir"""
-        # Önce yerel, sonra MongoDB (yerel her zaman güncel olmalı)
-        local_user = self.local.get_user(user_id)
-        if local_user:
-            return local_user
+        """Kullanıcı bilgilerini getir (read-through önbellek)"""
+        cached = self.user_cache.get(user_id)
+        if cached is not MISS:
+            return cached
+        epoch = self.user_cache.epoch
         
-        if self.mongo.connected:
+        # Önce yerel, sonra MongoDB (yerel her zaman güncel olmalı)
+        user = await self.store.get_user(user_id)
+        if not user and self.mongo.connected:
             user = await self.mongo.get_user(user_id)
-            if user:
-                return user
         
+        if user:
+            self.user_cache.put(user_id, user, epoch=epoch)
+            return user
         return None
     
     async def add_user(self, user_id: int, username: str = None, first_name: str = None) -> bool:
         """Yeni kullanıcı ekle (her iki DB'ye)"""
-        local_result = self.local.add_user(user_id, username, first_name)
+        self._invalidate_user(user_id)
+        local_result = await self.store.add_user(user_id, username, first_name)
         
         if self.mongo.connected:
             mongo_result = await self.mongo.add_user(user_id, username, first_name)
@@ -60,7 +136,8 @@ class Database:
     
     async def update_user(self, user_id: int, data: Dict) -> bool:
         """Kullanıcı bilgilerini güncelle (her iki DB'ye)"""
-        local_result = self.local.update_user(user_id, data)
+        self._invalidate_user(user_id)
+        local_result = await self.store.update_user(user_id, data)
         
         if self.mongo.connected:
             mongo_result = await self.mongo.update_user(user_id, data)
@@ -70,7 +147,8 @@ class Database:
     
     async def delete_user(self, user_id: int) -> bool:
         """Kullanıcıyı sil"""
-        local_result = self.local.delete_user(user_id)
+        self._invalidate_user(user_id)
+        local_result = await self.store.delete_user(user_id)
         
         if self.mongo.connected:
             mongo_result = await self.mongo.delete_user(user_id)
@@ -81,15 +159,15 @@ class Database:
     async def get_all_users(self) -> List[Dict]:
         """Tüm kullanıcıları getir"""
         # Yerel dosyadan al (her zaman güncel)
-        return self.local.get_all_users()
+        return await self.store.get_all_users()
     
     async def get_logged_in_users(self) -> List[Dict]:
         """Giriş yapmış kullanıcıları getir"""
-        return self.local.get_logged_in_users()
+        return await self.store.get_logged_in_users()
     
     async def get_user_count(self) -> int:
         """Toplam kullanıcı sayısı"""
-        return self.local.get_user_count()
+        return await self.store.get_user_count()
     
     # ==========================================
     # SESSION İŞLEMLERİ
@@ -101,7 +179,8 @@ class Database:
         log.info("Session kaydediliyor: user=%s, type=%s, remember=%s", user_id, session_type, remember)
         
         # Yerel dosyaya kaydet
-        local_result = self.local.save_session(user_id, session_data, session_type, phone, remember)
+        self._invalidate_user(user_id)
+        local_result = await self.store.save_session(user_id, session_data, session_type, phone, remember)
         
         # MongoDB'ye kaydet
         if self.mongo.connected:
@@ -113,7 +192,7 @@ class Database:
     async def get_session(self, user_id: int) -> Optional[Dict]:
         """Session bilgilerini getir"""
         # Önce yerel dosyadan dene
-        session = self.local.get_session(user_id)
+        session = await self.store.get_session(user_id)
         if session and session.get("data"):
             log.info("Session bulundu (local): user=%s, type=%s", user_id, session.get('type'))
             return session
@@ -138,7 +217,8 @@ class Database:
         log.info("Session temizleniyor: user=%s, keep_data=%s", user_id, keep_data)
         
         # Yerel temizle
-        self.local.clear_session(user_id, keep_data)
+        self._invalidate_user(user_id)
+        await self.store.clear_session(user_id, keep_data)
         
         # MongoDB temizle
         if self.mongo.connected:
@@ -151,23 +231,30 @@ class Database:
     # ==========================================
     
     async def get_plugin(self, plugin_name: str) -> Optional[Dict]:
-        """Plugin bilgilerini getir"""
-        plugin = self.local.get_plugin(plugin_name)
-        if plugin:
-            return plugin
-        
-        if self.mongo.connected:
+        """Plugin bilgilerini getir (read-through önbellek)"""
+        cached = self.plugin_cache.get(plugin_name)
+        if cached is not MISS:
+            return cached
+        epoch = self.plugin_cache.epoch
+        
+        plugin = await self.store.get_plugin(plugin_name)
+        if not plugin and self.mongo.connected:
             plugin = await self.mongo.get_plugin(plugin_name)
-            if plugin:
-                return plugin
         
+        if plugin:
+            self.plugin_cache.put(plugin_name, plugin, epoch=epoch)
+            return plugin
         return None
     
     async def add_plugin(self, name: str, filename: str, description: str = "",
                         commands: List[str] = None, is_public: bool = True,
                         allowed_users: List[int] = None) -> bool:
         """Plugin ekle"""
-        local_result = self.local.add_plugin(name, filename, description, commands, is_public, allowed_users)
+        self._invalidate_plugin(name)
+        local_result = await self.store.add_plugin(name, filename, description, commands, is_public, allowed_users)
+        # Komut dizini yalnızca kayıt gerçekten yazıldıysa güncellenir
+        if local_result:
+            self.commands.set_plugin(name, commands or [])
         
         if self.mongo.connected:
             mongo_result = await self.mongo.add_plugin(name, filename, description, commands, is_public, allowed_users)
@@ -177,7 +264,10 @@ class Database:
     
     async def update_plugin(self, name: str, data: Dict) -> bool:
         """Plugin güncelle"""
-        local_result = self.local.update_plugin(name, data)
+        self._invalidate_plugin(name)
+        local_result = await self.store.update_plugin(name, data)
+        if local_result and "commands" in data:
+            self.commands.set_plugin(name, data["commands"] or [])
         
         if self.mongo.connected:
             mongo_result = await self.mongo.update_plugin(name, data)
@@ -187,7 +277,9 @@ class Database:
     
     async def delete_plugin(self, name: str) -> bool:
         """Plugin sil"""
-        local_result = self.local.delete_plugin(name)
+        self._invalidate_plugin(name)
+        local_result = await self.store.delete_plugin(name)
+        self.commands.drop_plugin(name)
         
         if self.mongo.connected:
             mongo_result = await self.mongo.delete_plugin(name)
@@ -196,29 +288,63 @@ class Database:
         return local_result
     
     async def get_all_plugins(self) -> List[Dict]:
-        """Tüm pluginleri getir"""
-        return self.local.get_all_plugins()
+        """Tüm pluginleri getir (önbellekli; tekil girdileri de ısıtır)"""
+        cached = self.plugin_cache.get(_ALL_PLUGINS)
+        if cached is not MISS:
+            return cached
+        epoch = self.plugin_cache.epoch
+        
+        plugins = await self.store.get_all_plugins()
+        self.plugin_cache.put(_ALL_PLUGINS, plugins, epoch=epoch)
+        for plugin in plugins:
+            if plugin.get("name"):
+                self.plugin_cache.put(plugin["name"], plugin, epoch=epoch)
+        return plugins
     
     async def get_public_plugins(self) -> List[Dict]:
         """Genel pluginleri getir"""
-        return self.local.get_public_plugins()
+        plugins = await self.get_all_plugins()
+        return [p for p in plugins if p.get("is_public") and p.get("is_active")]
     
     async def get_user_accessible_plugins(self, user_id: int) -> List[Dict]:
         """Kullanıcının erişebildiği pluginleri getir"""
-        return self.local.get_user_accessible_plugins(user_id)
+        accessible = []
+        for p in await self.get_all_plugins():
+            if not p.get("is_active"):
+                continue
+            if user_id in p.get("restricted_users", []):
+                continue
+            if p.get("is_public") or user_id in p.get("allowed_users", []):
+                accessible.append(p)
+        return accessible
+    
+    async def command_index(self) -> CommandIndex:
+        """Komut → plugin dizini (ilk çağrıda tüm pluginlerden kurulur)"""
+        index = self.commands
+        while not index.ready:
+            generation = index.generation
+            plugins = await self.get_all_plugins()
+            if generation == index.generation:
+                index.rebuild(plugins)
+        return index
     
     async def check_command_exists(self, command: str, exclude_plugin: str = None) -> Optional[str]:
-        """Komut kontrolü"""
-        return self.local.check_command_exists(command, exclude_plugin)
+        """Komut kontrolü (dizinde tek arama)"""
+        return (await self.command_index()).owner(command, exclude_plugin)
+    
+    async def check_commands(self, commands: List[str], exclude_plugin: str = None) -> Dict[str, str]:
+        """Bir plugin'in tüm komut kümesini tek çağrıda doğrula: {komut: sahibi}"""
+        return (await self.command_index()).conflicts(commands, exclude_plugin)
     
     async def add_plugin_user_access(self, plugin_name: str, user_id: int) -> bool:
         """Plugin erişimi ekle"""
-        plugin = self.local.get_plugin(plugin_name)
+        self._invalidate_plugin(plugin_name)
+        plugin = await self.store.get_plugin(plugin_name)
         if plugin:
             allowed = plugin.get("allowed_users", [])
             if user_id not in allowed:
                 allowed.append(user_id)
-                self.local.update_plugin(plugin_name, {"allowed_users": allowed})
+                await self.store.update_plugin(plugin_name, {"allowed_users": allowed})
         
         if self.mongo.connected:
             await self.mongo.add_plugin_user_access(plugin_name, user_id)
@@ -227,12 +353,13 @@ class Database:
     
     async def remove_plugin_user_access(self, plugin_name: str, user_id: int) -> bool:
         """Plugin erişimi kaldır"""
-        plugin = self.local.get_plugin(plugin_name)
+        self._invalidate_plugin(plugin_name)
+        plugin = await self.store.get_plugin(plugin_name)
         if plugin:
             allowed = plugin.get("allowed_users", [])
             if user_id in allowed:
                 allowed.remove(user_id)
-                self.local.update_plugin(plugin_name, {"allowed_users": allowed})
+                await self.store.update_plugin(plugin_name, {"allowed_users": allowed})
         
         if self.mongo.connected:
             await self.mongo.remove_plugin_user_access(plugin_name, user_id)
@@ -241,12 +368,13 @@ class Database:
     
     async def restrict_plugin_user(self, plugin_name: str, user_id: int) -> bool:
         """Plugin kısıtla"""
-        plugin = self.local.get_plugin(plugin_name)
+        self._invalidate_plugin(plugin_name)
+        plugin = await self.store.get_plugin(plugin_name)
         if plugin:
             restricted = plugin.get("restricted_users", [])
             if user_id not in restricted:
                 restricted.append(user_id)
-                self.local.update_plugin(plugin_name, {"restricted_users": restricted})
+                await self.store.update_plugin(plugin_name, {"restricted_users": restricted})
         
         if self.mongo.connected:
             await self.mongo.restrict_plugin_user(plugin_name, user_id)
@@ -255,12 +383,13 @@ class Database:
     
     async def unrestrict_plugin_user(self, plugin_name: str, user_id: int) -> bool:
         """Plugin kısıtlamayı kaldır"""
-        plugin = self.local.get_plugin(plugin_name)
+        self._invalidate_plugin(plugin_name)
+        plugin = await self.store.get_plugin(plugin_name)
         if plugin:
             restricted = plugin.get("restricted_users", [])
             if user_id in restricted:
                 restricted.remove(user_id)
-                self.local.update_plugin(plugin_name, {"restricted_users": restricted})
+                await self.store.update_plugin(plugin_name, {"restricted_users": restricted})
         
         if self.mongo.connected:
             await self.mongo.unrestrict_plugin_user(plugin_name, user_id)
@@ -273,7 +402,8 @@ class Database:
     
     async def ban_user(self, user_id: int, reason: str = None, banned_by: int = None) -> bool:
         """Kullanıcıyı banla"""
-        self.local.ban_user(user_id, reason)
+        self._invalidate_user(user_id)
+        await self.store.ban_user(user_id, reason)
         
         if self.mongo.connected:
             await self.mongo.ban_user(user_id, reason, banned_by)
@@ -282,7 +412,8 @@ class Database:
     
     async def unban_user(self, user_id: int) -> bool:
         """Ban kaldır"""
-        self.local.unban_user(user_id)
+        self._invalidate_user(user_id)
+        await self.store.unban_user(user_id)
         
         if self.mongo.connected:
             await self.mongo.unban_user(user_id)
@@ -291,11 +422,11 @@ class Database:
     
     async def is_banned(self, user_id: int) -> bool:
         """Ban kontrolü"""
-        return self.local.is_banned(user_id)
+        return await self.store.is_banned(user_id)
     
     async def get_banned_users(self) -> List[Dict]:
         """Banlı kullanıcılar"""
-        return self.local.get_banned_users()
+        return await self.store.get_banned_users()
     
     # ==========================================
     # SUDO İŞLEMLERİ
@@ -303,7 +434,8 @@ class Database:
     
     async def add_sudo(self, user_id: int) -> bool:
         """Sudo ekle"""
-        self.local.add_sudo(user_id)
+        self._invalidate_user(user_id)
+        await self.store.add_sudo(user_id)
         
         if self.mongo.connected:
             await self.mongo.add_sudo(user_id)
@@ -312,7 +444,8 @@ class Database:
     
     async def remove_sudo(self, user_id: int) -> bool:
         """Sudo kaldır"""
-        self.local.remove_sudo(user_id)
+        self._invalidate_user(user_id)
+        await self.store.remove_sudo(user_id)
         
         if self.mongo.connected:
             await self.mongo.remove_sudo(user_id)
@@ -323,11 +456,11 @@ class Database:
         """Sudo kontrolü"""
         if user_id == config.OWNER_ID:
             return True
-        return self.local.is_sudo(user_id)
+        return await self.store.is_sudo(user_id)
     
     async def get_sudos(self) -> List[Dict]:
         """Sudo listesi"""
-        return self.local.get_sudos()
+        return await self.store.get_sudos()
     
     # ==========================================
     # AYARLAR İŞLEMLERİ
@@ -335,11 +468,11 @@ class Database:
     
     async def get_settings(self) -> Dict:
         """Ayarları getir"""
-        return self.local.get_settings()
+        return await self.store.get_settings()
     
     async def update_settings(self, data: Dict) -> bool:
         """Ayarları güncelle"""
-        self.local.update_settings(data)
+        await self.store.update_settings(data)
         
         if self.mongo.connected:
             await self.mongo.update_settings(data)
@@ -353,6 +486,8 @@ class Database:
     async def add_log(self, log_type: str, user_id: int = None,
                      message: str = "", data: Dict = None) -> bool:
         """Log ekle"""
+        if self.sqlite is not None:
+            await self.sqlite.add_log(log_type, user_id, message, data)
         if self.mongo.connected:
             return await self.mongo.add_log(log_type, user_id, message, data)
         return True
@@ -360,7 +495,14 @@ class Database:
     async def get_logs(self, limit: int = 100, log_type: str = None) -> List[Dict]:
         """Logları getir"""
         if self.mongo.connected:
+            # Log yazmaları kuyruktan gider: az önce eklenenler de görünsün
+            try:
+                await self.flush_remote(5.0)
+            except Exception:
+                log.debug("Log okumadan önce kuyruk boşaltılamadı", exc_info=True)
             return await self.mongo.get_logs(limit, log_type)
+        if self.sqlite is not None:
+            return await self.sqlite.get_logs(limit, log_type)
         return []
     
     # ==========================================
@@ -368,8 +510,17 @@ class Database:
     # ==========================================
     
     async def get_stats(self) -> Dict:
-        """İstatistikleri getir"""
-        return self.local.get_stats()
+        """İstatistikleri getir (depo sayaçlarından anlık okuma)"""
+        return await self.store.get_stats()
+    
+    async def record_stats_sample(self, active_clients: int = 0, always_on_users: int = 0) -> Dict:
+        """Geçmiş halka tamponuna bir örnek ekle"""
+        stats = await self.get_stats()
+        return self.stats_history.record({
+            **stats,
+            "active_clients": active_clients,
+            "always_on_users": always_on_users,
+        })
     
     # ==========================================
     # TEPKİ SİSTEMİ
@@ -384,16 +535,20 @@ class Database:
                 return reaction
         
         # Yerel dosyadan al
-        return self.local.get_user_reaction(reaction_key, user_id)
+        return await self.store.get_user_reaction(reaction_key, user_id)
     
     async def set_user_reaction(self, reaction_key: str, user_id: int, emoji: Optional[str]) -> bool:
         """Kullanıcının tepkisini kaydet veya sil"""
         # Yerel dosyaya kaydet
-        local_result = self.local.set_user_reaction(reaction_key, user_id, emoji)
+        local_result = await self.store.set_user_reaction(reaction_key, user_id, emoji)
         
-        # MongoDB'ye kaydet
+        # MongoDB'ye kaydet. Okuma önce Mongo'ya bakar: yazma beklenmezse
+        # silinen tepki hemen ardından Mongo'dan geri okunur
         if self.mongo.connected:
-            await self.mongo.set_user_reaction(reaction_key, user_id, emoji)
+            try:
+                await self.mongo.set_user_reaction(reaction_key, user_id, emoji, wait=True)
+            except Exception:
+                log.warning("Tepki MongoDB'ye yazılamadı: %s/%s", reaction_key, user_id, exc_info=True)
         
         return local_result
     
@@ -421,8 +576,7 @@ class Database:
     
     async def get_always_on_users(self) -> List[Dict]:
         """Always-on plugin'i olan kullanıcıları getir"""
-        all_users = await self.get_all_users()
-        return [u for u in all_users if u.get("always_on_plugins", [])]
+        return await self.store.get_always_on_users()
     
     async def update_always_on_plugins(self, user_id: int, plugins: List[str]) -> bool:
         """Kullanıcının always-on plugin listesini güncelle"""
@@ -0,0 +1,82 @@
+# ============================================
+# KingTG UserBot Service - Okuma Önbelleği (TTL + LRU)
+# ============================================
+# Database facade'ı get_user / get_plugin sonuçlarını burada tutar.
+# Her update_*/delete_* çağrısı ilgili anahtarı geçersizleştirir; TTL yalnızca
+# facade dışından (ör. başka süreçten) yapılan değişikliklere karşı emniyettir.
+# ============================================
+
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+# Önbellekte "yok" ile "None değeri" ayrımı için
+MISS = object()
+
+
+class TTLCache:
+    """Boyut sınırlı (LRU) ve süreli (TTL) anahtar→değer önbelleği.
+
+    Değerler kopyalanarak döndürülür: çağıranın dönen sözlükteki listeleri
+    yerinde değiştirmesi (ör. active_plugins.append) önbelleği bozmaz.
+    """
+
+    def __init__(self, maxsize: int = 5000, ttl: float = 300.0):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Her geçersizleştirmede artar: okuma sürerken yazma olduysa, okunan
+        # (artık eski) değer önbelleğe YAZILMAZ (bkz. put(..., epoch=))
+        self.epoch = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Değeri getir; yoksa/süresi dolmuşsa MISS döndür"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISS
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return MISS
+        self._data.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(value)
+
+    def put(self, key: Hashable, value: Any, epoch: int = None):
+        """Değeri kopyasıyla sakla (en eski girdi taşarsa atılır).
+        epoch verilmişse ve o andan beri geçersizleştirme olduysa saklamaz."""
+        if epoch is not None and epoch != self.epoch:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """Tek anahtarı geçersizleştir"""
+        self.epoch += 1
+        if self._data.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        """Tüm önbelleği boşalt"""
+        self.epoch += 1
+        self.invalidations += len(self._data)
+        self._data.clear()
+
+    def stats(self) -> Dict:
+        """İsabet/ıska sayaçları"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / total * 100, 1) if total else 0.0,
+        }
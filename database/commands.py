@@ -0,0 +1,123 @@
+# ============================================
+# KingTG UserBot Service - Komut → Plugin Dizini
+# ============================================
+# Pluginlerin `commands` listeleri kayıt sırasında zaten açılmış halde
+# saklanır ([kc]lon → klon, clon; (?:ker)? → stic, sticker). Bu dizin o
+# varyantların hepsini tek sözlükte tutar:
+#   - çakışma kontrolü tek arama (JSON depoda tüm pluginleri taramak yerine)
+#   - bir plugin'in tüm komut kümesi tek çağrıda doğrulanır
+#   - yardım sayfaları / yönlendirici komutun sahibini DB'ye gitmeden bulur
+# Database facade'ı ilk kullanımda tüm pluginlerden kurar ve her plugin
+# yazmasında günceller.
+# ============================================
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def normalize_command(command: str) -> str:
+    """`.afk`, ` afk ` → `afk`"""
+    return (command or "").strip().lstrip(".").strip()
+
+
+class CommandIndex:
+    """{komut: [sahip pluginler]} ve {plugin: (komutlar)}"""
+
+    def __init__(self):
+        # Sahip listesi kayıt sırasını korur: çakışmada ilk sahip döner
+        self._owners: Dict[str, List[str]] = {}
+        self._by_plugin: Dict[str, Tuple[str, ...]] = {}
+        self.ready = False
+        # Her plugin yazmasında artar: kurulum sürerken yazma olduysa,
+        # okunan (artık eski) liste dizine YAZILMAZ
+        self.generation = 0
+
+    # ==========================================
+    # BAKIM
+    # ==========================================
+
+    def rebuild(self, plugins: Iterable[Dict]):
+        self._owners.clear()
+        self._by_plugin.clear()
+        for plugin in plugins:
+            if plugin.get("name"):
+                self._add(plugin["name"], plugin.get("commands") or [])
+        self.ready = True
+
+    def set_plugin(self, name: str, commands: Iterable[str]):
+        """Plugin'in komut kümesini değiştir (yoksa ekle)"""
+        self.generation += 1
+        if not self.ready:
+            return
+        self._remove(name)
+        self._add(name, commands or [])
+
+    def drop_plugin(self, name: str):
+        self.generation += 1
+        if self.ready:
+            self._remove(name)
+
+    def invalidate(self):
+        """Dizini at; sonraki kullanımda yeniden kurulur"""
+        self.generation += 1
+        self.ready = False
+
+    def _add(self, name: str, commands: Iterable[str]):
+        cleaned = []
+        for command in commands:
+            command = normalize_command(command)
+            if command and command not in cleaned:
+                cleaned.append(command)
+                self._owners.setdefault(command, []).append(name)
+        self._by_plugin[name] = tuple(cleaned)
+
+    def _remove(self, name: str):
+        for command in self._by_plugin.pop(name, ()):
+            owners = self._owners.get(command)
+            if owners is None:
+                continue
+            owners[:] = [o for o in owners if o != name]
+            if not owners:
+                del self._owners[command]
+
+    # ==========================================
+    # SORGU
+    # ==========================================
+
+    def owner(self, command: str, exclude: str = None) -> Optional[str]:
+        """Komutu tanımlayan (exclude dışındaki) ilk plugin"""
+        for name in self._owners.get(normalize_command(command), ()):
+            if name != exclude:
+                return name
+        return None
+
+    def owners(self, command: str) -> List[str]:
+        return list(self._owners.get(normalize_command(command), ()))
+
+    def conflicts(self, commands: Iterable[str], exclude: str = None) -> Dict[str, str]:
+        """{komut: sahibi} — verilen kümede başka plugine ait olanlar"""
+        result = {}
+        for command in commands or ():
+            owner = self.owner(command, exclude)
+            if owner is not None:
+                result[normalize_command(command)] = owner
+        return result
+
+    def commands_of(self, name: str) -> Tuple[str, ...]:
+        return self._by_plugin.get(name, ())
+
+    def plugins(self) -> List[str]:
+        return list(self._by_plugin)
+
+    def duplicates(self) -> Dict[str, List[str]]:
+        """Birden çok pluginde tanımlı komutlar"""
+        return {c: list(o) for c, o in self._owners.items() if len(o) > 1}
+
+    def __contains__(self, command: str) -> bool:
+        return normalize_command(command) in self._owners
+
+    def __len__(self) -> int:
+        return len(self._owners)
+
+    def stats(self) -> Dict:
+        return {"commands": len(self._owners), "plugins": len(self._by_plugin),
+                "duplicates": sum(1 for o in self._owners.values() if len(o) > 1)}
@@ -0,0 +1,259 @@
+# ============================================
+# KingTG UserBot Service - Write-Behind Günlük (Journal)
+# ============================================
+# LocalStorage kullanıcı yazmalarını tüm dosyayı yeniden yazmak yerine
+# append-only bir günlüğe (satır başına bir JSON) ekler. Arka plan iş
+# parçacığı günlüğü belirli aralıkla / boyut eşiğinde ana dosyaya sıkıştırır.
+#
+# Dayanıklılık modları (LOCAL_DB_DURABILITY):
+#   fsync → her değişiklik anında yazılır + fsync (en güvenli, en yavaş)
+#   group → değişiklikler N ms'lik pencerede biriktirilir, tek fsync ile yazılır
+#   none  → group gibi biriktirilir ama fsync yapılmaz (işletim sistemine güvenilir)
+# Aynı pencere içinde aynı kayda gelen değişiklikler TEK satıra iner.
+# ============================================
+
+import os
+import json
+import time
+import threading
+from typing import Callable, Dict, Optional
+
+import config
+import logging
+
+log = logging.getLogger(f"kingtg.{__name__}")
+
+DURABILITY_MODES = ("fsync", "group", "none")
+
+# Silme işaretçisi (bekleyen değişikliklerde "bu kayıt silindi")
+_DELETED = object()
+
+
+class WriteBehindJournal:
+    """Anahtar→kayıt deposu için write-behind günlüğü.
+
+    Günlük satırları TAM kayıt içerir ({"op": "set", "id": .., "v": {...}}
+    veya {"op": "del", "id": ..}); bu sayede tekrar oynatma idempotenttir ve
+    yarıda kalmış sıkıştırma güvenle yeniden oynatılabilir.
+    """
+
+    def __init__(self, snapshot_path: str, lock: threading.RLock,
+                 snapshot_fn: Callable[[], Dict], durability: str = "group",
+                 group_commit_ms: int = 50, compact_interval: float = 60.0,
+                 compact_bytes: int = 4 * 1024 * 1024):
+        if durability not in DURABILITY_MODES:
+            log.warning("Geçersiz dayanıklılık modu '%s' → 'group'", durability)
+            durability = "group"
+        self.snapshot_path = snapshot_path
+        self.path = snapshot_path + ".journal"
+        self.old_path = self.path + ".old"
+        self.durability = durability
+        self.group_commit = max(1, group_commit_ms) / 1000.0
+        self.compact_interval = compact_interval
+        self.compact_bytes = compact_bytes
+        # Depo ile AYNI kilit: anlık görüntü ve günlük sırası tutarlı kalır
+        self._lock = lock
+        self._snapshot_fn = snapshot_fn
+        self._pending: Dict[str, object] = {}
+        self._fh = None
+        self._size = 0
+        self._last_compact = time.time()
+        # Sıkıştırmalar sıralanır (ortak .tmp/.old dosyaları)
+        self._compact_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ==========================================
+    # TEKRAR OYNATMA (açılış)
+    # ==========================================
+
+    def replay(self, data: Dict) -> int:
+        """Yarıda kalmış sıkıştırma + günlüğü anlık görüntünün üzerine uygula.
+        Uygulanan satır sayısını döndürür."""
+        applied = 0
+        for path in (self.old_path, self.path):
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            # Çökme anında yarım kalan son satır → yok say
+                            log.warning("Günlükte bozuk satır atlandı: %s", path)
+                            continue
+                        if entry.get("op") == "set":
+                            data[entry["id"]] = entry.get("v")
+                        elif entry.get("op") == "del":
+                            data.pop(entry["id"], None)
+                        applied += 1
+            except Exception:
+                log.error("Günlük okunamadı: %s", path, exc_info=True)
+        if applied:
+            log.info("Günlükten %s değişiklik geri oynatıldı", applied)
+        return applied
+
+    # ==========================================
+    # YAZMA
+    # ==========================================
+
+    def record(self, key: str, value: Optional[Dict]):
+        """Kaydın yeni hâlini günlüğe işle (value=None → silindi).
+        Çağıran, depo kilidini TUTARKEN çağırmalıdır."""
+        self._pending[key] = _DELETED if value is None else value
+        if self.durability == "fsync" or self._stopped:
+            self._flush_locked(fsync=True)
+            if self._stopped or not self._compact_due():
+                return
+        # Sıkıştırma (fsync modunda da) arka plan iş parçacığında yapılır:
+        # çağıran olay döngüsü tüm dosyanın yazılmasını beklemez
+        self._ensure_thread()
+        self._wake.set()
+
+    def _open(self):
+        if self._fh is None:
+            self._fh = open(self.path, "a", encoding="utf-8")
+            self._size = self._fh.tell()
+        return self._fh
+
+    def _flush_locked(self, fsync: bool) -> int:
+        """Bekleyen değişiklikleri günlüğe yaz (kilit tutulurken)."""
+        if not self._pending:
+            return 0
+        lines = []
+        for key, value in self._pending.items():
+            if value is _DELETED:
+                entry = {"op": "del", "id": key}
+            else:
+                entry = {"op": "set", "id": key, "v": value}
+            lines.append(json.dumps(entry, ensure_ascii=False, default=str))
+        self._pending.clear()
+        payload = "\n".join(lines) + "\n"
+        fh = self._open()
+        fh.write(payload)
+        fh.flush()
+        if fsync:
+            os.fsync(fh.fileno())
+        self._size += len(payload.encode("utf-8"))
+        return len(lines)
+
+    # ==========================================
+    # SIKIŞTIRMA
+    # ==========================================
+
+    def _compact_due(self) -> bool:
+        if self._size <= 0:
+            return False
+        return (self._size >= self.compact_bytes
+                or time.time() - self._last_compact >= self.compact_interval)
+
+    def _snapshot_copy(self) -> Dict:
+        """Anlık görüntünün kayıt başına sığ kopyası (kilit tutulurken).
+        Depo kayıtların yalnızca üst düzey alanlarını yerinde değiştirir
+        (iç içe değerler değiştirilmez, yenisiyle değiştirilir); bu yüzden
+        kopya kilit bırakıldıktan sonra da tutarlı serileştirilebilir."""
+        return {k: dict(v) if isinstance(v, dict) else v
+                for k, v in self._snapshot_fn().items()}
+
+    def compact(self):
+        """Günlüğü ana dosyaya sıkıştır.
+
+        Kilit altında yalnızca bekleyenler yazılır, anlık görüntü kopyalanır
+        ve günlük `.old`'a döndürülür; serileştirme ve fsync'li yazma kilit
+        DIŞINDA yapılır (yazmalar yeni günlüğe devam eder). Sıra çökme-
+        güvenlidir: ana dosya atomik yazıldıktan sonra `.old` silinir. Arada
+        çökülürse (ya da yazma başarısız olursa) açılışta ana dosya + `.old`
+        + günlük sırasıyla yeniden oynatılır."""
+        with self._compact_lock:
+            try:
+                with self._lock:
+                    self._flush_locked(fsync=self.durability != "none")
+                    snapshot = self._snapshot_copy()
+                    if self._fh is not None:
+                        self._fh.close()
+                        self._fh = None
+                    self._rotate()
+                    self._size = 0
+                    self._last_compact = time.time()
+                payload = json.dumps(snapshot, ensure_ascii=False, indent=2, default=str)
+                tmp = self.snapshot_path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.snapshot_path)
+                if os.path.exists(self.old_path):
+                    os.remove(self.old_path)
+            except Exception:
+                log.error("Günlük sıkıştırma hatası", exc_info=True)
+
+    def _rotate(self):
+        """Günlüğü `.old`'a döndür. Önceki sıkıştırma yarım kaldıysa `.old`
+        korunur ve günlük onun sonuna eklenir (sıra bozulmaz)."""
+        if not os.path.exists(self.path):
+            return
+        if not os.path.exists(self.old_path):
+            os.replace(self.path, self.old_path)
+            return
+        with open(self.path, "r", encoding="utf-8") as src, \
+                open(self.old_path, "a", encoding="utf-8") as dst:
+            dst.write(src.read())
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.remove(self.path)
+
+    # ==========================================
+    # ARKA PLAN İŞ PARÇACIĞI
+    # ==========================================
+
+    def _ensure_thread(self):
+        if self._thread is None and not self._stopped:
+            self._thread = threading.Thread(
+                target=self._run, name="kingtg-journal", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        """Grup commit + periyodik sıkıştırma döngüsü"""
+        while not self._stopped:
+            self._wake.wait(timeout=self.compact_interval)
+            if self._stopped:
+                break
+            # Pencere boyunca gelen değişiklikleri biriktir
+            time.sleep(self.group_commit)
+            self._wake.clear()
+            due = False
+            with self._lock:
+                try:
+                    self._flush_locked(fsync=self.durability == "group")
+                    due = self._compact_due()
+                except Exception:
+                    log.error("Günlük yazma hatası", exc_info=True)
+            if due:
+                self.compact()
+
+    def close(self):
+        """Bekleyenleri yaz, sıkıştır ve iş parçacığını durdur"""
+        self._stopped = True
+        self._wake.set()
+        self.compact()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+
+def journal_from_config(snapshot_path: str, lock: threading.RLock,
+                        snapshot_fn: Callable[[], Dict]) -> WriteBehindJournal:
+    """config'teki LOCAL_DB_* ayarlarıyla günlük oluştur"""
+    return WriteBehindJournal(
+        snapshot_path, lock, snapshot_fn,
+        durability=config.LOCAL_DB_DURABILITY,
+        group_commit_ms=config.LOCAL_DB_GROUP_COMMIT_MS,
+        compact_interval=config.LOCAL_DB_COMPACT_INTERVAL,
+        compact_bytes=config.LOCAL_DB_COMPACT_BYTES,
+    )
@@ -4,19 +4,48 @@
 
 import os
 import json
+import copy
+import atexit
+import threading
 from datetime import datetime
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Set, Any
 import config
 import logging
+from .journal import journal_from_config
 
 log = logging.getLogger(f"kingtg.{__name__}")
 
 
 class LocalStorage:
-    """JSON dosyalarında veri saklama sınıfı"""
+    """JSON dosyalarında veri saklama sınıfı.
+
+    Kullanıcılar bellekte tutulur: `users.json` yalnızca ilk erişimde BİR KEZ
+    okunur, sonrası yazmalarla senkron kalan sözlük + ikincil indekslerden
+    okunur. Eskiden her get_user/update_user tüm dosyayı yeniden parse
+    ediyordu (yüzlerce kullanıcıda restore_sessions yüzlerce tam okuma).
+
+    Yazmalar da tüm dosyayı yeniden yazmaz: değişen kayıt write-behind
+    günlüğüne eklenir, günlük arka planda `users.json`'a sıkıştırılır
+    (bkz. database/journal.py).
+    """
     
     def __init__(self):
         self._ensure_files()
+        # Bellekteki kullanıcı deposu {str(user_id): kayıt} — lazy yüklenir
+        self._users: Optional[Dict[str, Dict]] = None
+        # İkincil indeksler (str(user_id) kümeleri)
+        self._logged_in: Set[str] = set()
+        self._always_on: Set[str] = set()
+        self._banned: Set[str] = set()
+        self._sudos: Set[str] = set()
+        self._plugin_users: Dict[str, Set[str]] = {}
+        # Plugin sayaçları {"total": n, "public": n} — yazmalarda artımlı güncellenir
+        self._plugin_counts: Optional[Dict[str, int]] = None
+        self._users_lock = threading.RLock()
+        self._journal = journal_from_config(
+            config.USERS_FILE, self._users_lock, lambda: self._users or {}
+        )
+        atexit.register(self.flush)
     
     def _ensure_files(self):
         """Gerekli dosyaları oluştur"""
@@ -58,17 +87,83 @@ class LocalStorage:
     # KULLANICI İŞLEMLERİ
     # ==========================================
     
+    def _user_store(self) -> Dict[str, Dict]:
+        """Kullanıcı sözlüğünü döndür (ilk çağrıda diskten yükle + indeksle)"""
+        if self._users is None:
+            with self._users_lock:
+                if self._users is None:
+                    users = self._load_json(config.USERS_FILE)
+                    users = users if isinstance(users, dict) else {}
+                    # Çökme öncesi sıkıştırılmamış değişiklikleri geri oynat
+                    replayed = self._journal.replay(users)
+                    for key, user in users.items():
+                        self._index_user(key, user)
+                    self._users = users
+                    if replayed:
+                        self._journal.compact()
+                    log.info("Kullanıcı deposu belleğe alındı: %s kayıt", len(users))
+        return self._users
+
+    def _index_user(self, key: str, user: Dict):
+        """Kaydı ikincil indekslere ekle"""
+        if user.get("is_logged_in"):
+            self._logged_in.add(key)
+        if user.get("always_on_plugins"):
+            self._always_on.add(key)
+        if user.get("is_banned"):
+            self._banned.add(key)
+        if user.get("is_sudo"):
+            self._sudos.add(key)
+        for plugin_name in user.get("active_plugins") or []:
+            self._plugin_users.setdefault(plugin_name, set()).add(key)
+
+    def _unindex_user(self, key: str, user: Dict):
+        """Kaydı ikincil indekslerden çıkar"""
+        self._logged_in.discard(key)
+        self._always_on.discard(key)
+        self._banned.discard(key)
+        self._sudos.discard(key)
+        for plugin_name in user.get("active_plugins") or []:
+            users = self._plugin_users.get(plugin_name)
+            if users is not None:
+                users.discard(key)
+                if not users:
+                    del self._plugin_users[plugin_name]
+
+    def _save_user(self, key: str) -> bool:
+        """Kaydın yeni hâlini günlüğe işle (silindiyse silme satırı)"""
+        try:
+            self._journal.record(key, self._user_store().get(key))
+            return True
+        except Exception:
+            log.error("Kullanıcı günlüğe yazılamadı: %s", key, exc_info=True)
+            return False
+
+    def flush(self):
+        """Bekleyen kullanıcı yazmalarını diske indir (kapanışta çağrılır)"""
+        if self._users is not None:
+            self._journal.close()
+
+    def _select_users(self, keys) -> List[Dict]:
+        """İndeksteki anahtarlara ait kayıtların kopyalarını döndür"""
+        users = self._user_store()
+        return [copy.deepcopy(users[k]) for k in list(keys) if k in users]
+    
     def get_user(self, user_id: int) -> Optional[Dict]:
         """Kullanıcı bilgilerini getir"""
-        users = self._load_json(config.USERS_FILE) or {}
-        return users.get(str(user_id))
+        user = self._user_store().get(str(user_id))
+        # Kopya döndür: çağıranın listeyi yerinde değiştirmesi indeksleri bozmasın
+        return copy.deepcopy(user) if user is not None else None
     
     def add_user(self, user_id: int, username: str = None, first_name: str = None) -> bool:
         """Yeni kullanıcı ekle"""
-        users = self._load_json(config.USERS_FILE) or {}
+        users = self._user_store()
+        key = str(user_id)
         
-        if str(user_id) not in users:
-            users[str(user_id)] = {
+        with self._users_lock:
+            if key in users:
+                return True
+            users[key] = {
                 "user_id": user_id,
                 "username": username,
                 "first_name": first_name,
@@ -88,47 +183,57 @@ class LocalStorage:
                 "ban_reason": None,
                 "settings": {}
             }
-            return self._save_json(config.USERS_FILE, users)
-        return True
+            self._index_user(key, users[key])
+            return self._save_user(key)
     
     def update_user(self, user_id: int, data: Dict) -> bool:
         """Kullanıcı bilgilerini güncelle"""
-        users = self._load_json(config.USERS_FILE) or {}
+        users = self._user_store()
+        key = str(user_id)
         
-        if str(user_id) not in users:
-            # Kullanıcı yoksa oluştur
-            self.add_user(user_id)
-            users = self._load_json(config.USERS_FILE) or {}
-        
-        if str(user_id) in users:
-            users[str(user_id)].update(data)
-            users[str(user_id)]["last_active"] = datetime.utcnow().isoformat()
-            return self._save_json(config.USERS_FILE, users)
-        return False
+        with self._users_lock:
+            if key not in users:
+                # Kullanıcı yoksa oluştur
+                self.add_user(user_id)
+            
+            user = users[key]
+            self._unindex_user(key, user)
+            user.update(copy.deepcopy(data))
+            user["last_active"] = datetime.utcnow().isoformat()
+            self._index_user(key, user)
+            return self._save_user(key)
     
     def delete_user(self, user_id: int) -> bool:
         """Kullanıcıyı sil"""
-        users = self._load_json(config.USERS_FILE) or {}
+        users = self._user_store()
+        key = str(user_id)
         
-        if str(user_id) in users:
-            del users[str(user_id)]
-            return self._save_json(config.USERS_FILE, users)
-        return False
+        with self._users_lock:
+            if key not in users:
+                return False
+            self._unindex_user(key, users.pop(key))
+            return self._save_user(key)
     
     def get_all_users(self) -> List[Dict]:
         """Tüm kullanıcıları getir"""
-        users = self._load_json(config.USERS_FILE) or {}
-        return list(users.values())
+        return copy.deepcopy(list(self._user_store().values()))
     
     def get_logged_in_users(self) -> List[Dict]:
         """Giriş yapmış kullanıcıları getir"""
-        users = self._load_json(config.USERS_FILE) or {}
-        return [u for u in users.values() if u.get("is_logged_in")]
+        return self._select_users(self._logged_in)
+    
+    def get_always_on_users(self) -> List[Dict]:
+        """Always-on plugin'i olan kullanıcıları getir"""
+        return self._select_users(self._always_on)
+    
+    def get_plugin_user_ids(self, plugin_name: str) -> List[int]:
+        """Plugin'i aktif olan kullanıcı ID'leri"""
+        self._user_store()
+        return [int(k) for k in self._plugin_users.get(plugin_name, ())]
     
     def get_user_count(self) -> int:
         """Toplam kullanıcı sayısı"""
-        users = self._load_json(config.USERS_FILE) or {}
-        return len(users)
+        return len(self._user_store())
     
     # ==========================================
     # SESSION İŞLEMLERİ
@@ -179,6 +284,23 @@ class LocalStorage:
     # PLUGİN İŞLEMLERİ
     # ==========================================
     
+    def _count_plugin(self, plugin: Optional[Dict], sign: int):
+        """Plugin sayaçlarına kaydı ekle (+1) / çıkar (-1)"""
+        if self._plugin_counts is None or not plugin:
+            return
+        self._plugin_counts["total"] += sign
+        if plugin.get("is_public"):
+            self._plugin_counts["public"] += sign
+    
+    def _plugin_counters(self) -> Dict[str, int]:
+        if self._plugin_counts is None:
+            plugins = self._load_json(config.PLUGINS_FILE) or {}
+            self._plugin_counts = {
+                "total": len(plugins),
+                "public": sum(1 for p in plugins.values() if p.get("is_public")),
+            }
+        return self._plugin_counts
+    
     def get_plugin(self, plugin_name: str) -> Optional[Dict]:
         """Plugin bilgilerini getir"""
         plugins = self._load_json(config.PLUGINS_FILE) or {}
@@ -190,6 +312,7 @@ class LocalStorage:
         """Yeni plugin ekle"""
         plugins = self._load_json(config.PLUGINS_FILE) or {}
         
+        previous = plugins.get(name)
         plugins[name] = {
             "name": name,
             "filename": filename,
@@ -204,15 +327,25 @@ class LocalStorage:
             "usage_count": 0
         }
         
-        return self._save_json(config.PLUGINS_FILE, plugins)
+        # Sayaçlar yalnızca yazma başarılıysa güncellenir
+        if not self._save_json(config.PLUGINS_FILE, plugins):
+            return False
+        self._count_plugin(previous, -1)
+        self._count_plugin(plugins[name], +1)
+        return True
     
     def update_plugin(self, name: str, data: Dict) -> bool:
         """Plugin bilgilerini güncelle"""
         plugins = self._load_json(config.PLUGINS_FILE) or {}
         
         if name in plugins:
+            previous = dict(plugins[name])
             plugins[name].update(data)
-            return self._save_json(config.PLUGINS_FILE, plugins)
+            if not self._save_json(config.PLUGINS_FILE, plugins):
+                return False
+            self._count_plugin(previous, -1)
+            self._count_plugin(plugins[name], +1)
+            return True
         return False
     
     def delete_plugin(self, name: str) -> bool:
@@ -220,8 +353,11 @@ class LocalStorage:
         plugins = self._load_json(config.PLUGINS_FILE) or {}
         
         if name in plugins:
-            del plugins[name]
-            return self._save_json(config.PLUGINS_FILE, plugins)
+            removed = plugins.pop(name)
+            if not self._save_json(config.PLUGINS_FILE, plugins):
+                return False
+            self._count_plugin(removed, -1)
+            return True
         return False
     
     def get_all_plugins(self) -> List[Dict]:
@@ -287,8 +423,7 @@ class LocalStorage:
     
     def get_banned_users(self) -> List[Dict]:
         """Banlı kullanıcıları getir"""
-        users = self._load_json(config.USERS_FILE) or {}
-        return [u for u in users.values() if u.get("is_banned")]
+        return self._select_users(self._banned)
     
     # ==========================================
     # SUDO İŞLEMLERİ
@@ -311,8 +446,7 @@ class LocalStorage:
     
     def get_sudos(self) -> List[Dict]:
         """Sudo listesi"""
-        users = self._load_json(config.USERS_FILE) or {}
-        return [u for u in users.values() if u.get("is_sudo")]
+        return self._select_users(self._sudos)
     
     # ==========================================
     # AYARLAR İŞLEMLERİ
@@ -336,18 +470,18 @@ class LocalStorage:
     # ==========================================
     
     def get_stats(self) -> Dict:
-        """İstatistikleri getir"""
-        users = self._load_json(config.USERS_FILE) or {}
-        plugins = self._load_json(config.PLUGINS_FILE) or {}
+        """İstatistikleri getir (indeks/sayaçlardan, dosya okumadan)"""
+        users = self._user_store()
+        counts = self._plugin_counters()
         
         return {
             "total_users": len(users),
-            "logged_in_users": len([u for u in users.values() if u.get("is_logged_in")]),
-            "banned_users": len([u for u in users.values() if u.get("is_banned")]),
-            "sudo_users": len([u for u in users.values() if u.get("is_sudo")]),
-            "total_plugins": len(plugins),
-            "public_plugins": len([p for p in plugins.values() if p.get("is_public")]),
-            "private_plugins": len([p for p in plugins.values() if not p.get("is_public")]),
+            "logged_in_users": len(self._logged_in),
+            "banned_users": len(self._banned),
+            "sudo_users": len(self._sudos),
+            "total_plugins": counts["total"],
+            "public_plugins": counts["public"],
+            "private_plugins": counts["total"] - counts["public"],
         }
     
     # ==========================================
@@ -2,20 +2,112 @@
 # KingTG UserBot Service - MongoDB İşlemleri
 # ============================================
 
+import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Any
 import config
 import logging
 
+from .mongo_queue import queue_from_config
+
 log = logging.getLogger(f"kingtg.{__name__}")
 
 
+# ============================================
+# İNDEKSLER
+# ============================================
+# (koleksiyon, anahtarlar, seçenekler) — connect() her açılışta idempotent kurar.
+# Sorgu → indeks eşlemesi HOT_QUERIES'te; /dbaudit ikisini explain() ile doğrular.
+INDEXES = [
+    ("users", [("user_id", ASCENDING)], {"unique": True}),
+    ("users", [("is_logged_in", ASCENDING)], {}),
+    ("users", [("is_banned", ASCENDING)], {}),
+    ("users", [("is_sudo", ASCENDING)], {}),
+    ("plugins", [("name", ASCENDING)], {"unique": True}),
+    # Çok anahtarlı (multikey): dizi alanları
+    ("plugins", [("commands", ASCENDING)], {}),
+    ("plugins", [("allowed_users", ASCENDING)], {}),
+    ("plugins", [("is_public", ASCENDING), ("is_active", ASCENDING)], {}),
+    ("logs", [("type", ASCENDING), ("timestamp", DESCENDING)], {}),
+    # TTL: eski loglar sunucu tarafında kendiliğinden silinir
+    ("logs", [("timestamp", ASCENDING)], {"name": "logs_ttl", "ttl": True}),
+    ("reactions", [("reaction_key", ASCENDING), ("user_id", ASCENDING)], {"unique": True}),
+]
+
+# /dbaudit: (ad, koleksiyon, filtre, sıralama)
+HOT_QUERIES = [
+    ("get_user", "users", {"user_id": 0}, None),
+    ("get_logged_in_users", "users", {"is_logged_in": True}, None),
+    ("get_banned_users", "users", {"is_banned": True}, None),
+    ("get_sudos", "users", {"is_sudo": True}, None),
+    ("get_plugin", "plugins", {"name": ""}, None),
+    ("check_command_exists", "plugins", {"commands": ""}, None),
+    ("get_public_plugins", "plugins", {"is_public": True, "is_active": True}, None),
+    ("get_user_accessible_plugins", "plugins", {"$and": [
+        {"is_active": True},
+        {"restricted_users": {"$ne": 0}},
+        {"$or": [{"is_public": True}, {"allowed_users": 0}]},
+    ]}, None),
+    ("get_logs", "logs", {}, [("timestamp", DESCENDING)]),
+    ("get_logs(type)", "logs", {"type": ""}, [("timestamp", DESCENDING)]),
+    ("get_user_reaction", "reactions", {"reaction_key": "", "user_id": 0}, None),
+]
+
+
+def _plan_stages(plan: Dict) -> List[Dict]:
+    """explain() planındaki tüm aşamaları (iç içe inputStage'ler dahil) düzleştir"""
+    stages = []
+    stack = [plan] if plan else []
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        stages.append(node)
+        # Sorgu planı sürüm farkları: queryPlan / inputStage / inputStages
+        for key in ("queryPlan", "inputStage"):
+            if key in node:
+                stack.append(node[key])
+        stack.extend(node.get("inputStages", []))
+    return stages
+
+
+def summarize_explain(explain: Dict) -> Dict[str, Any]:
+    """explain() çıktısından kazanan plan özeti: aşamalar, indeksler, tarama"""
+    planner = explain.get("queryPlanner", {})
+    stages = _plan_stages(planner.get("winningPlan", {}))
+    names = [st.get("stage") for st in stages if st.get("stage")]
+    execution = explain.get("executionStats", {})
+    return {
+        "stages": names,
+        "indexes": [st["indexName"] for st in stages if st.get("indexName")],
+        "collscan": "COLLSCAN" in names,
+        "keys_examined": execution.get("totalKeysExamined"),
+        "docs_examined": execution.get("totalDocsExamined"),
+    }
+
+
 class MongoDB:
     def __init__(self):
         self.client: Optional[AsyncIOMotorClient] = None
         self.db = None
         self.connected = False
+        # Yazmalar kuyruktan toplu gider; wait=True olan çağrı Mongo'ya
+        # ulaşılana kadar bekler (read-your-writes)
+        self.writes = queue_from_config(self)
+    
+    async def _submit(self, fut, wait: bool) -> bool:
+        """Kuyruğa atılmış yazma: wait ise sonucunu bekle, değilse kabul edildi say"""
+        if not wait:
+            return True
+        try:
+            # Kesintide kuyruk yeniden dener; çağıranı sonsuza dek bekletme
+            return await asyncio.wait_for(asyncio.shield(fut), config.MONGO_WRITE_WAIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            log.warning("MongoDB yazması %g sn içinde onaylanmadı", config.MONGO_WRITE_WAIT_TIMEOUT)
+            return False
     
     async def connect(self):
         """MongoDB'ye bağlan. Placeholder/boş URI'de hiç denemez (temiz başlangıç)."""
@@ -32,14 +124,62 @@ class MongoDB:
             await self.client.admin.command('ping')
             self.connected = True
             log.info("MongoDB bağlantısı başarılı")
+            await self.ensure_indexes()
             return True
         except Exception:
             log.warning("MongoDB'ye bağlanılamadı — yerel dosya sistemine geçiliyor.")
             self.connected = False
             return False
     
+    async def ensure_indexes(self) -> int:
+        """INDEXES listesini kur (var olanlara dokunulmaz). Kurulan/doğrulanan sayı."""
+        ok = 0
+        ttl_seconds = int(config.LOG_RETENTION_DAYS * 86400)
+        for collection, keys, options in INDEXES:
+            options = dict(options)
+            if options.pop("ttl", False):
+                options["expireAfterSeconds"] = ttl_seconds
+            try:
+                await self.db[collection].create_index(keys, **options)
+                ok += 1
+            except OperationFailure as e:
+                if options.get("expireAfterSeconds") is not None and e.code in (85, 86):
+                    # TTL süresi değişmiş: indeksi silmeden collMod ile güncelle
+                    try:
+                        await self.db.command("collMod", collection, index={
+                            "keyPattern": dict(keys), "expireAfterSeconds": ttl_seconds,
+                        })
+                        ok += 1
+                        continue
+                    except Exception:
+                        pass
+                log.warning("İndeks kurulamadı: %s %s (%s)", collection, keys, e)
+            except Exception:
+                log.warning("İndeks kurulamadı: %s %s", collection, keys, exc_info=True)
+        log.info("MongoDB indeksleri hazır (%s/%s)", ok, len(INDEXES))
+        return ok
+    
+    async def explain_hot_queries(self) -> List[Dict]:
+        """Sık kullanılan sorguları explain() ile denetle; COLLSCAN olanları işaretle"""
+        if not self.connected:
+            return []
+        
+        report = []
+        for name, collection, query, sort in HOT_QUERIES:
+            entry = {"name": name, "collection": collection}
+            try:
+                cursor = self.db[collection].find(query)
+                if sort:
+                    cursor = cursor.sort(sort)
+                entry.update(summarize_explain(await cursor.limit(100).explain()))
+            except Exception as e:
+                entry["error"] = str(e)
+            report.append(entry)
+        return report
+    
     async def disconnect(self):
-        """MongoDB bağlantısını kapat"""
+        """MongoDB bağlantısını kapat (önce yazma kuyruğunu boşalt)"""
+        await self.writes.close()
         if self.client:
             self.client.close()
             self.connected = False
@@ -55,7 +195,7 @@ class MongoDB:
             return None
         return await self.db.users.find_one({"user_id": user_id})
     
-    async def add_user(self, user_id: int, username: str = None, first_name: str = None) -> bool:
+    async def add_user(self, user_id: int, username: str = None, first_name: str = None, wait: bool = False) -> bool:
         """Yeni kullanıcı ekle"""
         if not self.connected:
             return False
@@ -81,45 +221,35 @@ class MongoDB:
             "settings": {}
         }
         
-        try:
-            await self.db.users.update_one(
-                {"user_id": user_id},
-                {"$setOnInsert": user_data},
-                upsert=True
-            )
-            return True
-        except Exception as e:
-            log.error("Kullanıcı ekleme hatası", exc_info=True)
-            return False
+        fut = self.writes.update_one(
+            "users",
+            {"user_id": user_id},
+            {"$setOnInsert": user_data},
+            upsert=True
+        )
+        return await self._submit(fut, wait)
     
-    async def update_user(self, user_id: int, data: Dict) -> bool:
+    async def update_user(self, user_id: int, data: Dict, wait: bool = False) -> bool:
         """Kullanıcı bilgilerini güncelle"""
         if not self.connected:
             return False
         
-        data["last_active"] = datetime.utcnow()
+        data = dict(data, last_active=datetime.utcnow())
         
-        try:
-            await self.db.users.update_one(
-                {"user_id": user_id},
-                {"$set": data}
-            )
-            return True
-        except Exception as e:
-            log.error("Kullanıcı güncelleme hatası", exc_info=True)
-            return False
+        fut = self.writes.update_one(
+            "users",
+            {"user_id": user_id},
+            {"$set": data}
+        )
+        return await self._submit(fut, wait)
     
-    async def delete_user(self, user_id: int) -> bool:
+    async def delete_user(self, user_id: int, wait: bool = False) -> bool:
         """Kullanıcıyı sil"""
         if not self.connected:
             return False
         
-        try:
-            await self.db.users.delete_one({"user_id": user_id})
-            return True
-        except Exception as e:
-            log.error("Kullanıcı silme hatası", exc_info=True)
-            return False
+        fut = self.writes.delete_one("users", {"user_id": user_id})
+        return await self._submit(fut, wait)
     
     async def get_all_users(self) -> List[Dict]:
         """Tüm kullanıcıları getir"""
@@ -148,7 +278,7 @@ class MongoDB:
     # ==========================================
     
     async def save_session(self, user_id: int, session_data: str, session_type: str, 
-                          phone: str = None, remember: bool = False) -> bool:
+                          phone: str = None, remember: bool = False, wait: bool = False) -> bool:
         """Session bilgilerini kaydet"""
         return await self.update_user(user_id, {
             "session_data": session_data,
@@ -156,16 +286,16 @@ class MongoDB:
             "phone_number": phone,
             "remember_session": remember,
             "is_logged_in": True
-        })
+        }, wait=wait)
     
-    async def clear_session(self, user_id: int, keep_data: bool = False) -> bool:
+    async def clear_session(self, user_id: int, keep_data: bool = False, wait: bool = False) -> bool:
         """Session bilgilerini temizle"""
         if keep_data:
             return await self.update_user(user_id, {
                 "is_logged_in": False,
                 "userbot_id": None,
                 "userbot_username": None
-            })
+            }, wait=wait)
         else:
             return await self.update_user(user_id, {
                 "session_data": None,
@@ -175,7 +305,7 @@ class MongoDB:
                 "is_logged_in": False,
                 "userbot_id": None,
                 "userbot_username": None
-            })
+            }, wait=wait)
     
     # ==========================================
     # PLUGİN İŞLEMLERİ
@@ -189,7 +319,7 @@ class MongoDB:
     
     async def add_plugin(self, name: str, filename: str, description: str = "",
                         commands: List[str] = None, is_public: bool = True,
-                        allowed_users: List[int] = None) -> bool:
+                        allowed_users: List[int] = None, wait: bool = False) -> bool:
         """Yeni plugin ekle"""
         if not self.connected:
             return False
@@ -208,43 +338,33 @@ class MongoDB:
             "usage_count": 0
         }
         
-        try:
-            await self.db.plugins.update_one(
-                {"name": name},
-                {"$set": plugin_data},
-                upsert=True
-            )
-            return True
-        except Exception as e:
-            log.error("Plugin ekleme hatası", exc_info=True)
-            return False
+        fut = self.writes.update_one(
+            "plugins",
+            {"name": name},
+            {"$set": plugin_data},
+            upsert=True
+        )
+        return await self._submit(fut, wait)
     
-    async def update_plugin(self, name: str, data: Dict) -> bool:
+    async def update_plugin(self, name: str, data: Dict, wait: bool = False) -> bool:
         """Plugin bilgilerini güncelle"""
         if not self.connected:
             return False
         
-        try:
-            await self.db.plugins.update_one(
-                {"name": name},
-                {"$set": data}
-            )
-            return True
-        except Exception as e:
-            log.error("Plugin güncelleme hatası", exc_info=True)
-            return False
+        fut = self.writes.update_one(
+            "plugins",
+            {"name": name},
+            {"$set": data}
+        )
+        return await self._submit(fut, wait)
     
-    async def delete_plugin(self, name: str) -> bool:
+    async def delete_plugin(self, name: str, wait: bool = False) -> bool:
         """Plugin sil"""
         if not self.connected:
             return False
         
-        try:
-            await self.db.plugins.delete_one({"name": name})
-            return True
-        except Exception as e:
-            log.error("Plugin silme hatası", exc_info=True)
-            return False
+        fut = self.writes.delete_one("plugins", {"name": name})
+        return await self._submit(fut, wait)
     
     async def get_all_plugins(self) -> List[Dict]:
         """Tüm pluginleri getir"""
@@ -292,109 +412,91 @@ class MongoDB:
         plugin = await self.db.plugins.find_one(query)
         return plugin["name"] if plugin else None
     
-    async def add_plugin_user_access(self, plugin_name: str, user_id: int) -> bool:
+    async def add_plugin_user_access(self, plugin_name: str, user_id: int, wait: bool = False) -> bool:
         """Plugin'e kullanıcı erişimi ekle"""
         if not self.connected:
             return False
         
-        try:
-            await self.db.plugins.update_one(
-                {"name": plugin_name},
-                {"$addToSet": {"allowed_users": user_id}}
-            )
-            return True
-        except Exception as e:
-            log.error("Plugin erişim ekleme hatası", exc_info=True)
-            return False
+        fut = self.writes.update_one(
+            "plugins",
+            {"name": plugin_name},
+            {"$addToSet": {"allowed_users": user_id}}
+        )
+        return await self._submit(fut, wait)
     
-    async def remove_plugin_user_access(self, plugin_name: str, user_id: int) -> bool:
+    async def remove_plugin_user_access(self, plugin_name: str, user_id: int, wait: bool = False) -> bool:
         """Plugin'den kullanıcı erişimini kaldır"""
         if not self.connected:
             return False
         
-        try:
-            await self.db.plugins.update_one(
-                {"name": plugin_name},
-                {"$pull": {"allowed_users": user_id}}
-            )
-            return True
-        except Exception as e:
-            log.error("Plugin erişim kaldırma hatası", exc_info=True)
-            return False
+        fut = self.writes.update_one(
+            "plugins",
+            {"name": plugin_name},
+            {"$pull": {"allowed_users": user_id}}
+        )
+        return await self._submit(fut, wait)
     
-    async def restrict_plugin_user(self, plugin_name: str, user_id: int) -> bool:
+    async def restrict_plugin_user(self, plugin_name: str, user_id: int, wait: bool = False) -> bool:
         """Kullanıcıyı plugin kullanımından kısıtla"""
         if not self.connected:
             return False
         
-        try:
-            await self.db.plugins.update_one(
-                {"name": plugin_name},
-                {"$addToSet": {"restricted_users": user_id}}
-            )
-            return True
-        except Exception as e:
-            log.error("Plugin kısıtlama hatası", exc_info=True)
-            return False
+        fut = self.writes.update_one(
+            "plugins",
+            {"name": plugin_name},
+            {"$addToSet": {"restricted_users": user_id}}
+        )
+        return await self._submit(fut, wait)
     
-    async def unrestrict_plugin_user(self, plugin_name: str, user_id: int) -> bool:
+    async def unrestrict_plugin_user(self, plugin_name: str, user_id: int, wait: bool = False) -> bool:
         """Kullanıcının plugin kısıtlamasını kaldır"""
         if not self.connected:
             return False
         
-        try:
-            await self.db.plugins.update_one(
-                {"name": plugin_name},
-                {"$pull": {"restricted_users": user_id}}
-            )
-            return True
-        except Exception as e:
-            log.error("Plugin kısıtlama kaldırma hatası", exc_info=True)
-            return False
+        fut = self.writes.update_one(
+            "plugins",
+            {"name": plugin_name},
+            {"$pull": {"restricted_users": user_id}}
+        )
+        return await self._submit(fut, wait)
     
     # ==========================================
     # BAN İŞLEMLERİ
     # ==========================================
     
-    async def ban_user(self, user_id: int, reason: str = None, banned_by: int = None) -> bool:
+    async def ban_user(self, user_id: int, reason: str = None, banned_by: int = None, wait: bool = False) -> bool:
         """Kullanıcıyı banla"""
         if not self.connected:
             return False
         
-        try:
-            await self.db.users.update_one(
-                {"user_id": user_id},
-                {"$set": {
-                    "is_banned": True,
-                    "ban_reason": reason,
-                    "banned_at": datetime.utcnow(),
-                    "banned_by": banned_by
-                }}
-            )
-            return True
-        except Exception as e:
-            log.error("Ban hatası", exc_info=True)
-            return False
-    
-    async def unban_user(self, user_id: int) -> bool:
+        fut = self.writes.update_one(
+            "users",
+            {"user_id": user_id},
+            {"$set": {
+                "is_banned": True,
+                "ban_reason": reason,
+                "banned_at": datetime.utcnow(),
+                "banned_by": banned_by
+            }}
+        )
+        return await self._submit(fut, wait)
+    
+    async def unban_user(self, user_id: int, wait: bool = False) -> bool:
         """Kullanıcının banını kaldır"""
         if not self.connected:
             return False
         
-        try:
-            await self.db.users.update_one(
-                {"user_id": user_id},
-                {"$set": {
-                    "is_banned": False,
-                    "ban_reason": None,
-                    "banned_at": None,
-                    "banned_by": None
-                }}
-            )
-            return True
-        except Exception as e:
-            log.error("Unban hatası", exc_info=True)
-            return False
+        fut = self.writes.update_one(
+            "users",
+            {"user_id": user_id},
+            {"$set": {
+                "is_banned": False,
+                "ban_reason": None,
+                "banned_at": None,
+                "banned_by": None
+            }}
+        )
+        return await self._submit(fut, wait)
     
     async def is_banned(self, user_id: int) -> bool:
         """Kullanıcının banlı olup olmadığını kontrol et"""
@@ -413,13 +515,13 @@ class MongoDB:
     # SUDO İŞLEMLERİ
     # ==========================================
     
-    async def add_sudo(self, user_id: int) -> bool:
+    async def add_sudo(self, user_id: int, wait: bool = False) -> bool:
         """Sudo ekle"""
-        return await self.update_user(user_id, {"is_sudo": True})
+        return await self.update_user(user_id, {"is_sudo": True}, wait=wait)
     
-    async def remove_sudo(self, user_id: int) -> bool:
+    async def remove_sudo(self, user_id: int, wait: bool = False) -> bool:
         """Sudo kaldır"""
-        return await self.update_user(user_id, {"is_sudo": False})
+        return await self.update_user(user_id, {"is_sudo": False}, wait=wait)
     
     async def is_sudo(self, user_id: int) -> bool:
         """Sudo kontrolü"""
@@ -451,28 +553,25 @@ class MongoDB:
             return settings
         return config.DEFAULT_SETTINGS.copy()
     
-    async def update_settings(self, data: Dict) -> bool:
+    async def update_settings(self, data: Dict, wait: bool = False) -> bool:
         """Bot ayarlarını güncelle"""
         if not self.connected:
             return False
         
-        try:
-            await self.db.settings.update_one(
-                {"_id": "bot_settings"},
-                {"$set": data},
-                upsert=True
-            )
-            return True
-        except Exception as e:
-            log.error("Ayar güncelleme hatası", exc_info=True)
-            return False
+        fut = self.writes.update_one(
+            "settings",
+            {"_id": "bot_settings"},
+            {"$set": data},
+            upsert=True
+        )
+        return await self._submit(fut, wait)
     
     # ==========================================
     # LOG İŞLEMLERİ
     # ==========================================
     
     async def add_log(self, log_type: str, user_id: int = None, 
-                     message: str = "", data: Dict = None) -> bool:
+                     message: str = "", data: Dict = None, wait: bool = False) -> bool:
         """Log ekle"""
         if not self.connected:
             return False
@@ -485,12 +584,8 @@ class MongoDB:
             "timestamp": datetime.utcnow()
         }
         
-        try:
-            await self.db.logs.insert_one(log_data)
-            return True
-        except Exception as e:
-            log.error("Log ekleme hatası", exc_info=True)
-            return False
+        fut = self.writes.insert_one("logs", log_data)
+        return await self._submit(fut, wait)
     
     async def get_logs(self, limit: int = 100, log_type: str = None) -> List[Dict]:
         """Logları getir"""
@@ -509,19 +604,52 @@ class MongoDB:
     # ==========================================
     
     async def get_stats(self) -> Dict:
-        """İstatistikleri getir"""
+        """İstatistikleri getir (TEK aggregation: users + $unionWith plugins + $facet)"""
         if not self.connected:
             return {}
         
-        return {
-            "total_users": await self.db.users.count_documents({}),
-            "logged_in_users": await self.db.users.count_documents({"is_logged_in": True}),
-            "banned_users": await self.db.users.count_documents({"is_banned": True}),
-            "sudo_users": await self.db.users.count_documents({"is_sudo": True}),
-            "total_plugins": await self.db.plugins.count_documents({}),
-            "public_plugins": await self.db.plugins.count_documents({"is_public": True}),
-            "private_plugins": await self.db.plugins.count_documents({"is_public": False}),
+        def _count(field, value=True):
+            return {"$sum": {"$cond": [{"$eq": [f"${field}", value]}, 1, 0]}}
+        
+        pipeline = [
+            {"$project": {"_id": 0, "_k": "u", "is_logged_in": 1, "is_banned": 1, "is_sudo": 1}},
+            {"$unionWith": {"coll": "plugins", "pipeline": [
+                {"$project": {"_id": 0, "_k": "p", "is_public": 1}}
+            ]}},
+            {"$facet": {
+                "users": [
+                    {"$match": {"_k": "u"}},
+                    {"$group": {
+                        "_id": None,
+                        "total_users": {"$sum": 1},
+                        "logged_in_users": _count("is_logged_in"),
+                        "banned_users": _count("is_banned"),
+                        "sudo_users": _count("is_sudo"),
+                    }},
+                ],
+                "plugins": [
+                    {"$match": {"_k": "p"}},
+                    {"$group": {
+                        "_id": None,
+                        "total_plugins": {"$sum": 1},
+                        "public_plugins": _count("is_public"),
+                        "private_plugins": _count("is_public", False),
+                    }},
+                ],
+            }},
+        ]
+        
+        stats = {
+            "total_users": 0, "logged_in_users": 0, "banned_users": 0, "sudo_users": 0,
+            "total_plugins": 0, "public_plugins": 0, "private_plugins": 0,
         }
+        rows = await self.db.users.aggregate(pipeline).to_list(length=1)
+        if rows:
+            for part in ("users", "plugins"):
+                for group in rows[0].get(part, []):
+                    group.pop("_id", None)
+                    stats.update(group)
+        return stats
     
     # ==========================================
     # TEPKİ SİSTEMİ
@@ -537,25 +665,25 @@ class MongoDB:
         })
         return doc.get("emoji") if doc else None
     
-    async def set_user_reaction(self, reaction_key: str, user_id: int, emoji: Optional[str]) -> bool:
+    async def set_user_reaction(self, reaction_key: str, user_id: int, emoji: Optional[str],
+                                wait: bool = False) -> bool:
         """Kullanıcının tepkisini kaydet veya sil"""
         if not self.connected:
             return False
         
+        key = {"reaction_key": reaction_key, "user_id": user_id}
         if emoji is None:
             # Tepkiyi sil
-            await self.db.reactions.delete_one({
-                "reaction_key": reaction_key,
-                "user_id": user_id
-            })
+            fut = self.writes.delete_one("reactions", key)
         else:
             # Tepkiyi ekle veya güncelle
-            await self.db.reactions.update_one(
-                {"reaction_key": reaction_key, "user_id": user_id},
+            fut = self.writes.update_one(
+                "reactions",
+                key,
                 {"$set": {"emoji": emoji, "updated_at": datetime.utcnow()}},
                 upsert=True
             )
-        return True
+        return await self._submit(fut, wait)
 
 
 # Global MongoDB instance
@@ -0,0 +1,356 @@
+# ============================================
+# KingTG UserBot Service - MongoDB Yazma Kuyruğu
+# ============================================
+# Database facade'ı her yazmayı önce yerel depoya yapar; MongoDB kopyası
+# eskiden aynı istek içinde tek tek await ediliyordu (her plugin aç/kapa bir
+# Mongo tur süresi ödüyordu). Artık yazmalar bu kuyruğa atılır:
+#   - aynı belgeye gelen güncellemeler tek işleme birleştirilir
+#   - kısa aralıklarla bulk_write(ordered=False) ile toplu gönderilir
+#   - bağlantı koptuğunda artan beklemeyle tekrar denenir
+# Yazmanın Mongo'ya ulaştığını bilmesi gereken çağıran, dönen Future'ı
+# await edebilir (read-your-writes).
+# ============================================
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import AutoReconnect, BulkWriteError, ConnectionFailure
+
+import config
+import logging
+
+log = logging.getLogger(f"kingtg.{__name__}")
+
+# Birleştirilebilir operatörler: aynı alan hem $set hem $setOnInsert'te olabilir
+_MERGEABLE = ("$set", "$setOnInsert")
+
+
+def _paths_conflict(a: str, b: str) -> bool:
+    """'x' ile 'x.y' aynı güncellemede çakışır (Mongo hata verir)"""
+    return a.startswith(b + ".") or b.startswith(a + ".")
+
+
+class _PendingOp:
+    """Kuyruktaki tek belge işlemi (birleştirilmiş olabilir)"""
+
+    __slots__ = ("kind", "collection", "filter", "update", "upsert", "document", "futures")
+
+    def __init__(self, kind: str, collection: str, filter: Dict = None,
+                 update: Dict = None, upsert: bool = False, document: Dict = None):
+        self.kind = kind  # update | delete | insert
+        self.collection = collection
+        self.filter = filter
+        # Sığ kopya: çağıran sözlüğü sonradan değiştirse de kuyruk etkilenmez
+        self.update = {op: dict(fields) for op, fields in update.items()} if update else None
+        self.upsert = upsert
+        self.document = document
+        self.futures: List[asyncio.Future] = []
+
+    def merge(self, other: "_PendingOp") -> bool:
+        """Sonraki işlemi bununla birleştirmeyi dene. Sonuç, ikisinin sırayla
+        uygulanmasıyla aynı olmalı; emin olunamıyorsa False döner."""
+        if other.kind == "delete":
+            # Silme önceki güncellemeleri geçersiz kılar
+            self.kind, self.update, self.upsert = "delete", None, False
+            return True
+        if self.kind != "update" or other.kind != "update":
+            return False
+        # Önceki upsert değilken sonraki upsert ise, önceki alanlar ekleme
+        # sırasında belgeye girmemeliydi → birleştirilemez
+        if other.upsert and not self.upsert:
+            return False
+
+        mine = {op: dict(fields) for op, fields in self.update.items()}
+        for op, fields in other.update.items():
+            for path in fields:
+                for my_op, my_fields in mine.items():
+                    for my_path in my_fields:
+                        if _paths_conflict(path, my_path):
+                            return False
+                        if path == my_path and (op not in _MERGEABLE or my_op not in _MERGEABLE):
+                            return False
+
+        for op, fields in other.update.items():
+            target = mine.setdefault(op, {})
+            for path, value in fields.items():
+                if op == "$setOnInsert":
+                    # İlk ekleme kazanır; sonradan $set edilmişse ona dokunma
+                    if path not in target and path not in mine.get("$set", {}):
+                        target[path] = value
+                else:
+                    target[path] = value
+                    if op == "$set":
+                        mine.get("$setOnInsert", {}).pop(path, None)
+        self.update = {op: fields for op, fields in mine.items() if fields}
+        return True
+
+    def to_request(self):
+        if self.kind == "insert":
+            return InsertOne(self.document)
+        if self.kind == "delete":
+            return DeleteOne(self.filter)
+        return UpdateOne(self.filter, self.update, upsert=self.upsert)
+
+
+class MongoWriteQueue:
+    """Belge başına birleştiren, toplu yazan MongoDB yazma kuyruğu.
+
+    Aynı belgeye ait birleştirilemeyen işlemler sırayla bekler: her turda
+    belge başına yalnızca İLK işlem gönderilir, böylece ordered=False
+    toplu yazmada bile belge içi sıra korunur.
+    """
+
+    def __init__(self, mongo, flush_ms: int = 50, batch_size: int = 500,
+                 max_backoff: float = 30.0, max_inserts: int = 10000):
+        self.mongo = mongo
+        self.interval = max(1, flush_ms) / 1000.0
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.max_inserts = max_inserts
+        # {(koleksiyon, filtre anahtarı): [_PendingOp, ...]} (ekleme sırası korunur)
+        self._pending: "OrderedDict[Tuple, List[_PendingOp]]" = OrderedDict()
+        self._depth = 0
+        self._insert_seq = 0
+        self._inserts = 0
+        # Kuyruktan alınmış, bulk_write'ı süren turun future'ları (flush bekler)
+        self._inflight: List[asyncio.Future] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        # Metrikler
+        self.enqueued = 0
+        self.coalesced = 0
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.retries = 0
+        self.flushes = 0
+        self.max_depth = 0
+        self.last_flush_ms = 0.0
+        self._flush_ms_total = 0.0
+
+    # ==========================================
+    # KUYRUĞA EKLEME
+    # ==========================================
+
+    def update_one(self, collection: str, filter: Dict, update: Dict,
+                   upsert: bool = False) -> asyncio.Future:
+        return self._enqueue(_PendingOp("update", collection, filter, update, upsert))
+
+    def delete_one(self, collection: str, filter: Dict) -> asyncio.Future:
+        return self._enqueue(_PendingOp("delete", collection, filter))
+
+    def insert_one(self, collection: str, document: Dict) -> asyncio.Future:
+        if self._inserts >= self.max_inserts:
+            # Yalnızca log gibi birleşmeyen eklemeler sınırsız büyüyebilir
+            self.dropped += 1
+            fut = asyncio.get_running_loop().create_future()
+            fut.set_result(False)
+            return fut
+        self._inserts += 1
+        return self._enqueue(_PendingOp("insert", collection, document=document))
+
+    def _key(self, op: _PendingOp) -> Tuple:
+        if op.kind == "insert":
+            self._insert_seq += 1
+            return (op.collection, "#insert", self._insert_seq)
+        return (op.collection, tuple(sorted(op.filter.items())))
+
+    def _enqueue(self, op: _PendingOp) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        op.futures.append(fut)
+        self.enqueued += 1
+
+        key = self._key(op)
+        chain = self._pending.get(key)
+        if chain is None:
+            self._pending[key] = [op]
+            self._depth += 1
+        elif chain[-1].merge(op):
+            chain[-1].futures.append(fut)
+            self.coalesced += 1
+        else:
+            chain.append(op)
+            self._depth += 1
+
+        self.max_depth = max(self.max_depth, self._depth)
+        self._ensure_task()
+        return fut
+
+    # ==========================================
+    # GÖNDERME
+    # ==========================================
+
+    def _ensure_task(self):
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        self._wake.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def _take_batch(self) -> List[Tuple[Tuple, _PendingOp]]:
+        """Belge başına ilk işlemi al (en fazla batch_size)"""
+        batch = []
+        for key in list(self._pending.keys()):
+            if len(batch) >= self.batch_size:
+                break
+            chain = self._pending[key]
+            batch.append((key, chain.pop(0)))
+            self._depth -= 1
+            if not chain:
+                del self._pending[key]
+        return batch
+
+    def _requeue(self, batch: List[Tuple[Tuple, _PendingOp]]):
+        """Gönderilemeyen işlemleri belge zincirlerinin BAŞINA geri koy"""
+        self._depth += len(batch)
+        for key, op in reversed(batch):
+            chain = self._pending.get(key)
+            if chain is None:
+                self._pending[key] = [op]
+                self._pending.move_to_end(key, last=False)
+            else:
+                chain.insert(0, op)
+
+    @staticmethod
+    def _resolve(op: _PendingOp, ok: bool):
+        for fut in op.futures:
+            if not fut.done():
+                fut.set_result(ok)
+
+    async def _run(self):
+        backoff = min(0.5, self.max_backoff)
+        while True:
+            if not self._pending:
+                if self._closing:
+                    return
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            if not self._closing:
+                # Kısa pencere: aynı belgeye gelen yazmalar birleşsin
+                await asyncio.sleep(self.interval)
+            try:
+                await self._flush_once()
+                backoff = min(0.5, self.max_backoff)
+            except (AutoReconnect, ConnectionFailure) as e:
+                self.retries += 1
+                log.warning("MongoDB yazma kuyruğu: bağlantı hatası (%s), %.1f sn sonra tekrar", e, backoff)
+                if self._closing:
+                    return
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    async def _flush_once(self):
+        batch = self._take_batch()
+        if not batch:
+            return
+        self._inflight = [f for _, op in batch for f in op.futures]
+        by_collection: Dict[str, List[Tuple[Tuple, _PendingOp]]] = {}
+        for item in batch:
+            by_collection.setdefault(item[1].collection, []).append(item)
+
+        started = time.perf_counter()
+        done = 0
+        try:
+            for collection, items in by_collection.items():
+                requests = [op.to_request() for _, op in items]
+                failed_idx = set()
+                try:
+                    await self.mongo.db[collection].bulk_write(requests, ordered=False)
+                except BulkWriteError as e:
+                    failed_idx = {err.get("index") for err in e.details.get("writeErrors", [])}
+                    log.error("MongoDB toplu yazma: %s işlem başarısız (%s)",
+                              len(failed_idx), collection)
+                except (AutoReconnect, ConnectionFailure):
+                    raise
+                except Exception:
+                    log.error("MongoDB toplu yazma hatası (%s)", collection, exc_info=True)
+                    failed_idx = set(range(len(items)))
+                for i, (_, op) in enumerate(items):
+                    ok = i not in failed_idx
+                    if op.kind == "insert":
+                        self._inserts -= 1
+                    self._resolve(op, ok)
+                    if ok:
+                        self.written += 1
+                    else:
+                        self.failed += 1
+                done += len(items)
+        except (AutoReconnect, ConnectionFailure):
+            # Henüz sonuçlanmamış işlemler sırasını koruyarak geri döner
+            self._requeue([item for item in batch if not all(f.done() for f in item[1].futures)])
+            raise
+        finally:
+            self._inflight = []
+            if done:
+                elapsed = (time.perf_counter() - started) * 1000
+                self.flushes += 1
+                self.last_flush_ms = elapsed
+                self._flush_ms_total += elapsed
+
+    async def flush(self, timeout: float = None) -> bool:
+        """Şu ana kadar kuyruğa girmiş her şeyin yazılmasını bekle"""
+        futures = [f for chain in self._pending.values() for op in chain for f in op.futures]
+        futures += [f for f in self._inflight if not f.done()]
+        if not futures:
+            return True
+        try:
+            # shield: zaman aşımı işlemlerin kendi future'larını iptal etmesin
+            await asyncio.wait_for(asyncio.shield(asyncio.gather(*futures)), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self, timeout: float = 10.0):
+        """Kapanış: bekleyenleri boşalt (bağlantı yoksa en fazla timeout kadar)"""
+        self._closing = True
+        if self._task is not None and not self._task.done():
+            self._wake.set()
+            try:
+                await asyncio.wait_for(asyncio.shield(self._task), timeout)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+        if self._pending:
+            log.warning("MongoDB yazma kuyruğu: %s işlem gönderilemedi", self.depth)
+            for chain in self._pending.values():
+                for op in chain:
+                    self._resolve(op, False)
+            self._pending.clear()
+            self._depth = 0
+
+    # ==========================================
+    # METRİKLER
+    # ==========================================
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    def stats(self) -> Dict:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "written": self.written,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "retries": self.retries,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 1),
+            "avg_flush_ms": round(self._flush_ms_total / self.flushes, 1) if self.flushes else 0.0,
+        }
+
+
+def queue_from_config(mongo) -> MongoWriteQueue:
+    """config'teki MONGO_WRITE_* ayarlarıyla kuyruk oluştur"""
+    return MongoWriteQueue(
+        mongo,
+        flush_ms=config.MONGO_WRITE_FLUSH_MS,
+        batch_size=config.MONGO_WRITE_BATCH,
+    )
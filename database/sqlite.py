@@ -0,0 +1,775 @@
+# ============================================
+# KingTG UserBot Service - SQLite Depolama
+# ============================================
+# MongoDB olmayan kurulumlar için gömülü veritabanı. DB_BACKEND=sqlite ile
+# seçilir; JSON dosyalarının yerine birincil depo olur.
+#   - WAL modu: okuyucular yazarı beklemez
+#   - Sorgulanan alanlar ayrı sütun + indeks (user_id, is_logged_in,
+#     plugin komutları, log zaman damgası); kaydın tamamı JSON sütununda
+#   - Tüm çağrılar TEK iş parçacıklı ayrı bir executor'da çalışır →
+#     event loop hiç bloklanmaz, bağlantı tek thread'den kullanılır
+# ============================================
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, Dict, List, Any
+import config
+import logging
+
+log = logging.getLogger(f"kingtg.{__name__}")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id      INTEGER PRIMARY KEY,
+    is_logged_in INTEGER NOT NULL DEFAULT 0,
+    is_banned    INTEGER NOT NULL DEFAULT 0,
+    is_sudo      INTEGER NOT NULL DEFAULT 0,
+    is_deleted   INTEGER NOT NULL DEFAULT 0,
+    always_on    INTEGER NOT NULL DEFAULT 0,
+    data         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_users_logged_in ON users(is_logged_in);
+CREATE INDEX IF NOT EXISTS idx_users_always_on ON users(always_on) WHERE always_on = 1;
+CREATE INDEX IF NOT EXISTS idx_users_banned ON users(is_banned) WHERE is_banned = 1;
+CREATE INDEX IF NOT EXISTS idx_users_sudo ON users(is_sudo) WHERE is_sudo = 1;
+
+CREATE TABLE IF NOT EXISTS user_plugins (
+    plugin  TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (plugin, user_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_user_plugins_user ON user_plugins(user_id);
+
+CREATE TABLE IF NOT EXISTS plugins (
+    name      TEXT PRIMARY KEY,
+    is_public INTEGER NOT NULL DEFAULT 1,
+    data      TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS plugin_commands (
+    command TEXT NOT NULL,
+    plugin  TEXT NOT NULL,
+    PRIMARY KEY (command, plugin)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_plugin_commands_plugin ON plugin_commands(plugin);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS logs (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    type      TEXT,
+    user_id   INTEGER,
+    message   TEXT,
+    data      TEXT,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp);
+CREATE INDEX IF NOT EXISTS idx_logs_type_timestamp ON logs(type, timestamp);
+
+CREATE TABLE IF NOT EXISTS reactions (
+    reaction_key TEXT NOT NULL,
+    user_id      INTEGER NOT NULL,
+    emoji        TEXT NOT NULL,
+    updated_at   REAL,
+    PRIMARY KEY (reaction_key, user_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def _new_user(user_id: int, username: str = None, first_name: str = None) -> Dict:
+    """LocalStorage ile aynı varsayılan kullanıcı kaydı"""
+    now = datetime.utcnow().isoformat()
+    return {
+        "user_id": user_id,
+        "username": username,
+        "first_name": first_name,
+        "created_at": now,
+        "last_active": now,
+        "is_logged_in": False,
+        "session_data": None,
+        "session_type": None,
+        "remember_session": False,
+        "phone_number": None,
+        "userbot_id": None,
+        "userbot_username": None,
+        "active_plugins": [],
+        "plugin_settings": {},
+        "is_banned": False,
+        "is_sudo": False,
+        "ban_reason": None,
+        "settings": {}
+    }
+
+
+class SQLiteDB:
+    """SQLite tabanlı depo (MongoDB / LocalStorage ile aynı arayüz, async)"""
+
+    def __init__(self, path: str = None):
+        self.path = path or config.SQLITE_PATH
+        self.conn: Optional[sqlite3.Connection] = None
+        self.connected = False
+        # Tek iş parçacığı: sqlite bağlantısı yalnızca buradan kullanılır
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kingtg-sqlite")
+
+    async def _run(self, fn, *args):
+        """Senkron sqlite işini ayrılmış executor'da çalıştır"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    # ==========================================
+    # BAĞLANTI
+    # ==========================================
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _connect_sync(self, migrate: bool = True) -> bool:
+        if self.conn is None:
+            self.conn = self._open()
+        self.connected = True
+        if migrate and not self._meta_get("migrated_from_json"):
+            migrated = self._migrate_from_json_sync()
+            log.info("JSON → SQLite göçü tamamlandı: %s", migrated)
+        return True
+
+    async def connect(self, migrate: bool = True) -> bool:
+        """Veritabanını aç (ilk açılışta data/*.json'dan bir kez göç et)"""
+        try:
+            await self._run(self._connect_sync, migrate)
+            log.info("SQLite veritabanı hazır: %s", self.path)
+            return True
+        except Exception:
+            log.error("SQLite açılamadı", exc_info=True)
+            self.connected = False
+            return False
+
+    def close(self):
+        """Bağlantıyı kapat (senkron; kapanışta çağrılır)"""
+        if self.conn is not None:
+            try:
+                self._executor.submit(self.conn.close).result(timeout=5)
+            except Exception:
+                pass
+            self.conn = None
+        self.connected = False
+        self._executor.shutdown(wait=False)
+
+    def _meta_get(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _meta_set(self, key: str, value: str):
+        self.conn.execute(
+            "INSERT INTO meta(key, value) VALUES(?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    # ==========================================
+    # KULLANICI İŞLEMLERİ (senkron çekirdek)
+    # ==========================================
+
+    def _get_user_sync(self, user_id: int) -> Optional[Dict]:
+        row = self.conn.execute("SELECT data FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def _put_user_sync(self, user: Dict):
+        """Kaydı yaz ve indeks sütunlarını/plugin tablosunu güncelle"""
+        user_id = int(user["user_id"])
+        self.conn.execute(
+            "INSERT INTO users(user_id, is_logged_in, is_banned, is_sudo, is_deleted, always_on, data) "
+            "VALUES(?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET is_logged_in = excluded.is_logged_in, "
+            "is_banned = excluded.is_banned, is_sudo = excluded.is_sudo, "
+            "is_deleted = excluded.is_deleted, always_on = excluded.always_on, data = excluded.data",
+            (
+                user_id,
+                int(bool(user.get("is_logged_in"))),
+                int(bool(user.get("is_banned"))),
+                int(bool(user.get("is_sudo"))),
+                int(bool(user.get("is_deleted"))),
+                int(bool(user.get("always_on_plugins"))),
+                _dumps(user),
+            ),
+        )
+        self.conn.execute("DELETE FROM user_plugins WHERE user_id = ?", (user_id,))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO user_plugins(plugin, user_id) VALUES(?, ?)",
+            [(p, user_id) for p in user.get("active_plugins") or []],
+        )
+
+    def _add_user_sync(self, user_id: int, username: str = None, first_name: str = None) -> bool:
+        with self.conn:
+            if self._get_user_sync(user_id) is None:
+                self._put_user_sync(_new_user(user_id, username, first_name))
+        return True
+
+    def _update_user_sync(self, user_id: int, data: Dict) -> bool:
+        with self.conn:
+            user = self._get_user_sync(user_id) or _new_user(user_id)
+            user.update(data)
+            user["last_active"] = datetime.utcnow().isoformat()
+            self._put_user_sync(user)
+        return True
+
+    def _delete_user_sync(self, user_id: int) -> bool:
+        with self.conn:
+            cur = self.conn.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+            self.conn.execute("DELETE FROM user_plugins WHERE user_id = ?", (user_id,))
+        return cur.rowcount > 0
+
+    def _select_users_sync(self, where: str = "", params: tuple = ()) -> List[Dict]:
+        rows = self.conn.execute(f"SELECT data FROM users {where}", params).fetchall()
+        return [json.loads(r["data"]) for r in rows]
+
+    def _scalar_sync(self, sql: str, params: tuple = ()):
+        return self.conn.execute(sql, params).fetchone()[0]
+
+    # ==========================================
+    # KULLANICI İŞLEMLERİ
+    # ==========================================
+
+    async def get_user(self, user_id: int) -> Optional[Dict]:
+        """Kullanıcı bilgilerini getir"""
+        return await self._run(self._get_user_sync, user_id)
+
+    async def add_user(self, user_id: int, username: str = None, first_name: str = None) -> bool:
+        """Yeni kullanıcı ekle"""
+        try:
+            return await self._run(self._add_user_sync, user_id, username, first_name)
+        except Exception:
+            log.error("Kullanıcı ekleme hatası", exc_info=True)
+            return False
+
+    async def update_user(self, user_id: int, data: Dict) -> bool:
+        """Kullanıcı bilgilerini güncelle (yoksa oluştur)"""
+        try:
+            return await self._run(self._update_user_sync, user_id, dict(data))
+        except Exception:
+            log.error("Kullanıcı güncelleme hatası", exc_info=True)
+            return False
+
+    async def delete_user(self, user_id: int) -> bool:
+        """Kullanıcıyı sil"""
+        try:
+            return await self._run(self._delete_user_sync, user_id)
+        except Exception:
+            log.error("Kullanıcı silme hatası", exc_info=True)
+            return False
+
+    async def get_all_users(self) -> List[Dict]:
+        """Tüm kullanıcıları getir"""
+        return await self._run(self._select_users_sync)
+
+    async def get_logged_in_users(self) -> List[Dict]:
+        """Giriş yapmış kullanıcıları getir"""
+        return await self._run(self._select_users_sync, "WHERE is_logged_in = 1")
+
+    async def get_always_on_users(self) -> List[Dict]:
+        """Always-on plugin'i olan kullanıcıları getir"""
+        return await self._run(self._select_users_sync, "WHERE always_on = 1")
+
+    async def get_plugin_user_ids(self, plugin_name: str) -> List[int]:
+        """Plugin'i aktif olan kullanıcı ID'leri"""
+        def _q():
+            rows = self.conn.execute(
+                "SELECT user_id FROM user_plugins WHERE plugin = ?", (plugin_name,)
+            ).fetchall()
+            return [r["user_id"] for r in rows]
+        return await self._run(_q)
+
+    async def get_user_count(self) -> int:
+        """Toplam kullanıcı sayısı"""
+        return await self._run(self._scalar_sync, "SELECT COUNT(*) FROM users")
+
+    # ==========================================
+    # SESSION İŞLEMLERİ
+    # ==========================================
+
+    async def save_session(self, user_id: int, session_data: str, session_type: str,
+                           phone: str = None, remember: bool = False) -> bool:
+        """Session bilgilerini kaydet"""
+        return await self.update_user(user_id, {
+            "session_data": session_data,
+            "session_type": session_type,
+            "phone_number": phone,
+            "remember_session": remember,
+            "is_logged_in": True
+        })
+
+    async def get_session(self, user_id: int) -> Optional[Dict]:
+        """Session bilgilerini getir"""
+        user = await self.get_user(user_id)
+        if user and user.get("session_data"):
+            return {
+                "data": user.get("session_data"),
+                "type": user.get("session_type"),
+                "phone": user.get("phone_number"),
+                "remember": user.get("remember_session", False)
+            }
+        return None
+
+    async def clear_session(self, user_id: int, keep_data: bool = False) -> bool:
+        """Session bilgilerini temizle"""
+        update_data = {
+            "is_logged_in": False,
+            "userbot_id": None,
+            "userbot_username": None
+        }
+        if not keep_data:
+            update_data.update({
+                "session_data": None,
+                "session_type": None,
+                "phone_number": None,
+                "remember_session": False
+            })
+        return await self.update_user(user_id, update_data)
+
+    # ==========================================
+    # PLUGİN İŞLEMLERİ
+    # ==========================================
+
+    def _get_plugin_sync(self, name: str) -> Optional[Dict]:
+        row = self.conn.execute("SELECT data FROM plugins WHERE name = ?", (name,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def _put_plugin_sync(self, plugin: Dict):
+        name = plugin["name"]
+        self.conn.execute(
+            "INSERT INTO plugins(name, is_public, data) VALUES(?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET is_public = excluded.is_public, data = excluded.data",
+            (name, int(bool(plugin.get("is_public"))), _dumps(plugin)),
+        )
+        self.conn.execute("DELETE FROM plugin_commands WHERE plugin = ?", (name,))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO plugin_commands(command, plugin) VALUES(?, ?)",
+            [(c, name) for c in plugin.get("commands") or []],
+        )
+
+    def _all_plugins_sync(self) -> List[Dict]:
+        rows = self.conn.execute("SELECT data FROM plugins").fetchall()
+        return [json.loads(r["data"]) for r in rows]
+
+    async def get_plugin(self, plugin_name: str) -> Optional[Dict]:
+        """Plugin bilgilerini getir"""
+        return await self._run(self._get_plugin_sync, plugin_name)
+
+    async def add_plugin(self, name: str, filename: str, description: str = "",
+                         commands: List[str] = None, is_public: bool = True,
+                         allowed_users: List[int] = None) -> bool:
+        """Yeni plugin ekle"""
+        plugin = {
+            "name": name,
+            "filename": filename,
+            "description": description,
+            "commands": commands or [],
+            "is_public": is_public,
+            "allowed_users": allowed_users or [],
+            "restricted_users": [],
+            "added_at": datetime.utcnow().isoformat(),
+            "added_by": config.OWNER_ID,
+            "is_active": True,
+            "usage_count": 0
+        }
+
+        def _add():
+            with self.conn:
+                self._put_plugin_sync(plugin)
+            return True
+        try:
+            return await self._run(_add)
+        except Exception:
+            log.error("Plugin ekleme hatası", exc_info=True)
+            return False
+
+    async def update_plugin(self, name: str, data: Dict) -> bool:
+        """Plugin bilgilerini güncelle"""
+        def _update():
+            with self.conn:
+                plugin = self._get_plugin_sync(name)
+                if plugin is None:
+                    return False
+                plugin.update(data)
+                self._put_plugin_sync(plugin)
+            return True
+        try:
+            return await self._run(_update)
+        except Exception:
+            log.error("Plugin güncelleme hatası", exc_info=True)
+            return False
+
+    async def delete_plugin(self, name: str) -> bool:
+        """Plugin sil"""
+        def _delete():
+            with self.conn:
+                cur = self.conn.execute("DELETE FROM plugins WHERE name = ?", (name,))
+                self.conn.execute("DELETE FROM plugin_commands WHERE plugin = ?", (name,))
+            return cur.rowcount > 0
+        try:
+            return await self._run(_delete)
+        except Exception:
+            log.error("Plugin silme hatası", exc_info=True)
+            return False
+
+    async def get_all_plugins(self) -> List[Dict]:
+        """Tüm pluginleri getir"""
+        return await self._run(self._all_plugins_sync)
+
+    async def get_public_plugins(self) -> List[Dict]:
+        """Genel pluginleri getir"""
+        plugins = await self.get_all_plugins()
+        return [p for p in plugins if p.get("is_public") and p.get("is_active")]
+
+    async def get_user_accessible_plugins(self, user_id: int) -> List[Dict]:
+        """Kullanıcının erişebildiği pluginleri getir"""
+        accessible = []
+        for plugin in await self.get_all_plugins():
+            if not plugin.get("is_active"):
+                continue
+            if user_id in plugin.get("restricted_users", []):
+                continue
+            if plugin.get("is_public") or user_id in plugin.get("allowed_users", []):
+                accessible.append(plugin)
+        return accessible
+
+    async def check_command_exists(self, command: str, exclude_plugin: str = None) -> Optional[str]:
+        """Komutun başka bir pluginde olup olmadığını kontrol et (indeksli)"""
+        def _q():
+            row = self.conn.execute(
+                "SELECT plugin FROM plugin_commands WHERE command = ? AND plugin != ? LIMIT 1",
+                (command, exclude_plugin or ""),
+            ).fetchone()
+            return row["plugin"] if row else None
+        return await self._run(_q)
+
+    async def _modify_plugin_list(self, plugin_name: str, field: str, user_id: int, add: bool) -> bool:
+        def _modify():
+            with self.conn:
+                plugin = self._get_plugin_sync(plugin_name)
+                if plugin is None:
+                    return False
+                values = plugin.get(field, [])
+                if add and user_id not in values:
+                    values.append(user_id)
+                elif not add and user_id in values:
+                    values.remove(user_id)
+                plugin[field] = values
+                self._put_plugin_sync(plugin)
+            return True
+        try:
+            return await self._run(_modify)
+        except Exception:
+            log.error("Plugin erişim listesi hatası (%s)", field, exc_info=True)
+            return False
+
+    async def add_plugin_user_access(self, plugin_name: str, user_id: int) -> bool:
+        """Plugin'e kullanıcı erişimi ekle"""
+        return await self._modify_plugin_list(plugin_name, "allowed_users", user_id, True)
+
+    async def remove_plugin_user_access(self, plugin_name: str, user_id: int) -> bool:
+        """Plugin'den kullanıcı erişimini kaldır"""
+        return await self._modify_plugin_list(plugin_name, "allowed_users", user_id, False)
+
+    async def restrict_plugin_user(self, plugin_name: str, user_id: int) -> bool:
+        """Kullanıcıyı plugin kullanımından kısıtla"""
+        return await self._modify_plugin_list(plugin_name, "restricted_users", user_id, True)
+
+    async def unrestrict_plugin_user(self, plugin_name: str, user_id: int) -> bool:
+        """Kullanıcının plugin kısıtlamasını kaldır"""
+        return await self._modify_plugin_list(plugin_name, "restricted_users", user_id, False)
+
+    # ==========================================
+    # BAN İŞLEMLERİ
+    # ==========================================
+
+    async def ban_user(self, user_id: int, reason: str = None, banned_by: int = None) -> bool:
+        """Kullanıcıyı banla"""
+        return await self.update_user(user_id, {
+            "is_banned": True,
+            "ban_reason": reason,
+            "banned_at": datetime.utcnow().isoformat(),
+            "banned_by": banned_by
+        })
+
+    async def unban_user(self, user_id: int) -> bool:
+        """Kullanıcının banını kaldır"""
+        return await self.update_user(user_id, {
+            "is_banned": False,
+            "ban_reason": None,
+            "banned_at": None,
+            "banned_by": None
+        })
+
+    async def is_banned(self, user_id: int) -> bool:
+        """Kullanıcının banlı olup olmadığını kontrol et"""
+        row = await self._run(
+            lambda: self.conn.execute(
+                "SELECT is_banned FROM users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        )
+        return bool(row and row["is_banned"])
+
+    async def get_banned_users(self) -> List[Dict]:
+        """Banlı kullanıcıları getir"""
+        return await self._run(self._select_users_sync, "WHERE is_banned = 1")
+
+    # ==========================================
+    # SUDO İŞLEMLERİ
+    # ==========================================
+
+    async def add_sudo(self, user_id: int) -> bool:
+        """Sudo ekle"""
+        return await self.update_user(user_id, {"is_sudo": True})
+
+    async def remove_sudo(self, user_id: int) -> bool:
+        """Sudo kaldır"""
+        return await self.update_user(user_id, {"is_sudo": False})
+
+    async def is_sudo(self, user_id: int) -> bool:
+        """Sudo kontrolü"""
+        if user_id == config.OWNER_ID:
+            return True
+        row = await self._run(
+            lambda: self.conn.execute(
+                "SELECT is_sudo FROM users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        )
+        return bool(row and row["is_sudo"])
+
+    async def get_sudos(self) -> List[Dict]:
+        """Sudo listesi"""
+        return await self._run(self._select_users_sync, "WHERE is_sudo = 1")
+
+    # ==========================================
+    # AYARLAR İŞLEMLERİ
+    # ==========================================
+
+    def _get_settings_sync(self) -> Dict:
+        row = self.conn.execute("SELECT value FROM settings WHERE key = 'bot_settings'").fetchone()
+        if row:
+            return json.loads(row["value"])
+        return config.DEFAULT_SETTINGS.copy()
+
+    async def get_settings(self) -> Dict:
+        """Bot ayarlarını getir"""
+        return await self._run(self._get_settings_sync)
+
+    async def update_settings(self, data: Dict) -> bool:
+        """Bot ayarlarını güncelle"""
+        def _update():
+            with self.conn:
+                settings = self._get_settings_sync()
+                settings.update(data)
+                self.conn.execute(
+                    "INSERT INTO settings(key, value) VALUES('bot_settings', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (_dumps(settings),),
+                )
+            return True
+        try:
+            return await self._run(_update)
+        except Exception:
+            log.error("Ayar güncelleme hatası", exc_info=True)
+            return False
+
+    # ==========================================
+    # LOG İŞLEMLERİ
+    # ==========================================
+
+    async def add_log(self, log_type: str, user_id: int = None,
+                      message: str = "", data: Dict = None) -> bool:
+        """Log ekle"""
+        def _add():
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO logs(type, user_id, message, data, timestamp) VALUES(?, ?, ?, ?, ?)",
+                    (log_type, user_id, message, _dumps(data or {}), time.time()),
+                )
+            return True
+        try:
+            return await self._run(_add)
+        except Exception:
+            log.error("Log ekleme hatası", exc_info=True)
+            return False
+
+    async def get_logs(self, limit: int = 100, log_type: str = None) -> List[Dict]:
+        """Logları getir (en yeni önce)"""
+        def _q():
+            if log_type:
+                rows = self.conn.execute(
+                    "SELECT * FROM logs WHERE type = ? ORDER BY timestamp DESC LIMIT ?",
+                    (log_type, limit),
+                ).fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT * FROM logs ORDER BY timestamp DESC LIMIT ?", (limit,)
+                ).fetchall()
+            return [{
+                "type": r["type"],
+                "user_id": r["user_id"],
+                "message": r["message"],
+                "data": json.loads(r["data"] or "{}"),
+                "timestamp": datetime.utcfromtimestamp(r["timestamp"]),
+            } for r in rows]
+        return await self._run(_q)
+
+    # ==========================================
+    # İSTATİSTİK İŞLEMLERİ
+    # ==========================================
+
+    async def get_stats(self) -> Dict:
+        """İstatistikleri getir (tek sorgu)"""
+        def _q():
+            row = self.conn.execute(
+                "SELECT "
+                "(SELECT COUNT(*) FROM users), "
+                "(SELECT COUNT(*) FROM users WHERE is_logged_in = 1), "
+                "(SELECT COUNT(*) FROM users WHERE is_banned = 1), "
+                "(SELECT COUNT(*) FROM users WHERE is_sudo = 1), "
+                "(SELECT COUNT(*) FROM plugins), "
+                "(SELECT COUNT(*) FROM plugins WHERE is_public = 1)"
+            ).fetchone()
+            return {
+                "total_users": row[0],
+                "logged_in_users": row[1],
+                "banned_users": row[2],
+                "sudo_users": row[3],
+                "total_plugins": row[4],
+                "public_plugins": row[5],
+                "private_plugins": row[4] - row[5],
+            }
+        return await self._run(_q)
+
+    # ==========================================
+    # TEPKİ SİSTEMİ
+    # ==========================================
+
+    async def get_user_reaction(self, reaction_key: str, user_id: int) -> Optional[str]:
+        """Kullanıcının tepkisini getir"""
+        def _q():
+            row = self.conn.execute(
+                "SELECT emoji FROM reactions WHERE reaction_key = ? AND user_id = ?",
+                (reaction_key, user_id),
+            ).fetchone()
+            return row["emoji"] if row else None
+        return await self._run(_q)
+
+    async def set_user_reaction(self, reaction_key: str, user_id: int, emoji: Optional[str]) -> bool:
+        """Kullanıcının tepkisini kaydet veya sil"""
+        def _set():
+            with self.conn:
+                if emoji is None:
+                    self.conn.execute(
+                        "DELETE FROM reactions WHERE reaction_key = ? AND user_id = ?",
+                        (reaction_key, user_id),
+                    )
+                else:
+                    self.conn.execute(
+                        "INSERT INTO reactions(reaction_key, user_id, emoji, updated_at) "
+                        "VALUES(?, ?, ?, ?) ON CONFLICT(reaction_key, user_id) "
+                        "DO UPDATE SET emoji = excluded.emoji, updated_at = excluded.updated_at",
+                        (reaction_key, user_id, emoji, time.time()),
+                    )
+            return True
+        try:
+            return await self._run(_set)
+        except Exception:
+            log.error("Tepki kaydetme hatası", exc_info=True)
+            return False
+
+    # ==========================================
+    # JSON → SQLITE GÖÇÜ
+    # ==========================================
+
+    def _migrate_from_json_sync(self) -> Dict:
+        """data/*.json içeriğini SQLite'a aktar (bir kez; meta'da işaretlenir)"""
+        from .local import local_db
+
+        counts = {"users": 0, "plugins": 0, "reactions": 0}
+        with self.conn:
+            for user in local_db.get_all_users():
+                if isinstance(user, dict) and user.get("user_id") is not None:
+                    self._put_user_sync(user)
+                    counts["users"] += 1
+            for plugin in local_db.get_all_plugins():
+                if isinstance(plugin, dict) and plugin.get("name"):
+                    self._put_plugin_sync(plugin)
+                    counts["plugins"] += 1
+            settings = local_db.get_settings()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO settings(key, value) VALUES('bot_settings', ?)",
+                (_dumps(settings),),
+            )
+            reactions = local_db._load_json(os.path.join(config.DATA_DIR, "reactions.json")) or {}
+            for key, emoji in reactions.items():
+                # Yerel anahtar biçimi: "<reaction_key>_<user_id>"
+                reaction_key, _, uid = key.rpartition("_")
+                if reaction_key and uid.lstrip("-").isdigit() and emoji:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO reactions(reaction_key, user_id, emoji, updated_at) "
+                        "VALUES(?, ?, ?, ?)",
+                        (reaction_key, int(uid), emoji, time.time()),
+                    )
+                    counts["reactions"] += 1
+            self._meta_set("migrated_from_json", datetime.utcnow().isoformat())
+        return counts
+
+    async def migrate_from_json(self) -> Dict:
+        """JSON dosyalarını (tekrar) içe aktar"""
+        return await self._run(self._migrate_from_json_sync)
+
+    async def migrated_at(self) -> Optional[str]:
+        """JSON göçünün yapıldığı zaman (ISO), yapılmadıysa None"""
+        return await self._run(self._meta_get, "migrated_from_json")
+
+
+# Global örnek yok: Database (database/__init__.py) yalnızca DB_BACKEND=sqlite
+# iken oluşturur (json modunda bağlantı/iş parçacığı açılmaz)
+
+
+if __name__ == "__main__":
+    # Tek seferlik göç: python -m database.sqlite [--force]
+    # Göç daha önce yapıldıysa canlı veritabanındaki yeni satırlar eski JSON
+    # ile ezilmesin diye --force olmadan reddedilir.
+    async def _main() -> int:
+        sqlite_db = SQLiteDB()
+        try:
+            if not await sqlite_db.connect(migrate=False):
+                return 1
+            done = await sqlite_db.migrated_at()
+            if done and "--force" not in sys.argv[1:]:
+                print(f"Göç zaten yapılmış ({done}): {sqlite_db.path}\n"
+                      "JSON verisi SQLite'taki güncel kayıtların üzerine yazılır; "
+                      "yine de çalıştırmak için --force verin.")
+                return 1
+            result = await sqlite_db.migrate_from_json()
+            print(f"Göç tamamlandı: {result} → {sqlite_db.path}")
+            return 0
+        finally:
+            sqlite_db.close()
+
+    sys.exit(asyncio.run(_main()))
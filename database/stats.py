@@ -0,0 +1,63 @@
+# ============================================
+# KingTG UserBot Service - İstatistik Geçmişi
+# ============================================
+# Anlık sayaçlar depoların kendisinden gelir (LocalStorage indeksleri,
+# SQLite tek sorgu, MongoDB tek $facet aggregation). Burada yalnızca trend
+# grafikleri için periyodik örnekler sabit boyutlu halka tamponda tutulur.
+# ============================================
+
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+# Örnekte tutulan alanlar
+SAMPLE_FIELDS = ("total_users", "logged_in_users", "active_clients", "always_on_users")
+
+_SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+class StatsHistory:
+    """Son N örneği tutan halka tampon (eskiler kendiliğinden düşer)"""
+
+    def __init__(self, size: int = 288):
+        self._samples: deque = deque(maxlen=max(1, size))
+
+    def record(self, sample: Dict, ts: float = None) -> Dict:
+        """Bir örnek ekle; yalnızca SAMPLE_FIELDS alanları saklanır"""
+        entry = {"ts": ts if ts is not None else time.time()}
+        for field in SAMPLE_FIELDS:
+            entry[field] = int(sample.get(field, 0) or 0)
+        self._samples.append(entry)
+        return entry
+
+    def samples(self, since: float = None) -> List[Dict]:
+        """Örnekler (eskiden yeniye)"""
+        if since is None:
+            return list(self._samples)
+        return [s for s in self._samples if s["ts"] >= since]
+
+    def series(self, field: str, since: float = None) -> List[int]:
+        """Tek alanın zaman serisi"""
+        return [s.get(field, 0) for s in self.samples(since)]
+
+    def latest(self) -> Optional[Dict]:
+        return self._samples[-1] if self._samples else None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+def sparkline(values: List[int], width: int = 24) -> str:
+    """Değerleri ▁▂▃▅▇ karakterleriyle tek satır grafiğe çevir"""
+    if not values:
+        return ""
+    if len(values) > width:
+        # Eşit aralıklı örnekle (son değer her zaman dahil)
+        step = len(values) / width
+        values = [values[min(len(values) - 1, int((i + 1) * step) - 1)] for i in range(width)]
+    low, high = min(values), max(values)
+    span = high - low
+    if span == 0:
+        return _SPARK_CHARS[0] * len(values)
+    top = len(_SPARK_CHARS) - 1
+    return "".join(_SPARK_CHARS[round((v - low) / span * top)] for v in values)
@@ -93,6 +93,11 @@ def register(bot):
             
             old_cmds = ", ".join([f"`.{c}`" for c in existing_plugin.get("commands", [])[:5]])
             new_cmds = ", ".join([f"`.{c}`" for c in info.get("commands", [])[:5]])
+            # Yeni sürümün eklediği komutlar başka pluginle çakışıyor mu
+            conflicts = await db.check_commands(info.get("commands", []), exclude_plugin=plugin_name)
+            clash = "".join(f"⚠️ `.{cmd}` → `{owner}` ile çakışıyor\n" for cmd, owner in conflicts.items())
+            if clash:
+                clash += "\n"
             
             await event.respond(
                 f"⚠️ **`{plugin_name}` zaten mevcut!**\n\n"
@@ -100,6 +105,7 @@ def register(bot):
                 f"   └ {old_cmds or 'Komut yok'}\n\n"
                 f"📦 **Yeni:**\n"
                 f"   └ {new_cmds or 'Komut yok'}\n\n"
+                f"{clash}"
                 f"Ne yapmak istiyorsunuz?",
                 buttons=[
                     [Button.inline("🔄 Güncelle", f"update_plugin_{plugin_name}".encode())],
@@ -109,13 +115,13 @@ def register(bot):
             )
             return
         
-        # Yeni plugin - komut çakışması kontrolü (başka pluginlerle)
-        for cmd in info["commands"]:
-            existing = await db.check_command_exists(cmd)
-            if existing and existing != plugin_name:
-                os.remove(temp_path)
-                await event.respond(f"❌ `.{cmd}` komutu `{existing}` plugininde mevcut!")
-                return
+        # Yeni plugin - komut çakışması kontrolü (başka pluginlerle, tek çağrıda)
+        conflicts = await db.check_commands(info["commands"], exclude_plugin=plugin_name)
+        if conflicts:
+            os.remove(temp_path)
+            await event.respond("❌ Komut çakışması:\n" + "\n".join(
+                f"• `.{cmd}` → `{owner}`" for cmd, owner in conflicts.items()))
+            return
         
         # Dosyayı doğru isimle taşı
         final_path = os.path.join(config.PLUGINS_DIR, original_filename)
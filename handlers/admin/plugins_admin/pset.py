@@ -538,30 +538,21 @@ def register(bot):
             # Özel yapıldığında izinsiz kullanıcılarda deaktif et
             allowed_users = plugin.get("allowed_users", []) if plugin else []
 
+            # İzinli kullanıcılar, owner ve sudo'lar hariç herkeste tek geçişte kaldır
             users = await db.get_all_users()
+            targets = []
             for user in users:
                 user_id = user.get("user_id")
-
-                # İzinli kullanıcıları atla
                 if user_id in allowed_users:
                     continue
-
-                # Owner ve sudo'ları atla
                 if user_id == config.OWNER_ID or await db.is_sudo(user_id):
                     continue
+                targets.append(user_id)
 
-                active = user.get("active_plugins", [])
-                if plugin_name in active:
-                    active.remove(plugin_name)
-                    await db.update_user(user_id, {"active_plugins": active})
-
-                    # Handler'ları kaldır
-                    try:
-                        success, _ = await plugin_manager.deactivate_plugin(user_id, plugin_name)
-                        if success:
-                            count += 1
-                    except Exception:
-                        pass
+            try:
+                count = await plugin_manager.deactivate_plugin_for_users(plugin_name, targets)
+            except Exception:
+                pass
 
             if count > 0:
                 await event.answer(f"✅ Özel yapıldı! {count} kullanıcıda kaldırıldı.", alert=True)
@@ -613,22 +604,11 @@ def register(bot):
 
         deactivated_count = 0
         if is_disabled:
-            # Tüm kullanıcılarda deaktif et
-            users = await db.get_all_users()
-            for user in users:
-                user_id = user.get("user_id")
-                active = user.get("active_plugins", [])
-                if plugin_name in active:
-                    active.remove(plugin_name)
-                    await db.update_user(user_id, {"active_plugins": active})
-
-                    # Handler'ları kaldır (client aktifse)
-                    try:
-                        success, _ = await plugin_manager.deactivate_plugin(user_id, plugin_name)
-                        if success:
-                            deactivated_count += 1
-                    except Exception:
-                        pass
+            # Tüm kullanıcılarda deaktif et (DB + yüklü handler'lar, tek geçiş)
+            try:
+                deactivated_count = await plugin_manager.deactivate_plugin_for_users(plugin_name)
+            except Exception:
+                pass
 
             await event.answer(f"✅ Devre dışı! {deactivated_count} kullanıcıda kaldırıldı.", alert=True)
         else:
@@ -8,6 +8,7 @@
 # KingTG UserBot Service - Admin Handlers
 # ============================================
 
+import io
 import os
 import sys
 import asyncio
@@ -18,6 +19,7 @@ from datetime import datetime
 from telethon import events, Button
 import config
 from database import database as db
+from database.stats import sparkline
 from userbot.smart_manager import smart_session_manager
 from userbot.plugins import plugin_manager
 
@@ -25,6 +27,8 @@ from userbot.plugins import plugin_manager
 userbot_manager = smart_session_manager
 from utils import send_log, get_readable_time, back_button
 from utils.bot_api import bot_api, btn, ButtonBuilder
+from utils.profiler import profiler
+from utils.http_client import http_client
 
 start_time = time.time()
 
@@ -183,9 +187,9 @@ def register(bot):
             # Ping
             try:
                 start = time_module.time()
-                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
-                    async with session.head("https://www.google.com"):
-                        pass
+                async with http_client.session.head("https://www.google.com",
+                                                    timeout=aiohttp.ClientTimeout(total=5)):
+                    pass
                 results['ping'] = (time_module.time() - start) * 1000
             except Exception:
                 pass
@@ -194,10 +198,10 @@ def register(bot):
             try:
                 start = time_module.time()
                 total_bytes = 0
-                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15)) as session:
-                    async with session.get("https://speed.cloudflare.com/__down?bytes=5000000") as response:
-                        async for chunk in response.content.iter_chunked(1024 * 64):
-                            total_bytes += len(chunk)
+                async with http_client.session.get("https://speed.cloudflare.com/__down?bytes=5000000",
+                                                   timeout=aiohttp.ClientTimeout(total=15)) as response:
+                    async for chunk in response.content.iter_chunked(1024 * 64):
+                        total_bytes += len(chunk)
                 elapsed = time_module.time() - start
                 if elapsed > 0:
                     results['download'] = (total_bytes * 8) / (elapsed * 1_000_000)
@@ -208,9 +212,9 @@ def register(bot):
             try:
                 data = b'0' * (1 * 1024 * 1024)  # 1MB
                 start = time_module.time()
-                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15)) as session:
-                    async with session.post("https://speed.cloudflare.com/__up", data=data):
-                        pass
+                async with http_client.session.post("https://speed.cloudflare.com/__up", data=data,
+                                                    timeout=aiohttp.ClientTimeout(total=15)):
+                    pass
                 elapsed = time_module.time() - start
                 if elapsed > 0:
                     results['upload'] = (len(data) * 8) / (elapsed * 1_000_000)
@@ -232,7 +236,28 @@ def register(bot):
         text = "📊 **Bot İstatistikleri**\n\n"
         text += f"👥 **Kullanıcı:** `{db_stats.get('total_users', 0)}` (Aktif: `{db_stats.get('logged_in_users', 0)}`)\n"
         text += f"🔌 **Plugin:** `{db_stats.get('total_plugins', 0)}`\n"
-        text += f"👑 **Sudo:** `{db_stats.get('sudo_users', 0)}` | 🚫 **Ban:** `{db_stats.get('banned_users', 0)}`\n\n"
+        text += f"👑 **Sudo:** `{db_stats.get('sudo_users', 0)}` | 🚫 **Ban:** `{db_stats.get('banned_users', 0)}`\n"
+        cache = db.cache_stats()
+        text += f"🗃️ **Önbellek:** Kullanıcı `{cache['users']['hit_rate']}%` | Plugin `{cache['plugins']['hit_rate']}%`\n"
+        sm_stats = smart_session_manager.get_stats()
+        text += (f"🔗 **Client:** `{sm_stats['active_clients']}` aktif | "
+                 f"💤 `{sm_stats['hibernated']}` hibernasyonda\n")
+        health = smart_session_manager.health.stats()
+        if health["monitored"]:
+            text += (f"🩺 **Sağlık:** `{health['checks']}` kontrol, `{health['failures']}` hata, "
+                     f"`{health['passive_skips']}` pasif | ort. `{health['avg_latency_ms'] or '-'} ms`\n")
+        restore = smart_session_manager.restore_status()
+        if restore["running"]:
+            eta = get_readable_time(restore["eta"]) if restore["eta"] is not None else "?"
+            text += (f"♻️ **Geri Yükleme:** `{restore['done']}/{restore['total']}` "
+                     f"(ETA: `{eta}`)\n")
+        if len(db.stats_history) > 1:
+            text += f"📈 **Aktif Client:** `{sparkline(db.stats_history.series('active_clients'))}`\n"
+            text += f"📈 **Kullanıcı:** `{sparkline(db.stats_history.series('total_users'))}`\n"
+        if db.is_mongo_connected:
+            wq = db.write_queue_stats()
+            text += f"📤 **Mongo Kuyruk:** `{wq['depth']}` bekleyen | Gönderim `{wq['avg_flush_ms']} ms`\n"
+        text += "\n"
         
         text += "━━━━━━━━━━━━━━━━━━━━\n🖥️ **Sistem:**\n\n"
         text += f"💻 **CPU:** `{sys_stats['cpu_percent']}%` ({sys_stats['cpu_count']} core)\n"
@@ -278,6 +303,83 @@ def register(bot):
         await msg.edit(text)
     
 
+    @bot.on(events.NewMessage(pattern=r'^/pprof(?: (\w+))?$'))
+    async def pprof_command(event):
+        """Plugin profili: /pprof [busy|calls|errors|http|prom|reset]"""
+        if event.sender_id != config.OWNER_ID and not await db.is_sudo(event.sender_id):
+            return
+        arg = (event.pattern_match.group(1) or "busy").lower()
+        if arg == "reset":
+            profiler.reset()
+            http_client.reset()
+            await event.respond("🧹 Plugin profili sıfırlandı.")
+            return
+        if arg == "http":
+            rows = http_client.stats()[:10]
+            text = "🌐 **Giden HTTP** (host başına, yanıt başlıklarına kadar)\n\n"
+            if not rows:
+                text += "Henüz istek yok."
+            for row in rows:
+                text += f"🔗 **{row['host']}** · `{row['requests']}` istek · `{row['bytes'] / 1048576:.1f}` MB"
+                if row["errors"]:
+                    text += f" · ❌ `{row['errors']}`"
+                if row["retries"]:
+                    text += f" · 🔁 `{row['retries']}`"
+                text += f"\n   p50/p95/p99: `{row['p50_ms']:.0f}` / `{row['p95_ms']:.0f}` / `{row['p99_ms']:.0f}` ms\n"
+            await event.respond(text)
+            return
+        if arg == "prom":
+            data = io.BytesIO(profiler.metrics_text().encode("utf-8"))
+            data.name = "plugins.prom"
+            await event.respond("📈 Plugin metrikleri (Prometheus)", file=data)
+            return
+        rows = profiler.top(10, arg)
+        since = get_readable_time(time.time() - profiler.started)
+        text = f"🔬 **Plugin Profili** (`{arg}`, son {since})\n"
+        if not profiler.enabled:
+            text += "⚠️ Profilleyici kapalı (`PLUGIN_PROFILE=false`)\n"
+        text += f"Örnekleme: 1/{profiler.sample_every} | yavaş eşiği: `{profiler.slow_threshold * 1000:g} ms`\n\n"
+        if not rows:
+            text += "Henüz ölçülen handler çağrısı yok."
+        for row in rows:
+            text += f"🔌 **{row['plugin']}** · {row['users']} kullanıcı · `{row['calls']}` çağrı"
+            if row["errors"]:
+                text += f" · ❌ `{row['errors']}`"
+            if row["slow"]:
+                text += f" · 🐢 `{row['slow']}`"
+            text += (f"\n   p50/p95/p99: `{row['p50_ms']:.1f}` / `{row['p95_ms']:.1f}` / `{row['p99_ms']:.1f}` ms"
+                     f" | döngü: `{row['busy_ms']:.0f} ms` (en uzun adım `{row['busy_max_ms']:.1f}`)\n")
+        await event.respond(text)
+    
+
+    @bot.on(events.NewMessage(pattern=r'^/dbaudit$'))
+    async def dbaudit_command(event):
+        """MongoDB sık sorgularını explain() ile denetle (COLLSCAN uyarısı)"""
+        if event.sender_id != config.OWNER_ID:
+            return
+        if not db.is_mongo_connected:
+            await event.respond("⚠️ MongoDB bağlı değil.")
+            return
+        msg = await event.respond("⏳ **Sorgu planları inceleniyor...**")
+        report = await db.mongo.explain_hot_queries()
+        scans = 0
+        text = "🔍 **Sorgu Planı Denetimi**\n\n"
+        for row in report:
+            if row.get("error"):
+                text += f"❓ `{row['name']}`: {row['error'][:80]}\n"
+                continue
+            if row["collscan"]:
+                scans += 1
+            icon = "⚠️" if row["collscan"] else "✅"
+            plan = ", ".join(row["indexes"]) or "/".join(row["stages"])
+            text += f"{icon} `{row['name']}` → `{plan}`"
+            if row.get("docs_examined") is not None:
+                text += f" (doc: {row['docs_examined']}, key: {row['keys_examined']})"
+            text += "\n"
+        text += f"\n{'⚠️ ' + str(scans) + ' sorgu tam tarama yapıyor' if scans else '✅ Tüm sorgular indeks kullanıyor'}"
+        await msg.edit(text)
+    
+
     @bot.on(events.CallbackQuery(data=b"update_bot"))
     async def update_bot_handler(event):
         if event.sender_id != config.OWNER_ID:
@@ -417,7 +519,7 @@ def register(bot):
         text += "**🔌 Plugin:**\n• `/addplugin` - Ekle\n• `/delplugin <isim>` - Sil\n• `/getplugin <isim>` - İndir\n• `/setpublic <isim>`\n• `/setprivate <isim>`\n\n"
         text += "**🚫 Ban:** `/ban <id>` `/unban <id>`\n"
         text += "**👑 Sudo:** `/addsudo <id>` `/delsudo <id>`\n\n"
-        text += "**📢 Diğer:** `/broadcast` `/stats`"
+        text += "**📢 Diğer:** `/broadcast` `/stats` `/dbaudit` `/pprof`"
         await event.edit(text, buttons=[back_button("settings_menu")])
     
 
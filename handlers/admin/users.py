@@ -107,6 +107,12 @@ def register(bot):
             if len(active_plugins) > 5:
                 text += f" +{len(active_plugins) - 5}"
             text += "\n"
+        health = smart_session_manager.health.user_stats(user_id)
+        if health:
+            latency = health["avg_latency_ms"]
+            text += (f"\n🩺 **Bağlantı:** kontrol `{health['checks']}` | hata `{health['failures']}` | "
+                     f"gecikme `{latency if latency is not None else '-'} ms` | "
+                     f"aralık `{int(health['interval'])} sn`\n")
         if is_banned:
             text += f"\n🚫 **Ban:** {user_data.get('ban_reason', 'Sebep yok')}\n"
         buttons = []
@@ -250,18 +250,19 @@ def register(bot):
         text += "_Hesabınızı yöneten userbot'un komutları._\n"
         text += "_`.` ile **Telegram'da herhangi bir sohbete** yazılır._\n\n"
         try:
+            index = await db.command_index()
             plugins = await db.get_all_plugins()
         except Exception:
-            plugins = []
+            index, plugins = None, []
+        disabled = {pl.get("name") for pl in (plugins or []) if pl.get("is_disabled")}
         listed = 0
-        for pl in (plugins or []):
-            if pl.get("is_disabled"):
+        for name in (index.plugins() if index else []):
+            if name in disabled:
                 continue
-            cmds = pl.get("commands", [])
+            cmds = index.commands_of(name)
             if not cmds:
                 continue
-            name = pl.get("name", "?")
-            cmd_text = ", ".join(f"`.{c}`" for c in cmds)
+            cmd_text = ", ".join(f"`.{c}`" + ("⚠️" if len(index.owners(c)) > 1 else "") for c in cmds)
             line = f"🔌 **{name}:** {cmd_text}\n"
             if len(text) + len(line) > 3800:  # Telegram mesaj sınırı güvenliği
                 text += "…ve daha fazlası. Detay: `/pinfo <plugin>`\n"
@@ -270,7 +271,9 @@ def register(bot):
             listed += 1
         if listed == 0:
             text += "_Henüz plugin komutu yok._\n"
-        text += "\n💡 Bir plugin'in detayı için: `/pinfo <isim>`"
+        elif index and index.duplicates():
+            text += "\n⚠️ _İşaretli komut birden çok plugin'de var; ikisi de yüklüyse ikisi de çalışır._\n"
+        text += "\n💡 Bir plugin'in ya da komutun detayı için: `/pinfo <isim|.komut>`"
         rows = [[btn.callback(" Geri", "commands", style=ButtonBuilder.STYLE_DANGER,
                               icon_custom_emoji_id=5832646161554480591)]]
         await bot_api.edit_message_text(chat_id=event.sender_id, message_id=event.message_id,
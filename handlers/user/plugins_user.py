@@ -302,6 +302,11 @@ def register(bot):
     async def pinfo_command(event):
         plugin_name = event.pattern_match.group(1)
         text, rows = await build_plugin_info(event.sender_id, 0, plugin_name)
+        if not text:
+            # Plugin adı değilse komut olarak dene: /pinfo .sticker → sticker'ın plugini
+            owner = await db.check_command_exists(plugin_name)
+            if owner:
+                text, rows = await build_plugin_info(event.sender_id, 0, owner)
         if not text:
             await event.respond(f"❌ `{plugin_name}` bulunamadı.")
             return
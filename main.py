@@ -25,6 +25,7 @@ from database import database as db
 # Smart Session Manager
 from userbot.smart_manager import smart_session_manager
 from userbot.plugins import plugin_manager
+from userbot.watcher import plugin_watcher
 
 # Eski uyumluluk için alias
 userbot_manager = smart_session_manager
@@ -33,6 +34,9 @@ from handlers import register_user_handlers, register_admin_handlers
 from utils import send_log, get_readable_time
 from utils.bot_api import bot_api
 from utils.logger import get_logger
+from utils.profiler import profiler
+from utils.imaging import image_pool
+from utils.http_client import http_client
 
 # ============================================
 # GLOBAL DEĞİŞKENLER
@@ -237,6 +241,22 @@ async def main():
     except Exception as _e:
         log(f"⚠️ Plugin senkron hatası: {_e}")
 
+    # Plugin klasörünü izle: yeni/değişen dosya yeniden başlatmadan panele düşer
+    # (debounce'lu artımlı senkron); hot-reload açıksa değişen plugin, yükleyen
+    # herkeste yerinde güncellenir
+    plugin_watcher.subscribe(plugin_manager.sync_changed)
+    if config.PLUGIN_HOT_RELOAD:
+        plugin_watcher.subscribe(plugin_manager.reload_changed)
+    plugin_watcher.start()
+    log(f"👀 Plugin klasörü izleniyor (her {config.PLUGIN_WATCH_INTERVAL:g} sn"
+        f"{', hot-reload aktif' if config.PLUGIN_HOT_RELOAD else ''})")
+
+    # Plugin profilleyici: Prometheus /metrics (PLUGIN_PROFILE_PORT > 0 ise)
+    try:
+        await profiler.start_server(config.PLUGIN_PROFILE_HOST, config.PLUGIN_PROFILE_PORT)
+    except Exception as _e:
+        log(f"⚠️ Metrik uç noktası açılamadı: {_e}")
+
     # Kullanıcı dillerini belleğe al (otomatik çeviri için)
     try:
         import utils.i18n as _i18n
@@ -272,15 +292,11 @@ async def main():
     except Exception as _e:
         log(f"⚠️ Dil yükleme atlandı: {_e}")
 
-    # Session'ları geri yükle
-    log("🔄 Session'lar geri yükleniyor...")
-    restored = await smart_session_manager.restore_sessions()
-    
-    # İstatistikleri göster
-    stats = smart_session_manager.get_stats()
-    log(f"✅ {restored} kullanıcı aktif (plugin'li)")
-    log(f"📦 {stats['session_cache']} session cache'de")
-    log(f"🟢 {stats['always_on_users']} always-on")
+    # Session'ları arka planda geri yükle: bot (kontrol düzlemi) hemen hazır,
+    # kullanıcı client'ları öncelik sırasıyla sınırlı eşzamanlılıkla açılır
+    log("🔄 Session'lar arka planda geri yükleniyor "
+        f"(eşzamanlılık: {config.RESTORE_CONCURRENCY})...")
+    smart_session_manager.start_restore()
     
     # Arka plan görevlerini başlat
     log("🔄 Arka plan görevleri başlatılıyor...")
@@ -302,8 +318,7 @@ async def main():
             text += f"🔢 Sürüm: `v{config.__version__}`\n"
             text += f"👥 Kullanıcı: `{db_stats.get('total_users', 0)}`\n"
             text += f"🔌 Plugin: `{db_stats.get('total_plugins', 0)}`\n"
-            text += f"🟢 Always-On: `{stats['always_on_users']}`\n"
-            text += f"📦 On-Demand Hazır: `{stats['session_cache']}`\n"
+            text += "♻️ Oturumlar: `arka planda geri yükleniyor`\n"
             text += f"🔗 MongoDB: `{'Bağlı' if mongo_connected else 'Bağlı Değil'}`"
             
             await bot.send_message(config.LOG_CHANNEL, text)
@@ -314,8 +329,6 @@ async def main():
     log("✅ Bot hazır!")
     log(f"👤 Sahip: {config.OWNER_ID}")
     log(f"📊 Kullanıcılar: {await db.get_user_count()}")
-    log(f"🟢 Always-On: {stats['always_on_users']}")
-    log(f"📦 On-Demand: {stats['session_cache']}")
     log("=" * 50)
     
     # Bot çalışmaya devam et
@@ -329,15 +342,37 @@ async def shutdown():
     """Kapanış işlemleri"""
     log("🔄 Bot kapatılıyor...")
 
-    # Çeviri önbelleğini diske kaydet
+    # Çeviri önbelleğini diske kaydet, çeviri havuzunu kapat
     try:
         import utils.i18n as _i18n
         _i18n.flush_cache()
+        _i18n.shutdown()
     except Exception:
         pass
 
+    plugin_watcher.stop()
+    await profiler.stop_server()
+
     # Smart Session Manager'ı kapat
     await smart_session_manager.shutdown()
+
+    # Görsel işleme alt süreçlerini kapat
+    image_pool.shutdown()
+
+    # Paylaşılan HTTP oturumunu kapat
+    await http_client.close()
+
+    # MongoDB yazma kuyruğunu boşalt
+    try:
+        await db.disconnect()
+    except Exception:
+        pass
+
+    # Yerel veritabanı günlüğünü diske indir
+    try:
+        db.flush()
+    except Exception:
+        pass
     
     # Bot bağlantısını kapat
     await bot.disconnect()
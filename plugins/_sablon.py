@@ -75,5 +75,10 @@ def unregister():
 #    yeni bir mesaj olarak da cevap verebilirsin.
 #  • Hata olabilecek yerleri try/except ile sar AMA hatayı
 #    yutma — en azından kullanıcıya anlamlı bir mesaj göster.
+#  • Başlığa "# shared: true" yazarsan plugin tüm kullanıcılar için
+#    BİR KEZ yüklenir (daha az bellek). O zaman kullanıcıya özel
+#    veriyi global değişkende değil UserState() içinde tut.
+#  • Dosyayı kaydedince plugin herkeste kendiliğinden yenilenir.
+#    Eski modüldeki veriyi korumak için migrate_state(eski, yeni) yaz.
 #  • Daha fazla örnek için: PLUGIN_REHBERI.md
 # ============================================================
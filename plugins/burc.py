@@ -1,3 +1,4 @@
+# shared: true
 """
 Herhangi bir sohbete günlük, haftalık ve aylık bur yorumu yapın.
 
@@ -20,6 +21,7 @@ Bu komutla girilen burcuaylık olarak yorumlayın (yorumlar aylık değişir)
 """
 
 from userbot.events import register
+from userbot import http_client
 import aiohttp
 
 # Burç emojileri
@@ -50,16 +52,9 @@ def get_emoji(burc_adi):
 
 
 async def _fetch_json(url):
-    """aiohttp ile JSON çek — event loop'u BLOKLAMAZ (eski requests senkrondu, botu donduruyordu)."""
-    try:
-        timeout = aiohttp.ClientTimeout(total=10)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url) as resp:
-                if resp.status == 200:
-                    return await resp.json(content_type=None), 200
-                return None, resp.status
-    except Exception:
-        return None, 0
+    """Paylaşılan HTTP istemcisiyle JSON çek — event loop'u BLOKLAMAZ (eski requests
+    senkrondu, botu donduruyordu); geçici hatada yeniden dener."""
+    return await http_client.get_json(url, timeout=aiohttp.ClientTimeout(total=10))
 
 
 
@@ -1,3 +1,4 @@
+# shared: true
 """
 Birinin mesajını yanıtlayarak ya da yanına isim yazarak, adına özel animasyonlu
 ASCII sahneler ve efektler gönderin. Mesaj kare kare canlanır.
@@ -4,14 +4,26 @@
 # description: Temel komutları içeren örnek plugin
 # author: @KingOdi
 # version: 1.0.0
+# shared: true
 # ============================================
 
 import os
 import time as _time
-from userbot.events import register
+from userbot.events import register, UserState
 
-# Plugin yüklendiği an → userbot oturum süresi (uptime) için referans
+# Plugin yüklendiği an → userbot oturum süresi (uptime) için referans.
+# Modül tüm kullanıcılar için bir kez yüklenir; kullanıcının kendi yükleme
+# anı register_handlers'ta kaydedilir.
 _LOAD_TIME = _time.time()
+_LOADED = UserState()
+
+
+def register_handlers(client, user_id):
+    _LOADED.of(user_id)["t"] = _time.time()
+
+
+def _uptime(event):
+    return _readable(_time.time() - _LOADED.of(event.sender_id).get("t", _LOAD_TIME))
 
 
 def _brand_username():
@@ -54,7 +66,7 @@ async def alive_handler(event):
         who = f"@{me.username}" if me.username else (me.first_name or "?")
     except Exception:
         who = "?"
-    uptime = _readable(_time.time() - _LOAD_TIME)
+    uptime = _uptime(event)
     brand = _brand_username()
 
     text = "✅ **Userbot Aktif!**\n\n"
@@ -89,7 +101,7 @@ async def ping_handler(event):
     start = _time.time()
     msg = await event.edit("🏓 Pong!")
     latency = (_time.time() - start) * 1000
-    uptime = _readable(_time.time() - _LOAD_TIME)
+    uptime = _uptime(event)
     await msg.edit(f"🏓 **Pong!**\n\n⚡ Gecikme: `{latency:.0f} ms`\n⏱️ Uptime: `{uptime}`")
 
 def unregister():
@@ -1788,7 +1788,7 @@ def register_handlers(client, user_id):
 
 
 # Bu plugin örneğine bağlı USERBOT client'ını YÜK ANINDA yakala (bot değil!).
-# (Her hesap için plugin ayrı exec edildiğinden, set_client ile bağlanan
+# (Her hesap için plugin ayrı exec edildiğinden, bound_client ile bağlanan
 #  doğru userbot client'ı bu noktada get_client() ile alınır.)
 try:
     from userbot.events import get_client as _get_bound_client
@@ -45,6 +45,7 @@ Kullanabileceğiniz renkleri gösterir.
 
 from telethon import events
 from userbot.events import register
+from userbot import http_client
 from telethon.tl.types import (
     User, Channel, Chat, InputStickerSetShortName,
     MessageEntityBold, MessageEntityItalic, MessageEntityCode,
@@ -62,11 +63,14 @@ import aiohttp
 import base64
 import os
 import tempfile
+import time
 import random as rnd
 import re
 from PIL import Image
 from io import BytesIO
 from utils.logger import get_logger
+from utils import imaging
+from utils.media_cache import media_cache
 
 log = get_logger(__name__)
 
@@ -85,6 +89,12 @@ QUOTLY_APIS = [
 # 1 saatlik otomatik silinen geçici host kullanılır — bot token'ı ASLA
 # üçüncü tarafa gönderilmez (Bot API getFile yöntemi token'ı sızdırırdı).
 LITTERBOX_API = "https://litterbox.catbox.moe/resources/internals/api.php"
+# Aynı görsel tekrar yüklenmez: dönen URL host'un 1 saatlik ömründen kısa tutulur
+UPLOAD_URL_TTL = 50 * 60
+# Aynı anda istenen özdeş quote'lar tek render'ı paylaşır: render başarısızsa
+# hata metni kısa süre saklanır ki bekleyen herkes gerçek hatayı görsün
+RENDER_ERROR_TTL = 30
+_render_errors = {}  # {render anahtarı: (bitiş, hata)}
 
 PACK_OWNER = "TG: @KingUser_bot"
 
@@ -171,6 +181,21 @@ def entity_to_dict(entity):
 
 
 async def get_avatar_url(client, user):
+    """Profil fotoğrafı (data URI). (id, photo_id) ile önbelleklenir: fotoğraf
+    değişince photo_id de değişir, eski girdi kendiliğinden kullanılmaz olur."""
+    photo_id = getattr(getattr(user, "photo", None), "photo_id", None)
+    if not photo_id:
+        return await _download_avatar_url(client, user)
+
+    async def fetch():
+        url = await _download_avatar_url(client, user)
+        return url.encode() if url else None
+
+    data = await media_cache.get_or_fetch(media_cache.key("avatar", user.id, photo_id), fetch)
+    return data.decode() if data else None
+
+
+async def _download_avatar_url(client, user):
     """
     Profil fotoğrafını indir - VIDEO ve NORMAL profil fotoğrafları için
     """
@@ -270,8 +295,17 @@ async def get_avatar_url(client, user):
 
 async def get_emoji_status_url(client, emoji_status_id):
     """
-    Premium emoji status'u base64 formatında döndür
+    Premium emoji status'u base64 formatında döndür (document_id ile önbellekli)
     """
+    async def fetch():
+        url = await _download_emoji_status_url(client, emoji_status_id)
+        return url.encode() if url else None
+
+    data = await media_cache.get_or_fetch(media_cache.key("emoji", int(emoji_status_id)), fetch)
+    return data.decode() if data else None
+
+
+async def _download_emoji_status_url(client, emoji_status_id):
     try:
         from telethon.tl.functions.messages import GetCustomEmojiDocumentsRequest
         
@@ -412,7 +446,16 @@ async def _upload_temp_image(image_bytes):
     """Görseli 1 saatlik otomatik silinen geçici host'a yükle, public URL döndür.
     Quotly API medyayı SADECE erişilebilir http URL'den çeker (base64 render olmaz),
     bu yüzden geçici host şart. Bot token'ı hiçbir üçüncü tarafa gönderilmez."""
-    image_bytes, _fname, _ctype = _normalize_to_png(image_bytes)
+    async def fetch():
+        url = await _upload_png(*_normalize_to_png(image_bytes))
+        return url.encode() if url else None
+
+    key = media_cache.digest("upload", image_bytes)
+    url = await media_cache.get_or_fetch(key, fetch, ttl=UPLOAD_URL_TTL)
+    return url.decode() if url else None
+
+
+async def _upload_png(image_bytes, _fname, _ctype):
     for attempt in range(3):  # litterbox ara sıra geçici hata verir → tekrar dene
         try:
             fd = aiohttp.FormData()
@@ -420,12 +463,11 @@ async def _upload_temp_image(image_bytes):
             fd.add_field("time", "1h")
             fd.add_field("fileToUpload", image_bytes, filename=_fname,
                          content_type=_ctype)
-            async with aiohttp.ClientSession() as s:
-                async with s.post(LITTERBOX_API, data=fd,
-                                  timeout=aiohttp.ClientTimeout(total=30)) as r:
-                    txt = (await r.text()).strip()
-                    if r.status == 200 and txt.startswith("http"):
-                        return txt
+            async with http_client.session.post(LITTERBOX_API, data=fd,
+                                                timeout=aiohttp.ClientTimeout(total=30)) as r:
+                txt = (await r.text()).strip()
+                if r.status == 200 and txt.startswith("http"):
+                    return txt
         except Exception:
             log.warning("Geçici medya yüklemesi başarısız (deneme %d)", attempt + 1, exc_info=True)
         await asyncio.sleep(1.5)
@@ -618,7 +660,8 @@ async def build_message_data(client, msg, include_reply_info=True, media_status=
 
 async def generate_quote(messages_data, bg_color="#1b1429", fmt="webp"):
     """Quotly API'den quote oluştur. Endpoint'ler sırayla denenir; ilk geçerli
-    görsel dönen kullanılır. Dönen değer: (image_bytes | None, hata_metni | None)."""
+    görsel dönen kullanılır. Aynı payload (mesaj + renk + format) önbellekten
+    anında döner. Dönen değer: (image_bytes | None, hata_metni | None)."""
     payload = {
         "type": "quote",
         "format": fmt,
@@ -630,27 +673,45 @@ async def generate_quote(messages_data, bg_color="#1b1429", fmt="webp"):
         "messages": messages_data
     }
 
+    key = media_cache.content_key("render", payload)
+
+    async def fetch():
+        image, err = await _post_quote(payload)
+        if not image:
+            now = time.monotonic()
+            for old in [k for k, (until, _e) in _render_errors.items() if until < now]:
+                del _render_errors[old]
+            _render_errors[key] = (now + RENDER_ERROR_TTL, err)
+        return image
+
+    image = await media_cache.get_or_fetch(key, fetch)
+    if image:
+        return image, None
+    until, err = _render_errors.get(key, (0, None))
+    return None, err if err and until >= time.monotonic() else "bilinmeyen hata"
+
+
+async def _post_quote(payload):
     last_err = "bilinmeyen hata"
     for api in QUOTLY_APIS:
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(api, json=payload,
-                                        timeout=aiohttp.ClientTimeout(total=30)) as resp:
-                    if resp.status != 200:
-                        last_err = f"{api.split('/')[2]} → HTTP {resp.status}"
-                        log.warning("Quotly endpoint hatası: %s", last_err)
-                        continue
-                    data = await resp.json(content_type=None)
-                    image_b64 = None
-                    if data.get("ok") and data.get("result"):
-                        image_b64 = data["result"].get("image")
-                    elif data.get("image"):
-                        image_b64 = data["image"]
-                    elif isinstance(data.get("result"), dict):
-                        image_b64 = data["result"].get("image")
-                    if image_b64:
-                        return base64.b64decode(image_b64), None
-                    last_err = f"{api.split('/')[2]} → geçersiz yanıt"
+            async with http_client.session.post(api, json=payload,
+                                                timeout=aiohttp.ClientTimeout(total=30)) as resp:
+                if resp.status != 200:
+                    last_err = f"{api.split('/')[2]} → HTTP {resp.status}"
+                    log.warning("Quotly endpoint hatası: %s", last_err)
+                    continue
+                data = await resp.json(content_type=None)
+                image_b64 = None
+                if data.get("ok") and data.get("result"):
+                    image_b64 = data["result"].get("image")
+                elif data.get("image"):
+                    image_b64 = data["image"]
+                elif isinstance(data.get("result"), dict):
+                    image_b64 = data["result"].get("image")
+                if image_b64:
+                    return base64.b64decode(image_b64), None
+                last_err = f"{api.split('/')[2]} → geçersiz yanıt"
         except Exception as e:
             last_err = f"{api.split('/')[2]} → {type(e).__name__}"
             log.error("Quotly hatası (%s)", api, exc_info=True)
@@ -658,57 +719,15 @@ async def generate_quote(messages_data, bg_color="#1b1429", fmt="webp"):
     return None, last_err
 
 
-def resize_sticker(image_data, make_transparent=True):
+async def resize_sticker(image_data, make_transparent=True):
+    """Arka plan silme + 512 px + PNG. Süreç havuzunda çalışır: büyük quote
+    görselinde bile olay döngüsü (diğer kullanıcıların client'ları) donmaz."""
     try:
-        img = Image.open(BytesIO(image_data))
-        
-        if img.mode != 'RGBA':
-            img = img.convert('RGBA')
-        
-        if make_transparent:
-            pixels = img.load()
-            bg_color = pixels[0, 0][:3] if len(pixels[0, 0]) >= 3 else None
-            
-            if bg_color:
-                new_img = Image.new('RGBA', img.size)
-                new_pixels = new_img.load()
-                tolerance = 35
-                
-                for y in range(img.height):
-                    for x in range(img.width):
-                        pixel = pixels[x, y]
-                        
-                        if len(pixel) >= 3:
-                            diff = sum(abs(pixel[i] - bg_color[i]) for i in range(3))
-                            
-                            if diff < tolerance:
-                                new_pixels[x, y] = (0, 0, 0, 0)
-                            else:
-                                new_pixels[x, y] = pixel
-                        else:
-                            new_pixels[x, y] = pixel
-                
-                img = new_img
-        
-        width, height = img.size
-        
-        if width > height:
-            new_width = 512
-            new_height = int((height / width) * 512)
-        else:
-            new_height = 512
-            new_width = int((width / height) * 512)
-        
-        img = img.resize((new_width, new_height), Image.LANCZOS)
-        
-        output = BytesIO()
-        img.save(output, format='PNG', optimize=True)
-        return output.getvalue()
-        
-    except Exception as e:
+        key = media_cache.digest(f"sticker:{int(make_transparent)}", image_data)
+        return await media_cache.get_or_fetch(
+            key, lambda: imaging.sticker(image_data, make_transparent)) or image_data
+    except Exception:
         log.error("Resize hatası", exc_info=True)
-        import traceback
-        traceback.print_exc()
         return image_data
 
 
@@ -968,7 +987,7 @@ async def quote_cmd(event):
             return await event.edit(f"❌ **Quote oluşturulamadı:** `{gerr}`")
 
         if save:
-            image_data = resize_sticker(image_data, make_transparent=True)
+            image_data = await resize_sticker(image_data, make_transparent=True)
 
         with tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False) as f:
             f.write(image_data)
@@ -1043,7 +1062,7 @@ async def quote_save_cmd(event):
             if not sticker_bytes:
                 return await event.edit("❌ Sticker indirilemedi!")
 
-            image_data = resize_sticker(sticker_bytes, make_transparent=False)
+            image_data = await resize_sticker(sticker_bytes, make_transparent=False)
 
             with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
                 f.write(image_data)
@@ -1104,7 +1123,7 @@ async def quote_save_cmd(event):
             if not image_data:
                 return await event.edit(f"❌ **Quote oluşturulamadı:** `{gerr}`")
 
-            image_data = resize_sticker(image_data, make_transparent=True)
+            image_data = await resize_sticker(image_data, make_transparent=True)
 
             with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
                 f.write(image_data)
@@ -1,6 +1,7 @@
 # KingTG UserBot - Raw Data Plugin
 # Mesajın ham verisini gösterir
 # Kullanım: .raw (mesajı yanıtla)
+# shared: true
 
 import os
 import tempfile
@@ -0,0 +1,337 @@
+# ============================================
+# KingTG UserBot Service - Plugin Bağımlılık Çözücü
+# ============================================
+# Eskiden pip `subprocess.run(..., timeout=300)` ile SENKRON çalışıyordu:
+# kurulum süresince event loop (bot + tüm kullanıcı client'ları) donuyordu.
+# install_package ile preinstall_all_dependencies ayrıca farklı atlama ve
+# paket eşleme tabloları taşıyordu. Artık tek çözücü:
+#   - standart kütüphane: sys.stdlib_module_names (elle liste yok)
+#   - pip: asyncio.create_subprocess_exec, sınırlı eşzamanlılık
+#   - aynı paket için eşzamanlı istekler tek kuruluma bağlanır
+#   - modül → paket → kurulu sürüm önbelleği data/deps_cache.json'da
+#     kalıcıdır; sürüm değişmedikçe açılışta import denemesi yapılmaz
+# ============================================
+
+import asyncio
+import importlib
+import importlib.metadata
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# Python < 3.10'da sys.stdlib_module_names yok → yerleşik modüllerle yetin
+STDLIB_MODULES = frozenset(getattr(sys, "stdlib_module_names", ())) | frozenset(sys.builtin_module_names)
+
+# Proje içi / uyumluluk katmanı modülleri (pip'ten ASLA kurulmaz)
+LOCAL_MODULES = frozenset({
+    "userbot", "userbot_compat", "seduserbot", "asena",
+    "config", "database", "utils", "handlers", "plugins",
+})
+
+# import adı → pip paketi (adı farklı olanlar; diğerleri aynen kurulur)
+PACKAGE_MAPPING = {
+    "cv2": "opencv-python",
+    "PIL": "Pillow",
+    "sklearn": "scikit-learn",
+    "yaml": "pyyaml",
+    "bs4": "beautifulsoup4",
+    "dotenv": "python-dotenv",
+    "gtts": "gTTS",
+    "edge_tts": "edge-tts",
+    "git": "GitPython",
+    "barcode": "python-barcode",
+    "googletrans": "googletrans==3.1.0a0",
+    "speedtest": "speedtest-cli",
+    "dateutil": "python-dateutil",
+    "forex_python": "forex-python",
+    "yt_dlp": "yt-dlp",
+    "ffmpeg": "ffmpeg-python",
+    "speech_recognition": "SpeechRecognition",
+    "telethon": "Telethon",
+}
+
+# "Kuruldu ama import edilemiyor" sonucu bu süre (sn) dolmadan tekrar denenmez
+# (yeniden başlatmada da). Geçici pip hataları (ağ, zaman aşımı) yalnızca bu
+# süreçte atlanır, diske yazılmaz.
+FAILED_RETRY_AFTER = 24 * 3600
+
+
+def package_for(module: str) -> str:
+    return PACKAGE_MAPPING.get(module, module)
+
+
+def _dist_name(package: str) -> str:
+    """'googletrans==3.1.0a0' / 'pkg[extra]>=1' → 'googletrans' / 'pkg'"""
+    return re.split(r"[<>=!~\[;\s]", package, 1)[0].strip()
+
+
+_module_dists: Optional[Dict[str, List[str]]] = None
+
+
+def _dist_of(module: str) -> Optional[str]:
+    """Kurulu modülün gerçek dağıtım adı (PIL → pillow); bilinmiyorsa None"""
+    global _module_dists
+    if _module_dists is None:
+        try:
+            _module_dists = importlib.metadata.packages_distributions()
+        except Exception:
+            _module_dists = {}
+    dists = _module_dists.get(module)
+    return dists[0] if dists else None
+
+
+def _installed_version(package: str) -> Optional[str]:
+    try:
+        return importlib.metadata.version(_dist_name(package))
+    except Exception:
+        return None
+
+
+class DependencyResolver:
+    """Plugin import'larını çözer, eksikleri arka planda pip ile kurar"""
+
+    def __init__(self, cache_file: str, concurrency: int = 1, timeout: float = 300):
+        self.cache_file = cache_file
+        self.timeout = timeout
+        # pip aynı site-packages'a paralel yazınca bozulabilir → varsayılan 1
+        self._sem = asyncio.Semaphore(max(1, concurrency))
+        self._inflight: Dict[str, asyncio.Future] = {}   # {paket: pip çalıştırması}
+        # {modül: {"package", "version", "ok", "ts", "error"}}
+        self._modules: Dict[str, Dict] = {}
+        self._transient: Dict[str, str] = {}  # {modül: hata} yalnızca bu süreç
+        self._verified: set = set()   # bu süreçte doğrulanmış modüller
+        self._dirty = False
+        self.installs = 0
+        self._load()
+
+    # ==========================================
+    # KALICI ÖNBELLEK
+    # ==========================================
+
+    def _load(self):
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception:
+            log.warning("Bağımlılık önbelleği okunamadı, sıfırlanıyor", exc_info=True)
+            return
+        # Farklı Python sürümünde kurulu paketler geçerli değildir
+        if data.get("python") != sys.version.split()[0]:
+            return
+        self._modules = data.get("modules", {}) or {}
+
+    def _save(self):
+        data = {"python": sys.version.split()[0], "modules": self._modules}
+        tmp = f"{self.cache_file}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp, self.cache_file)
+            self._dirty = False
+        except Exception:
+            log.debug("Bağımlılık önbelleği yazılamadı", exc_info=True)
+
+    def _record(self, module: str, package: str, ok: bool, error: str = None,
+                persist: bool = True):
+        """Sonucu kaydet. persist=False başarısızlık (geçici pip hatası) yalnızca
+        bu süreçte hatırlanır; kalıcı önbellekteki kayda dokunulmaz."""
+        if not ok and not persist:
+            self._transient[module] = (error or "kurulamadı")[-300:]
+            return
+        self._transient.pop(module, None)
+        if ok and _installed_version(package) is None:
+            # Eşleme tablosunda olmayan adlar için kurulu dağıtımı bul
+            package = _dist_of(module) or package
+        entry = {"package": package, "ok": ok, "ts": int(time.time()),
+                 "version": _installed_version(package) if ok else None}
+        if error:
+            entry["error"] = error[-300:]
+        self._modules[module] = entry
+        self._dirty = True
+        if ok:
+            self._verified.add(module)
+
+    # ==========================================
+    # ÇÖZÜMLEME
+    # ==========================================
+
+    def needs_check(self, module: str) -> bool:
+        """Modül için import/pip kontrolü gerekiyor mu? (stdlib/proje modülü değilse)"""
+        return not (module in STDLIB_MODULES or module in LOCAL_MODULES or module in self._verified)
+
+    def _cached_ok(self, module: str) -> Optional[bool]:
+        """Kalıcı önbellekten karar: True (kurulu), False (yakında başarısız), None (bilinmiyor)"""
+        entry = self._modules.get(module)
+        if not entry:
+            return None
+        if entry.get("ok"):
+            version = entry.get("version")
+            if version and _installed_version(entry["package"]) == version:
+                self._verified.add(module)
+                return True
+            return None
+        if time.time() - entry.get("ts", 0) < FAILED_RETRY_AFTER:
+            # Elle kurulmuş/düzelmiş olabilir: önce import dene
+            if self._importable(module):
+                self._record(module, package_for(module), True)
+                return True
+            return False
+        return None
+
+    def _error(self, module: str) -> str:
+        return (self._transient.get(module)
+                or (self._modules.get(module) or {}).get("error") or "kurulamadı")
+
+    def _importable(self, module: str) -> bool:
+        try:
+            importlib.import_module(module)
+            return True
+        except Exception:
+            return False
+
+    def missing(self, modules: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """(kurulması gerekenler, bilinen başarısızlar) — pip çalıştırmaz"""
+        to_install, known_failed = [], []
+        for module in sorted(set(modules)):
+            if not module or not self.needs_check(module):
+                continue
+            cached = self._cached_ok(module)
+            if cached is True:
+                continue
+            if cached is False:
+                known_failed.append(module)
+                continue
+            if self._importable(module):
+                self._record(module, package_for(module), True)
+                continue
+            if module in self._transient:
+                known_failed.append(module)
+                continue
+            to_install.append(module)
+        return to_install, known_failed
+
+    async def ensure(self, modules: Iterable[str]) -> Tuple[bool, List[str], List[str]]:
+        """Modülleri kullanılabilir yap. Döndürür: (başarılı, kurulan paketler, hatalar)"""
+        to_install, known_failed = self.missing(modules)
+        failed = [f"{package_for(m)}: {self._error(m)}" for m in known_failed]
+        installed = []
+        if len(to_install) > 1:
+            # Önce tek pip çalıştırmasıyla hepsini dene; olmazsa tek tek (hangisi bozuk?)
+            ok, _msg = await self.install([package_for(m) for m in to_install])
+            if ok:
+                importlib.invalidate_caches()
+                for module in list(to_install):
+                    if self._importable(module):
+                        self._record(module, package_for(module), True)
+                        installed.append(package_for(module))
+                        to_install.remove(module)
+        if to_install:
+            results = await asyncio.gather(*(self.install_module(m) for m in to_install))
+            for module, (ok, msg) in zip(to_install, results):
+                if ok:
+                    installed.append(package_for(module))
+                else:
+                    failed.append(f"{package_for(module)}: {msg}")
+        if self._dirty:
+            self._save()
+        return not failed, installed, failed
+
+    async def install_module(self, module: str) -> Tuple[bool, str]:
+        """Tek modülü kur ve import edilebildiğini doğrula"""
+        package = package_for(module)
+        ok, msg = await self.install([package])
+        if not ok:
+            # Geçici olabilir (ağ, zaman aşımı): diske yazma, sonraki süreç dener
+            self._record(module, package, False, msg, persist=False)
+            return ok, msg
+        importlib.invalidate_caches()
+        # Kurulu ama kullanılamıyor olabilir (ör. Python 3.13'te pydub→audioop)
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            msg = f"kuruldu ama import edilemiyor ({e})"
+            log.warning("'%s' %s — %d saat tekrar denenmeyecek",
+                        module, msg, FAILED_RETRY_AFTER // 3600)
+            self._record(module, package, False, msg)
+            return False, msg
+        self._record(module, package, True)
+        return ok, msg
+
+    async def install(self, packages: List[str]) -> Tuple[bool, str]:
+        """pip install (sınırlı eşzamanlılık). Paket başına tekilleştirilir:
+        başka bir çalıştırmada kurulmakta olan paket için o beklenir, kalanlar
+        tek pip çalıştırmasında kurulur."""
+        packages = list(dict.fromkeys(packages))
+        shared = list(dict.fromkeys(self._inflight[p] for p in packages if p in self._inflight))
+        own = [p for p in packages if p not in self._inflight]
+        results = []
+        if own:
+            fut = asyncio.get_running_loop().create_future()
+            for package in own:
+                self._inflight[package] = fut
+            try:
+                result = await self._run_pip(own)
+                fut.set_result(result)
+                results.append(result)
+            except asyncio.CancelledError:
+                fut.cancel()
+                raise
+            except Exception as e:
+                fut.set_exception(e)
+                fut.exception()  # bekleyen yoksa "never retrieved" uyarısını bastır
+                raise
+            finally:
+                for package in own:
+                    if self._inflight.get(package) is fut:
+                        del self._inflight[package]
+        for fut in shared:
+            results.append(await asyncio.shield(fut))
+        errors = [msg for ok, msg in results if not ok]
+        return (False, "; ".join(errors)) if errors else (True, "kuruldu")
+
+    async def _run_pip(self, packages: List[str]) -> Tuple[bool, str]:
+        async with self._sem:
+            log.info("pip install: %s", ", ".join(packages))
+            started = time.perf_counter()
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    sys.executable, "-m", "pip", "install", *packages,
+                    "-q", "--disable-pip-version-check",
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+            except Exception as e:
+                return False, str(e)
+            try:
+                _out, err = await asyncio.wait_for(proc.communicate(), self.timeout)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                return False, "Kurulum zaman aşımına uğradı"
+            self.installs += 1
+            elapsed = time.perf_counter() - started
+            if proc.returncode == 0:
+                log.info("Kuruldu (%.1f sn): %s", elapsed, ", ".join(packages))
+                return True, "kuruldu"
+            message = err.decode("utf-8", "replace").strip()
+            log.error("pip başarısız (%s): %s", ", ".join(packages), message[-500:])
+            return False, message or f"pip çıkış kodu {proc.returncode}"
+
+    def stats(self) -> Dict:
+        ok = sum(1 for e in self._modules.values() if e.get("ok"))
+        return {
+            "known": len(self._modules),
+            "ok": ok,
+            "failed": len(self._modules) - ok,
+            "inflight": len(self._inflight),
+            "installs": self.installs,
+        }
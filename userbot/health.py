@@ -0,0 +1,239 @@
+# ============================================
+# KingTG UserBot Service - Oturum Sağlık Zamanlayıcısı
+# ============================================
+# Eskiden her aktif client için ayrı bir sonsuz görev 120 sn uyuyup
+# get_me() çağırıyordu: N kullanıcı = N zamanlayıcı ve aynı anda patlayan
+# N RPC. Artık TEK bir zamanlama çarkı (timing wheel) tüm kontrolleri
+# aralık boyunca jitter ile yayar:
+#   - son aralıkta güncelleme alan client kontrol edilmez (pasif canlılık)
+#   - geçici hatadan sonra sık, sorunsuz oturumlarda seyrek kontrol (uyarlamalı)
+#   - kullanıcı başına gecikme / hata sayaçları tutulur
+# ============================================
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from telethon.errors import (
+    AuthKeyUnregisteredError,
+    UserDeactivatedBanError,
+    UserDeactivatedError,
+    SessionRevokedError,
+    AuthKeyDuplicatedError,
+)
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# Oturumun GERÇEKTEN bittiğini gösteren hatalar (geçici değil)
+FATAL_ERRORS = (
+    AuthKeyUnregisteredError,
+    UserDeactivatedBanError,
+    UserDeactivatedError,
+    SessionRevokedError,
+    AuthKeyDuplicatedError,
+)
+
+
+class _Health:
+    """Tek kullanıcının kontrol durumu ve sayaçları"""
+
+    __slots__ = ("interval", "last_seen", "last_check", "checks", "failures",
+                 "consecutive", "passive", "last_latency", "avg_latency")
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.last_seen = 0.0        # son alınan güncelleme (pasif canlılık)
+        self.last_check = 0.0
+        self.checks = 0
+        self.failures = 0
+        self.consecutive = 0
+        self.passive = 0            # güncelleme görüldüğü için atlanan kontroller
+        self.last_latency = None    # ms
+        self.avg_latency = None     # ms (üstel hareketli ortalama)
+
+    def as_dict(self) -> Dict:
+        return {
+            "interval": round(self.interval, 1),
+            "checks": self.checks,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive,
+            "passive_skips": self.passive,
+            "last_check": self.last_check or None,
+            "last_seen": self.last_seen or None,
+            "last_latency_ms": round(self.last_latency, 1) if self.last_latency is not None else None,
+            "avg_latency_ms": round(self.avg_latency, 1) if self.avg_latency is not None else None,
+        }
+
+
+class HealthScheduler:
+    """Tüm client'lar için tek görevli, jitter'lı, uyarlamalı sağlık kontrolü.
+
+    Çark `slots` yuvadan oluşur, her `tick` saniyede bir yuva ilerler. Bir
+    kullanıcı `gecikme / tick` yuva ileriye yerleştirilir; çark turundan uzun
+    gecikmeler için kalan tur sayısı ayrıca tutulur.
+    """
+
+    def __init__(self, get_client: Callable[[int], Optional[object]],
+                 on_fatal: Callable[[int], Awaitable], interval: float = 120.0,
+                 min_interval: float = 30.0, max_interval: float = 600.0,
+                 tick: float = 1.0, concurrency: int = 10, jitter: float = 0.1):
+        self.get_client = get_client
+        self.on_fatal = on_fatal
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.tick = tick
+        self.jitter = jitter
+        self.slots = max(1, int(max_interval / tick) + 1)
+        self._wheel: List[Dict[int, int]] = [dict() for _ in range(self.slots)]  # {user_id: kalan tur}
+        self._slot_of: Dict[int, int] = {}
+        self._cursor = 0
+        self._state: Dict[int, _Health] = {}
+        self._running: Set[int] = set()
+        self._sem = asyncio.Semaphore(concurrency)
+        self._task: Optional[asyncio.Task] = None
+
+    # ==========================================
+    # KAYIT
+    # ==========================================
+
+    def add(self, user_id: int):
+        """Kullanıcıyı izlemeye al (ilk kontrol aralık içinde rastgele bir anda)"""
+        state = self._state.get(user_id)
+        if state is None:
+            state = self._state[user_id] = _Health(self.interval)
+        self._schedule(user_id, random.uniform(self.tick, state.interval))
+        self._ensure_task()
+
+    def remove(self, user_id: int):
+        """Kullanıcıyı izlemeden çıkar (sayaçlar da silinir)"""
+        slot = self._slot_of.pop(user_id, None)
+        if slot is not None:
+            self._wheel[slot].pop(user_id, None)
+        self._state.pop(user_id, None)
+
+    def mark_alive(self, user_id: int):
+        """Client'tan güncelleme geldi → bağlantı canlı (ucuz, her güncellemede çağrılır)"""
+        state = self._state.get(user_id)
+        if state is not None:
+            state.last_seen = time.time()
+
+    def _schedule(self, user_id: int, delay: float):
+        old = self._slot_of.pop(user_id, None)
+        if old is not None:
+            self._wheel[old].pop(user_id, None)
+        ticks = max(1, int(round(delay / self.tick)))
+        slot = (self._cursor + ticks) % self.slots
+        self._wheel[slot][user_id] = (ticks - 1) // self.slots
+        self._slot_of[user_id] = slot
+
+    def _next_delay(self, state: _Health) -> float:
+        spread = state.interval * self.jitter
+        return max(self.tick, state.interval + random.uniform(-spread, spread))
+
+    # ==========================================
+    # ÇARK
+    # ==========================================
+
+    def _ensure_task(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        # Süren kontrol bitince kullanıcıyı çarka geri koyar: o ana kadar dön
+        while self._slot_of or self._running:
+            await asyncio.sleep(self.tick)
+            self._cursor = (self._cursor + 1) % self.slots
+            bucket = self._wheel[self._cursor]
+            due = []
+            for user_id, rounds in list(bucket.items()):
+                if rounds > 0:
+                    bucket[user_id] = rounds - 1
+                else:
+                    del bucket[user_id]
+                    self._slot_of.pop(user_id, None)
+                    due.append(user_id)
+            for user_id in due:
+                self._on_due(user_id)
+
+    def _on_due(self, user_id: int):
+        state = self._state.get(user_id)
+        if state is None:
+            return
+        # Pasif canlılık: son aralıkta güncelleme alındıysa RPC atma
+        if state.last_seen and time.time() - state.last_seen < state.interval:
+            state.passive += 1
+            self._schedule(user_id, self._next_delay(state))
+            return
+        if user_id in self._running:
+            self._schedule(user_id, self._next_delay(state))
+            return
+        self._running.add(user_id)
+        asyncio.get_running_loop().create_task(self._check(user_id, state))
+
+    async def _check(self, user_id: int, state: _Health):
+        try:
+            client = self.get_client(user_id)
+            if client is None:
+                self.remove(user_id)
+                return
+            async with self._sem:
+                started = time.perf_counter()
+                try:
+                    await client.get_me()
+                except FATAL_ERRORS as e:
+                    log.info("Oturum sonlandırıldı: user=%s (%s)", user_id, type(e).__name__)
+                    self.remove(user_id)
+                    await self.on_fatal(user_id)
+                    return
+                except Exception as e:
+                    # Geçici ağ/sunucu hatası → oturumu ÖLDÜRME, daha sık tekrar bak
+                    state.checks += 1
+                    state.failures += 1
+                    state.consecutive += 1
+                    state.last_check = time.time()
+                    state.interval = self.min_interval
+                    log.debug("Oturum kontrolü geçici hata: user=%s (%s)", user_id, e)
+                else:
+                    latency = (time.perf_counter() - started) * 1000
+                    state.checks += 1
+                    state.consecutive = 0
+                    state.last_check = time.time()
+                    state.last_latency = latency
+                    state.avg_latency = latency if state.avg_latency is None \
+                        else state.avg_latency * 0.8 + latency * 0.2
+                    # Sorunsuz oturum → aralığı kademeli uzat
+                    state.interval = min(self.max_interval, max(state.interval, self.interval) * 1.5)
+            # Kontrol sürerken çıkarılıp yeniden eklendiyse yeni kayıt zaten planlı
+            if self._state.get(user_id) is state:
+                self._schedule(user_id, self._next_delay(state))
+        finally:
+            self._running.discard(user_id)
+
+    # ==========================================
+    # METRİKLER
+    # ==========================================
+
+    def user_stats(self, user_id: int) -> Optional[Dict]:
+        state = self._state.get(user_id)
+        return state.as_dict() if state else None
+
+    def stats(self) -> Dict:
+        states = list(self._state.values())
+        latencies = [s.avg_latency for s in states if s.avg_latency is not None]
+        return {
+            "monitored": len(states),
+            "checks": sum(s.checks for s in states),
+            "failures": sum(s.failures for s in states),
+            "passive_skips": sum(s.passive for s in states),
+            "unstable": sum(1 for s in states if s.consecutive),
+            "avg_latency_ms": round(sum(latencies) / len(latencies), 1) if latencies else None,
+        }
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,152 @@
+# ============================================
+# KingTG UserBot Service - Plugin Derleme Önbelleği (disk)
+# ============================================
+# Bellekteki mtime cache'i yalnızca süreç ömrü boyunca geçerliydi: her
+# yeniden başlatmada her plugin okunup regex ile yamalanıyor, derleniyor ve
+# bilgi/import çıkarımı için birkaç kez daha ast.parse ediliyordu.
+# Burada tek bir kayıt dosyası (marshal) şunları tutar:
+#   yamalı kaynak, kod nesnesi, import kümesi, bilgi sözlüğü (komutlar dahil)
+# Anahtar: dosya İÇERİĞİNİN sha256'sı + yamalayıcı sürümü + Python bytecode
+# sürümü + dosya yolu. İçerik değişirse ya da yamalayıcı güncellenirse kayıt
+# kendiliğinden geçersiz olur; eski kayıtlar yazma sırasında budanır.
+# ============================================
+
+import hashlib
+import importlib.util
+import marshal
+import os
+from typing import Callable, Dict, Optional
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+_SUFFIX = ".kpc"
+
+
+class PluginCodeCache:
+    """İçerik adresli, marshal tabanlı plugin derleme önbelleği"""
+
+    def __init__(self, directory: str, version: int):
+        self.directory = directory
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        # Aynı süreçte tekrar okumayı önler: {yol: (mtime_ns, boyut, kayıt)}
+        self._memo: Dict[str, tuple] = {}
+        # Python sürümü değişirse marshal/bytecode uyumsuzdur → farklı kayıt
+        self._magic = importlib.util.MAGIC_NUMBER
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError:
+            log.warning("Plugin önbellek dizini oluşturulamadı: %s", directory)
+
+    def key(self, source: bytes, file_path: str = "") -> str:
+        # Yol da anahtara girer: kod nesnesi co_filename'i (traceback) taşır
+        h = hashlib.sha256(source)
+        h.update(b"\0%d\0" % self.version)
+        h.update(self._magic)
+        h.update(os.path.abspath(file_path).encode("utf-8", "surrogatepass"))
+        return h.hexdigest()
+
+    def _path(self, name: str, key: str) -> str:
+        return os.path.join(self.directory, f"{name}-{key[:24]}{_SUFFIX}")
+
+    def load(self, file_path: str, build: Callable[[str], Dict]) -> Optional[Dict]:
+        """Kaydı diskten getir; yoksa build(kaynak) ile üretip yaz.
+
+        build şu anahtarları içeren sözlük döndürmeli:
+            patched (str), code (code), imports (list), info (dict)
+        Döndürülen sözlüğe ek olarak "key" eklenir.
+        """
+        try:
+            st = os.stat(file_path)
+            memo = self._memo.get(file_path)
+            if memo is not None and memo[0] == st.st_mtime_ns and memo[1] == st.st_size:
+                return memo[2]
+            with open(file_path, "rb") as f:
+                source = f.read()
+        except OSError:
+            return None
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        key = self.key(source, file_path)
+        path = self._path(name, key)
+
+        entry = self._read(path, key)
+        if entry is not None:
+            self.hits += 1
+            entry["key"] = key
+            self._memo[file_path] = (st.st_mtime_ns, st.st_size, entry)
+            return entry
+
+        self.misses += 1
+        try:
+            text = source.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+        entry = build(text)
+        if entry is None:
+            return None
+        self._write(name, path, key, entry)
+        entry["key"] = key
+        self._memo[file_path] = (st.st_mtime_ns, st.st_size, entry)
+        return entry
+
+    def _read(self, path: str, key: str) -> Optional[Dict]:
+        try:
+            with open(path, "rb") as f:
+                stored_key, patched, code, imports, info = marshal.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Bozuk / eski biçim kayıt → yeniden üretilecek
+            log.debug("Plugin önbellek kaydı okunamadı: %s", path, exc_info=True)
+            return None
+        if stored_key != key:
+            return None
+        return {"patched": patched, "code": code, "imports": list(imports), "info": dict(info)}
+
+    def _write(self, name: str, path: str, key: str, entry: Dict):
+        payload = (key, entry["patched"], entry["code"], tuple(entry["imports"]), entry["info"])
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                marshal.dump(payload, f)
+            os.replace(tmp, path)
+        except Exception:
+            log.debug("Plugin önbellek kaydı yazılamadı: %s", path, exc_info=True)
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        self._prune(name, keep=os.path.basename(path))
+
+    def _prune(self, name: str, keep: str):
+        """Aynı plugin'in eski içerik/sürüm kayıtlarını sil"""
+        prefix = f"{name}-"
+        try:
+            for fn in os.listdir(self.directory):
+                if fn != keep and fn.startswith(prefix) and fn.endswith(_SUFFIX) \
+                        and len(fn) == len(keep):
+                    try:
+                        os.remove(os.path.join(self.directory, fn))
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+
+    def clear(self) -> int:
+        self._memo.clear()
+        removed = 0
+        try:
+            for fn in os.listdir(self.directory):
+                if fn.endswith(_SUFFIX):
+                    os.remove(os.path.join(self.directory, fn))
+                    removed += 1
+        except OSError:
+            pass
+        return removed
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,129 @@
+# ============================================
+# KingTG UserBot Service - Plugin Klasörü Parmak İzi Dizini
+# ============================================
+# sync_folder_plugins her açılışta klasördeki HER plugin için bilgi
+# çıkarımı (dosya okuma + ayrıştırma) ve DB karşılaştırması yapıyordu;
+# hiçbir şey değişmese bile. Bu dizin data/plugin_index.json'da dosya
+# başına şunları tutar:
+#   boyut, mtime_ns, sha256, çıkarılan bilgi, DB ile eşitlendi mi
+# (boyut, mtime) aynıysa dosya açılmaz; yalnızca mtime değiştiyse (touch,
+# git checkout) içerik hash'i aynı çıkar ve yeniden ayrıştırılmaz.
+# ============================================
+
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# Biçim değişirse eski dizin yok sayılır
+INDEX_VERSION = 1
+
+
+def file_digest(file_path: str) -> Optional[str]:
+    h = hashlib.sha256()
+    try:
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+class PluginIndex:
+    """{dosya adı: {"size", "mtime_ns", "sha256", "info", "synced"}}"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._files: Dict[str, Dict] = {}
+        self._dirty = False
+        self.parsed = 0     # bu süreçte yeniden ayrıştırılan dosya
+        self.skipped = 0    # parmak izi tuttuğu için atlanan dosya
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception:
+            log.warning("Plugin dizini okunamadı, yeniden oluşturulacak", exc_info=True)
+            return
+        if data.get("version") == INDEX_VERSION:
+            self._files = data.get("files", {}) or {}
+
+    def save(self):
+        if not self._dirty:
+            return
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "files": self._files},
+                          f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except Exception:
+            log.debug("Plugin dizini yazılamadı", exc_info=True)
+
+    # ==========================================
+    # SORGU / GÜNCELLEME
+    # ==========================================
+
+    def get(self, filename: str) -> Optional[Dict]:
+        return self._files.get(filename)
+
+    def check(self, filename: str, file_path: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """Kayıt hâlâ geçerliyse (kayıt, None); içerik değiştiyse (None, yeni sha256).
+        Yalnızca mtime değişip içerik aynıysa kayıt tazelenip geçerli sayılır."""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None, None
+        entry = self._files.get(filename)
+        if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            self.skipped += 1
+            return entry, None
+        digest = file_digest(file_path)
+        if entry and digest is not None and entry.get("sha256") == digest:
+            entry["size"], entry["mtime_ns"] = st.st_size, st.st_mtime_ns
+            self._dirty = True
+            self.skipped += 1
+            return entry, None
+        return None, digest
+
+    def update(self, filename: str, file_path: str, digest: str, info: Dict) -> Dict:
+        """Yeniden ayrıştırılan dosyanın kaydı (DB ile henüz eşitlenmedi)"""
+        try:
+            st = os.stat(file_path)
+            size, mtime_ns = st.st_size, st.st_mtime_ns
+        except OSError:
+            size = mtime_ns = None
+        entry = {"size": size, "mtime_ns": mtime_ns, "sha256": digest,
+                 "info": info, "synced": False}
+        self._files[filename] = entry
+        self._dirty = True
+        self.parsed += 1
+        return entry
+
+    def mark_synced(self, filename: str):
+        entry = self._files.get(filename)
+        if entry is not None and not entry.get("synced"):
+            entry["synced"] = True
+            self._dirty = True
+
+    def retain(self, filenames) -> int:
+        """Klasörde artık olmayan dosyaların kayıtlarını at"""
+        gone = [fn for fn in self._files if fn not in filenames]
+        for fn in gone:
+            del self._files[fn]
+        if gone:
+            self._dirty = True
+        return len(gone)
+
+    def stats(self) -> Dict:
+        return {"files": len(self._files), "parsed": self.parsed, "skipped": self.skipped}
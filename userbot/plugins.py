@@ -5,19 +5,32 @@
 import os
 import re
 import ast
+import copy
 import importlib
 import importlib.util
-import subprocess
+import inspect
 import sys
+import time
 import asyncio
+import weakref
 from typing import Dict, List, Tuple, Set
-from telethon import TelegramClient
+from telethon import TelegramClient, events
 import config
 from database import database as db
+from userbot.deps import DependencyResolver
+from userbot.plugin_cache import PluginCodeCache
+from userbot.plugin_index import PluginIndex
+from userbot.router import command_names_for, get_router
+from userbot_compat.events import UserState
 from utils.logger import get_logger
+from utils.profiler import profiler
 
 log = get_logger(__name__)
 
+# Disk önbelleği anahtarının parçası: _patch_plugin_content, komut/bilgi
+# çıkarımı veya import taraması değiştiğinde ARTTIRILMALI (eski kayıtlar düşer)
+PLUGIN_PATCHER_VERSION = 1
+
 
 def _extract_command_names(content: str):
     """Plugin içeriğinden `.komut` adlarını güvenilir şekilde çıkarır.
@@ -38,66 +51,82 @@ def _extract_command_names(content: str):
         flags=re.DOTALL,
     )
     for _quote, raw in pat_strings:
-        # Callback pattern'leri (byte/rb) genelde nokta içermez -> komut değil
-        if not raw.startswith("^") and "\\." not in raw and not raw.startswith("."):
-            # ^\. veya ^. ile başlamayan (ör. callback data) -> atla
-            if "." not in raw[:3]:
-                continue
-        # baştaki ^ kaldır
-        s = raw[1:] if raw.startswith("^") else raw
-        # baştaki nokta önekini kaldır (\\. veya .)
-        if s.startswith("\\."):
-            s = s[2:]
-        elif s.startswith("."):
-            s = s[1:]
-        else:
-            # nokta ile başlamayan pattern komut değildir
-            continue
-        # İlk komut tokenini al: sadece somut harfler, [..] karakter sınıfı ve
-        # metin alternatifi (?:a|b) — içinde \s .+ gibi regex metası OLMAYAN.
-        token = ""
-        k = 0
-        while k < len(s):
-            c = s[k]
-            if c in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_" \
-                    "ğüşıöçĞÜŞİÖÇ":
-                token += c
-                k += 1
-            elif c == "[":
-                j = s.find("]", k)
-                if j == -1:
-                    break
-                inner = s[k:j + 1]
-                # sadece harf içeren karakter sınıfı komuttur ([cç] gibi)
-                if re.fullmatch(r"\[[\wğüşıöçĞÜŞİÖÇ]+\]", inner):
-                    token += inner
-                    k = j + 1
-                else:
-                    break
-            elif s[k:k + 3] == "(?:":
-                j = s.find(")", k)
-                if j == -1:
-                    break
-                inner = s[k + 3:j]
-                # sadece 'a|b|c' gibi düz metin alternatifi komuttur
-                if re.fullmatch(r"[\wğüşıöçĞÜŞİÖÇ|]+", inner):
-                    token += s[k:j + 1]
-                    k = j + 1
-                    # (?:ker)? gibi OPSİYONEL grup -> '?' işaretini de taşı
-                    if k < len(s) and s[k] == "?":
-                        token += "?"
-                        k += 1
-                else:
-                    break
+        names |= _pattern_command_names(raw)
+    return names
+
+
+def _pattern_command_names(raw: str, strict: bool = False):
+    """Tek bir pattern string'inden komut adlarını çıkarır.
+
+    strict=True (komut yönlendirici için): yalnızca `^\\.` / `\\.` ile başlayan
+    ve çıkarılan token'ın eşleşmenin KESİN öneki olduğu pattern'ler kabul edilir;
+    token'dan sonra ? * { niceleyicisi gelirse (ör. `^\\.afks?`) boş küme döner.
+    """
+    names = set()
+    if strict and not (raw.startswith("^\\.") or raw.startswith("\\.")):
+        return names
+    # Callback pattern'leri (byte/rb) genelde nokta içermez -> komut değil
+    if not raw.startswith("^") and "\\." not in raw and not raw.startswith("."):
+        # ^\. veya ^. ile başlamayan (ör. callback data) -> atla
+        if "." not in raw[:3]:
+            return names
+    # baştaki ^ kaldır
+    s = raw[1:] if raw.startswith("^") else raw
+    # baştaki nokta önekini kaldır (\\. veya .)
+    if s.startswith("\\."):
+        s = s[2:]
+    elif s.startswith("."):
+        s = s[1:]
+    else:
+        # nokta ile başlamayan pattern komut değildir
+        return names
+    # İlk komut tokenini al: sadece somut harfler, [..] karakter sınıfı ve
+    # metin alternatifi (?:a|b) — içinde \s .+ gibi regex metası OLMAYAN.
+    token = ""
+    k = 0
+    while k < len(s):
+        c = s[k]
+        if c in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_" \
+                "ğüşıöçĞÜŞİÖÇ":
+            token += c
+            k += 1
+        elif c == "[":
+            j = s.find("]", k)
+            if j == -1:
+                break
+            inner = s[k:j + 1]
+            # sadece harf içeren karakter sınıfı komuttur ([cç] gibi)
+            if re.fullmatch(r"\[[\wğüşıöçĞÜŞİÖÇ]+\]", inner):
+                token += inner
+                k = j + 1
             else:
                 break
-        if not token:
-            continue
-        # token'ı somut komut varyantlarına aç
-        for variant in _expand_token(token):
-            v = variant.strip()
-            if v and re.fullmatch(r"[\wğüşıöçĞÜŞİÖÇ]+", v):
-                names.add(v)
+        elif s[k:k + 3] == "(?:":
+            j = s.find(")", k)
+            if j == -1:
+                break
+            inner = s[k + 3:j]
+            # sadece 'a|b|c' gibi düz metin alternatifi komuttur
+            if re.fullmatch(r"[\wğüşıöçĞÜŞİÖÇ|]+", inner):
+                token += s[k:j + 1]
+                k = j + 1
+                # (?:ker)? gibi OPSİYONEL grup -> '?' işaretini de taşı
+                if k < len(s) and s[k] == "?":
+                    token += "?"
+                    k += 1
+            else:
+                break
+        else:
+            break
+    if not token:
+        return names
+    if strict and k < len(s) and s[k] in "?*{":
+        return names
+    # token'ı somut komut varyantlarına aç
+    for variant in _expand_token(token):
+        v = variant.strip()
+        if v and re.fullmatch(r"[\wğüşıöçĞÜŞİÖÇ]+", v):
+            names.add(v)
     return names
 
 
@@ -132,37 +161,151 @@ def _expand_token(token: str):
 
 
 
+def _collect_imports(tree) -> Set[str]:
+    """AST'deki üst seviye import edilen modül adları"""
+    imports = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.add(alias.name.split('.')[0])
+        elif isinstance(node, ast.ImportFrom):
+            if node.module:
+                imports.add(node.module.split('.')[0])
+    return imports
+
+
+def _plugin_info_from_source(content: str, tree=None) -> Dict:
+    """Plugin kaynağından açıklama/komut/sürüm bilgileri (ad hariç)"""
+    info = {
+        "commands": [],
+        "description": "",
+        "author": "",
+        "version": "1.0.0",
+        "requirements": [],
+        "shared": False
+    }
+
+    try:
+        if tree is None:
+            tree = ast.parse(content)
+        if (tree.body and isinstance(tree.body[0], ast.Expr) and
+            isinstance(tree.body[0].value, ast.Constant)):
+            info["description"] = tree.body[0].value.value.strip()
+    except Exception:
+        pass
+
+    patterns = _extract_command_names(content)
+    info["commands"] = sorted(set(patterns))
+
+    for line in content.split('\n')[:30]:
+        line = line.strip()
+        if line.startswith('# author:') or line.startswith('# Author:'):
+            info["author"] = line.split(':', 1)[1].strip()
+        elif line.startswith('# version:') or line.startswith('# Version:'):
+            info["version"] = line.split(':', 1)[1].strip()
+        elif line.startswith('# requires:') or line.startswith('# requirements:'):
+            reqs = line.split(':', 1)[1].strip().split(',')
+            info["requirements"] = [r.strip() for r in reqs if r.strip()]
+        elif line.lower().startswith('# shared:'):
+            info["shared"] = _is_shared_plugin(line)
+        elif line.startswith('# description:') or line.startswith('# Description:'):
+            if not info["description"]:
+                info["description"] = line.split(':', 1)[1].strip()
+
+    return info
+
+
+def _is_shared_plugin(content: str) -> bool:
+    """Başlıkta `# shared: true` → çok kiracılı (multi-tenant) plugin.
+
+    Sözleşme: modül TEK kez exec edilir; handler'lar ya modül seviyesinde
+    @register ile (her client'a ayrı builder kopyasıyla bağlanır) ya da
+    register_handlers(client, user_id) içinde closure olarak tanımlanır.
+    Handler'lar client'a yalnızca `event.client` ile erişir; kullanıcıya
+    özel durum `userbot.events.UserState` gibi user_id anahtarlı depolarda
+    tutulur (modül global'i tüm kullanıcılar arasında paylaşılır).
+    """
+    for line in content.split("\n", 30)[:30]:
+        line = line.strip().lower()
+        if line.startswith("# shared:"):
+            return line.split(":", 1)[1].strip() in ("true", "yes", "1", "evet")
+    return False
+
+
+class _SharedPlugin:
+    """Bir kez exec edilmiş paylaşımlı plugin modülü"""
+
+    __slots__ = ("code", "key", "module", "templates", "users")
+
+    def __init__(self, code, key, module, templates):
+        self.code = code
+        self.key = key               # kaynağın içerik hash'i (plugin_cache)
+        self.module = module
+        self.templates = templates   # modül seviyesindeki [(callback, builder)]
+        self.users: Set[int] = set()
+
+
+class PluginContext:
+    """Paylaşımlı modülün kullanıcıya bağlı görünümü.
+
+    user_active_plugins'te modül yerine durur: `client` bu kullanıcının
+    client'ıdır, diğer tüm öznitelikler ortak modülden okunur.
+    """
+
+    __slots__ = ("module", "client", "user_id")
+
+    def __init__(self, module, client, user_id: int):
+        self.module = module
+        self.client = client
+        self.user_id = user_id
+
+    def __getattr__(self, name):
+        return getattr(self.module, name)
+
+
 class PluginManager:
     """Plugin yönetim sistemi"""
     
     def __init__(self):
         self.loaded_plugins: Dict[str, Dict] = {}
         self.user_active_plugins: Dict[int, Dict[str, any]] = {}
-        # Kullanıcı başına kaydedilen handler'lar
+        # Kullanıcı başına kaydedilen handler'lar: {uid: {plugin: [(callback, builder)]}}
+        # Deaktivasyon YALNIZCA bu kayda göre yapılır (client taraması yok)
         self.user_handlers: Dict[int, Dict[str, List]] = {}
+        # Plugin modül adı → plugin adı (aktivasyondan SONRA eklenen handler'ları
+        # sahibine yazmak için: plugin_<ad>_<uid> ve paylaşımlı plugin_<ad>)
+        self._module_plugins: Dict[str, str] = {}
+        profiler.set_resolver(self._module_plugins.get)
+        # Uyarılmış (plugin, komut) çakışmaları — her aktivasyonda tekrar loglanmasın
+        self._warned_commands: Set[Tuple[str, str]] = set()
         self._retry_count: Dict[str, int] = {}
         self._compat_installed = False
-        self._installed_packages: Set[str] = set()  # Kurulu paket cache
-        # Kurulsa bile import EDİLEMEYEN modüller (ör. Python 3.13'te pydub→audioop).
-        # Bunlar bir kez denenip kara listeye alınır; aksi halde HER kullanıcı için
-        # tekrar tekrar pip çalıştırılıp açılış dakikalarca uzuyordu.
-        self._import_failed: Set[str] = set()
-        # Plugin DOSYASI başına derleme cache'i {yol: (mtime, patched, code, deps_ok)}
+        # Bağımlılık çözücü: pip arka planda (asyncio), modül→paket→sürüm
+        # önbelleği kalıcı. Kurulsa bile import EDİLEMEYEN modüller (ör. Python
+        # 3.13'te pydub→audioop) bir süre kara listede kalır; aksi halde HER
+        # kullanıcı için tekrar tekrar pip çalıştırılıp açılış dakikalarca uzuyordu.
+        self.deps = DependencyResolver(config.DEPS_CACHE_FILE, config.PIP_CONCURRENCY, config.PIP_TIMEOUT)
+        # Plugin DOSYASI başına derleme cache'i {yol: (mtime, patched, code, deps_ok, imports)}
         # Eskiden her KULLANICI için dosya yeniden okunup regex'le yamalanıyor,
         # ast.parse + compile ediliyordu (40 kullanıcı × 7 plugin ≈ 280 kez).
         # Artık dosya değişmedikçe bu iş dosya başına 1 kez yapılır.
         self._code_cache: Dict[str, tuple] = {}
-        # Açılışta toplu yükleme modu: plugin meta verisi Mongo'dan TEK sorguda
-        # alınır. Eskiden her (kullanıcı, plugin) için ayrı sorgu gidiyordu
-        # (40×7 ≈ 280 tur) — uzak veritabanında açılışın büyük kısmı buydu.
-        self._bulk_meta: Dict[str, dict] = {}
-        self._bulk_mode = False
+        # Süreçler arası: yamalı kaynak + kod + import + bilgi (data/plugin_cache)
+        self._disk_cache = PluginCodeCache(config.PLUGIN_CACHE_DIR, PLUGIN_PATCHER_VERSION)
+        # `# shared: true` pluginler: {plugin adı: _SharedPlugin} (exec 1 kez)
+        self._shared_modules: Dict[str, _SharedPlugin] = {}
         self._packages_checked = False
-        # B1 düzeltmesi: eski stil (@register) pluginler global `_client`
-        # okuduğu için, iki kullanıcı aynı anda plugin aktive ederse handler
-        # yanlış hesaba bağlanabilir. Bu kilit `set_client -> exec -> register`
-        # kritik bölgesini kullanıcılar arasında atomik tutar.
-        self._activation_lock = asyncio.Lock()
+        # Eski stil (@register) pluginlerin hedef client'ı artık bağlam
+        # değişkeninden (compat bound_client) okunur → farklı kullanıcıların
+        # aktivasyonları paralel ilerler; yalnızca AYNI kullanıcınınkiler
+        # sıralanır (çift exec / handler farkının karışmaması için).
+        self._user_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+        # Hot-reload'lar sırayla (aynı plugin iki kez paralel geçirilmesin)
+        self._reload_lock = asyncio.Lock()
+        # Klasör senkronu: parmak izi dizini + çalışırken debounce'lu tetikleme
+        self._folder_index = PluginIndex(config.PLUGIN_INDEX_FILE)
+        self._sync_lock = asyncio.Lock()
+        self._sync_timer = None
     
     async def preinstall_all_dependencies(self):
         """Tüm pluginlerin bağımlılıklarını önceden kur"""
@@ -183,90 +326,19 @@ class PluginManager:
                 continue
             
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                tree = ast.parse(content)
-                
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.Import):
-                        for alias in node.names:
-                            module_name = alias.name.split('.')[0]
-                            all_imports.add(module_name)
-                    elif isinstance(node, ast.ImportFrom):
-                        if node.module:
-                            module_name = node.module.split('.')[0]
-                            all_imports.add(module_name)
+                entry = self._load_entry(filepath)
+                if entry is not None:
+                    all_imports.update(entry["imports"])
             except Exception:
                 continue
         
-        # Standart kütüphaneler ve zaten kurulu olanları atla
-        skip_modules = {
-            'os', 'sys', 'time', 'datetime', 'json', 'random', 'math', 're',
-            'asyncio', 'subprocess', 'shutil', 'glob', 'pathlib', 'tempfile',
-            'base64', 'hashlib', 'uuid', 'io', 'collections', 'itertools',
-            'functools', 'typing', 'abc', 'copy', 'pickle', 'sqlite3',
-            'urllib', 'http', 'html', 'xml', 'email', 'mimetypes',
-            'logging', 'traceback', 'inspect', 'importlib', 'ast',
-            'struct', 'codecs', 'string', 'textwrap', 'difflib',
-            'threading', 'multiprocessing', 'concurrent', 'queue',
-            'socket', 'ssl', 'select', 'selectors', 'signal',
-            'contextlib', 'weakref', 'gc', 'platform', 'locale',
-            'getpass', 'gettext', 'argparse', 'configparser',
-            'csv', 'zipfile', 'tarfile', 'gzip', 'bz2', 'lzma',
-            'secrets', 'statistics', 'decimal', 'fractions',
-            'numbers', 'cmath', 'array', 'bisect', 'heapq',
-            'enum', 'graphlib', 'dataclasses', 'contextvars',
-            '__future__', 'builtins', 'warnings', 'atexit',
-            'telethon', 'pyrogram', 'motor', 'pymongo', 'dotenv', 'git',
-            'userbot', 'userbot_compat', 'config', 'database', 'utils',
-            'seduserbot', 'asena'
-        }
-        
-        package_mapping = {
-            'cv2': 'opencv-python',
-            'PIL': 'Pillow',
-            'sklearn': 'scikit-learn',
-            'yaml': 'pyyaml',
-            'bs4': 'beautifulsoup4',
-        }
-        
-        to_install = []
-        
-        for module in all_imports:
-            if module in skip_modules:
-                continue
-            
-            # Zaten kurulu mu kontrol et
-            try:
-                importlib.import_module(module)
-                self._installed_packages.add(module)
-            except ImportError:
-                package_name = package_mapping.get(module, module)
-                to_install.append(package_name)
-        
-        # Eksik paketleri toplu kur
-        if to_install:
-            unique_packages = list(set(to_install))
-            log.info("%s paket kuruluyor: %s", len(unique_packages), ', '.join(unique_packages))
-            
-            try:
-                result = subprocess.run(
-                    [sys.executable, "-m", "pip", "install"] + unique_packages + ["-q", "--disable-pip-version-check"],
-                    capture_output=True,
-                    text=True,
-                    timeout=300
-                )
-                
-                if result.returncode == 0:
-                    log.info("Tüm bağımlılıklar kuruldu")
-                    for pkg in unique_packages:
-                        self._installed_packages.add(pkg)
-                else:
-                    log.warning("Bazı paketler kurulamadı")
-            except Exception as e:
-                log.warning("Paket kurulum hatası: %s", e)
-        else:
+        # Eksikleri tek pip çalıştırmasıyla (olmazsa tek tek) arka planda kur
+        success, installed, failed = await self.deps.ensure(all_imports)
+        if installed:
+            log.info("Kurulan bağımlılıklar: %s", ", ".join(installed))
+        if failed:
+            log.warning("Kurulamayan bağımlılıklar: %s", "; ".join(f[:120] for f in failed))
+        if success and not installed:
             log.info("Tüm bağımlılıklar mevcut")
         
         self._packages_checked = True
@@ -323,75 +395,59 @@ class PluginManager:
         
         return content
     
-    def install_package(self, package_name: str) -> Tuple[bool, str]:
-        """Pip ile paket kur"""
-        try:
-            clean_name = package_name.split('>=')[0].split('==')[0].split('[')[0].strip()
-            
-            if clean_name.lower() in ['userbot', 'userbot_compat']:
-                return True, "userbot uyumluluk katmanı mevcut"
-            
-            # Cache kontrolü - zaten kuruluysa atla
-            if clean_name in self._installed_packages:
-                return True, f"{clean_name} zaten kurulu"
-            
-            # Import ile kontrol et
-            try:
-                importlib.import_module(clean_name)
-                self._installed_packages.add(clean_name)
-                return True, f"{clean_name} zaten kurulu"
-            except ImportError:
-                pass
-            
-            log.info("%s kuruluyor...", clean_name)
-            
-            result = subprocess.run(
-                [sys.executable, "-m", "pip", "install", package_name, "-q", "--disable-pip-version-check"],
-                capture_output=True,
-                text=True,
-                timeout=120
-            )
-            
-            if result.returncode == 0:
-                log.info("%s kuruldu", clean_name)
-                self._installed_packages.add(clean_name)
-                return True, f"{clean_name} kuruldu"
-            else:
-                log.error("%s kurulamadı: %s", clean_name, result.stderr)
-                return False, result.stderr
-                
-        except subprocess.TimeoutExpired:
-            return False, "Kurulum zaman aşımına uğradı"
-        except Exception as e:
-            return False, str(e)
+    async def install_package(self, package_name: str) -> Tuple[bool, str]:
+        """Pip ile paket kur (event loop'u bloklamaz; eşzamanlı istekler birleşir)"""
+        clean_name = package_name.split('>=')[0].split('==')[0].split('[')[0].strip()
+        
+        if clean_name.lower() in ['userbot', 'userbot_compat']:
+            return True, "userbot uyumluluk katmanı mevcut"
+        
+        success, installed, failed = await self.deps.ensure([clean_name])
+        if success:
+            return True, f"{clean_name} kuruldu" if installed else f"{clean_name} zaten kurulu"
+        return False, failed[0] if failed else "Kurulamadı"
     
     async def begin_bulk_load(self):
-        """Açılış/toplu yükleme başlangıcı: plugin meta verisini bir kez çek."""
+        """Açılış/toplu yükleme başlangıcı: plugin meta verisini TEK sorguda
+        çekip veritabanı önbelleğini ısıt (sonraki get_plugin'ler isabet eder)."""
         try:
             rows = await db.get_all_plugins()
-            self._bulk_meta = {p.get("name"): p for p in (rows or []) if p.get("name")}
-            self._bulk_mode = True
-            log.info("Toplu yükleme: %s plugin meta verisi önbelleğe alındı", len(self._bulk_meta))
+            log.info("Toplu yükleme: %s plugin meta verisi önbelleğe alındı", len(rows or []))
         except Exception:
-            self._bulk_meta = {}
-            self._bulk_mode = False
             log.warning("Toplu meta önbelleği alınamadı", exc_info=True)
 
     def end_bulk_load(self):
-        """Toplu yükleme bitti: önbelleği bırak (ayar değişiklikleri anında geçerli olsun)."""
-        self._bulk_mode = False
-        self._bulk_meta = {}
+        """Toplu yükleme bitti. Önbellek yazmalarda zaten geçersizleştiği için
+        bırakılacak bir şey yok; çağıranlarla uyumluluk için duruyor."""
 
     async def _get_plugin_meta(self, plugin_name: str):
-        """Plugin meta verisi: toplu moddayken önbellekten, normalde DB'den."""
-        if self._bulk_mode:
-            hit = self._bulk_meta.get(plugin_name)
-            if hit is not None:
-                return hit
+        """Plugin meta verisi (db.get_plugin önbellekli okur)"""
         return await db.get_plugin(plugin_name)
 
+    def _build_entry(self, file_path: str, original: str) -> Dict:
+        """Önbellek kaydını üret: TEK ast.parse → derleme + import + bilgi"""
+        patched = self._patch_plugin_content(original)
+        try:
+            tree = ast.parse(patched, file_path)
+            code = compile(tree, file_path, 'exec')
+        except SyntaxError:
+            log.error("Plugin derlenemedi: %s", file_path, exc_info=True)
+            return None
+        return {
+            "patched": patched,
+            "code": code,
+            "imports": sorted(_collect_imports(tree)),
+            "info": _plugin_info_from_source(original, tree),
+        }
+
+    def _load_entry(self, file_path: str) -> Dict:
+        """Disk önbelleğinden kayıt (yoksa üretilip yazılır)"""
+        return self._disk_cache.load(file_path, lambda text: self._build_entry(file_path, text))
+
     def _get_compiled_plugin(self, file_path: str):
         """Plugin dosyasını oku→yamala→derle ve CACHE'le (mtime ile geçersizleşir).
+        Bellekte yoksa disk önbelleğine bakılır (içerik hash'i ile); sıcak
+        açılışta yamalama/ayrıştırma/derleme yapılmaz.
         Döndürür: (patched_content, code_obj, deps_ok) | None"""
         try:
             mtime = os.path.getmtime(file_path)
@@ -400,202 +456,97 @@ class PluginManager:
         hit = self._code_cache.get(file_path)
         if hit and hit[0] == mtime:
             return hit[1], hit[2], hit[3]
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                original = f.read()
-        except Exception:
+        entry = self._load_entry(file_path)
+        if entry is None:
             return None
-        patched = self._patch_plugin_content(original)
+        if hit and hit[5] == entry["key"]:
+            # Yalnızca mtime değişti (touch, git checkout): içerik aynı → eski
+            # kod nesnesi ve bağımlılık kontrolü geçerli kalır
+            self._code_cache[file_path] = (mtime,) + tuple(hit[1:])
+            return hit[1], hit[2], hit[3]
+        self._code_cache[file_path] = (mtime, entry["patched"], entry["code"], False,
+                                       entry["imports"], entry["key"])
+        return entry["patched"], entry["code"], False
+
+    def _code_key(self, file_path: str):
+        """Önbellekteki kodun içerik hash'i (yoksa None)"""
+        hit = self._code_cache.get(file_path)
+        return hit[5] if hit else None
+
+    def _cached_imports(self, file_path: str):
+        hit = self._code_cache.get(file_path)
+        return hit[4] if hit else None
+
+    def _get_shared_module(self, plugin_name: str, file_path: str, code_obj) -> _SharedPlugin:
+        """Paylaşımlı modülü döndür; yoksa (ya da dosya değiştiyse) bir kez exec et.
+        Modül seviyesindeki @register handler'ları client'a değil şablon
+        listesine düşer; her kullanıcıya builder kopyasıyla bağlanır."""
+        shared = self._shared_modules.get(plugin_name)
+        key = self._code_key(file_path)
+        if shared is not None and (shared.code is code_obj or (key and shared.key == key)):
+            return shared
+
+        import types
+        from userbot_compat import events as compat_events
+
+        module_name = f"plugin_{plugin_name}"
+        module = types.ModuleType(module_name)
+        module.__file__ = file_path
+        module.__name__ = module_name
+        sys.modules[module_name] = module
+
+        # Modül seviyesindeki @register'lar client'a değil bekleme listesine düşsün
+        pending_before = len(compat_events._pending_handlers)
         try:
-            code = compile(patched, file_path, 'exec')
-        except SyntaxError:
-            log.error("Plugin derlenemedi: %s", file_path, exc_info=True)
-            return None
-        self._code_cache[file_path] = (mtime, patched, code, False)
-        return patched, code, False
+            with compat_events.bound_client(None):
+                exec(code_obj, module.__dict__)
+        finally:
+            templates = compat_events._pending_handlers[pending_before:]
+            del compat_events._pending_handlers[pending_before:]
+
+        if shared is not None:
+            # Dosya değişti: eski modülü kullanan client'lar yeniden aktive
+            # edilene kadar eski handler'larla çalışmaya devam eder
+            log.info("Paylaşımlı plugin yeniden yüklendi: %s", plugin_name)
+        shared = _SharedPlugin(code_obj, key, module, templates)
+        self._shared_modules[plugin_name] = shared
+        log.info("Paylaşımlı plugin yüklendi: %s (%d handler)", plugin_name, len(templates))
+        return shared
 
     def _mark_deps_ok(self, file_path: str):
         """Bu dosyanın bağımlılıkları kontrol edildi → tekrar kontrol etme."""
         hit = self._code_cache.get(file_path)
         if hit:
-            self._code_cache[file_path] = (hit[0], hit[1], hit[2], True)
+            self._code_cache[file_path] = (hit[0], hit[1], hit[2], True, hit[4], hit[5])
 
-    def check_and_install_imports(self, content: str) -> Tuple[bool, List[str], List[str]]:
-        """Plugin içeriğindeki import'ları kontrol et ve eksik olanları kur"""
-        installed = []
-        failed = []
-        
+    async def check_and_install_imports(self, content: str, imports=None) -> Tuple[bool, List[str], List[str]]:
+        """Plugin içeriğindeki import'ları kontrol et ve eksik olanları kur.
+        imports verilirse (disk önbelleğinden) içerik yeniden ayrıştırılmaz."""
         try:
-            tree = ast.parse(content)
-            imports = set()
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    for alias in node.names:
-                        module_name = alias.name.split('.')[0]
-                        imports.add(module_name)
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module:
-                        module_name = node.module.split('.')[0]
-                        imports.add(module_name)
-            
-            skip_modules = {
-                'os', 'sys', 'time', 'datetime', 'json', 'random', 'math', 're',
-                'asyncio', 'subprocess', 'shutil', 'glob', 'pathlib', 'tempfile',
-                'base64', 'hashlib', 'uuid', 'io', 'collections', 'itertools',
-                'functools', 'typing', 'abc', 'copy', 'pickle', 'sqlite3',
-                'urllib', 'http', 'html', 'xml', 'email', 'mimetypes',
-                'logging', 'traceback', 'inspect', 'importlib', 'ast',
-                'struct', 'codecs', 'string', 'textwrap', 'difflib',
-                'threading', 'multiprocessing', 'concurrent', 'queue',
-                'socket', 'ssl', 'select', 'selectors', 'signal',
-                'contextlib', 'weakref', 'gc', 'platform', 'locale',
-                'getpass', 'gettext', 'argparse', 'configparser',
-                'csv', 'zipfile', 'tarfile', 'gzip', 'bz2', 'lzma',
-                'secrets', 'statistics', 'decimal', 'fractions',
-                'numbers', 'cmath', 'array', 'bisect', 'heapq',
-                'enum', 'graphlib', 'dataclasses', 'contextvars',
-                '__future__', 'builtins', 'warnings', 'atexit',
-                'telethon', 'pyrogram', 'motor', 'pymongo', 'dotenv', 'git',
-                'userbot', 'userbot_compat', 'config', 'database', 'utils',
-                'seduserbot', 'asena'
-            }
-            
-            package_mapping = {
-                'cv2': 'opencv-python',
-                'PIL': 'Pillow',
-                'sklearn': 'scikit-learn',
-                'yaml': 'pyyaml',
-                'bs4': 'beautifulsoup4',
-                'dotenv': 'python-dotenv',
-                'gtts': 'gTTS',
-                'edge_tts': 'edge-tts',
-                'pydub': 'pydub',
-                'mutagen': 'mutagen',
-                'aiohttp': 'aiohttp',
-                'aiofiles': 'aiofiles',
-                'requests': 'requests',
-                'httpx': 'httpx',
-                'numpy': 'numpy',
-                'pandas': 'pandas',
-                'matplotlib': 'matplotlib',
-                'scipy': 'scipy',
-                'tqdm': 'tqdm',
-                'colorama': 'colorama',
-                'rich': 'rich',
-                'emoji': 'emoji',
-                'qrcode': 'qrcode',
-                'barcode': 'python-barcode',
-                'googletrans': 'googletrans==3.1.0a0',
-                'translate': 'translate',
-                'wikipedia': 'wikipedia',
-                'speedtest': 'speedtest-cli',
-                'psutil': 'psutil',
-                'pytz': 'pytz',
-                'dateutil': 'python-dateutil',
-                'humanize': 'humanize',
-                'validators': 'validators',
-                'phonenumbers': 'phonenumbers',
-                'pycountry': 'pycountry',
-                'forex_python': 'forex-python',
-                'cryptocompare': 'cryptocompare',
-                'yfinance': 'yfinance',
-                'instaloader': 'instaloader',
-                'yt_dlp': 'yt-dlp',
-                'pytube': 'pytube',
-                'spotipy': 'spotipy',
-                'lyricsgenius': 'lyricsgenius',
-                'ffmpeg': 'ffmpeg-python',
-                'speech_recognition': 'SpeechRecognition',
-                'openai': 'openai',
-                'anthropic': 'anthropic',
-            }
-            
-            for module_name in imports:
-                if module_name in skip_modules:
-                    continue
-                # Bu oturumda zaten doğrulandı / zaten denenip olmadı → atla
-                if module_name in self._installed_packages or module_name in self._import_failed:
-                    continue
-
-                try:
-                    importlib.import_module(module_name)
-                    self._installed_packages.add(module_name)
-                    continue
-                except ImportError:
-                    pass
-
-                package_name = package_mapping.get(module_name, module_name)
-                log.warning("'%s' bulunamadı, '%s' kuruluyor...", module_name, package_name)
-                success, msg = self.install_package(package_name)
-
-                if success:
-                    installed.append(package_name)
-                    importlib.invalidate_caches()
-                    # Kurulum başarılı ama gerçekten import edilebiliyor mu?
-                    try:
-                        importlib.import_module(module_name)
-                        self._installed_packages.add(module_name)
-                    except Exception as _ie:
-                        # Kurulu ama kullanılamıyor → bir daha DENEME (açılışı kilitliyordu)
-                        self._import_failed.add(module_name)
-                        log.warning("'%s' kuruldu ama import edilemiyor (%s) — "
-                                    "bu oturumda tekrar denenmeyecek", module_name, _ie)
-                else:
-                    failed.append(f"{package_name}: {msg}")
-                    self._import_failed.add(module_name)
-            
-            return len(failed) == 0, installed, failed
-            
+            if imports is None:
+                imports = _collect_imports(ast.parse(content))
+            return await self.deps.ensure(imports)
         except SyntaxError as e:
             return False, [], [f"Sözdizimi hatası: {e}"]
         except Exception as e:
             return False, [], [f"Hata: {e}"]
     
     def extract_plugin_info(self, file_path: str) -> Dict:
-        """Plugin dosyasından bilgileri çıkar"""
-        info = {
-            "name": os.path.basename(file_path).replace('.py', ''),
-            "commands": [],
-            "description": "",
-            "author": "",
-            "version": "1.0.0",
-            "requirements": []
-        }
-        
+        """Plugin dosyasından bilgileri çıkar (disk önbelleğinden; ayrıştırma yok)"""
+        name = os.path.basename(file_path).replace('.py', '')
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            try:
-                tree = ast.parse(content)
-                if (tree.body and isinstance(tree.body[0], ast.Expr) and 
-                    isinstance(tree.body[0].value, ast.Constant)):
-                    info["description"] = tree.body[0].value.value.strip()
-            except Exception:
-                pass
-            
-            patterns = _extract_command_names(content)
-            info["commands"] = sorted(set(patterns))
-            
-            for line in content.split('\n')[:30]:
-                line = line.strip()
-                if line.startswith('# author:') or line.startswith('# Author:'):
-                    info["author"] = line.split(':', 1)[1].strip()
-                elif line.startswith('# version:') or line.startswith('# Version:'):
-                    info["version"] = line.split(':', 1)[1].strip()
-                elif line.startswith('# requires:') or line.startswith('# requirements:'):
-                    reqs = line.split(':', 1)[1].strip().split(',')
-                    info["requirements"] = [r.strip() for r in reqs if r.strip()]
-                elif line.startswith('# description:') or line.startswith('# Description:'):
-                    if not info["description"]:
-                        info["description"] = line.split(':', 1)[1].strip()
-            
-            return info
-            
-        except Exception as e:
+            entry = self._load_entry(file_path)
+            if entry is not None:
+                info = dict(entry["info"])
+            else:
+                # Derlenemeyen dosya: önbelleğe girmez, bilgiler yine çıkarılır
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    info = _plugin_info_from_source(f.read())
+        except Exception:
             log.error("Bilgi çıkarma hatası", exc_info=True)
-            return info
+            info = _plugin_info_from_source("")
+        info["name"] = name
+        return info
     
     async def register_plugin(self, file_path: str, is_public: bool = True,
                              allowed_users: List[int] = None) -> Tuple[bool, str]:
@@ -610,10 +561,10 @@ class PluginManager:
         if existing:
             return False, f"`{plugin_name}` adında bir plugin zaten mevcut"
         
-        for cmd in info["commands"]:
-            existing_plugin = await db.check_command_exists(cmd)
-            if existing_plugin:
-                return False, f"`.{cmd}` komutu `{existing_plugin}` plugininde zaten mevcut"
+        conflicts = await db.check_commands(info["commands"])
+        if conflicts:
+            cmd, existing_plugin = next(iter(conflicts.items()))
+            return False, f"`.{cmd}` komutu `{existing_plugin}` plugininde zaten mevcut"
         
         dest_path = os.path.join(config.PLUGINS_DIR, os.path.basename(file_path))
         if file_path != dest_path:
@@ -642,9 +593,7 @@ class PluginManager:
         if not plugin:
             return False, f"`{plugin_name}` adında bir plugin bulunamadı"
         
-        for user_id in list(self.user_active_plugins.keys()):
-            if plugin_name in self.user_active_plugins[user_id]:
-                await self.deactivate_plugin(user_id, plugin_name)
+        await self.deactivate_plugin_for_users(plugin_name)
         
         file_path = os.path.join(config.PLUGINS_DIR, plugin["filename"])
         if os.path.exists(file_path):
@@ -721,7 +670,8 @@ class PluginManager:
         if _deps_ok:
             success, installed, failed = True, [], []
         else:
-            success, installed, failed = self.check_and_install_imports(patched_content)
+            success, installed, failed = await self.check_and_install_imports(
+                patched_content, self._cached_imports(file_path))
             if success:
                 self._mark_deps_ok(file_path)
         
@@ -734,9 +684,8 @@ class PluginManager:
         
         # Plugin'i yükle - exec kullanarak
         try:
-            # B1: global `_client` yarışını önlemek için compat kurulumu ve
-            # handler kaydını (senkron kritik bölge) kilit altında yap.
-            async with self._activation_lock:
+            # Aynı kullanıcının aktivasyonları sıralanır; diğer kullanıcılar beklemez
+            async with self._user_lock(user_id):
                 # YARIŞ KORUMASI: "zaten aktif" kontrolü kilit DIŞINDA yapıldığı için
                 # iki eşzamanlı aktivasyon (paralel yükleme) ikisi de geçebilir;
                 # kilit içinde TEKRAR kontrol et → aksi halde plugin ikinci kez exec
@@ -744,47 +693,21 @@ class PluginManager:
                 if plugin_name in self.user_active_plugins.get(user_id, {}):
                     return True, f"`{plugin_name}` zaten aktif"
 
-                # userbot_compat'ı hazırla
-                try:
-                    from userbot_compat import events as compat_events
-                    compat_events.set_client(client)
-                except Exception:
-                    log.error("compat_events hatası", exc_info=True)
-
-                # Modül için namespace oluştur
-                module_name = f"plugin_{plugin_name}_{user_id}"
-
-                # Yeni modül oluştur
-                import types
-                module = types.ModuleType(module_name)
-                module.__file__ = file_path
-                module.__name__ = module_name
-                module.client = client
-
-                # Modülü sys.modules'a ekle
-                sys.modules[module_name] = module
-
-                # Mevcut handler sayısını kaydet (önceki durum)
-                handlers_before = len(client.list_event_handlers())
-
-                # Kodu çalıştır (önceden derlenmiş kod nesnesi — compile tekrar edilmez)
-                exec(_code_obj, module.__dict__)
-
-                # Register fonksiyonu varsa çağır (eski stil)
-                if hasattr(module, 'register') and callable(module.register):
-                    module.register(client)
+                if _is_shared_plugin(patched_content):
+                    # Çok kiracılı plugin: modül bir kez exec edilir, yalnızca
+                    # handler'lar bu client'a bağlanır
+                    shared = self._get_shared_module(plugin_name, file_path, _code_obj)
+                    module, new_handlers = self._attach_shared(shared, client, user_id)
+                    shared.users.add(user_id)
+                else:
+                    module, new_handlers = self._exec_user_module(
+                        plugin_name, user_id, client, file_path, _code_obj)
 
-                # register_handlers fonksiyonu varsa çağır (yeni stil)
-                if hasattr(module, 'register_handlers') and callable(module.register_handlers):
-                    try:
-                        module.register_handlers(client, user_id)
-                        log.info("register_handlers çağrıldı: %s", plugin_name)
-                    except Exception:
-                        log.error("register_handlers hatası", exc_info=True)
+                self._module_plugins[module.__name__] = plugin_name
+                self._track_registrations(client, user_id)
 
-                # Yeni eklenen handler'ları tespit et ve kaydet
-                handlers_after = client.list_event_handlers()
-                new_handlers = handlers_after[handlers_before:]
+                # Komut handler'larını client'tan alıp yönlendiriciye taşı
+                self._route_handlers(client, plugin_name, new_handlers)
             
             # Handler'ları kullanıcı ve plugin bazında sakla
             if user_id not in self.user_handlers:
@@ -827,7 +750,7 @@ class PluginManager:
                 return await self.activate_plugin(user_id, plugin_name, client)
             
             log.error("Import hatası: %s", missing_module, exc_info=True)
-            success, msg = self.install_package(missing_module)
+            success, msg = await self.install_package(missing_module)
             
             if success:
                 importlib.invalidate_caches()
@@ -845,18 +768,208 @@ class PluginManager:
             traceback.print_exc()
             return False, f"❌ Plugin hatası:\n`{str(e)}`"
     
-    async def deactivate_plugin(self, user_id: int, plugin_name: str, reason: str = "disable") -> Tuple[bool, str]:
-        """Kullanıcı için plugin deaktif et"""
-        
+    def _exec_user_module(self, plugin_name: str, user_id: int, client, file_path: str,
+                          code_obj, strict: bool = False):
+        """Kullanıcıya özel modül oluştur → exec → register. Döndürür: (modül, yeni handler'lar).
+        Hata olursa bu sırada eklenen handler'lar geri alınır ve hata yükseltilir;
+        strict=True iken register_handlers hatası da yükseltilir (hot-reload)."""
+        import types
+        from userbot_compat import events as compat_events
+
+        module_name = f"plugin_{plugin_name}_{user_id}"
+        module = types.ModuleType(module_name)
+        module.__file__ = file_path
+        module.__name__ = module_name
+        module.client = client
+        sys.modules[module_name] = module
+
+        # Mevcut handler sayısını kaydet (önceki durum)
+        handlers_before = len(client.list_event_handlers())
+        try:
+            # Kodu çalıştır (önceden derlenmiş kod nesnesi — compile tekrar edilmez).
+            # @register/@on ve exec sırasında açılan görevler bu client'ı görür.
+            with compat_events.bound_client(client):
+                exec(code_obj, module.__dict__)
+
+                # Register fonksiyonu varsa çağır (eski stil)
+                if hasattr(module, 'register') and callable(module.register):
+                    module.register(client)
+
+                # register_handlers fonksiyonu varsa çağır (yeni stil)
+                if hasattr(module, 'register_handlers') and callable(module.register_handlers):
+                    try:
+                        module.register_handlers(client, user_id)
+                        log.info("register_handlers çağrıldı: %s", plugin_name)
+                    except Exception:
+                        if strict:
+                            raise
+                        log.error("register_handlers hatası", exc_info=True)
+        except BaseException:
+            self._remove_handlers(client, client.list_event_handlers()[handlers_before:])
+            raise
+        return module, client.list_event_handlers()[handlers_before:]
+
+    def _attach_shared(self, shared: _SharedPlugin, client, user_id: int, strict: bool = False):
+        """Paylaşımlı modülün handler'larını client'a bağla. Döndürür: (bağlam, yeni handler'lar)"""
+        handlers_before = len(client.list_event_handlers())
+        try:
+            for callback, builder in shared.templates:
+                client.add_event_handler(callback, copy.copy(builder))
+            if callable(getattr(shared.module, 'register_handlers', None)):
+                from userbot_compat import events as compat_events
+                try:
+                    with compat_events.bound_client(client):
+                        shared.module.register_handlers(client, user_id)
+                except Exception:
+                    if strict:
+                        raise
+                    log.error("register_handlers hatası", exc_info=True)
+        except BaseException:
+            self._remove_handlers(client, client.list_event_handlers()[handlers_before:])
+            raise
+        return PluginContext(shared.module, client, user_id), client.list_event_handlers()[handlers_before:]
+
+    def _user_lock(self, user_id: int) -> asyncio.Lock:
+        """Kullanıcının aktivasyon kilidi (kimse tutmuyorsa kendiliğinden silinir)"""
+        lock = self._user_locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._user_locks[user_id] = lock
+        return lock
+
+    def _route_handlers(self, client, plugin_name: str, handlers: List) -> int:
+        """Komut adı kesin çıkarılabilen NewMessage handler'larını client'ın
+        tek yönlendirici handler'ına taşır; kalanlar client'ta kalır (regex yolu).
+        Aynı callback yönlendirilemeyen bir builder'la da kayıtlıysa taşınmaz
+        (remove_event_handler callback'in tüm NewMessage kayıtlarını siler)."""
+        routable = {}
+        pinned = set()
+        for callback, builder in handlers:
+            names = command_names_for(builder)
+            if names:
+                routable.setdefault(id(callback), []).append((callback, builder, names))
+            else:
+                pinned.add(id(callback))
+        routed = 0
+        for key, items in routable.items():
+            if key in pinned:
+                continue
+            router = get_router(client)
+            for callback, builder, names in items:
+                self._check_foreign_commands(plugin_name, names)
+                router.add(plugin_name, callback, builder, names)
+                routed += 1
+            client.remove_event_handler(items[0][0], events.NewMessage)
+        return routed
+
+    def _check_foreign_commands(self, plugin_name: str, names: Set[str]):
+        """Yönlendirilen komut, dizine göre BAŞKA bir plugine aitse bir kez uyar
+        (ikisini birden yükleyen kullanıcıda komut iki handler'ı tetikler)"""
+        if not db.commands.ready:
+            return
+        for cmd, owner in db.commands.conflicts(names, exclude=plugin_name).items():
+            if (plugin_name, cmd) not in self._warned_commands:
+                self._warned_commands.add((plugin_name, cmd))
+                log.warning("Komut çakışması: %s pluginindeki .%s, %s plugininde de tanımlı",
+                            plugin_name, cmd, owner)
+
+    # ==========================================
+    # HANDLER KAYDI / SÖKME
+    # ==========================================
+
+    def _track_registrations(self, client, user_id: int):
+        """Client'ın add_event_handler'ını bir kez sarar: aktivasyondan SONRA
+        (komut içinde, görevde...) eklenen plugin handler'ları da kayda düşer.
+        Böylece sökme için client'ın handler listesini taramak gerekmez."""
+        if getattr(client, "_kingtg_tracked", False):
+            return
+        original = client.add_event_handler
+
+        def add_event_handler(callback, event=None):
+            result = original(callback, event)
+            try:
+                self._record_late_handler(client, user_id, callback)
+            except Exception:
+                log.debug("Geç handler kaydı tutulamadı", exc_info=True)
+            return result
+
+        try:
+            client.add_event_handler = add_event_handler
+            client._kingtg_tracked = True
+            client._kingtg_user_id = user_id  # profilleyici etiketi
+        except Exception:
+            pass
+
+    def _record_late_handler(self, client, user_id: int, callback):
+        module_name = getattr(inspect.unwrap(callback), "__module__", None)
+        plugin_name = self._module_plugins.get(module_name)
+        if plugin_name is None:
+            return
+        # Kayıt yoksa aktivasyon sürüyor demektir → fark listesi zaten yakalar
+        handlers = self.user_handlers.get(user_id, {}).get(plugin_name)
+        builders = client.list_event_handlers()
+        if handlers is None or not builders or builders[-1][0] is not callback:
+            return
+        handlers.append(builders[-1])
+
+    def _remove_handlers(self, client, handlers: List) -> int:
+        """Kayıtlı (callback, builder) çiftlerini client'tan TEK geçişte kaldır.
+        remove_event_handler her çağrıda tüm listeyi tarar ve callback'in
+        diğer builder'larla kayıtlarını da siler; burada kimlikle eşlenir."""
+        if not client or not handlers:
+            return 0
+        keys = {(id(callback), id(builder)) for callback, builder in handlers}
+        builders = getattr(client, "_event_builders", None)
+        if not isinstance(builders, list):
+            removed = 0
+            for callback, builder in handlers:
+                try:
+                    removed += client.remove_event_handler(callback, builder)
+                except Exception:
+                    pass
+            return removed
+        kept = [(b, cb) for b, cb in builders if (id(cb), id(b)) not in keys]
+        # Yeni liste ata: o an dağıtılan güncellemenin döngüsü bozulmasın
+        client._event_builders = kept
+        return len(builders) - len(kept)
+
+    def _legacy_handlers(self, client, module, module_name: str) -> List:
+        """Kaydı olmayan (eski/tembel kayıt yapan) plugin için yedek tarama:
+        client listesinde TEK geçiş, modülün callable'larıyla kimlik eşlemesi."""
+        if not client:
+            return []
+        owned = {id(v) for v in vars(module).values() if callable(v)} if module is not None else set()
+        found = []
+        for callback, builder in client.list_event_handlers():
+            if id(callback) in owned or \
+                    getattr(inspect.unwrap(callback), "__module__", None) == module_name:
+                found.append((callback, builder))
+        return found
+
+    @staticmethod
+    def _release_shared(shared: _SharedPlugin, user_id: int):
+        """Kullanıcıyı paylaşımlı modülden çıkarır; son kullanıcı çıkınca unregister çağrılır"""
+        shared.users.discard(user_id)
+        # user_id anahtarlı depolardaki bu kullanıcıya ait durumu bırak
+        for value in list(vars(shared.module).values()):
+            if isinstance(value, UserState):
+                value.drop(user_id)
+        unregister = getattr(shared.module, 'unregister', None)
+        if not shared.users and callable(unregister):
+            try:
+                unregister()
+            except Exception:
+                pass
+
+    def _teardown_plugin(self, user_id: int, plugin_name: str, reason: str,
+                         persist: bool) -> Tuple[object, List, int]:
+        """Plugin'i kullanıcı için bellekten söker; client'tan kaldırılacak
+        handler'ları döndürür (toplu işlemde client başına tek geçiş için).
+        Döndürür: (client, kaldırılacak handler'lar, yönlendiriciden çıkan sayısı)"""
         handlers_removed = 0
-        module = None
-        client = None
-        
-        # Modülü bul
-        if user_id in self.user_active_plugins and plugin_name in self.user_active_plugins[user_id]:
-            module = self.user_active_plugins[user_id][plugin_name]
-            client = getattr(module, 'client', None)
-        
+        module = self.user_active_plugins.get(user_id, {}).get(plugin_name)
+        client = getattr(module, 'client', None) if module is not None else None
+
         # Client yoksa smart_session_manager'dan al
         if not client:
             try:
@@ -864,118 +977,346 @@ class PluginManager:
                 client = smart_session_manager.get_client(user_id)
             except Exception:
                 pass
-        
-        try:
-            # Önce unregister_handlers fonksiyonu varsa çağır
-            if module and hasattr(module, 'unregister_handlers') and callable(module.unregister_handlers):
-                try:
-                    module.unregister_handlers(client, user_id)
-                    handlers_removed += 1
-                    log.info("unregister_handlers çağrıldı: %s", plugin_name)
-                except Exception as e:
-                    log.error("unregister_handlers hatası", exc_info=True)
-            
-            # Handler'ları kaldır
-            if client:
-                module_name = f"plugin_{plugin_name}_{user_id}"
-                all_handlers = list(client.list_event_handlers())  # Kopya al
-                
-                for callback, event in all_handlers:
-                    should_remove = False
-                    
-                    try:
-                        # Callback'in modülünü kontrol et
-                        cb_module = getattr(callback, '__module__', '') or ''
-                        cb_name = getattr(callback, '__name__', '') or ''
-                        cb_qualname = getattr(callback, '__qualname__', '') or ''
-                        
-                        # Bu plugin'e ait mi kontrol et
-                        if module_name in cb_module:
-                            should_remove = True
-                        elif module_name in cb_qualname:
-                            should_remove = True
-                        elif plugin_name in cb_module and str(user_id) in cb_module:
-                            should_remove = True
-                        
-                        # Modül referansı ile kontrol
-                        if module and hasattr(module, cb_name):
-                            module_func = getattr(module, cb_name, None)
-                            if module_func is callback or module_func == callback:
-                                should_remove = True
-                        
-                        if should_remove:
-                            client.remove_event_handler(callback, event)
-                            handlers_removed += 1
-                            log.info("Handler kaldırıldı: %s - %s", plugin_name, cb_name)
-                    except Exception as e:
-                        log.error("Handler kontrol hatası", exc_info=True)
-                
-                # Modüldeki tüm fonksiyonları tara
-                if module:
-                    for attr_name in dir(module):
-                        if attr_name.startswith('_'):
-                            continue
-                        try:
-                            attr = getattr(module, attr_name)
-                            if not callable(attr):
-                                continue
-                            
-                            # Yeniden handler listesini al (değişmiş olabilir)
-                            current_handlers = list(client.list_event_handlers())
-                            for callback, event in current_handlers:
-                                try:
-                                    if callback is attr:
-                                        client.remove_event_handler(callback, event)
-                                        handlers_removed += 1
-                                        log.info("Handler kaldırıldı (ref): %s - %s", plugin_name, attr_name)
-                                except Exception:
-                                    pass
-                        except Exception:
-                            pass
-            
-            # Kayıtlı handler'ları temizle
-            if user_id in self.user_handlers and plugin_name in self.user_handlers[user_id]:
-                del self.user_handlers[user_id][plugin_name]
-            
+
+        # Önce unregister_handlers fonksiyonu varsa çağır
+        if module and hasattr(module, 'unregister_handlers') and callable(module.unregister_handlers):
+            try:
+                module.unregister_handlers(client, user_id)
+                handlers_removed += 1
+                log.info("unregister_handlers çağrıldı: %s", plugin_name)
+            except Exception:
+                log.error("unregister_handlers hatası", exc_info=True)
+
+        # Handler'lar: aktivasyonda (ve sonrasında) tutulan kayıt
+        module_name = f"plugin_{plugin_name}_{user_id}"
+        registered = self.user_handlers.get(user_id, {}).pop(plugin_name, None)
+        shared = self._shared_modules.get(plugin_name) if isinstance(module, PluginContext) else None
+        if registered is None and shared is None:
+            # Kayıt yok → yalnızca bu durumda client taranır
+            registered = self._legacy_handlers(client, module, module_name)
+        handlers = list(registered or [])
+
+        # Yönlendiricideki komut handler'larını çıkar
+        router = get_router(client, create=False) if client else None
+        if router is not None:
+            handlers_removed += router.remove_plugin(plugin_name)
+
+        if shared is not None:
+            self._release_shared(shared, user_id)
+        elif module and hasattr(module, 'unregister') and callable(module.unregister):
             # Unregister fonksiyonu varsa çağır
-            if module and hasattr(module, 'unregister') and callable(module.unregister):
-                try:
-                    module.unregister()
-                except Exception:
-                    pass
+            try:
+                module.unregister()
+            except Exception:
+                pass
+
+        # Kullanıcı verilerini temizle (depoda çöp birikmesini önler)
+        if persist and module and hasattr(module, 'cleanup_user_data') and callable(module.cleanup_user_data):
+            try:
+                module.cleanup_user_data(user_id, reason)
+                log.info("cleanup_user_data çağrıldı: %s (reason=%s)", plugin_name, reason)
+            except Exception:
+                log.error("cleanup_user_data hatası: %s", plugin_name, exc_info=True)
+
+        # sys.modules'dan kaldır
+        sys.modules.pop(module_name, None)
+        self._module_plugins.pop(module_name, None)
+        if persist:
+            profiler.forget(plugin_name, user_id)
+
+        # user_active_plugins'den kaldır
+        self.user_active_plugins.get(user_id, {}).pop(plugin_name, None)
+        return client, handlers, handlers_removed
+
+    async def deactivate_plugin(self, user_id: int, plugin_name: str, reason: str = "disable",
+                                persist: bool = True) -> Tuple[bool, str]:
+        """Kullanıcı için plugin deaktif et.
+        persist=False → yalnızca bellekten boşalt (hibernasyon): DB'deki aktif
+        liste ve plugin'in kullanıcı verisi olduğu gibi kalır."""
+        try:
+            client, handlers, handlers_removed = self._teardown_plugin(
+                user_id, plugin_name, reason, persist)
+            handlers_removed += self._remove_handlers(client, handlers)
 
-            # Kullanıcı verilerini temizle (depoda çöp birikmesini önler)
-            if module and hasattr(module, 'cleanup_user_data') and callable(module.cleanup_user_data):
-                try:
-                    module.cleanup_user_data(user_id, reason)
-                    log.info("cleanup_user_data çağrıldı: %s (reason=%s)", plugin_name, reason)
-                except Exception:
-                    log.error("cleanup_user_data hatası: %s", plugin_name, exc_info=True)
-            
-            # sys.modules'dan kaldır
-            module_name = f"plugin_{plugin_name}_{user_id}"
-            if module_name in sys.modules:
-                del sys.modules[module_name]
-            
-            # user_active_plugins'den kaldır
-            if user_id in self.user_active_plugins and plugin_name in self.user_active_plugins[user_id]:
-                del self.user_active_plugins[user_id][plugin_name]
-            
             # DB'den kaldır
-            user = await db.get_user(user_id)
-            active_plugins = user.get("active_plugins", []) if user else []
-            if plugin_name in active_plugins:
-                active_plugins.remove(plugin_name)
-                await db.update_user(user_id, {"active_plugins": active_plugins})
-            
+            if persist:
+                user = await db.get_user(user_id)
+                active_plugins = user.get("active_plugins", []) if user else []
+                if plugin_name in active_plugins:
+                    active_plugins.remove(plugin_name)
+                    await db.update_user(user_id, {"active_plugins": active_plugins})
+
             log.info("%s deaktif edildi (user=%s), %s handler kaldırıldı", plugin_name, user_id, handlers_removed)
             return True, f"✅ `{plugin_name}` deaktif edildi"
-            
+
         except Exception as e:
             import traceback
             traceback.print_exc()
             return False, f"Hata: `{str(e)}`"
-    
+
+    async def deactivate_plugin_for_users(self, plugin_name: str, user_ids=None,
+                                          reason: str = "disable", persist: bool = True) -> int:
+        """Plugin'i birden çok kullanıcıda TEK geçişte deaktif et
+        (ör. "X'i herkes için kapat", özel moda alma, plugin silme).
+        user_ids=None → DB'de aktif listesinde olan + bellekte yüklü herkes.
+        Kullanıcı listesi DB'den bir kez okunur, client başına handler listesi
+        bir kez yeniden kurulur. Deaktif edilen kullanıcı sayısını döndürür."""
+        wanted = None if user_ids is None else set(user_ids)
+        db_users = {}
+        if persist:
+            for user in await db.get_all_users():
+                uid = user.get("user_id")
+                if plugin_name in (user.get("active_plugins") or []) and (wanted is None or uid in wanted):
+                    db_users[uid] = user
+        loaded = [uid for uid, plugins in self.user_active_plugins.items()
+                  if plugin_name in plugins and (wanted is None or uid in wanted)]
+
+        pending: Dict[int, Tuple[object, List]] = {}  # id(client) → (client, handlers)
+        for uid in loaded:
+            try:
+                client, handlers, _ = self._teardown_plugin(uid, plugin_name, reason, persist)
+            except Exception:
+                log.error("Toplu deaktivasyon hatası: %s (user=%s)", plugin_name, uid, exc_info=True)
+                continue
+            if client and handlers:
+                pending.setdefault(id(client), (client, []))[1].extend(handlers)
+        removed = sum(self._remove_handlers(client, handlers) for client, handlers in pending.values())
+
+        for uid, user in db_users.items():
+            active_plugins = [p for p in user.get("active_plugins", []) if p != plugin_name]
+            try:
+                await db.update_user(uid, {"active_plugins": active_plugins})
+            except Exception:
+                log.error("Aktif liste güncellenemedi: user=%s", uid, exc_info=True)
+
+        count = len(set(loaded) | set(db_users))
+        log.info("%s toplu deaktif edildi: %s kullanıcı, %s handler kaldırıldı",
+                 plugin_name, count, removed)
+        return count
+
+    # ==========================================
+    # HOT-RELOAD
+    # ==========================================
+
+    def plugins_for_files(self, paths) -> List[str]:
+        """Verilen dosyalardan yüklenmiş (en az bir kullanıcıda aktif) plugin adları"""
+        wanted = {os.path.abspath(p) for p in paths}
+        names = []
+        for plugins in self.user_active_plugins.values():
+            for plugin_name, module in plugins.items():
+                file_path = getattr(module, '__file__', None)
+                if plugin_name not in names and file_path and os.path.abspath(file_path) in wanted:
+                    names.append(plugin_name)
+        return names
+
+    async def reload_changed(self, paths) -> List[Dict]:
+        """Klasör izleyici aboneliği: değişen dosyaların yüklü pluginlerini yeniden yükle"""
+        return [await self.reload_plugin(name) for name in self.plugins_for_files(paths)]
+
+    def _swap_plugin(self, user_id: int, plugin_name: str, file_path: str, code_obj,
+                     shared: _SharedPlugin = None):
+        """Kullanıcının yüklü plugin'ini yeni koda geçir. Arada await yok →
+        olay döngüsü açısından atomik: hiçbir mesaj eski+yeni handler'ları
+        birlikte görmez. Hata olursa eski modül/handler'lar yerinde kalır."""
+        old = self.user_active_plugins[user_id][plugin_name]
+        client = old.client
+        registry = self.user_handlers.setdefault(user_id, {})
+        # Kayıt çekilir: geç kayıt izleyicisi yeni handler'ları eski listeye yazmasın
+        old_handlers = registry.pop(plugin_name, [])
+        module_name = f"plugin_{plugin_name}_{user_id}"
+        old_sys_module = sys.modules.get(module_name)
+        new_handlers = []
+        try:
+            if shared is not None:
+                module, new_handlers = self._attach_shared(shared, client, user_id, strict=True)
+            else:
+                module, new_handlers = self._exec_user_module(
+                    plugin_name, user_id, client, file_path, code_obj, strict=True)
+                if callable(getattr(module, 'migrate_state', None)):
+                    module.migrate_state(old, module)
+        except BaseException:
+            self._remove_handlers(client, new_handlers)
+            if old_sys_module is not None:
+                sys.modules[module_name] = old_sys_module
+            else:
+                sys.modules.pop(module_name, None)
+            registry[plugin_name] = old_handlers
+            raise
+
+        self._remove_handlers(client, old_handlers)
+        router = get_router(client, create=False)
+        if router is not None:
+            router.remove_plugin(plugin_name)
+        self._route_handlers(client, plugin_name, new_handlers)
+        registry[plugin_name] = new_handlers
+        self.user_active_plugins[user_id][plugin_name] = module
+        self._module_plugins[module.__name__] = plugin_name
+        if shared is not None:
+            shared.users.add(user_id)
+            sys.modules.pop(module_name, None)  # kullanıcıya özelden paylaşımlıya geçildiyse
+        if not isinstance(old, PluginContext) and callable(getattr(old, 'unregister', None)):
+            try:
+                old.unregister()
+            except Exception:
+                log.debug("Eski modül unregister hatası: %s", plugin_name, exc_info=True)
+        return old
+
+    def _reload_shared_module(self, plugin_name: str, file_path: str, code_obj) -> _SharedPlugin:
+        """Paylaşımlı modülü yeni kodla bir kez exec et (+ migrate_state).
+        Hata olursa eski modül yerine konur ve hata yükseltilir."""
+        old = self._shared_modules.get(plugin_name)
+        module_name = f"plugin_{plugin_name}"
+        try:
+            shared = self._get_shared_module(plugin_name, file_path, code_obj)
+            if old is not None and callable(getattr(shared.module, 'migrate_state', None)):
+                shared.module.migrate_state(old.module, shared.module)
+            return shared
+        except BaseException:
+            if old is not None:
+                self._shared_modules[plugin_name] = old
+                sys.modules[module_name] = old.module
+            else:
+                self._shared_modules.pop(plugin_name, None)
+                sys.modules.pop(module_name, None)
+            raise
+
+    def _pin_code(self, file_path: str, previous):
+        """Yeni kod reddedildi: dosya tekrar değişene kadar eski kod kullanılsın"""
+        if not previous:
+            return
+        try:
+            mtime = os.path.getmtime(file_path)
+        except OSError:
+            return
+        self._code_cache[file_path] = (mtime,) + tuple(previous[1:])
+
+    async def reload_plugin(self, plugin_name: str, batch_size: int = None) -> Dict:
+        """Plugin'i yükleyen TÜM kullanıcılarda yeni koda geçir (yerinde handler değişimi).
+        Dosya bir kez derlenir. İlk kullanıcı kanaryadır: yeni kod register
+        sırasında hata verirse kimse geçirilmez ve derleme önbelleği eski koda
+        sabitlenir. Kalan kullanıcılar `batch_size`'lık turlarla geçirilir,
+        turlar arasında olay döngüsüne dönülür. Gecikme raporu döndürür."""
+        started = time.perf_counter()
+        batch_size = max(1, batch_size or config.PLUGIN_RELOAD_BATCH)
+        report = {"plugin": plugin_name, "users": 0, "swapped": 0, "failed": [],
+                   "rolled_back": False, "error": None, "compile_ms": 0.0, "total_ms": 0.0}
+
+        async with self._reload_lock:
+            plugin = await self._get_plugin_meta(plugin_name)
+            if not plugin:
+                report["error"] = "plugin bulunamadı"
+                return report
+            file_path = os.path.join(config.PLUGINS_DIR, plugin["filename"])
+            previous = self._code_cache.get(file_path)
+
+            cached = self._get_compiled_plugin(file_path)
+            if not cached:
+                report["error"] = "dosya okunamadı veya derlenemedi"
+                report["rolled_back"] = True
+                self._pin_code(file_path, previous)
+                log.error("Hot-reload iptal (%s): %s", plugin_name, report["error"])
+                return report
+            patched_content, code_obj, deps_ok = cached
+            if previous is not None and previous[5] == self._code_key(file_path):
+                return report  # içerik değişmemiş (yalnızca mtime)
+
+            if not deps_ok:
+                success, _installed, failed = await self.check_and_install_imports(
+                    patched_content, self._cached_imports(file_path))
+                if not success:
+                    report["error"] = "bağımlılık kurulamadı: " + "; ".join(failed)
+                    report["rolled_back"] = True
+                    self._pin_code(file_path, previous)
+                    log.error("Hot-reload iptal (%s): %s", plugin_name, report["error"])
+                    return report
+                self._mark_deps_ok(file_path)
+            report["compile_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+            users = [uid for uid, plugins in self.user_active_plugins.items() if plugin_name in plugins]
+            report["users"] = len(users)
+            old_shared = self._shared_modules.get(plugin_name)
+            shared = None
+            try:
+                if _is_shared_plugin(patched_content):
+                    shared = self._reload_shared_module(plugin_name, file_path, code_obj)
+                if users:
+                    self._swap_plugin(users[0], plugin_name, file_path, code_obj, shared)
+                    report["swapped"] += 1
+            except Exception as e:
+                # Kanarya başarısız → herkes eski kodda kalır
+                if shared is not None and shared is not old_shared:
+                    if old_shared is not None:
+                        self._shared_modules[plugin_name] = old_shared
+                        sys.modules[f"plugin_{plugin_name}"] = old_shared.module
+                    else:
+                        self._shared_modules.pop(plugin_name, None)
+                self._pin_code(file_path, previous)
+                report["error"] = f"{type(e).__name__}: {e}"
+                report["rolled_back"] = True
+                report["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                log.error("Hot-reload geri alındı (%s): %s", plugin_name, report["error"], exc_info=True)
+                return report
+
+            rest = users[1:]
+            for i in range(0, len(rest), batch_size):
+                await asyncio.sleep(0)
+                for user_id in rest[i:i + batch_size]:
+                    # Turlar arasında kapatmış / uyumuş olabilir
+                    if plugin_name not in self.user_active_plugins.get(user_id, {}):
+                        continue
+                    try:
+                        self._swap_plugin(user_id, plugin_name, file_path, code_obj, shared)
+                        report["swapped"] += 1
+                    except Exception:
+                        report["failed"].append(user_id)
+                        log.error("Hot-reload başarısız (%s, user=%s) — eski kodda kaldı",
+                                  plugin_name, user_id, exc_info=True)
+
+            # Eski paylaşımlı modülü kullanan kalmadıysa kapat
+            if old_shared is not None and old_shared is not shared:
+                old_shared.users.difference_update(
+                    uid for uid in users if uid not in report["failed"])
+                if not old_shared.users:
+                    if shared is None:
+                        self._shared_modules.pop(plugin_name, None)
+                    if callable(getattr(old_shared.module, 'unregister', None)):
+                        try:
+                            old_shared.module.unregister()
+                        except Exception:
+                            log.debug("Eski paylaşımlı modül unregister hatası", exc_info=True)
+
+        total = time.perf_counter() - started
+        report["total_ms"] = round(total * 1000, 2)
+        log.info("Hot-reload: %s → %d/%d kullanıcı, %.1f ms (derleme %.1f ms)%s",
+                 plugin_name, report["swapped"], report["users"], report["total_ms"],
+                 report["compile_ms"], f", başarısız: {len(report['failed'])}" if report["failed"] else "")
+        return report
+
+    def is_command_only(self, user_id: int) -> bool:
+        """Kullanıcının yüklü TÜM plugin handler'ları giden (outgoing) komut mu?
+        Öyleyse gelen mesaj dinlemesine gerek yoktur → hibernasyona uygundur."""
+        plugins = self.user_handlers.get(user_id) or {}
+        if not plugins or set(plugins) != set(self.user_active_plugins.get(user_id, {})):
+            return False
+        for handlers in plugins.values():
+            if not handlers:
+                # Handler'sız plugin arka plan işi yürütüyor olabilir
+                return False
+            for _callback, builder in handlers:
+                if not isinstance(builder, events.NewMessage):
+                    return False
+                if not getattr(builder, "outgoing", False) or getattr(builder, "pattern", None) is None:
+                    return False
+        return True
+
+    async def unload_user_plugins(self, user_id: int) -> List[str]:
+        """Kullanıcının pluginlerini bellekten boşalt (DB/veri korunur).
+        Boşaltılan plugin adlarını döndürür (uyanınca yeniden yüklemek için)."""
+        names = list(self.user_active_plugins.get(user_id, {}).keys())
+        for plugin_name in names:
+            await self.deactivate_plugin(user_id, plugin_name, reason="hibernate", persist=False)
+        return names
+
     async def purge_user_data(self, user_id: int, reason: str = "logout") -> int:
         """Kullanıcının YÜKLÜ tüm pluginlerindeki verilerini temizler (çıkış/silme).
         Her plugin kendi cleanup_user_data'sını uygular; kurtarma/yapılandırma reason'a göre korunur."""
@@ -1100,22 +1441,21 @@ class PluginManager:
             for plugin_name in list(self.user_active_plugins[user_id].keys()):
                 module = self.user_active_plugins[user_id].get(plugin_name)
                 
-                # Handler'ları kaldır
-                if user_id in self.user_handlers and plugin_name in self.user_handlers[user_id]:
-                    handlers = self.user_handlers[user_id][plugin_name]
-                    client = getattr(module, 'client', None) if module else None
-                    
-                    if client and handlers:
-                        for callback, event in handlers:
-                            try:
-                                client.remove_event_handler(callback, event)
-                            except Exception:
-                                pass
+                # Handler'ları kaldır (kayda göre, tek geçiş)
+                client = getattr(module, 'client', None) if module else None
+                self._remove_handlers(client, self.user_handlers.get(user_id, {}).get(plugin_name))
+                router = get_router(client, create=False) if client else None
+                if router is not None:
+                    router.remove_plugin(plugin_name)
                 
+                shared = self._shared_modules.get(plugin_name) if isinstance(module, PluginContext) else None
+                if shared is not None:
+                    self._release_shared(shared, user_id)
+
                 # sys.modules'dan kaldır
                 module_name = f"plugin_{plugin_name}_{user_id}"
-                if module_name in sys.modules:
-                    del sys.modules[module_name]
+                sys.modules.pop(module_name, None)
+                self._module_plugins.pop(module_name, None)
             
             del self.user_active_plugins[user_id]
         
@@ -1126,7 +1466,9 @@ class PluginManager:
     async def sync_folder_plugins(self):
         """plugins/ klasöründeki, DB'de OLMAYAN pluginleri otomatik kaydet.
         Dosyayı klasöre atınca panele düşmesi için. Mevcut kayıtlar KORUNUR.
-        Başlıkta '# type:/# stars:/# days:' varsa premium ayarını da uygular."""
+        Başlıkta '# type:/# stars:/# days:' varsa premium ayarını da uygular.
+        Artımlı: parmak izi (boyut, mtime, sha256) değişmeyen dosya yeniden
+        ayrıştırılmaz; DB'ye yalnızca gerçek farklar yazılır."""
         try:
             from database import database as _db
         except Exception:
@@ -1140,35 +1482,44 @@ class PluginManager:
             files = [f for f in os.listdir(config.PLUGINS_DIR) if f.endswith(".py")]
         except Exception:
             files = []
-        added = 0
+        index = self._folder_index
+        added = refreshed = 0
         for fn in files:
             name = fn[:-3]
             if name.startswith("_") or name.startswith("temp_") or name == "__init__":
                 continue
             path = os.path.join(config.PLUGINS_DIR, fn)
+            entry, digest = index.check(fn, path)
+            if entry is None:
+                if digest is None:
+                    continue  # okunamadı / bu arada silindi
+                entry = index.update(fn, path, digest, self.extract_plugin_info(path))
+            elif entry.get("synced") and name in existing:
+                continue  # dosya da DB kaydı da değişmedi
+            info = entry["info"]
             if name in existing:
                 # Var olan plugin: açıklama/komut bilgisini DOSYADAN TAZELE.
                 # Eskiden atlanıyordu → plugin dosyası güncellense bile menülerde
                 # ve detay kartında ilk kayıttaki eski açıklama/komutlar kalıyordu.
                 # Admin ayarlarına (is_public, premium, izinler) DOKUNULMAZ.
                 try:
-                    _info = self.extract_plugin_info(path)
                     _yeni = {
-                        "description": _info.get("description", ""),
-                        "commands": _info.get("commands", []),
+                        "description": info.get("description", ""),
+                        "commands": info.get("commands", []),
                     }
-                    _eski = existing.get(name) if isinstance(existing, dict) else None
+                    _eski = existing.get(name)
                     if (not isinstance(_eski, dict)
                             or _eski.get("description") != _yeni["description"]
                             or list(_eski.get("commands") or []) != list(_yeni["commands"])):
                         await _db.update_plugin(name, _yeni)
+                        refreshed += 1
                         log.info("Plugin bilgisi tazelendi: %s (%s komut)",
                                  name, len(_yeni["commands"]))
+                    index.mark_synced(fn)
                 except Exception:
                     log.debug("Plugin bilgisi tazelenemedi: %s", name, exc_info=True)
                 continue
             try:
-                info = self.extract_plugin_info(path)
                 await _db.add_plugin(
                     name=name, filename=fn,
                     description=info.get("description", ""),
@@ -1176,14 +1527,47 @@ class PluginManager:
                     is_public=True, allowed_users=[],
                 )
                 self._apply_header_premium(path, name)
+                index.mark_synced(fn)
                 added += 1
                 log.info("Klasörden plugin kaydedildi: %s", name)
             except Exception:
                 log.warning("Plugin senkron hatası: %s", name, exc_info=True)
+        index.retain(set(files))
+        index.save()
         if added:
             log.info("%d yeni plugin klasörden senkronlandı", added)
+        log.debug("Plugin senkronu: %d ayrıştırıldı, %d atlandı, %d tazelendi",
+                  index.parsed, index.skipped, refreshed)
+        # Komut dizinini kur; klasörden gelen pluginler çakışma kontrolünden geçmez
+        try:
+            for cmd, owners in sorted((await _db.command_index()).duplicates().items()):
+                log.warning("Komut çakışması: .%s → %s", cmd, ", ".join(owners))
+        except Exception:
+            log.debug("Komut dizini kurulamadı", exc_info=True)
         return added
 
+    async def sync_changed(self, paths=None):
+        """Klasör izleyici aboneliği: art arda gelen değişiklikleri tek
+        senkrona topla (PLUGIN_SYNC_DEBOUNCE sn sessizlikten sonra çalışır)"""
+        self.schedule_sync()
+
+    def schedule_sync(self, delay: float = None):
+        delay = config.PLUGIN_SYNC_DEBOUNCE if delay is None else delay
+        if self._sync_timer is not None:
+            self._sync_timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._sync_timer = loop.call_later(delay, lambda: loop.create_task(self._run_sync()))
+
+    async def _run_sync(self):
+        self._sync_timer = None
+        async with self._sync_lock:
+            try:
+                added = await self.sync_folder_plugins()
+                if added:
+                    log.info("Çalışırken %d yeni plugin panele eklendi", added)
+            except Exception:
+                log.error("Plugin klasör senkronu hatası", exc_info=True)
+
     def _apply_header_premium(self, path, name):
         """Plugin başlığındaki '# type:/# stars:/# days:' satırlarını premium
         config'e uygular (yalnızca daha önce ayarlanmamışsa; panel ayarları korunur)."""
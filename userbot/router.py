@@ -0,0 +1,198 @@
+# ============================================
+# KingTG UserBot Service - Komut Yönlendirici
+# ============================================
+# Her plugin kendi `events.NewMessage(pattern=...)` handler'larını client'a
+# ekliyordu; Telethon her mesajda TÜM handler'ların regex'ini çalıştırır
+# (20 plugin ≈ 40+ regex / mesaj / kullanıcı). Artık client başına TEK bir
+# NewMessage handler'ı var:
+#   - mesaj komut önekiyle ("." ) başlamıyorsa hiçbir regex çalışmaz
+#   - komut adı bir trie'de yürünür → yalnızca adı eşleşen handler'ların
+#     filtresi (asıl regex dahil) çalıştırılır
+# Komut adı kesin çıkarılamayan handler'lar (callback, gelen mesaj,
+# `(?i)`, `^[.!]` vb.) client'ta olduğu gibi kalır (regex yedek yolu).
+# ============================================
+
+import inspect
+import re
+from typing import Dict, List, Optional, Tuple
+
+from telethon import errors, events
+
+from utils.logger import get_logger
+from utils.profiler import profiler
+
+log = get_logger(__name__)
+
+COMMAND_PREFIX = "."
+
+# Trie düğümünde handler listesinin anahtarı (karakterlerle çakışmaz)
+_END = ""
+
+
+def _has_top_level_branch(source: str) -> bool:
+    """Pattern'de grup DIŞINDA `|` var mı? (`^\\.a|^\\.b` komut öneki garanti etmez)"""
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(source):
+        c = source[i]
+        if c == "\\":
+            i += 2
+            continue
+        if in_class:
+            if c == "]":
+                in_class = False
+        elif c == "[":
+            in_class = True
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "|" and depth == 0:
+            return True
+        i += 1
+    return False
+
+
+def command_names_for(builder) -> set:
+    """Handler yönlendirilebilirse komut adlarını, değilse boş küme döndür"""
+    from userbot.plugins import _pattern_command_names
+
+    if type(builder) is not events.NewMessage:
+        return set()
+    matcher = getattr(builder, "pattern", None)
+    compiled = getattr(matcher, "__self__", None)
+    if not isinstance(compiled, re.Pattern) or not isinstance(compiled.pattern, str):
+        return set()
+    if compiled.flags & re.IGNORECASE or _has_top_level_branch(compiled.pattern):
+        return set()
+    return _pattern_command_names(compiled.pattern, strict=True)
+
+
+class CommandRouter:
+    """Client başına tek NewMessage handler'ı + komut adı trie'si"""
+
+    def __init__(self, client, prefix: str = COMMAND_PREFIX):
+        self.client = client
+        self.prefix = prefix
+        self._trie: Dict = {}
+        # plugin adı → [(komut adı, callback, builder)]
+        self._by_plugin: Dict[str, List[Tuple[str, object, object]]] = {}
+        self._seq = 0  # Telethon'daki kayıt sırasını korumak için
+        self.dispatched = 0
+        client.add_event_handler(self._dispatch, events.NewMessage())
+
+    # ==========================================
+    # KAYIT
+    # ==========================================
+
+    def add(self, plugin_name: str, callback, builder, names: set = None) -> bool:
+        """Handler'ı trie'ye ekle; yönlendirilemiyorsa False (client'ta kalmalı)"""
+        names = names if names is not None else command_names_for(builder)
+        if not names:
+            return False
+        entries = self._by_plugin.setdefault(plugin_name, [])
+        self._seq += 1
+        for name in names:
+            node = self._trie
+            for ch in name:
+                node = node.setdefault(ch, {})
+            node.setdefault(_END, []).append((self._seq, callback, builder, plugin_name))
+            entries.append((name, callback, builder))
+        return True
+
+    def remove_plugin(self, plugin_name: str) -> int:
+        """Plugin'in tüm yönlendirilmiş handler'larını çıkar"""
+        entries = self._by_plugin.pop(plugin_name, [])
+        for name, callback, builder in entries:
+            path = [self._trie]
+            for ch in name:
+                node = path[-1].get(ch)
+                if node is None:
+                    break
+                path.append(node)
+            else:
+                handlers = path[-1].get(_END, [])
+                handlers[:] = [h for h in handlers if h[1] is not callback or h[2] is not builder]
+                if not handlers:
+                    path[-1].pop(_END, None)
+                # Boşalan dalları buda
+                for depth in range(len(name), 0, -1):
+                    if path[depth]:
+                        break
+                    del path[depth - 1][name[depth - 1]]
+        return len({(id(c), id(b)) for _n, c, b in entries})
+
+    def plugin_handlers(self, plugin_name: str) -> List[Tuple[object, object]]:
+        seen, result = set(), []
+        for _name, callback, builder in self._by_plugin.get(plugin_name, []):
+            key = (id(callback), id(builder))
+            if key not in seen:
+                seen.add(key)
+                result.append((callback, builder))
+        return result
+
+    def commands(self) -> List[str]:
+        return sorted({name for entries in self._by_plugin.values() for name, _c, _b in entries})
+
+    def __len__(self) -> int:
+        return len(self._by_plugin)
+
+    # ==========================================
+    # DAĞITIM
+    # ==========================================
+
+    def candidates(self, text: str) -> List[Tuple[object, object]]:
+        """Metnin komut kısmının öneki olan tüm komutların handler'ları
+        (ör. `.burch` → `burc` ve `burch`; asıl regex sonra karar verir)"""
+        return [(callback, builder) for _seq, callback, builder, _p in self._matches(text)]
+
+    def _matches(self, text: str) -> List[Tuple[int, object, object, str]]:
+        if not text or not text.startswith(self.prefix):
+            return []
+        node = self._trie
+        found = []
+        for ch in text[len(self.prefix):]:
+            node = node.get(ch)
+            if node is None:
+                break
+            if _END in node:
+                found.extend(node[_END])
+        if len(found) > 1:
+            # Aynı handler birden çok varyantla eklenmiş olabilir (stic/sticker)
+            found = sorted(dict((h[0], h) for h in found).values(), key=lambda h: h[0])
+        return found
+
+    async def _dispatch(self, event):
+        handlers = self._matches(event.message.message)
+        if not handlers:
+            return
+        self.dispatched += 1
+        for _seq, callback, builder, plugin_name in handlers:
+            if not builder.resolved:
+                await builder.resolve(self.client)
+            matched = builder.filter(event)
+            if inspect.isawaitable(matched):
+                matched = await matched
+            if not matched:
+                continue
+            try:
+                if getattr(callback, "_kingtg_profiled", False):
+                    await callback(event)
+                else:
+                    await profiler.call(callback, event, plugin_name)
+            except events.StopPropagation:
+                raise
+            except errors.AlreadyInConversationError:
+                log.debug("Handler zaten konuşmada: %s", getattr(callback, "__name__", callback))
+            except Exception:
+                log.exception("Komut handler hatası: %s", getattr(callback, "__name__", callback))
+
+
+def get_router(client, create: bool = True) -> Optional[CommandRouter]:
+    """Client'ın yönlendiricisi (yoksa oluşturup tek handler'ı kaydeder)"""
+    router = getattr(client, "_kingtg_router", None)
+    if router is None and create:
+        router = CommandRouter(client)
+        client._kingtg_router = router
+    return router
@@ -7,8 +7,9 @@
 
 import asyncio
 import time
-from typing import Optional, Dict, Callable
-from telethon import TelegramClient
+from datetime import datetime
+from typing import Optional, Dict, Callable, List
+from telethon import TelegramClient, events
 from telethon.sessions import StringSession
 from telethon.errors import (
     SessionPasswordNeededError, 
@@ -18,13 +19,12 @@ from telethon.errors import (
     AuthKeyUnregisteredError,
     UserDeactivatedBanError,
     UserDeactivatedError,
-    SessionRevokedError,
-    AuthKeyDuplicatedError,
     FloodWaitError
 )
 import config
 from database import database as db
 from utils.logger import get_logger
+from userbot.health import HealthScheduler
 
 log = get_logger(__name__)
 
@@ -84,8 +84,19 @@ class SmartSessionManager:
         # Bekleyen onaylar
         self.pending_confirms: Dict[int, float] = {}
         
-        # Session izleyicileri
-        self.session_monitors: Dict[int, asyncio.Task] = {}
+        # Oturum sağlık kontrolü: tüm client'lar için TEK zamanlayıcı
+        self.health = HealthScheduler(
+            self.active_clients.get,
+            self._on_session_dead,
+            interval=config.HEALTH_CHECK_INTERVAL,
+            min_interval=config.HEALTH_CHECK_MIN_INTERVAL,
+            max_interval=config.HEALTH_CHECK_MAX_INTERVAL,
+            concurrency=config.HEALTH_CHECK_CONCURRENCY,
+        )
+        
+        # Hibernasyondaki kullanıcılar (yalnızca komut plugin'i olup boşta kalanlar)
+        # Yapı: {user_id: {'plugins': [...], 'since': ts, 'client': uyandırma client'ı | None}}
+        self.hibernated: Dict[int, Dict] = {}
         
         # Callback'ler
         self.on_session_terminated_callback = None
@@ -104,6 +115,14 @@ class SmartSessionManager:
         self._cleanup_task = None
         self._confirm_task = None
         self._sync_task = None
+        self._stats_task = None
+        self._restore_task = None
+        
+        # Açılış geri yükleme ilerlemesi (admin paneli / ETA)
+        self.restore_progress: Dict = {
+            "total": 0, "done": 0, "restored": 0, "cached": 0, "failed": 0,
+            "started_at": None, "finished_at": None, "running": False,
+        }
     
     @property
     def plugin_manager(self):
@@ -135,6 +154,9 @@ class SmartSessionManager:
             user_id: Kullanıcı ID
             keep_alive: True ise always-on moda al
         """
+        if user_id in self.hibernated:
+            return await self._wake(user_id)
+        
         lock = self.get_lock(user_id)
         
         async with lock:
@@ -269,6 +291,7 @@ class SmartSessionManager:
         # Cache'den sil
         if user_id in self.session_cache:
             del self.session_cache[user_id]
+        await self._drop_hibernated(user_id)
         
         # Always-on'dan sil
         if user_id in self.always_on_users:
@@ -387,6 +410,157 @@ class SmartSessionManager:
         for user_id in to_close:
             log.info("İnaktif client kapatılıyor: user=%s", user_id)
             await self._disconnect_client(user_id)
+        
+        # Plugin'i olan ama hepsi komutla çalışan (gelen mesaj dinlemeyen)
+        # boştaki kullanıcılar → hibernasyon
+        if config.HIBERNATE_AFTER > 0:
+            for user_id, last_time in list(self.last_activity.items()):
+                if user_id in self.always_on_users or user_id in to_close:
+                    continue
+                if now - last_time < config.HIBERNATE_AFTER:
+                    continue
+                if self.plugin_manager.is_command_only(user_id):
+                    await self._hibernate(user_id)
+    
+    # ============================================
+    # HİBERNASYON
+    # ============================================
+    # Komut plugin'leri yalnızca kullanıcının KENDİ gönderdiği ".komut"
+    # mesajlarıyla tetiklenir. Boştayken tam client (plugin modülleri,
+    # handler'lar, varlık önbelleği, izleyici görevi) kapatılır; oturum
+    # dizesi saklanır. Yerine tek handler'lı, varlık önbelleği küçük bir
+    # uyandırma client'ı açılır: ilk "." komutunda kullanıcı uyanır, plugin'ler
+    # derleme önbelleğinden yeniden yüklenir ve komut yeniden işlenir.
+    
+    async def _hibernate(self, user_id: int) -> bool:
+        """Tam client'ı kapat, plugin'leri bellekten boşalt, uyandırma kanalını aç"""
+        async with self.get_lock(user_id):
+            client = self.active_clients.get(user_id)
+            if not client or user_id in self.hibernated:
+                return False
+            
+            plugins = await self.plugin_manager.unload_user_plugins(user_id)
+            
+            # Oturum durumunu sakla (auth key / DC değişmiş olabilir)
+            try:
+                session_data = client.session.save()
+                if session_data and user_id in self.session_cache:
+                    self.session_cache[user_id]['data'] = session_data
+            except Exception:
+                log.debug("Oturum dizesi alınamadı: user=%s", user_id, exc_info=True)
+            
+            await self._disconnect_client(user_id)
+            
+            wake_client = None
+            if config.HIBERNATE_WAKE_LISTENER:
+                wake_client = await self._create_wake_client(user_id)
+            
+            self.hibernated[user_id] = {
+                'plugins': plugins,
+                'since': time.time(),
+                'client': wake_client,
+            }
+        
+        log.info("Hibernasyon: user=%s, %s plugin boşaltıldı", user_id, len(plugins))
+        return True
+    
+    async def _create_wake_client(self, user_id: int) -> Optional[TelegramClient]:
+        """Yalnızca giden '.' komutlarını dinleyen hafif client"""
+        session_info = self.session_cache.get(user_id)
+        if not session_info:
+            return None
+        try:
+            client = TelegramClient(
+                StringSession(session_info.get('data')),
+                config.API_ID,
+                config.API_HASH,
+                entity_cache_limit=100,
+            )
+            await client.connect()
+            if not await client.is_user_authorized():
+                await client.disconnect()
+                return None
+        except Exception:
+            log.warning("Uyandırma client'ı açılamadı: user=%s", user_id, exc_info=True)
+            return None
+        
+        async def on_command(event):
+            asyncio.create_task(self._wake(user_id, event))
+            raise events.StopPropagation
+        
+        client.add_event_handler(on_command, events.NewMessage(outgoing=True, pattern=r"^\."))
+        return client
+    
+    async def _wake(self, user_id: int, event=None) -> Optional[TelegramClient]:
+        """Hibernasyondan çık: client'ı terfi ettir, plugin'leri yükle, komutu yeniden işle"""
+        async with self.get_lock(user_id):
+            entry = self.hibernated.pop(user_id, None)
+            if entry is None:
+                return self.active_clients.get(user_id)
+            
+            started = time.perf_counter()
+            client = entry.get('client')
+            if client is not None:
+                # Uyandırma client'ı tam client'a terfi eder (yeniden bağlanma yok)
+                for callback, builder in client.list_event_handlers():
+                    client.remove_event_handler(callback, builder)
+                client._kingtg_hooked = False
+                client._entity_cache_limit = 5000
+                try:
+                    import utils.i18n as _i18n
+                    _i18n.install_client_translation(client, user_id)
+                except Exception:
+                    pass
+                if not client.is_connected():
+                    try:
+                        await client.connect()
+                    except Exception:
+                        client = None
+            if client is None:
+                session_info = await self._get_session_data(user_id)
+                client = await self._create_client(user_id, session_info) if session_info else None
+            if client is None:
+                return None
+            
+            self.active_clients[user_id] = client
+            self.last_activity[user_id] = time.time()
+            self._start_session_monitor(user_id)
+        
+        # Uyurken panelden kapatılan / admin tarafından silinen veya özele
+        # alınan plugin'ler DB aktif listesinden çıkmıştır: yalnızca hâlâ
+        # listede olanları yükle (erişim kontrolünü activate_plugin yapar)
+        try:
+            user = await db.get_user(user_id)
+            still_active = set(user.get("active_plugins", []) if user else [])
+        except Exception:
+            log.warning("Uyanışta aktif liste okunamadı: user=%s", user_id, exc_info=True)
+            still_active = set()
+        for plugin_name in entry.get('plugins', []):
+            if plugin_name not in still_active:
+                continue
+            try:
+                await self.plugin_manager.activate_plugin(user_id, plugin_name, client)
+            except Exception:
+                log.error("Uyanışta plugin yükleme hatası: %s", plugin_name, exc_info=True)
+        
+        log.info("Uyandı: user=%s, %.0f ms", user_id, (time.perf_counter() - started) * 1000)
+        
+        # Uyandıran komutu yeni yüklenen handler'lara yeniden ver
+        if event is not None:
+            try:
+                await client._dispatch_update(event.original_update)
+            except Exception:
+                log.warning("Uyandıran komut yeniden işlenemedi: user=%s", user_id, exc_info=True)
+        return client
+    
+    async def _drop_hibernated(self, user_id: int):
+        """Hibernasyon kaydını ve uyandırma bağlantısını kapat"""
+        entry = self.hibernated.pop(user_id, None)
+        if entry and entry.get('client') is not None:
+            try:
+                await entry['client'].disconnect()
+            except Exception:
+                pass
     
     # ============================================
     # ONAY SİSTEMİ (3 günlük)
@@ -615,42 +789,30 @@ class SmartSessionManager:
     # ============================================
     
     def _start_session_monitor(self, user_id: int):
-        """Session izleyiciyi başlat"""
-        if user_id in self.session_monitors:
-            self.session_monitors[user_id].cancel()
-        
-        async def monitor():
-            while user_id in self.active_clients:
-                await asyncio.sleep(120)  # 2 dakikada bir kontrol (daha hızlı tespit)
-
-                client = self.active_clients.get(user_id)
-                if not client:
-                    break
-
-                try:
-                    await client.get_me()
-                except (AuthKeyUnregisteredError, UserDeactivatedBanError,
-                        UserDeactivatedError, SessionRevokedError,
-                        AuthKeyDuplicatedError) as e:
-                    # Oturum GERÇEKTEN sonlandırıldı (Telegram ayarlarından atıldı,
-                    # hesap banlandı vb.) → kullanıcıyı bilgilendir
-                    log.info("Oturum sonlandırıldı: user=%s (%s)", user_id, type(e).__name__)
-                    await self._handle_invalid_session(user_id, notify=True)
-                    break
-                except Exception as e:
-                    # Geçici ağ/sunucu hatası → oturumu ÖLDÜRME, sonraki turda tekrar bak.
-                    # (Eskiden her hata oturum sonlandırma sayılıyordu; ağ kesintisinde
-                    #  kullanıcı boşuna çıkarılıp yanlış bildirim gidiyordu.)
-                    log.debug("Oturum kontrolü geçici hata: user=%s (%s)", user_id, e)
-                    continue
-        
-        self.session_monitors[user_id] = asyncio.create_task(monitor())
+        """Kullanıcıyı ortak sağlık zamanlayıcısına al ve client kancalarını tak"""
+        client = self.active_clients.get(user_id)
+        if client is not None and not getattr(client, "_kingtg_hooked", False):
+            client._kingtg_hooked = True
+            
+            async def on_update(update):
+                # Pasif canlılık: güncelleme geliyorsa bağlantı ayakta
+                self.health.mark_alive(user_id)
+            
+            async def on_outgoing(event):
+                # Giden mesaj → son aktivite (hibernasyon zamanlayıcısı)
+                self.last_activity[user_id] = time.time()
+            
+            client.add_event_handler(on_update, events.Raw)
+            client.add_event_handler(on_outgoing, events.NewMessage(outgoing=True))
+        self.health.add(user_id)
     
     def _stop_session_monitor(self, user_id: int):
-        """Session izleyiciyi durdur"""
-        if user_id in self.session_monitors:
-            self.session_monitors[user_id].cancel()
-            del self.session_monitors[user_id]
+        """Kullanıcıyı sağlık zamanlayıcısından çıkar"""
+        self.health.remove(user_id)
+    
+    async def _on_session_dead(self, user_id: int):
+        """Sağlık kontrolü oturumun sonlandığını buldu → kullanıcıyı bilgilendir"""
+        await self._handle_invalid_session(user_id, notify=True)
     
     # ============================================
     # ARKA PLAN GÖREVLERİ
@@ -702,9 +864,20 @@ class SmartSessionManager:
                 except Exception as e:
                     log.error("Sync hatası", exc_info=True)
         
+        async def stats_loop():
+            """İstatistik geçmişi örnekleme döngüsü"""
+            while True:
+                try:
+                    stats = self.get_stats()
+                    await db.record_stats_sample(stats["active_clients"], stats["always_on_users"])
+                except Exception:
+                    log.error("İstatistik örnekleme hatası", exc_info=True)
+                await asyncio.sleep(config.STATS_SAMPLE_INTERVAL)
+        
         self._cleanup_task = asyncio.create_task(cleanup_loop())
         self._confirm_task = asyncio.create_task(confirm_loop())
         self._sync_task = asyncio.create_task(sync_loop())
+        self._stats_task = asyncio.create_task(stats_loop())
         
         log.info("Arka plan görevleri başlatıldı")
     
@@ -716,6 +889,8 @@ class SmartSessionManager:
             self._confirm_task.cancel()
         if self._sync_task:
             self._sync_task.cancel()
+        if self._stats_task:
+            self._stats_task.cancel()
     
     # ============================================
     # GİRİŞ İŞLEMLERİ (Mevcut uyumluluk)
@@ -880,12 +1055,22 @@ class SmartSessionManager:
         # Cache'den sil
         if user_id in self.session_cache:
             del self.session_cache[user_id]
+        await self._drop_hibernated(user_id)
         
         return {"success": False, "error": "invalid_session"}
     
     async def logout(self, user_id: int, terminate_session: bool = False) -> bool:
         """Çıkış yap"""
         try:
+            # Hibernasyondaki kullanıcının modülleri bellekte değil: temizlik
+            # (cleanup_user_data) çalışabilsin diye önce uyandır
+            if user_id in self.hibernated:
+                try:
+                    await self._wake(user_id)
+                except Exception:
+                    log.warning("Çıkış öncesi uyandırılamadı: user=%s", user_id, exc_info=True)
+                await self._drop_hibernated(user_id)
+
             # Çıkışta kullanıcının çöp verilerini temizle (kurtarma/yapılandırma korunur)
             try:
                 await self.plugin_manager.purge_user_data(user_id, "logout")
@@ -937,17 +1122,51 @@ class SmartSessionManager:
         """Kullanıcının giriş yapıp yapmadığını kontrol et"""
         return user_id in self.active_clients or user_id in self.session_cache
     
+    @staticmethod
+    def _restore_priority(user: Dict):
+        """Sıralama anahtarı: önce always-on, sonra en son aktif olan"""
+        last = user.get("last_active")
+        if isinstance(last, datetime):
+            ts = last.timestamp()
+        elif isinstance(last, str):
+            try:
+                ts = datetime.fromisoformat(last).timestamp()
+            except ValueError:
+                ts = 0.0
+        elif isinstance(last, (int, float)):
+            ts = float(last)
+        else:
+            ts = 0.0
+        return (0 if user.get("always_on_plugins") else 1, -ts)
+    
+    def restore_status(self) -> Dict:
+        """Geri yükleme ilerlemesi + tahmini kalan süre (sn)"""
+        status = dict(self.restore_progress)
+        pending = status["total"] - status["done"]
+        elapsed = (status["finished_at"] or time.time()) - (status["started_at"] or time.time())
+        status["elapsed"] = elapsed
+        status["eta"] = (elapsed / status["done"] * pending) if status["done"] and pending > 0 else None
+        return status
+    
+    def start_restore(self) -> asyncio.Task:
+        """Geri yüklemeyi arka planda başlat (bot hemen hazır sayılır)"""
+        if self._restore_task is None or self._restore_task.done():
+            self._restore_task = asyncio.create_task(self.restore_sessions())
+        return self._restore_task
+    
     async def restore_sessions(self) -> int:
         """
         Session'ları geri yükle:
-        - Aktif plugin'i olan kullanıcılar başlatılır
+        - Aktif plugin'i olan kullanıcılar başlatılır (öncelik sırasıyla,
+          en fazla RESTORE_CONCURRENCY tanesi aynı anda bağlanır)
         - Plugin'i olmayan kullanıcılar cache'de tutulur (on-demand)
         """
         log.info("Session'lar geri yükleniyor...")
         
         users = await db.get_logged_in_users()
-        restored = 0
-        cached = 0
+        progress = self.restore_progress
+        progress.update(total=len(users), done=0, restored=0, cached=0, failed=0,
+                        started_at=time.time(), finished_at=None, running=True)
 
         # Toplu mod: plugin meta verisi tek sorguda alınır (kullanıcı başına
         # ayrı DB turu atılmaz) → açılış belirgin şekilde hızlanır.
@@ -958,13 +1177,47 @@ class SmartSessionManager:
         
         async def restore_single_user(user):
             """Tek kullanıcıyı restore et"""
-            nonlocal restored, cached
-            
             user_id = user.get("user_id")
             active_plugins = user.get("active_plugins", [])
             always_on_plugins = user.get("always_on_plugins", [])
             
-            # Session verisini cache'e al
+            # Aktif plugin'i olan kullanıcıları başlat
+            is_always_on = bool(always_on_plugins)
+            client = await self.get_or_create_client(user_id, keep_alive=is_always_on)
+            
+            if not client:
+                # Ölü/geçersiz oturum: yukarıda pasife alındı → hata değil
+                log.debug("Client oluşturulamadı (oturum geçersiz): user=%s", user_id)
+                return False
+            
+            # Always-on kullanıcıları kaydet
+            if always_on_plugins:
+                self.always_on_users[user_id] = {
+                    'plugins': always_on_plugins,
+                    'enabled_at': time.time()
+                }
+                self.last_confirm[user_id] = user.get("last_confirm", time.time())
+            
+            # Tüm aktif plugin'leri yükle
+            all_plugins = list(set(active_plugins + always_on_plugins))
+            plugin_count = 0
+            
+            for plugin_name in all_plugins:
+                try:
+                    success, _ = await self.plugin_manager.activate_plugin(user_id, plugin_name, client)
+                    if success:
+                        plugin_count += 1
+                except Exception as e:
+                    log.error("Plugin yükleme hatası: %s", plugin_name, exc_info=True)
+            
+            log.info("user=%s, %s plugin yüklendi", user_id, plugin_count)
+            return True
+        
+        # 1) Session verisini cache'e al; plugin'i olmayanlar burada biter
+        #    (bağlantı açılmaz → sınırsız ve anında)
+        queue: List[Dict] = []
+        for user in users:
+            user_id = user.get("user_id")
             session_data = user.get("session_data")
             if not session_data:
                 session_info = await db.get_session(user_id)
@@ -973,79 +1226,75 @@ class SmartSessionManager:
             
             if not session_data:
                 log.info("Session verisi yok: user=%s", user_id)
-                return False
+                progress["failed"] += 1
+                progress["done"] += 1
+                continue
             
             self.session_cache[user_id] = {
                 'data': session_data,
                 'type': user.get("session_type", "telethon")
             }
             
-            # Aktif plugin'i olan kullanıcıları başlat
-            if active_plugins or always_on_plugins:
-                # Always-on mu kontrol et
-                is_always_on = bool(always_on_plugins)
-                
-                client = await self.get_or_create_client(user_id, keep_alive=is_always_on)
-                
-                if client:
-                    # Always-on kullanıcıları kaydet
-                    if always_on_plugins:
-                        self.always_on_users[user_id] = {
-                            'plugins': always_on_plugins,
-                            'enabled_at': time.time()
-                        }
-                        self.last_confirm[user_id] = user.get("last_confirm", time.time())
-                    
-                    # Tüm aktif plugin'leri yükle
-                    all_plugins = list(set(active_plugins + always_on_plugins))
-                    plugin_count = 0
-                    
-                    for plugin_name in all_plugins:
-                        try:
-                            success = await self.plugin_manager.activate_plugin(user_id, plugin_name, client)
-                            if success:
-                                plugin_count += 1
-                        except Exception as e:
-                            log.error("Plugin yükleme hatası: %s", plugin_name, exc_info=True)
-                    
-                    log.info("user=%s, %s plugin yüklendi", user_id, plugin_count)
-                    restored += 1
-                    return True
-                else:
-                    # Ölü/geçersiz oturum: yukarıda pasife alındı → hata değil
-                    log.debug("Client oluşturulamadı (oturum geçersiz): user=%s", user_id)
-                    return False
+            if user.get("active_plugins") or user.get("always_on_plugins"):
+                queue.append(user)
             else:
                 # Plugin'i yok, sadece cache'de tut
-                cached += 1
-                return True
+                progress["cached"] += 1
+                progress["done"] += 1
+        
+        # 2) Bağlantı gerektirenler öncelik sırasıyla, sınırlı sayıda işçiyle
+        queue.sort(key=self._restore_priority)
+        pending = iter(queue)
+        stagger = config.RESTORE_STAGGER_MS / 1000.0
         
-        # Paralel olarak restore et
-        tasks = [restore_single_user(user) for user in users]
+        async def worker():
+            for user in pending:
+                try:
+                    ok = await restore_single_user(user)
+                except Exception:
+                    log.error("Restore hatası: user=%s", user.get("user_id"), exc_info=True)
+                    ok = False
+                progress["restored" if ok else "failed"] += 1
+                progress["done"] += 1
+                if stagger:
+                    # MTProto bağlantılarını patlama yerine yayarak aç
+                    await asyncio.sleep(stagger)
+        
+        workers = max(1, min(config.RESTORE_CONCURRENCY, len(queue)))
         try:
-            await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.gather(*(worker() for _ in range(workers)))
         finally:
             # Toplu modu kapat → sonraki değişiklikler anında geçerli olsun
             try:
                 self.plugin_manager.end_bulk_load()
             except Exception:
                 pass
+            progress["running"] = False
+            progress["finished_at"] = time.time()
         
-        log.info("%s kullanıcı aktif (plugin'li)", restored)
-        log.info("%s kullanıcı cache'de (on-demand)", cached)
+        log.info("%s kullanıcı aktif (plugin'li)", progress["restored"])
+        log.info("%s kullanıcı cache'de (on-demand)", progress["cached"])
         log.info("%s always-on", len(self.always_on_users))
+        log.info("Geri yükleme %.1f sn sürdü (eşzamanlılık=%s)",
+                 progress["finished_at"] - progress["started_at"], workers)
         
-        return restored
+        return progress["restored"]
     
     async def shutdown(self):
         """Tüm client'ları kapat"""
         log.info("Kapatılıyor...")
         
         self.stop_background_tasks()
+        self.health.stop()
+        if self._restore_task and not self._restore_task.done():
+            self._restore_task.cancel()
         
         for user_id in list(self.active_clients.keys()):
             await self._disconnect_client(user_id)
         
+        for user_id in list(self.hibernated.keys()):
+            await self._drop_hibernated(user_id)
+        
         for user_id in list(self.pending_logins.keys()):
             try:
                 await self.pending_logins[user_id]["client"].disconnect()
@@ -1065,6 +1314,7 @@ class SmartSessionManager:
             "always_on_users": len(self.always_on_users),
             "on_demand_active": len(self.active_clients) - len(self.always_on_users),
             "session_cache": len(self.session_cache),
+            "hibernated": len(self.hibernated),
             "pending_logins": len(self.pending_logins),
             "pending_confirms": len(self.pending_confirms)
         }
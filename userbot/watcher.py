@@ -0,0 +1,122 @@
+# ============================================
+# KingTG UserBot Service - Plugin Klasörü İzleyici
+# ============================================
+# plugins/*.py dosyalarını (mtime_ns, boyut) ile yoklar; inotify gibi
+# platforma bağlı bir bağımlılık gerekmez, 20 dosyalık klasörde tur başına
+# maliyet mikrosaniyeler düzeyindedir.
+#   - değişiklik, dosya bir tur boyunca sabit kalınca bildirilir (debounce):
+#     yazılmakta olan yarım dosya derlenmez
+#   - eklenen / değişen / silinen yollar tek listede aboneye iletilir
+# ============================================
+
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import config
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+_MISSING = object()
+
+Stat = Optional[Tuple[int, int]]
+
+
+class PluginWatcher:
+    """Klasörü periyodik tarayıp değişen dosyaları abonelere bildirir"""
+
+    def __init__(self, directory: str, interval: float = 2.0, suffix: str = ".py"):
+        self.directory = directory
+        self.interval = interval
+        self.suffix = suffix
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+        self._pending: Dict[str, Stat] = {}
+        self._subscribers: List[Callable[[List[str]], Awaitable]] = []
+        self._task: Optional[asyncio.Task] = None
+        self.changes = 0
+
+    def subscribe(self, callback: Callable[[List[str]], Awaitable]):
+        """callback(değişen yollar) — yol silinmişse de listede yer alır"""
+        self._subscribers.append(callback)
+
+    # ==========================================
+    # TARAMA
+    # ==========================================
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        result = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(self.suffix):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    if entry.is_file():
+                        result[os.path.abspath(entry.path)] = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            pass
+        return result
+
+    def poll(self) -> List[str]:
+        """Tek tur: bir önceki turdan beri SABİT kalan değişiklikleri döndür"""
+        current = self.scan()
+        ready = []
+        for path in set(current) | set(self._snapshot) | set(self._pending):
+            stat = current.get(path)
+            if stat == self._snapshot.get(path):
+                self._pending.pop(path, None)
+                continue
+            if self._pending.get(path, _MISSING) == stat:
+                # İki tur aynı → yazma bitti
+                self._pending.pop(path)
+                if stat is None:
+                    self._snapshot.pop(path, None)
+                else:
+                    self._snapshot[path] = stat
+                ready.append(path)
+            else:
+                self._pending[path] = stat
+        return sorted(ready)
+
+    # ==========================================
+    # DÖNGÜ
+    # ==========================================
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._snapshot = self.scan()
+            self._pending.clear()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            log.info("Plugin izleyici başladı: %s (%d dosya, %.1f sn)",
+                     self.directory, len(self._snapshot), self.interval)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                changed = self.poll()
+            except Exception:
+                log.debug("Plugin klasörü taranamadı", exc_info=True)
+                continue
+            if not changed:
+                continue
+            self.changes += len(changed)
+            log.info("Plugin dosyası değişti: %s", ", ".join(os.path.basename(p) for p in changed))
+            for callback in list(self._subscribers):
+                try:
+                    await callback(changed)
+                except Exception:
+                    log.error("Plugin izleyici aboneliği hatası", exc_info=True)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+# Global instance
+plugin_watcher = PluginWatcher(config.PLUGINS_DIR, config.PLUGIN_WATCH_INTERVAL)
@@ -27,6 +27,10 @@ ZALG_LIST = [
     "ͪ", "ͫ", "ͬ", "ͭ", "ͮ", "ͯ", "̾", "͛", "͆", "̚"
 ]
 
+# Paylaşılan HTTP istemcisi: `from userbot import http_client`
+# (her istekte yeni aiohttp.ClientSession açmak yerine)
+from utils.http_client import http_client
+
 # Bot referansları (plugin yüklenirken ayarlanacak)
 bot = None
 tgbot = None
@@ -5,13 +5,22 @@
 # ============================================
 
 from telethon import events
+import contextlib
+import contextvars
 import functools
 from utils.logger import get_logger
+from utils.profiler import profiler
 
 log = get_logger(__name__)
 
 
-# Client referansı (plugin yüklenirken ayarlanacak)
+# Hedef client, plugin exec edilirken bağlam değişkeninde tutulur: farklı
+# kullanıcıların aktivasyonları eşzamanlı ilerleyebilir ve exec sırasında
+# açılan görevler (create_task) kendi client'larını görür.
+_UNSET = object()
+_current_client = contextvars.ContextVar("kingtg_compat_client", default=_UNSET)
+
+# Son bağlanan client — yalnızca bağlam DIŞINDAN gelen eski çağrılar için yedek
 _client = None
 _pending_handlers = []
 
@@ -21,19 +30,57 @@ VALID_PARAMS = {
     'chats', 'blacklist_chats', 'func'
 }
 
+class UserState(dict):
+    """Paylaşımlı (`# shared: true`) pluginler için kullanıcı başına durum.
+
+    Modül tüm kullanıcılar için tek kez yüklendiğinden global değişkenler
+    ortaktır; kullanıcıya özel veriler burada user_id anahtarıyla tutulur.
+    Plugin kapatılınca o kullanıcının kaydı otomatik silinir.
+
+    Kullanım:
+        STATE = UserState()
+
+        @register(outgoing=True, pattern=r"^\\.say$")
+        async def say(event):
+            st = STATE.of(event.sender_id)
+            st["n"] = st.get("n", 0) + 1
+    """
+
+    def of(self, user_id) -> dict:
+        return self.setdefault(user_id, {})
+
+    def drop(self, user_id):
+        self.pop(user_id, None)
+
+
 def set_client(client):
     """Client'ı ayarla ve bekleyen handler'ları kaydet"""
     global _client
     _client = client
+    _current_client.set(client)
     
     # Bekleyen handler'ları kaydet
     for handler, event in _pending_handlers:
         _client.add_event_handler(handler, event)
     _pending_handlers.clear()
 
+@contextlib.contextmanager
+def bound_client(client):
+    """Blok süresince @register/@on/get_client bu client'ı kullanır
+    (None → handler'lar _pending_handlers'a düşer). Çıkışta önceki değer döner."""
+    global _client
+    token = _current_client.set(client)
+    if client is not None:
+        _client = client
+    try:
+        yield client
+    finally:
+        _current_client.reset(token)
+
 def get_client():
     """Mevcut client'ı getir"""
-    return _client
+    client = _current_client.get()
+    return _client if client is _UNSET else client
 
 def register(outgoing=True, incoming=False, pattern=None, **kwargs):
     """
@@ -55,17 +102,29 @@ def register(outgoing=True, incoming=False, pattern=None, **kwargs):
             **filtered_kwargs
         )
         
+        plugin_name = None
+
         @functools.wraps(func)
         async def wrapper(event):
+            nonlocal plugin_name
+            stats = None
             try:
-                return await func(event)
+                # Sayaç/süre (plugin, kullanıcı) başına profilleyiciye düşer;
+                # modül→plugin eşlemesi ilk çağrıda çözülüp saklanır
+                if plugin_name is None:
+                    plugin_name = profiler.plugin_of(func)
+                stats, pending = profiler.start(func, event, plugin_name)
+                return await pending
             except Exception as e:
+                profiler.record_error(stats, e)
                 # disable_errors=True olan pluginler için hataları yut
                 log.error("Plugin hatası (%s)", func.__name__, exc_info=True)
                 return None
+        wrapper._kingtg_profiled = True  # yönlendirici ikinci kez ölçmesin
         
-        if _client is not None:
-            _client.add_event_handler(wrapper, event)
+        client = get_client()
+        if client is not None:
+            client.add_event_handler(wrapper, event)
         else:
             _pending_handlers.append((wrapper, event))
         
@@ -82,8 +141,9 @@ def on(event):
             pass
     """
     def decorator(func):
-        if _client is not None:
-            _client.add_event_handler(func, event)
+        client = get_client()
+        if client is not None:
+            client.add_event_handler(func, event)
         else:
             _pending_handlers.append((func, event))
         return func
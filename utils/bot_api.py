@@ -10,6 +10,7 @@ import re
 from typing import Optional, List, Dict, Union
 import config
 from utils.logger import get_logger
+from utils.http_client import http_client
 
 log = get_logger(__name__)
 
@@ -101,16 +102,8 @@ class BotAPI:
     def __init__(self, token: str = None):
         self.token = token or config.BOT_TOKEN
         self.base_url = f"https://api.telegram.org/bot{self.token}"
-        self._session = None
-
-    async def _get_session(self):
-        """Tek bir oturumu yeniden kullan (her istekte yeni session açma + kısa timeout)."""
-        if self._session is None or self._session.closed:
-            timeout = aiohttp.ClientTimeout(
-                total=12, connect=6, sock_connect=6, sock_read=10
-            )
-            self._session = aiohttp.ClientSession(timeout=timeout)
-        return self._session
+        # Paylaşılan HTTP havuzu; Bot API için kısa zaman aşımı
+        self.timeout = aiohttp.ClientTimeout(total=12, connect=6, sock_connect=6, sock_read=10)
 
     @staticmethod
     def _strip_button_styles(markup):
@@ -125,35 +118,26 @@ class BotAPI:
         except Exception:
             pass
 
-    async def _request(self, method: str, data: Dict = None, _retry: bool = True, _stripped: bool = False) -> Optional[Dict]:
+    async def _request(self, method: str, data: Dict = None, _stripped: bool = False) -> Optional[Dict]:
         """API isteği gönder (kısa timeout + geçici hata/stil reddi durumunda yeniden dener)"""
         url = f"{self.base_url}/{method}"
 
         try:
-            session = await self._get_session()
-            async with session.post(url, json=data) as response:
-                result = await response.json()
-                if result.get('ok'):
-                    return result.get('result')
-                desc = result.get('description') or ''
-                # Telegram stilli/emoji butonu reddederse → stilleri atıp sade butonla bir kez daha dene
-                if (not _stripped) and data and data.get('reply_markup') and \
-                        'button' in desc.lower() and \
-                        ('style' in desc.lower() or 'parse' in desc.lower()):
-                    self._strip_button_styles(data['reply_markup'])
-                    return await self._request(method, data, _retry=False, _stripped=True)
-                log.warning("%s error: %s", method, desc)
-                return None
+            # geçici bağlantı/timeout/5xx → titreşimli beklemeyle bir kez daha dene
+            response = await http_client.post(url, json=data, timeout=self.timeout, retries=1)
+            result = response.json()
+            if result.get('ok'):
+                return result.get('result')
+            desc = result.get('description') or ''
+            # Telegram stilli/emoji butonu reddederse → stilleri atıp sade butonla bir kez daha dene
+            if (not _stripped) and data and data.get('reply_markup') and \
+                    'button' in desc.lower() and \
+                    ('style' in desc.lower() or 'parse' in desc.lower()):
+                self._strip_button_styles(data['reply_markup'])
+                return await self._request(method, data, _stripped=True)
+            log.warning("%s error: %s", method, desc)
+            return None
         except Exception:
-            # geçici bağlantı/timeout → session'ı tazeleyip bir kez daha dene
-            if _retry:
-                try:
-                    if self._session and not self._session.closed:
-                        await self._session.close()
-                except Exception:
-                    pass
-                self._session = None
-                return await self._request(method, data, _retry=False)
             log.error("%s exception", method, exc_info=True)
             return None
     
@@ -253,46 +237,46 @@ class BotAPI:
         
         url = f"{self.base_url}/sendPhoto"
         
-        async with aiohttp.ClientSession() as session:
-            # Dosya mı URL mi kontrol et
-            if os.path.exists(photo):
-                # Dosya olarak gönder
-                data = aiohttp.FormData()
-                data.add_field('chat_id', str(chat_id))
-                data.add_field('photo', open(photo, 'rb'), filename=os.path.basename(photo))
-                if caption:
-                    data.add_field('caption', caption)
-                if parse_mode:
-                    data.add_field('parse_mode', parse_mode)
-                if reply_markup:
-                    import json
-                    data.add_field('reply_markup', json.dumps(reply_markup))
+        session = http_client.session
+        # Dosya mı URL mi kontrol et
+        if os.path.exists(photo):
+            # Dosya olarak gönder
+            data = aiohttp.FormData()
+            data.add_field('chat_id', str(chat_id))
+            data.add_field('photo', open(photo, 'rb'), filename=os.path.basename(photo))
+            if caption:
+                data.add_field('caption', caption)
+            if parse_mode:
+                data.add_field('parse_mode', parse_mode)
+            if reply_markup:
+                import json
+                data.add_field('reply_markup', json.dumps(reply_markup))
                 
-                async with session.post(url, data=data) as response:
-                    result = await response.json()
-                    if result.get('ok'):
-                        return result.get('result')
-                    log.warning("send_photo error: %s", result.get('description'))
-                    return None
-            else:
-                # URL olarak gönder
-                json_data = {
-                    "chat_id": chat_id,
-                    "photo": photo
-                }
-                if caption:
-                    json_data["caption"] = caption
-                if parse_mode:
-                    json_data["parse_mode"] = parse_mode
-                if reply_markup:
-                    json_data["reply_markup"] = reply_markup
+            async with session.post(url, data=data) as response:
+                result = await response.json()
+                if result.get('ok'):
+                    return result.get('result')
+                log.warning("send_photo error: %s", result.get('description'))
+                return None
+        else:
+            # URL olarak gönder
+            json_data = {
+                "chat_id": chat_id,
+                "photo": photo
+            }
+            if caption:
+                json_data["caption"] = caption
+            if parse_mode:
+                json_data["parse_mode"] = parse_mode
+            if reply_markup:
+                json_data["reply_markup"] = reply_markup
                 
-                async with session.post(url, json=json_data) as response:
-                    result = await response.json()
-                    if result.get('ok'):
-                        return result.get('result')
-                    log.warning("send_photo error: %s", result.get('description'))
-                    return None
+            async with session.post(url, json=json_data) as response:
+                result = await response.json()
+                if result.get('ok'):
+                    return result.get('result')
+                log.warning("send_photo error: %s", result.get('description'))
+                return None
     
     async def send_document(
         self,
@@ -310,41 +294,41 @@ class BotAPI:
         
         url = f"{self.base_url}/sendDocument"
         
-        async with aiohttp.ClientSession() as session:
-            if os.path.exists(document):
-                data = aiohttp.FormData()
-                data.add_field('chat_id', str(chat_id))
-                data.add_field('document', open(document, 'rb'), filename=os.path.basename(document))
-                if caption:
-                    data.add_field('caption', caption)
-                    data.add_field('parse_mode', parse_mode)
-                if reply_markup:
-                    import json
-                    data.add_field('reply_markup', json.dumps(reply_markup))
+        session = http_client.session
+        if os.path.exists(document):
+            data = aiohttp.FormData()
+            data.add_field('chat_id', str(chat_id))
+            data.add_field('document', open(document, 'rb'), filename=os.path.basename(document))
+            if caption:
+                data.add_field('caption', caption)
+                data.add_field('parse_mode', parse_mode)
+            if reply_markup:
+                import json
+                data.add_field('reply_markup', json.dumps(reply_markup))
                 
-                async with session.post(url, data=data) as response:
-                    result = await response.json()
-                    if result.get('ok'):
-                        return result.get('result')
-                    log.warning("send_document error: %s", result)
-                    return None
-            else:
-                json_data = {
-                    "chat_id": chat_id,
-                    "document": document,
-                    "parse_mode": parse_mode
-                }
-                if caption:
-                    json_data["caption"] = caption
-                if reply_markup:
-                    json_data["reply_markup"] = reply_markup
+            async with session.post(url, data=data) as response:
+                result = await response.json()
+                if result.get('ok'):
+                    return result.get('result')
+                log.warning("send_document error: %s", result)
+                return None
+        else:
+            json_data = {
+                "chat_id": chat_id,
+                "document": document,
+                "parse_mode": parse_mode
+            }
+            if caption:
+                json_data["caption"] = caption
+            if reply_markup:
+                json_data["reply_markup"] = reply_markup
                 
-                async with session.post(url, json=json_data) as response:
-                    result = await response.json()
-                    if result.get('ok'):
-                        return result.get('result')
-                    log.warning("send_document error: %s", result)
-                    return None
+            async with session.post(url, json=json_data) as response:
+                result = await response.json()
+                if result.get('ok'):
+                    return result.get('result')
+                log.warning("send_document error: %s", result)
+                return None
     
     async def edit_message_reply_markup(
         self,
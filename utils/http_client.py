@@ -0,0 +1,284 @@
+# ============================================
+# KingTG UserBot Service - Paylaşılan HTTP İstemcisi
+# ============================================
+# Süreç başına TEK aiohttp oturumu: her istekte yeni ClientSession açmak
+# yeni TCP+TLS el sıkışması, DNS sorgusu ve bağlantı havuzu demekti.
+#   - bağlantı havuzu: toplam ve host başına sınır, keep-alive, DNS önbelleği
+#   - request(): geçici hatalarda (bağlantı, zaman aşımı, 429/5xx) titreşimli
+#     üstel bekleme ile yeniden deneme, yanıt boyutu sınırı
+#   - host başına metrikler: istek/hata/yeniden deneme sayısı, alınan bayt,
+#     yanıt başlıklarına kadar geçen süre (p50/p95/p99). Oturum üzerinden
+#     doğrudan yapılan istekler de (FormData yüklemesi, akış) sayılır; ancak
+#     gövdesi iter_chunked/content ile akışla okunanların baytları sayılmaz
+#     (aiohttp izleme kancası yalnızca resp.read()'de tetiklenir).
+# Plugin'ler `from userbot import http_client` ile kullanır; BotAPI ve
+# yönetici hız testi de aynı oturumu paylaşır. main.shutdown'da kapanır.
+# ============================================
+
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+from yarl import URL
+
+import config
+from utils.logger import get_logger
+from utils.profiler import Histogram, profiler
+
+log = get_logger(__name__)
+
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=30, sock_connect=10)
+
+# Gövde tekrar gönderilse de sonucu değişmeyen metotlar
+IDEMPOTENT = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+# Bağlantı kurulamadı: istek hiç gönderilmedi, her metotta güvenle tekrarlanır
+_CONNECT_ERRORS = (aiohttp.ClientConnectorError,)
+
+
+class ResponseTooLarge(aiohttp.ClientError):
+    """Yanıt gövdesi max_bytes sınırını aştı"""
+
+
+class HttpResponse:
+    """Okunmuş yanıt: bağlantı havuza iade edilmiştir"""
+
+    __slots__ = ("status", "headers", "url", "body")
+
+    def __init__(self, status: int, headers, url: str, body: bytes):
+        self.status = status
+        self.headers = headers
+        self.url = url
+        self.body = body
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.body.decode(encoding, errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+class HostStats:
+    """Tek host'un sayaçları"""
+
+    __slots__ = ("requests", "errors", "retries", "bytes", "latency")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.latency = Histogram()
+
+
+class HttpClient:
+    """Tembel açılan, paylaşılan aiohttp oturumu + yeniden deneme ve metrikler"""
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 10, dns_ttl: int = 300,
+                 keepalive: float = 30, retries: int = 2, max_bytes: int = 20 * 1024 * 1024,
+                 backoff: float = 0.3, max_backoff: float = 5.0):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive = keepalive
+        self.retries = retries
+        self.max_bytes = max_bytes
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._hosts: Dict[str, HostStats] = {}
+
+    # ==========================================
+    # OTURUM
+    # ==========================================
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Paylaşılan oturum (çalışan döngüde ilk erişimde açılır)"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit, limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl, keepalive_timeout=self.keepalive)
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=DEFAULT_TIMEOUT, trace_configs=[self._trace()])
+        return self._session
+
+    async def close(self):
+        session, self._session = self._session, None
+        if session is not None and not session.closed:
+            await session.close()
+
+    def _trace(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_start(_session, ctx, params):
+            ctx.started = time.perf_counter()
+
+        async def on_end(_session, ctx, params):
+            stats = self._host(params.url)
+            stats.requests += 1
+            stats.latency.observe(time.perf_counter() - ctx.started)
+
+        async def on_error(_session, ctx, params):
+            stats = self._host(params.url)
+            stats.requests += 1
+            stats.errors += 1
+
+        async def on_chunk(_session, ctx, params):
+            self._host(params.url).bytes += len(params.chunk)
+
+        trace.on_request_start.append(on_start)
+        trace.on_request_end.append(on_end)
+        trace.on_request_exception.append(on_error)
+        trace.on_response_chunk_received.append(on_chunk)
+        return trace
+
+    def _host(self, url) -> HostStats:
+        host = getattr(url, "host", None) or "?"
+        stats = self._hosts.get(host)
+        if stats is None:
+            stats = self._hosts[host] = HostStats()
+        return stats
+
+    # ==========================================
+    # İSTEK
+    # ==========================================
+
+    async def request(self, method: str, url: str, *, retries: int = None,
+                      max_bytes: int = None, **kwargs) -> HttpResponse:
+        """İsteği gönder ve gövdeyi oku.
+        Yeniden deneme: bağlantı kurulamadıysa her metotta; zaman aşımı ve
+        429/5xx'te yalnızca idempotent metotlarda ya da retries açıkça
+        verildiyse. Son denemenin yanıtı (hata kodlu olsa da) döndürülür."""
+        method = method.upper()
+        explicit = retries is not None
+        retries = self.retries if retries is None else retries
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        safe = explicit or method in IDEMPOTENT
+        attempt = 0
+        while True:
+            try:
+                async with self.session.request(method, url, **kwargs) as resp:
+                    wait = self._retry_after(resp) if safe and attempt < retries else None
+                    if wait is None:
+                        body = await _read_capped(resp, limit)
+                        if limit:
+                            # iter_chunked izleme kancasını tetiklemez: burada say
+                            # (sınırsızda resp.read() kancayı zaten tetikler)
+                            self._host(resp.url).bytes += len(body)
+                        return HttpResponse(resp.status, resp.headers, str(resp.url), body)
+            except ResponseTooLarge:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= retries or not (safe or isinstance(e, _CONNECT_ERRORS)):
+                    raise
+                wait = self._delay(attempt)
+            attempt += 1
+            self._host(URL(url)).retries += 1
+            await asyncio.sleep(wait)
+
+    async def get(self, url: str, **kwargs) -> HttpResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> HttpResponse:
+        return await self.request("POST", url, **kwargs)
+
+    async def get_json(self, url: str, **kwargs) -> Tuple[Any, int]:
+        """(veri, durum kodu); başarısızsa (None, kod), ağ hatasında (None, 0)"""
+        try:
+            resp = await self.get(url, **kwargs)
+            if resp.status == 200:
+                return resp.json(), 200
+            return None, resp.status
+        except Exception:
+            log.debug("JSON alınamadı: %s", url, exc_info=True)
+            return None, 0
+
+    def _delay(self, attempt: int) -> float:
+        # Tam titreşim: aynı anda düşen istekler aynı anda geri dönmesin
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _retry_after(self, resp: aiohttp.ClientResponse) -> Optional[float]:
+        """Yanıt tekrar denenecekse beklenecek süre, denenmeyecekse None"""
+        if resp.status not in RETRY_STATUSES:
+            return None
+        header = resp.headers.get("Retry-After")
+        if header and header.isdigit():
+            # Sunucu uzun bekleme istiyorsa çağırana bırak (ör. Telegram flood)
+            return float(header) if float(header) <= self.max_backoff else None
+        return self._delay(0)
+
+    # ==========================================
+    # METRİKLER
+    # ==========================================
+
+    def stats(self) -> List[Dict]:
+        rows = []
+        for host, s in self._hosts.items():
+            rows.append({
+                "host": host,
+                "requests": s.requests,
+                "errors": s.errors,
+                "retries": s.retries,
+                "bytes": s.bytes,
+                "p50_ms": s.latency.quantile(0.50) * 1000,
+                "p95_ms": s.latency.quantile(0.95) * 1000,
+                "p99_ms": s.latency.quantile(0.99) * 1000,
+            })
+        rows.sort(key=lambda r: r["requests"], reverse=True)
+        return rows
+
+    def reset(self):
+        self._hosts.clear()
+
+    def prometheus(self) -> str:
+        """Host başına sayaçlar ve yanıt süresi özeti (Prometheus metni)"""
+        items = sorted(self._hosts.items())
+        lines = []
+        for name, help_text, attr in (
+                ("kingtg_http_requests_total", "Giden HTTP istekleri", "requests"),
+                ("kingtg_http_errors_total", "Bağlantı/zaman aşımı hataları", "errors"),
+                ("kingtg_http_retries_total", "Yeniden denemeler", "retries"),
+                ("kingtg_http_received_bytes_total", "Alınan gövde baytları", "bytes")):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for host, s in items:
+                lines.append(f'{name}{{host="{host}"}} {getattr(s, attr)}')
+        name = "kingtg_http_latency_seconds"
+        lines.append(f"# HELP {name} Yanıt başlıklarına kadar geçen süre")
+        lines.append(f"# TYPE {name} summary")
+        for host, s in items:
+            for q in (0.5, 0.95, 0.99):
+                lines.append(f'{name}{{host="{host}",quantile="{q}"}} {s.latency.quantile(q)!r}')
+            lines.append(f'{name}_sum{{host="{host}"}} {s.latency.total!r}')
+            lines.append(f'{name}_count{{host="{host}"}} {s.latency.count}')
+        return "\n".join(lines) + "\n"
+
+
+async def _read_capped(resp: aiohttp.ClientResponse, limit: int) -> bytes:
+    """Gövdeyi en fazla `limit` bayt oku; aşarsa ResponseTooLarge"""
+    if limit and resp.content_length is not None and resp.content_length > limit:
+        raise ResponseTooLarge(f"{resp.url.host}: {resp.content_length} > {limit} bayt")
+    if not limit:
+        return await resp.read()
+    chunks, size = [], 0
+    async for chunk in resp.content.iter_chunked(64 * 1024):
+        size += len(chunk)
+        if size > limit:
+            raise ResponseTooLarge(f"{resp.url.host}: > {limit} bayt")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+# Global instance
+http_client = HttpClient(config.HTTP_LIMIT, config.HTTP_LIMIT_PER_HOST, config.HTTP_DNS_TTL,
+                         config.HTTP_KEEPALIVE, config.HTTP_RETRIES,
+                         int(config.HTTP_MAX_MB * 1024 * 1024))
+profiler.add_exporter(http_client.prometheus)
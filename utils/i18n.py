@@ -4,15 +4,26 @@
 #  - Kaynak dil TÜRKÇE. Kullanıcının diline anlık çevirir.
 #  - Ücretsiz backend: deep-translator (Google web). Kurulu değilse/hata olursa
 #    ORİJİNAL metni döndürür (bot asla bu yüzden bozulmaz).
-#  - KALICI ÖNBELLEK: her dil ayrı dosya → data/lang/<kod>.json
-#    Yeni çeviri anında yazılır; restart'ta baştan çevirmez.
+#  - KALICI ÖNBELLEK: her dil ayrı dosya → data/lang/<kod>.json (anlık görüntü)
+#    + data/lang/<kod>.log (yeni çeviriler satır satır EKLENİR, dosya yeniden
+#    yazılmaz). Log I18N_COMPACT_ENTRIES satırı aşınca arka planda anlık
+#    görüntüye katlanır. Dil ilk istendiğinde yüklenir; restart'ta baştan çevirmez.
+#  - Okuma kilitsiz: önbellek sözlüğü yalnızca eklenerek büyür, kilit sadece
+#    log yazımı ve sıkıştırma içindir.
+#  - ZAMANLAYICI: aynı (dil, metin) için tek çeviri isteği uçuşta olur, diğer
+#    çağıranlar onu bekler. Birkaç ms içinde gelen ıskalar dil başına TEK
+#    toplu çağrıda birleşir; çağrılar ayrı, sınırlı iş parçacığı havuzunda
+#    çalışır (varsayılan executor'u aç bırakmaz). Backend art arda hata
+#    verirse devre açılır, soğumadan sonra tek deneme isteği geçer.
 # ============================================================
 
 import os
 import re
 import json
+import time
 import asyncio
 import threading
+from concurrent.futures import ThreadPoolExecutor
 
 try:
     from utils.logger import get_logger
@@ -26,8 +37,17 @@ SOURCE_LANG = "tr"
 try:
     import config as _config
     _DATA_DIR = getattr(_config, "DATA_DIR", None) or "./data"
+    _COMPACT_ENTRIES = int(getattr(_config, "I18N_COMPACT_ENTRIES", 256))
+    _WORKERS = max(1, int(getattr(_config, "I18N_WORKERS", 4)))
+    _BATCH_WINDOW = float(getattr(_config, "I18N_BATCH_MS", 5)) / 1000
+    _BATCH_MAX = max(1, int(getattr(_config, "I18N_BATCH_MAX", 25)))
+    _BREAKER_FAILURES = max(1, int(getattr(_config, "I18N_BREAKER_FAILURES", 5)))
+    _BREAKER_COOLDOWN = float(getattr(_config, "I18N_BREAKER_COOLDOWN", 60))
 except Exception:
     _DATA_DIR = "./data"
+    _COMPACT_ENTRIES = 256
+    _WORKERS, _BATCH_WINDOW, _BATCH_MAX = 4, 0.005, 25
+    _BREAKER_FAILURES, _BREAKER_COOLDOWN = 5, 60.0
 
 LANG_DIR = os.path.join(_DATA_DIR, "lang")
 LANGS_FILE = os.path.join(_DATA_DIR, "languages.json")
@@ -50,12 +70,15 @@ DEFAULT_LANGS = {
     "uk": "🇺🇦 Українська",
 }
 
-_lock = threading.RLock()
+_lock = threading.RLock()   # dil yükleme + log yazımı/sıkıştırma (okuma kilitsiz)
 _cache = {}            # {lang: {masked: "çeviri"}}
-_dirty = set()
+_dirty = set()         # logunda anlık görüntüye katlanmamış satır olan diller
+_logs = {}             # {lang: açık log dosyası}
+_log_entries = {}      # {lang: logdaki satır sayısı}
+_compacting = set()    # sıkıştırması zamanlanmış diller
+_compact_locks = {}    # {lang: Lock} aynı dilin sıkıştırmaları sıralanır
 _user_lang = {}
 _langs = None
-_translator_ok = None
 
 
 def _load_json(path, default):
@@ -70,13 +93,19 @@ def _load_json(path, default):
 
 
 def _save_json(path, data):
+    tmp = path + ".tmp"
     try:
-        tmp = path + ".tmp"
         with open(tmp, "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=1)
         os.replace(tmp, path)
+        return True
     except Exception:
         log.debug("i18n json yazılamadı: %s", path, exc_info=True)
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
 
 
 # ---------- Dil bazlı kalıcı önbellek ----------
@@ -84,33 +113,157 @@ def _lang_path(lang):
     return os.path.join(LANG_DIR, "%s.json" % lang)
 
 
+def _log_path(lang):
+    return os.path.join(LANG_DIR, "%s.log" % lang)
+
+
+def _replay_log(path, d):
+    """Log satırlarını sözlüğe uygula; yarım kalmış (çökme) son satır atlanır."""
+    n = 0
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    k, v = json.loads(line)
+                except Exception:
+                    continue
+                d[k] = v
+                n += 1
+    except FileNotFoundError:
+        pass
+    except Exception:
+        log.debug("i18n log okunamadı: %s", path, exc_info=True)
+    return n
+
+
 def _ensure_lang(lang):
-    if lang not in _cache:
+    d = _cache.get(lang)
+    if d is not None:
+        return d
+    with _lock:
+        if lang in _cache:
+            return _cache[lang]
         d = _load_json(_lang_path(lang), {}) or {}
-        if lang != SOURCE_LANG and isinstance(d, dict):
+        if not isinstance(d, dict):
+            d = {}
+        # Sıkıştırma yarıda kaldıysa döndürülmüş log da okunur (sıra korunur)
+        n = _replay_log(_log_path(lang) + ".old", d)
+        n += _replay_log(_log_path(lang), d)
+        if lang != SOURCE_LANG:
             # Zehirli girdileri temizle: çeviri == kaynak (başarısız kalmış) → at,
             # tekrar denensin. (Harf içermeyenler zaten çevrilmez, onları tutmayız.)
             d = {k: v for k, v in d.items() if v and v != k}
-        _cache[lang] = d
-    return _cache[lang]
+        _log_entries[lang] = n
+        if n:
+            _dirty.add(lang)
+        _cache[lang] = d  # tam dolu sözlük tek atamayla yayınlanır
+    return d
 
 
 def _cache_get(lang, masked):
-    with _lock:
-        return _ensure_lang(lang).get(masked)
+    # Sıcak yol: kilit yok (dict okuma/ekleme GIL altında atomik)
+    d = _cache.get(lang)
+    if d is None:
+        d = _ensure_lang(lang)
+    return d.get(masked)
 
 
 def _cache_put(lang, masked, translated):
+    d = _ensure_lang(lang)
+    if d.get(masked) == translated:
+        return
+    line = json.dumps([masked, translated], ensure_ascii=False) + "\n"
     with _lock:
-        _ensure_lang(lang)[masked] = translated
+        d[masked] = translated
+        try:
+            f = _logs.get(lang)
+            if f is None:
+                f = _logs[lang] = open(_log_path(lang), "a", encoding="utf-8")
+            f.write(line)
+            f.flush()
+        except Exception:
+            log.debug("i18n log yazılamadı: %s", lang, exc_info=True)
+            return
         _dirty.add(lang)
+        n = _log_entries[lang] = _log_entries.get(lang, 0) + 1
+        due = n >= _COMPACT_ENTRIES and lang not in _compacting
+        if due:
+            _compacting.add(lang)
+    if due:
+        _schedule_compact(lang)
 
 
-def save_lang(lang):
+def _schedule_compact(lang):
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _scheduled_compact(lang)
+        return
+    loop.run_in_executor(None, _scheduled_compact, lang)
+
+
+def _scheduled_compact(lang):
+    try:
+        _compact(lang)
+    finally:
+        _compacting.discard(lang)
+
+
+def _compact(lang):
+    """Logu anlık görüntüye katla. Aynı dilin sıkıştırmaları sıralanır (ortak
+    .tmp/.old dosyaları); global kilit yalnızca log döndürülürken tutulur,
+    JSON yazımı sürerken yeni çeviriler yeni loga eklenmeye devam eder."""
     with _lock:
-        if lang in _cache:
-            _save_json(_lang_path(lang), _cache[lang])
-            _dirty.discard(lang)
+        clock = _compact_locks.setdefault(lang, threading.Lock())
+    try:
+        with clock:
+            _compact_locked(lang)
+    except Exception:
+        log.debug("i18n sıkıştırma başarısız: %s", lang, exc_info=True)
+
+
+def _compact_locked(lang):
+    path, old = _log_path(lang), _log_path(lang) + ".old"
+    with _lock:
+        d = _cache.get(lang)
+        if d is None or lang not in _dirty:
+            return
+        f = _logs.pop(lang, None)
+        if f is not None:
+            f.close()
+        if os.path.exists(old):
+            # Önceki anlık görüntü yazılamamıştı: .old korunur, log ona eklenir
+            try:
+                with open(path, "r", encoding="utf-8") as src, open(old, "a", encoding="utf-8") as dst:
+                    dst.write(src.read())
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        else:
+            try:
+                os.replace(path, old)
+            except FileNotFoundError:
+                pass
+        snapshot = dict(d)
+        _log_entries[lang] = 0
+        _dirty.discard(lang)
+    if _save_json(_lang_path(lang), snapshot):
+        try:
+            os.remove(old)
+        except FileNotFoundError:
+            pass
+        return
+    # Yazılamadı (disk dolu vb.): .old yerinde kalır (yüklemede okunur),
+    # dil yeniden kirli işaretlenir → sonraki save_lang/flush tekrar dener
+    with _lock:
+        _dirty.add(lang)
+    log.warning("i18n anlık görüntüsü yazılamadı, log korunuyor: %s", lang)
+
+
+def save_lang(lang):
+    """Dilin bekleyen log satırlarını anlık görüntüye katla."""
+    if lang in _dirty:
+        _compact(lang)
 
 
 def flush_cache():
@@ -218,21 +371,69 @@ def _has_letters(s):
     return bool(re.search(r"[A-Za-zÇĞİÖŞÜçğıöşü]", s))
 
 
-# ---------- Backend ----------
+# ---------- Devre kesici ----------
+# kapalı: istekler geçer | açık: backend'e gidilmez, metin çevrilmeden döner |
+# yarı açık (soğuma bitti): tek deneme isteği geçer → başarılıysa kapanır,
+# başarısızsa devre yeniden açılır.
+_breaker_lock = threading.Lock()
+_failures = 0          # art arda başarısız backend çağrısı
+_open_until = 0.0      # devre bu ana (monotonic) kadar açık
+_probing = False       # yarı açık deneme isteği uçuşta
+
+
+def _breaker_open():
+    """Backend'e şu an gidilmemeli mi? (durumu değiştirmez)"""
+    if _failures < _BREAKER_FAILURES:
+        return False
+    return _probing or time.monotonic() < _open_until
+
+
+def _backend_allowed():
+    """Çağrı yapılabilir mi? Yarı açıkta deneme hakkını bu çağrı alır."""
+    global _probing
+    if _failures < _BREAKER_FAILURES:
+        return True
+    with _breaker_lock:
+        if _probing or time.monotonic() < _open_until:
+            return False
+        _probing = True
+        return True
+
+
 def _mark_backend_down():
-    global _translator_ok
-    if _translator_ok is None:
-        _translator_ok = False
-        log.warning("Çeviri backend'i yok (deep-translator kurulu mu?). "
-                    "Metinler çevrilmeden gönderilecek.")
+    global _failures, _open_until, _probing
+    with _breaker_lock:
+        probe, _probing = _probing, False
+        _failures += 1
+        if _failures < _BREAKER_FAILURES:
+            return
+        _open_until = time.monotonic() + _BREAKER_COOLDOWN
+        opened = _failures == _BREAKER_FAILURES
+    if opened:
+        log.warning("Çeviri backend'i yanıt vermiyor (deep-translator kurulu mu?). "
+                    "%gs boyunca metinler çevrilmeden gönderilecek.", _BREAKER_COOLDOWN)
+    elif probe:
+        log.debug("Çeviri backend'i hâlâ yok, devre yeniden açıldı")
+
+
+def _mark_backend_up():
+    global _failures, _probing
+    if not _failures:
+        return
+    with _breaker_lock:
+        recovered = _failures >= _BREAKER_FAILURES
+        _failures = 0
+        _probing = False
+    if recovered:
+        log.info("Çeviri backend'i geri geldi, devre kapandı")
 
 
+# ---------- Backend ----------
 def _translate_one_sync(text, lang):
-    global _translator_ok
     try:
         from deep_translator import GoogleTranslator
         out = GoogleTranslator(source=SOURCE_LANG, target=lang).translate(text)
-        _translator_ok = True
+        _mark_backend_up()
         return out or None
     except Exception:
         _mark_backend_down()
@@ -240,11 +441,10 @@ def _translate_one_sync(text, lang):
 
 
 def _translate_batch_sync(texts, lang):
-    global _translator_ok
     try:
         from deep_translator import GoogleTranslator
         out = GoogleTranslator(source=SOURCE_LANG, target=lang).translate_batch(texts)
-        _translator_ok = True
+        _mark_backend_up()
         if out and len(out) == len(texts):
             return list(out)
         return None
@@ -253,6 +453,93 @@ def _translate_batch_sync(texts, lang):
         return None  # BAŞARISIZ → çağıran cache'lemesin
 
 
+# ---------- Zamanlayıcı ----------
+_pool = None           # çeviri çağrılarına ayrılmış iş parçacığı havuzu
+_inflight = {}         # {(lang, masked): Future} → aynı metin için tek istek
+_batches = {}          # {lang: [masked, ...]} pencerede biriken ıskalar
+_timers = {}           # {lang: TimerHandle} pencerenin kapanışı
+_tasks = set()         # çalışan toplu çağrılar (GC'ye karşı referans)
+
+
+def _executor():
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=_WORKERS, thread_name_prefix="i18n")
+    return _pool
+
+
+def shutdown():
+    """Çeviri havuzunu kapat (bekleyen çağrılar iptal edilir)."""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _request(lang, masked):
+    """(lang, masked) için paylaşılan future; uçuşta değilse dilin penceresine ekle."""
+    key = (lang, masked)
+    fut = _inflight.get(key)
+    if fut is not None:
+        return fut
+    loop = asyncio.get_running_loop()
+    fut = _inflight[key] = loop.create_future()
+    batch = _batches.setdefault(lang, [])
+    batch.append(masked)
+    if len(batch) >= _BATCH_MAX:
+        _flush_batch(lang)
+    elif lang not in _timers:
+        _timers[lang] = loop.call_later(_BATCH_WINDOW, _flush_batch, lang)
+    return fut
+
+
+def _flush_batch(lang):
+    timer = _timers.pop(lang, None)
+    if timer is not None:
+        timer.cancel()
+    batch = _batches.pop(lang, None)
+    if not batch:
+        return
+    # deep-translator toplu çağrıyı sırayla çevirir: pencereyi havuzdaki
+    # iş parçacıklarına böl ki büyük pencere tek iş parçacığında sıralanmasın
+    step = -(-len(batch) // _WORKERS)
+    for i in range(0, len(batch), step):
+        task = asyncio.ensure_future(_run_batch(lang, batch[i:i + step]))
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+
+
+async def _run_batch(lang, maskeds):
+    out = None
+    try:
+        if _backend_allowed():
+            loop = asyncio.get_running_loop()
+            if len(maskeds) == 1:
+                out = [await loop.run_in_executor(_executor(), _translate_one_sync, maskeds[0], lang)]
+            else:
+                out = await loop.run_in_executor(_executor(), _translate_batch_sync, maskeds, lang)
+    except Exception:
+        log.debug("i18n toplu çeviri çalıştırılamadı: %s", lang, exc_info=True)
+        _mark_backend_down()
+    finally:
+        # Önce önbelleğe yaz, sonra uçuştan çıkar: yeni gelen çağıran önbellekte bulur
+        for i, masked in enumerate(maskeds):
+            tr = out[i] if out else None
+            if tr and tr != masked:
+                _cache_put(lang, masked, tr)
+            else:
+                tr = None  # başarısız/çevrilmedi → CACHE'LEME (sonra tekrar)
+            fut = _inflight.pop((lang, masked), None)
+            if fut is not None and not fut.done():
+                fut.set_result(tr)
+
+
+async def _translate_masked(maskeds, lang):
+    """Iskaları zamanlayıcıya ver; her biri için çeviri ya da None.
+    Bir çağıran iptal edilse de paylaşılan istek diğerleri için sürer."""
+    return await asyncio.shield(asyncio.gather(*(_request(lang, m) for m in maskeds)))
+
+
 # ---------- Genel API ----------
 async def translate(text, lang):
     if not text or not lang:
@@ -266,15 +553,14 @@ async def translate(text, lang):
     hit = _cache_get(lang, masked)
     if hit is not None:
         return _unmask(hit, tokens)
+    if _breaker_open():
+        return text
     try:
-        loop = asyncio.get_event_loop()
-        translated = await loop.run_in_executor(None, _translate_one_sync, masked, lang)
+        translated = (await _translate_masked([masked], lang))[0]
     except Exception:
         translated = None
-    if not translated or translated == masked:
-        return text  # başarısız/çevrilmedi → orijinal, CACHE'LEME (sonra tekrar)
-    _cache_put(lang, masked, translated)
-    save_lang(lang)
+    if not translated:
+        return text  # başarısız/çevrilmedi → orijinal (önbelleğe yazılmadı)
     return _unmask(translated, tokens)
 
 
@@ -301,27 +587,18 @@ async def translate_many(texts, lang):
         else:
             pending.append((i, masked, tokens))
     if pending:
-        maskeds = [m for (_i, m, _t) in pending]
-        try:
-            loop = asyncio.get_event_loop()
-            translated = await loop.run_in_executor(None, _translate_batch_sync, maskeds, lang)
-        except Exception:
-            translated = None
-        changed = False
+        translated = None
+        if not _breaker_open():
+            try:
+                translated = await _translate_masked([m for (_i, m, _t) in pending], lang)
+            except Exception:
+                translated = None
         if translated is None:
-            # BAŞARISIZ batch → hepsini orijinal bırak, CACHE'LEME (sonra tekrar denenir)
-            for (i, masked, tokens) in pending:
-                results[i] = _unmask(masked, tokens)
-        else:
-            for (i, masked, tokens), tr in zip(pending, translated):
-                if tr and tr != masked:
-                    _cache_put(lang, masked, tr)
-                    changed = True
-                    results[i] = _unmask(tr, tokens)
-                else:
-                    results[i] = _unmask(masked, tokens)  # çevrilmedi → cache'leme
-        if changed:
-            save_lang(lang)
+            # BAŞARISIZ → hepsini orijinal bırak (sonra tekrar denenir)
+            translated = [None] * len(pending)
+        for (i, masked, tokens), tr in zip(pending, translated):
+            # çevrilenler zamanlayıcıda önbelleğe yazıldı; çevrilmeyen → orijinal
+            results[i] = _unmask(tr or masked, tokens)
     return results
 
 
@@ -385,7 +662,6 @@ async def prewarm(strings, langs=None, flush=True, attempts=6):
             for i in range(0, len(miss), 25):
                 await translate_many(miss[i:i + 25], lang)
                 await asyncio.sleep(0.5)
-            save_lang(lang)
             if _missing(lang):
                 # Kalan başarısızlar için soğuma (kota/geçici hata), artan bekleme
                 await asyncio.sleep(3 * (attempt + 1))
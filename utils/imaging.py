@@ -0,0 +1,136 @@
+# ============================================
+# KingTG UserBot Service - Görsel İşleme Havuzu
+# ============================================
+# Plugin'lerin CPU-ağır Pillow işleri (sticker arka plan silme, yeniden
+# boyutlandırma, PNG/WebP kodlama) olay döngüsünde DEĞİL, sınırlı bir süreç
+# havuzunda çalışır: bir kullanıcının .q'su diğer client'ları dondurmaz.
+#   - iş fonksiyonları bu modülde durur: plugin'ler exec ile yüklendiğinden
+#     alt süreç onları içe aktaramaz
+#   - aynı anda en fazla IMAGE_WORKERS × 2 iş kuyruğa girer, fazlası bekler
+#   - IMAGE_WORKERS=0 ya da havuz çökerse iş parçacığında çalışır (Pillow
+#     ağır işlemlerde GIL'i bırakır)
+# ============================================
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Callable, Optional, Union
+
+from PIL import Image, ImageChops
+
+import config
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+STICKER_SIDE = 512
+STICKER_TOLERANCE = 35
+
+
+# ==========================================
+# SENKRON İŞLER (alt süreçte çalışır)
+# ==========================================
+
+def _as_bytes(data: Buffer) -> bytes:
+    """bytes olduğu gibi geçer (BytesIO kopyalamadan paylaşır); memoryview /
+    bytearray tek kez kopyalanır (süreç sınırını zaten kopya olarak geçer)"""
+    return data if isinstance(data, bytes) else bytes(data)
+
+
+def color_key(img: Image.Image, tolerance: int = STICKER_TOLERANCE) -> Image.Image:
+    """Sol üst köşe rengine |ΔR|+|ΔG|+|ΔB| < tolerance olan pikselleri (0,0,0,0) yap.
+    Kanal farkları tek LUT geçişiyle hesaplanır ve tolerance'ta kırpılır: toplam
+    8 bite sığar, sonuç değişmez (bir kanal ≥ tolerance ise toplam da ≥)."""
+    bg = img.getpixel((0, 0))[:3]
+    cap = min(tolerance, 255)
+    lut = []
+    for c in bg:
+        lut += [min(abs(v - c), cap) for v in range(256)]
+    lut += [0] * 256
+    r, g, b, _ = img.point(lut).split()
+    total = ImageChops.add(ImageChops.add(r, g), b)
+    keep = total.point([0 if v < tolerance else 255 for v in range(256)])
+    return Image.composite(img, Image.new("RGBA", img.size), keep)
+
+
+def fit_size(width: int, height: int, side: int = STICKER_SIDE):
+    """Uzun kenar `side` olacak şekilde oranı koru"""
+    if width > height:
+        return side, max(1, int((height / width) * side))
+    return max(1, int((width / height) * side)), side
+
+
+def render_sticker(data: Buffer, make_transparent: bool = True,
+                   tolerance: int = STICKER_TOLERANCE, fmt: str = "png") -> bytes:
+    """Görsel → (arka plan silinmiş) 512 px sticker, PNG ya da WebP"""
+    img = Image.open(BytesIO(_as_bytes(data)))
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    if make_transparent:
+        img = color_key(img, tolerance)
+    img = img.resize(fit_size(*img.size), Image.LANCZOS)
+
+    out = BytesIO()
+    if fmt == "webp":
+        img.save(out, format="WEBP", lossless=True, method=4)
+    else:
+        # optimize=True (zlib 9 + filtre denemesi) süreyi ~3 katına çıkarıp
+        # quote görsellerinde boyutu %1 bile küçültmüyor
+        img.save(out, format="PNG")
+    return out.getvalue()
+
+
+# ==========================================
+# HAVUZ
+# ==========================================
+
+class ImagePool:
+    """Sınırlı süreç havuzu (ilk işte açılır)"""
+
+    def __init__(self, workers: int):
+        self.workers = max(0, workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = asyncio.Semaphore(max(1, self.workers) * 2)
+
+    def _pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers and self._executor is None:
+            try:
+                # spawn: çok iş parçacıklı süreçten fork etmek güvenli değil
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn"))
+            except Exception:
+                log.warning("Görsel süreç havuzu açılamadı, iş parçacığı kullanılacak", exc_info=True)
+                self.workers = 0
+        return self._executor
+
+    async def run(self, func: Callable, *args):
+        """`func(*args)`'ı havuzda çalıştır (func bu modül gibi içe aktarılabilir olmalı)"""
+        args = tuple(_as_bytes(a) if isinstance(a, (bytearray, memoryview)) else a for a in args)
+        async with self._slots:
+            pool = self._pool()
+            if pool is not None:
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+                except BrokenProcessPool:
+                    log.warning("Görsel süreç havuzu çöktü, yeniden açılacak", exc_info=True)
+                    self.shutdown()
+            return await asyncio.to_thread(func, *args)
+
+    def shutdown(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def sticker(data: Buffer, make_transparent: bool = True,
+                  tolerance: int = STICKER_TOLERANCE, fmt: str = "png") -> bytes:
+    """render_sticker'ın döngüyü bloklamayan hali"""
+    return await image_pool.run(render_sticker, data, make_transparent, tolerance, fmt)
+
+
+# Global instance
+image_pool = ImagePool(config.IMAGE_WORKERS)
@@ -0,0 +1,234 @@
+# ============================================
+# KingTG UserBot Service - Medya Önbelleği (bellek LRU + disk)
+# ============================================
+# Plugin'lerin tekrar tekrar indirdiği / ürettiği baytlar için süreç geneli
+# iki katmanlı önbellek:
+#   - bellek: toplam boyutu MEDIA_CACHE_MEM_MB ile sınırlı LRU
+#   - disk  : MEDIA_CACHE_DIR altında sha256 adlı dosyalar, toplam boyut
+#             MEDIA_CACHE_DISK_MB'yi aşınca en eski kullanılan silinir
+# Anahtar içeriği belirleyen kimliklerden üretilir (ör. avatar için
+# (kullanıcı, photo_id), render için normalize payload'un hash'i): içerik
+# değişince anahtar da değişir, geçersizleştirme gerekmez.
+# Aynı anahtar için eşzamanlı ıskalar tek indirmeye bağlanır.
+# ============================================
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+import config
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+def _read(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)  # disk LRU sırası yeniden açılışta da korunsun
+        return data
+    except OSError:
+        return None
+
+
+def _write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _scan(directory: str) -> "OrderedDict[str, int]":
+    """Diskteki girdiler, en eski kullanılandan yeniye {ad: boyut}"""
+    entries = []
+    for root, _dirs, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith(".tmp"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, name, st.st_size))
+    entries.sort()
+    return OrderedDict((name, size) for _mtime, name, size in entries)
+
+
+def _remove(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class MediaCache:
+    """Anahtar → bayt; bellek LRU + disk, eşzamanlı ıskada tek indirme"""
+
+    def __init__(self, directory: str, mem_bytes: int, disk_bytes: int):
+        self.directory = directory
+        self.mem_bytes = max(0, mem_bytes)
+        self.disk_bytes = max(0, disk_bytes)
+        # key → (bitiş | None, veri)
+        self._mem: "OrderedDict[str, tuple]" = OrderedDict()
+        self._mem_size = 0
+        # Disk dizini ilk disk erişiminde taranır
+        self._disk: Optional["OrderedDict[str, int]"] = None
+        self._disk_size = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ==========================================
+    # ANAHTARLAR
+    # ==========================================
+
+    @staticmethod
+    def key(kind: str, *parts) -> str:
+        """("avatar", 42, 777) → sha256 hex (dosya adı olarak da kullanılır)"""
+        raw = "\x1f".join(str(p) for p in (kind,) + parts)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @staticmethod
+    def content_key(kind: str, payload) -> str:
+        """JSON'a çevrilebilen içeriğin normalize (sıralı anahtar) hash'i"""
+        raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(f"{kind}\x1f{raw}".encode()).hexdigest()
+
+    @staticmethod
+    def digest(kind: str, data: bytes) -> str:
+        """Ham baytların hash'i (ör. aynı görsel → aynı anahtar)"""
+        h = hashlib.sha256(kind.encode() + b"\x1f")
+        h.update(data)
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    # ==========================================
+    # OKUMA / YAZMA
+    # ==========================================
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._mem.get(key)
+        if entry is not None:
+            expires, data = entry
+            if expires is None or expires > time.monotonic():
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return data
+            self._mem_drop(key)
+        if self.disk_bytes and key in await self._disk_index():
+            data = await asyncio.to_thread(_read, self._path(key))
+            if data is not None:
+                self._disk.move_to_end(key)
+                self._mem_put(key, data, None)
+                self.disk_hits += 1
+                return data
+            self._disk_size -= self._disk.pop(key, 0)
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, data: bytes, ttl: float = None):
+        """Sakla. ttl verilirse yalnızca bellekte ve süreli tutulur
+        (ör. 1 saat sonra silinen geçici URL'ler)"""
+        if not data:
+            return
+        self._mem_put(key, data, time.monotonic() + ttl if ttl else None)
+        if ttl or not self.disk_bytes or len(data) > self.disk_bytes:
+            return
+        index = await self._disk_index()
+        try:
+            await asyncio.to_thread(_write, self._path(key), data)
+        except OSError:
+            log.warning("Medya önbelleği diske yazılamadı", exc_info=True)
+            return
+        self._disk_size += len(data) - index.pop(key, 0)
+        index[key] = len(data)
+        victims = []
+        while self._disk_size > self.disk_bytes and index:
+            old, size = index.popitem(last=False)
+            self._disk_size -= size
+            victims.append(self._path(old))
+        if victims:
+            await asyncio.to_thread(_remove, victims)
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Optional[bytes]]],
+                           ttl: float = None) -> Optional[bytes]:
+        """Önbellekte yoksa fetch() ile getir ve sakla. Aynı anahtar için
+        süren bir indirme varsa ona bağlanılır. None/boş sonuç saklanmaz."""
+        data = await self.get(key)
+        if data is not None:
+            return data
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            data = await fetch()
+            if data:
+                await self.put(key, data, ttl)
+            return data
+        finally:
+            # İndirme hata verdiyse bekleyenler None alır, hatayı yalnız ilk çağıran görür
+            self._inflight.pop(key, None)
+            if not future.done():
+                future.set_result(data if data else None)
+
+    # ==========================================
+    # İÇ
+    # ==========================================
+
+    def _mem_put(self, key: str, data: bytes, expires: Optional[float]):
+        if len(data) > self.mem_bytes:
+            return
+        self._mem_drop(key)
+        self._mem[key] = (expires, data)
+        self._mem_size += len(data)
+        while self._mem_size > self.mem_bytes:
+            _old, (_exp, old_data) = self._mem.popitem(last=False)
+            self._mem_size -= len(old_data)
+
+    def _mem_drop(self, key: str):
+        entry = self._mem.pop(key, None)
+        if entry is not None:
+            self._mem_size -= len(entry[1])
+
+    async def _disk_index(self) -> "OrderedDict[str, int]":
+        if self._disk is None:
+            index = await asyncio.to_thread(_scan, self.directory)
+            if self._disk is None:
+                self._disk = index
+                self._disk_size = sum(index.values())
+        return self._disk
+
+    def stats(self) -> Dict:
+        total = self.hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._mem),
+            "memory_mb": round(self._mem_size / 1048576, 2),
+            "disk_entries": len(self._disk) if self._disk is not None else None,
+            "disk_mb": round(self._disk_size / 1048576, 2),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / total * 100, 1) if total else 0.0,
+        }
+
+
+# Global instance
+media_cache = MediaCache(config.MEDIA_CACHE_DIR, int(config.MEDIA_CACHE_MEM_MB * 1048576),
+                         int(config.MEDIA_CACHE_DISK_MB * 1048576))
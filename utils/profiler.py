@@ -0,0 +1,354 @@
+# ============================================
+# KingTG UserBot Service - Plugin Profilleyici
+# ============================================
+# Hangi plugin'in handler'ları ne kadar süre ve döngü zamanı harcıyor?
+# (plugin, kullanıcı) başına tutulanlar:
+#   - çağrı ve hata sayısı (her çağrıda, yalnızca sayaç artışı)
+#   - örneklenen çağrılarda uçtan uca süre → sabit kovalı histogram (p50/p95/p99)
+#   - döngüyü bloklayan süre: coroutine'in await'ler ARASINDAKİ senkron
+#     adımları tek tek ölçülür; tek adım PLUGIN_SLOW_CALLBACK_MS'yi aşarsa
+#     çağrı "yavaş" sayılır (asyncio debug modundaki slow callback uyarısı gibi)
+# Süre ölçümü N çağrıda bir yapılır (PLUGIN_PROFILE_SAMPLE); ek yük ölçülmeyen
+# çağrıda bir sözlük araması ve sayaç artışıdır.
+# Dışa aktarım: /pprof (admin) ve isteğe bağlı Prometheus metin uç noktası.
+# ============================================
+
+import math
+import time
+from array import array
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+from telethon import events
+
+import config
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+_perf = time.perf_counter
+
+# Histogram kovaları: 50 µs'den başlayıp 2^(1/4) katıyla ~120 sn'ye kadar.
+# Yüzdelik kovanın üst sınırıyla raporlanır (hata payı en fazla ~%19).
+_LOW = 50e-6
+_FACTOR = 2 ** 0.25
+_BUCKETS = 86
+BOUNDS = tuple(_LOW * _FACTOR ** i for i in range(_BUCKETS))
+
+
+class Histogram:
+    """Sabit boyutlu, log ölçekli süre histogramı (saniye)"""
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = array("I", bytes(4 * (_BUCKETS + 1)))  # son kova: taşma
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def merge(self, other: "Histogram"):
+        for i, n in enumerate(other.counts):
+            if n:
+                self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return BOUNDS[i] if i < _BUCKETS else float("inf")
+        return float("inf")
+
+
+class HandlerStats:
+    """Tek (plugin, kullanıcı) çiftinin sayaçları"""
+
+    __slots__ = ("calls", "errors", "slow", "latency", "busy", "busy_max")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.slow = 0
+        self.latency = Histogram()  # yalnızca örneklenen çağrılar
+        self.busy = 0.0             # örneklenen çağrılarda döngüde geçen süre
+        self.busy_max = 0.0         # en uzun tek senkron adım
+
+    def merge(self, other: "HandlerStats"):
+        self.calls += other.calls
+        self.errors += other.errors
+        self.slow += other.slow
+        self.latency.merge(other.latency)
+        self.busy += other.busy
+        self.busy_max = max(self.busy_max, other.busy_max)
+
+    @property
+    def busy_estimate(self) -> float:
+        """Örneklenen bloklama süresinin tüm çağrılara ölçeklenmiş tahmini"""
+        sampled = self.latency.count
+        return self.busy * self.calls / sampled if sampled else 0.0
+
+
+class _Timed:
+    """Coroutine'i adım adım sürer; her send/throw'un senkron süresini ölçer ve
+    bitince istatistiğe yazar. Görev açısından `await coro` ile aynıdır
+    (future'lar olduğu gibi iletilir)."""
+
+    __slots__ = ("coro", "profiler", "stats", "key", "name")
+
+    def __init__(self, coro, profiler: "PluginProfiler", stats: "HandlerStats", key, name: str):
+        self.coro = coro
+        self.profiler = profiler
+        self.stats = stats
+        self.key = key
+        self.name = name
+
+    def __await__(self):
+        coro = self.coro
+        value, error = None, None
+        busy = worst = 0.0
+        began = _perf()
+        try:
+            while True:
+                started = _perf()
+                try:
+                    signal = coro.send(value) if error is None else coro.throw(error)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    spent = _perf() - started
+                    busy += spent
+                    if spent > worst:
+                        worst = spent
+                try:
+                    value, error = (yield signal), None
+                except GeneratorExit:
+                    coro.close()
+                    raise
+                except BaseException as exc:
+                    value, error = None, exc
+        finally:
+            self.profiler._observe(self, _perf() - began, busy, worst)
+
+
+class PluginProfiler:
+    """(plugin, kullanıcı) başına handler istatistikleri"""
+
+    def __init__(self, enabled: bool = True, sample_every: int = 20, slow_ms: float = 100):
+        self.enabled = enabled
+        self.sample_every = max(1, int(sample_every))
+        self.slow_threshold = slow_ms / 1000
+        self._stats: Dict[Tuple[str, Optional[int]], HandlerStats] = {}
+        # modül adı → plugin adı (PluginManager bağlar)
+        self._resolve: Callable[[str], Optional[str]] = lambda name: None
+        self._server = None
+        # /metrics'e eklenen diğer metin üreticileri (ör. HTTP istemcisi)
+        self._exporters: List[Callable[[], str]] = []
+        self.started = time.time()
+
+    def set_resolver(self, resolve: Callable[[str], Optional[str]]):
+        self._resolve = resolve
+
+    def add_exporter(self, export: Callable[[], str]):
+        if export not in self._exporters:
+            self._exporters.append(export)
+
+    def stats_for(self, plugin_name: str, user_id: Optional[int]) -> HandlerStats:
+        key = (plugin_name, user_id)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = HandlerStats()
+        return stats
+
+    def forget(self, plugin_name: str, user_id: Optional[int] = None):
+        """Kullanıcının (None → herkesin) plugin kayıtlarını at"""
+        if user_id is not None:
+            self._stats.pop((plugin_name, user_id), None)
+            return
+        for key in [k for k in self._stats if k[0] == plugin_name]:
+            del self._stats[key]
+
+    def reset(self):
+        self._stats.clear()
+        self.started = time.time()
+
+    # ==========================================
+    # ÖLÇÜM
+    # ==========================================
+
+    def plugin_of(self, func) -> Optional[str]:
+        """Callback'in ait olduğu plugin (modülü henüz eşlenmemişse None)"""
+        return self._resolve(getattr(func, "__module__", None) or "?")
+
+    def start(self, func, event, plugin_name: Optional[str] = None):
+        """Çağrıyı say; (istatistik, beklenecek nesne) döndürür. Örneklenen
+        çağrıda nesne süreyi ölçen sarmalayıcıdır. Çağıran kendi try/except'inde
+        hatayı `record_error` ile bildirir — ölçülmeyen çağrıya ek coroutine
+        katmanı eklenmez."""
+        coro = func(event)
+        if not self.enabled:
+            return None, coro
+        if plugin_name is None:
+            plugin_name = self.plugin_of(func) or getattr(func, "__module__", None) or "?"
+        key = (plugin_name, getattr(getattr(event, "_client", None), "_kingtg_user_id", None))
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self.stats_for(*key)
+        stats.calls += 1
+        if (stats.calls - 1) % self.sample_every:
+            return stats, coro
+        return stats, _Timed(coro, self, stats, key, getattr(func, "__name__", "?"))
+
+    @staticmethod
+    def record_error(stats: Optional[HandlerStats], exc: BaseException):
+        if stats is not None and not isinstance(exc, events.StopPropagation):
+            stats.errors += 1
+
+    async def call(self, func, event, plugin_name: Optional[str] = None):
+        """`await func(event)` — sayaçlar her çağrıda, süre örneklemeyle"""
+        stats, pending = self.start(func, event, plugin_name)
+        try:
+            return await pending
+        except Exception as e:
+            self.record_error(stats, e)
+            raise
+
+    def _observe(self, timed: _Timed, elapsed: float, busy: float, worst: float):
+        stats = timed.stats
+        stats.latency.observe(elapsed)
+        stats.busy += busy
+        if worst > stats.busy_max:
+            stats.busy_max = worst
+        if worst > self.slow_threshold:
+            stats.slow += 1
+            plugin, user_id = timed.key
+            (log.warning if stats.slow == 1 else log.debug)(
+                "Yavaş plugin handler'ı: %s.%s (kullanıcı %s) döngüyü %.0f ms blokladı",
+                plugin, timed.name, user_id, worst * 1000)
+
+    # ==========================================
+    # RAPOR
+    # ==========================================
+
+    def by_plugin(self) -> Dict[str, Dict]:
+        """Plugin başına kullanıcılar üzerinden toplanmış istatistik"""
+        merged: Dict[str, HandlerStats] = {}
+        users: Dict[str, int] = {}
+        for (plugin_name, _uid), stats in list(self._stats.items()):
+            merged.setdefault(plugin_name, HandlerStats()).merge(stats)
+            users[plugin_name] = users.get(plugin_name, 0) + 1
+        return {name: {"users": users[name], "stats": stats} for name, stats in merged.items()}
+
+    def top(self, limit: int = 10, key: str = "busy") -> List[Dict]:
+        """En çok döngü zamanı (busy), çağrı (calls) ya da hata (errors) olan pluginler"""
+        rows = []
+        for name, item in self.by_plugin().items():
+            stats = item["stats"]
+            rows.append({
+                "plugin": name,
+                "users": item["users"],
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "slow": stats.slow,
+                "p50_ms": stats.latency.quantile(0.50) * 1000,
+                "p95_ms": stats.latency.quantile(0.95) * 1000,
+                "p99_ms": stats.latency.quantile(0.99) * 1000,
+                "busy_ms": stats.busy_estimate * 1000,
+                "busy_max_ms": stats.busy_max * 1000,
+            })
+        field = {"busy": "busy_ms", "calls": "calls", "errors": "errors"}.get(key, "busy_ms")
+        rows.sort(key=lambda r: r[field], reverse=True)
+        return rows[:limit]
+
+    def prometheus(self) -> str:
+        """Prometheus metin biçimi (text/plain; version=0.0.4).
+        Özet (summary) _count/_sum yalnızca örneklenen çağrıları kapsar."""
+        metrics = (
+            ("kingtg_plugin_calls_total", "counter", "Plugin handler çağrıları", lambda s: s.calls),
+            ("kingtg_plugin_errors_total", "counter", "Hata ile biten çağrılar", lambda s: s.errors),
+            ("kingtg_plugin_slow_callbacks_total", "counter",
+             "Döngüyü eşikten uzun bloklayan çağrılar", lambda s: s.slow),
+            ("kingtg_plugin_loop_busy_seconds_total", "counter",
+             "Döngüde geçen süre (örneklemeden ölçeklenmiş tahmin)", lambda s: s.busy_estimate),
+            ("kingtg_plugin_loop_busy_max_seconds", "gauge",
+             "En uzun tek senkron adım", lambda s: s.busy_max),
+        )
+        items = sorted(self._stats.items(), key=lambda kv: (kv[0][0], kv[0][1] or 0))
+        lines = []
+        for name, kind, help_text, value in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (plugin_name, user_id), stats in items:
+                lines.append(f"{name}{_labels(plugin_name, user_id)} {_num(value(stats))}")
+        name = "kingtg_plugin_latency_seconds"
+        lines.append(f"# HELP {name} Örneklenen handler süresi")
+        lines.append(f"# TYPE {name} summary")
+        for (plugin_name, user_id), stats in items:
+            for q in (0.5, 0.95, 0.99):
+                labels = _labels(plugin_name, user_id, quantile=q)
+                lines.append(f"{name}{labels} {_num(stats.latency.quantile(q))}")
+            labels = _labels(plugin_name, user_id)
+            lines.append(f"{name}_sum{labels} {_num(stats.latency.total)}")
+            lines.append(f"{name}_count{labels} {stats.latency.count}")
+        return "\n".join(lines) + "\n"
+
+    def metrics_text(self) -> str:
+        """Plugin metrikleri + kayıtlı diğer üreticiler"""
+        return self.prometheus() + "".join(export() for export in self._exporters)
+
+    # ==========================================
+    # PROMETHEUS UÇ NOKTASI
+    # ==========================================
+
+    async def start_server(self, host: str, port: int):
+        """GET /metrics — yalnızca port > 0 ise açılır"""
+        if port <= 0 or self._server is not None:
+            return
+        from aiohttp import web
+
+        async def metrics(_request):
+            return web.Response(text=self.metrics_text(),
+                                content_type="text/plain", charset="utf-8")
+
+        app = web.Application()
+        app.router.add_get("/metrics", metrics)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        self._server = runner
+        log.info("Plugin metrikleri: http://%s:%d/metrics", host, port)
+
+    async def stop_server(self):
+        if self._server is not None:
+            runner, self._server = self._server, None
+            await runner.cleanup()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(plugin_name: str, user_id: Optional[int], **extra) -> str:
+    parts = [f'plugin="{_escape(plugin_name)}"', f'user="{"" if user_id is None else user_id}"']
+    parts += [f'{k}="{v}"' for k, v in extra.items()]
+    return "{" + ",".join(parts) + "}"
+
+
+def _num(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(round(value, 9)) if isinstance(value, float) else str(value)
+
+
+# Global instance
+profiler = PluginProfiler(config.PLUGIN_PROFILE, config.PLUGIN_PROFILE_SAMPLE,
+                          config.PLUGIN_SLOW_CALLBACK_MS)